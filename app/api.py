@@ -10,6 +10,7 @@ import logging
 
 # Initialize shared services (must happen before blueprint imports)
 import services
+services.start_rollup_reconcile()
 
 # Import all blueprints (services are already initialized)
 from routes import (
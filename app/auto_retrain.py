@@ -34,6 +34,10 @@ CHECK_INTERVAL_SECONDS = 30 * 60
 # Export config name used for auto-retrain
 AUTO_RETRAIN_CONFIG_NAME = "auto-retrain-vehicle"
 
+# Extracted frames no export links to any more are removed from the
+# exporter's frame store after this many days
+FRAME_STORE_MAX_AGE_DAYS = 30
+
 # All vehicle class names mapped to class IDs (must match classification_classes)
 VEHICLE_CLASS_MAPPING = {
     "sedan": 0,
@@ -413,9 +417,9 @@ class AutoRetrainChecker:
         # Step 1: Find or create export config
         config_id = self._find_or_create_export_config()
 
-        # Step 2: Export dataset
-        timestamp_str = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        output_name = f"auto_retrain_{timestamp_str}"
+        # Step 2: Export dataset.  The directory name is stable per config so
+        # the incremental export finds the previous run's manifest.
+        output_name = f"auto_retrain_config_{config_id}"
 
         logger.info("Exporting dataset for auto-retrain (config_id=%d, output=%s)",
                      config_id, output_name)
@@ -424,6 +428,7 @@ class AutoRetrainChecker:
             output_name=output_name,
             val_split=0.2,
             seed=42,
+            incremental=True,
         )
 
         if not export_result.get("success"):
@@ -435,6 +440,15 @@ class AutoRetrainChecker:
             "Dataset exported: %d frames, %d annotations -> %s",
             export_result["frame_count"], export_result["annotation_count"], export_path,
         )
+        if export_result.get("delta"):
+            logger.info("Export delta vs previous auto-retrain export: %s", export_result["delta"])
+
+        try:
+            pruned = self.yolo_exporter.prune_frame_store(max_age_days=FRAME_STORE_MAX_AGE_DAYS)
+            if pruned:
+                logger.info("Pruned %d unreferenced frames from the export frame store", pruned)
+        except Exception as e:
+            logger.warning("Frame store pruning failed: %s", e)
 
         # Step 2.5: Validate dataset
         validation = self._validate_dataset(export_result)
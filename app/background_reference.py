@@ -4,6 +4,13 @@ Background Reference Image Auto-Generation — clean background plates per camer
 Identifies time windows with no active detections, median-stacks frames
 from quiet periods to produce clean background images for synthetic
 training compositing and crop quality filtering.
+
+Frames are decoded in one sequential pass over the video and folded into
+a remedian (Rousseeuw & Bassett): exact medians of REMEDIAN_BASE-frame
+batches, then medians of those medians, with a weighted median over the
+partial buffers at the end.  Memory stays at a few buffers of
+REMEDIAN_BASE frames however many frames are stacked, and the result is
+the exact median for up to REMEDIAN_BASE frames.
 """
 
 import logging
@@ -12,11 +19,19 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 from db_connection import get_cursor
+from video_utils import decode_frames_at
 
 logger = logging.getLogger(__name__)
 
 DOWNLOAD_DIR = os.environ.get('DOWNLOAD_DIR', '/opt/groundtruth-studio/downloads')
 
+# Odd, so every batch median is an actual pixel value
+REMEDIAN_BASE = 11
+MAX_BACKGROUND_FRAMES = 500
+MIN_BACKGROUND_FRAMES = 3
+# Rows per tile for the final weighted median (bounds its sort buffers)
+MEDIAN_TILE_ROWS = 32
+
 # Time categories for background references
 TIME_CATEGORIES = {
     'morning': (6, 10),
@@ -34,6 +49,93 @@ SEASON_MAP = {
 }
 
 
+class _Remedian:
+    """Approximate per-pixel running median over uint8 frames in bounded memory.
+
+    Level k holds up to `base` medians of base**k frames each; a full level
+    collapses into one entry of the next.
+    """
+
+    def __init__(self, base: int = REMEDIAN_BASE):
+        self.base = base
+        self.levels: List[list] = []
+        self.count = 0
+
+    def add(self, frame):
+        import numpy as np
+        if self.levels and self.levels[0] and frame.shape != self.levels[0][0].shape:
+            raise ValueError(f"frame shape {frame.shape} differs from {self.levels[0][0].shape}")
+        self.count += 1
+        item = frame
+        level = 0
+        while True:
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].append(item)
+            if len(self.levels[level]) < self.base:
+                return
+            stack = np.stack(self.levels[level])
+            self.levels[level] = []
+            # copy, so the partitioned stack isn't kept alive behind a view
+            item = np.partition(stack, self.base // 2, axis=0)[self.base // 2].copy()
+            level += 1
+
+    def result(self):
+        """Current estimate; the exact median while fewer than `base` frames were added."""
+        import numpy as np
+        if not self.count:
+            return None
+        if len(self.levels) == 1 or not any(self.levels[1:]):
+            return np.median(np.stack(self.levels[0]), axis=0).round().astype(np.uint8)
+
+        items = []
+        weights = []
+        for level, entries in enumerate(self.levels):
+            items.extend(entries)
+            weights.extend([self.base ** level] * len(entries))
+        weights = np.asarray(weights, dtype=np.int64)
+        half = weights.sum() / 2.0
+        out = np.empty_like(items[0])
+        # Weighted median per pixel, a band of rows at a time
+        for top in range(0, out.shape[0], MEDIAN_TILE_ROWS):
+            tile = np.stack([item[top:top + MEDIAN_TILE_ROWS] for item in items])
+            order = np.argsort(tile, axis=0, kind='stable')
+            cum = np.cumsum(weights[order], axis=0)
+            pick = np.argmax(cum >= half, axis=0)
+            out[top:top + MEDIAN_TILE_ROWS] = np.take_along_axis(
+                np.take_along_axis(tile, order, axis=0), pick[None], axis=0)[0]
+        return out
+
+
+def median_background(video_path: str, timestamps: List[float],
+                      max_frames: int = MAX_BACKGROUND_FRAMES):
+    """Median-stack the frames at the given timestamps in one decode pass.
+
+    Returns (background BGR uint8 array or None, frames used).  More than
+    max_frames timestamps are thinned evenly.
+    """
+    import cv2
+
+    stamps = sorted(timestamps)
+    if len(stamps) > max_frames:
+        step = len(stamps) / max_frames
+        stamps = [stamps[int(i * step)] for i in range(max_frames)]
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            return None, 0
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_numbers = sorted({int(round(ts * fps)) for ts in stamps})
+        median = _Remedian()
+        for _frame_number, frame in decode_frames_at(cap, frame_numbers):
+            if frame is not None:
+                median.add(frame)
+    finally:
+        cap.release()
+    return median.result(), median.count
+
+
 class BackgroundReferenceGenerator:
     """Generates clean background reference images from quiet camera periods."""
 
@@ -101,31 +203,20 @@ class BackgroundReferenceGenerator:
         Args:
             camera_id: Camera identifier
             video_path: Path to video file
-            timestamps: List of timestamps to sample
+            timestamps: Timestamps to sample (up to MAX_BACKGROUND_FRAMES are used)
             output_dir: Output directory for the image
 
         Returns:
             Path to generated background image, or None
         """
         try:
-            import numpy as np
+            import cv2
             from PIL import Image
-            from io import BytesIO
-            from vlm_reviewer import _extract_frame
-
-            frames = []
-            for ts in timestamps[:20]:  # Cap at 20 frames
-                frame_bytes = _extract_frame(video_path, ts)
-                if frame_bytes:
-                    img = Image.open(BytesIO(frame_bytes)).convert('RGB')
-                    frames.append(np.array(img))
 
-            if len(frames) < 3:
+            stacked, frame_count = median_background(video_path, timestamps)
+            if stacked is None or frame_count < MIN_BACKGROUND_FRAMES:
                 return None
-
-            # Median stack — robust to transient objects
-            stacked = np.median(np.array(frames), axis=0).astype(np.uint8)
-            result = Image.fromarray(stacked)
+            result = Image.fromarray(cv2.cvtColor(stacked, cv2.COLOR_BGR2RGB))
 
             if output_dir is None:
                 output_dir = os.path.join(DOWNLOAD_DIR, 'backgrounds')
@@ -144,7 +235,7 @@ class BackgroundReferenceGenerator:
                     INSERT INTO background_references
                         (camera_id, image_path, time_category, season, frame_count)
                     VALUES (%s, %s, %s, %s, %s)
-                """, (camera_id, output_path, time_cat, season, len(frames)))
+                """, (camera_id, output_path, time_cat, season, frame_count))
 
             return output_path
 
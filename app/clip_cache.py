@@ -0,0 +1,248 @@
+"""
+Clip Cache Index
+
+Keeps a small SQLite index (path, size, created, last access) of the
+cached review clips in the clips directory, so size/age budgets and stats
+are answered from the index instead of globbing and stat-ing every file.
+
+Writers call record() when they create a clip and touch() when they serve
+a cached one; enforce() evicts least-recently-used clips in batches until
+the budget holds.  A full directory scan only happens on first use, when
+the index is older than RESCAN_INTERVAL, or on request, to pick up clips
+written by something that bypassed the index.
+
+Only top-level *.mp4 clips are managed.  Crops under clips/crops are
+referenced from the database and are never evicted here.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = '.clip_index.sqlite'
+RESCAN_INTERVAL = 86400
+EVICT_BATCH = 500
+
+
+class ClipCacheIndex:
+    """SQLite-backed LRU index of cached clips for one directory."""
+
+    def __init__(self, clips_dir: str):
+        self.clips_dir = str(clips_dir)
+        self.db_path = os.path.join(self.clips_dir, INDEX_FILENAME)
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # ------------------------------------------------------------------
+    # SQLite plumbing
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _db(self):
+        self._ensure_schema()
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(self.clips_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            try:
+                # WAL lets the API and the worker processes write concurrently
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS clips (
+                        name TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_clips_last_access ON clips(last_access)')
+                conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)')
+                conn.commit()
+            finally:
+                conn.close()
+            self._initialized = True
+
+    def _name(self, path) -> str:
+        return os.path.basename(str(path))
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+
+    def record(self, path):
+        """Add or refresh a clip after it has been written."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        now = time.time()
+        with self._db() as conn:
+            conn.execute('''
+                INSERT INTO clips (name, size, created_at, last_access) VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET size = excluded.size, last_access = excluded.last_access
+            ''', (self._name(path), st.st_size, st.st_mtime, now))
+
+    def touch(self, path):
+        """Mark a cached clip as used; records it if the index missed it."""
+        with self._db() as conn:
+            cur = conn.execute('UPDATE clips SET last_access = ? WHERE name = ?',
+                               (time.time(), self._name(path)))
+            updated = cur.rowcount
+        if not updated:
+            self.record(path)
+
+    def forget(self, path):
+        with self._db() as conn:
+            conn.execute('DELETE FROM clips WHERE name = ?', (self._name(path),))
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    def rescan(self) -> int:
+        """Reconcile the index with the directory in one scandir pass.
+
+        Returns the number of clips now indexed.
+        """
+        now = time.time()
+        on_disk = {}
+        with os.scandir(self.clips_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.mp4') or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                on_disk[entry.name] = (st.st_size, st.st_mtime)
+
+        with self._db() as conn:
+            indexed = {name for (name,) in conn.execute('SELECT name FROM clips')}
+            gone = indexed - on_disk.keys()
+            conn.executemany('DELETE FROM clips WHERE name = ?', [(n,) for n in gone])
+            # Clips new to the index keep their mtime as last access
+            conn.executemany('''
+                INSERT INTO clips (name, size, created_at, last_access) VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET size = excluded.size
+            ''', [(name, size, mtime, mtime) for name, (size, mtime) in on_disk.items()])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('scanned_at', ?)", (now,))
+        return len(on_disk)
+
+    def needs_rescan(self) -> bool:
+        with self._db() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'scanned_at'").fetchone()
+        return row is None or time.time() - row[0] > RESCAN_INTERVAL
+
+    # ------------------------------------------------------------------
+    # Budgets and stats
+    # ------------------------------------------------------------------
+
+    def _evict(self, conn, rows):
+        """Delete clips and their rows; returns (removed, freed_bytes)."""
+        removed = 0
+        freed = 0
+        for name, size in rows:
+            try:
+                os.unlink(os.path.join(self.clips_dir, name))
+                freed += size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not evict clip {name}: {e}")
+                continue
+            conn.execute('DELETE FROM clips WHERE name = ?', (name,))
+            removed += 1
+        return removed, freed
+
+    def enforce(self, max_age_days: float, max_size_mb: float) -> Dict:
+        """Evict clips unused for max_age_days, then LRU clips until under max_size_mb."""
+        max_size_bytes = max_size_mb * 1024 * 1024
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        freed = 0
+
+        with self._db() as conn:
+            while True:
+                rows = conn.execute(
+                    'SELECT name, size FROM clips WHERE last_access < ? ORDER BY last_access LIMIT ?',
+                    (cutoff, EVICT_BATCH)).fetchall()
+                if not rows:
+                    break
+                n, nbytes = self._evict(conn, rows)
+                removed += n
+                freed += nbytes
+                conn.commit()
+                if n < len(rows) or len(rows) < EVICT_BATCH:
+                    break
+
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM clips').fetchone()[0]
+            while total > max_size_bytes:
+                rows = conn.execute(
+                    'SELECT name, size FROM clips ORDER BY last_access LIMIT ?',
+                    (EVICT_BATCH,)).fetchall()
+                if not rows:
+                    break
+                # Only take as many as needed to get under budget
+                batch = []
+                for name, size in rows:
+                    if total <= max_size_bytes:
+                        break
+                    batch.append((name, size))
+                    total -= size
+                n, nbytes = self._evict(conn, batch)
+                removed += n
+                freed += nbytes
+                conn.commit()
+                if n < len(batch):
+                    break
+
+            count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM clips').fetchone()
+
+        return {
+            'success': True,
+            'removed': removed,
+            'freed_mb': round(freed / (1024 * 1024), 1),
+            'remaining_mb': round(total / (1024 * 1024), 1),
+            'remaining_count': count,
+        }
+
+    def stats(self) -> Dict:
+        with self._db() as conn:
+            count, total, oldest = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created_at) FROM clips').fetchone()
+        return {
+            'count': count,
+            'total_mb': round(total / (1024 * 1024), 1),
+            'oldest_days': round((time.time() - oldest) / 86400, 1) if oldest else 0,
+        }
+
+
+_indexes: Dict[str, ClipCacheIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_clip_cache(clips_dir: str) -> ClipCacheIndex:
+    """Shared index instance for a clips directory."""
+    key = os.path.abspath(str(clips_dir))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ClipCacheIndex(key)
+        return index
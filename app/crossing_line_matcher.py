@@ -16,13 +16,20 @@ the pair is rejected outright.
 
 This module is intended to run BEFORE the ReID-based CrossCameraMatcher so
 that high-confidence spatial matches are locked in first.
+
+A full run (match_all) loads tracks, directions, path times, embeddings,
+colour histograms and reviewed links for every involved camera once, then
+scores each (camera pair, direction bucket) as a NumPy matrix.
 """
 
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
+from psycopg2 import extras
 
 from db_connection import get_cursor
 
@@ -43,6 +50,10 @@ class CrossingLineMatcher:
 
     def __init__(self):
         self._topology_cache = {}
+        # Per-run preloaded data (see _load_run); None outside a run
+        self._run = None
+        # Scoring time for the most recent direction-matched camera pair
+        self.last_pair_timing = {'pairs_scored': 0, 'scoring_ms': 0.0}
 
     # ------------------------------------------------------------------
     # Topology (cached)
@@ -130,6 +141,9 @@ class CrossingLineMatcher:
 
     def get_approved_tracks(self, camera_id, entity_type='vehicle'):
         """Get approved/conflict tracks for a camera, ordered by first_seen."""
+        run = self._run
+        if run is not None and run['entity_type'] == entity_type and camera_id in run['cameras']:
+            return list(run['tracks'].get(camera_id, []))
         scenario = (
             'vehicle_detection' if entity_type == 'vehicle'
             else entity_type + '_detection'
@@ -151,6 +165,128 @@ class CrossingLineMatcher:
             """, (camera_id, scenario))
             return [dict(r) for r in cursor.fetchall()]
 
+    # ------------------------------------------------------------------
+    # Run-level preloading
+    # ------------------------------------------------------------------
+
+    def _load_run(self, camera_ids, entity_type='vehicle', visual=True):
+        """Load everything the direction matcher needs for these cameras.
+
+        One query each for tracks, path_data metadata, bbox movement and
+        reviewed links, plus one embedding scan and one histogram pass, instead
+        of per-track queries repeated for every camera pair.  While loaded,
+        get_approved_tracks(), compute_direction() and _get_path_time() are
+        served from it.  visual=False skips embeddings and colour histograms
+        (the crossing-line scorer doesn't use them).
+        """
+        started = time.monotonic()
+        cameras = sorted(set(camera_ids))
+        scenario = (
+            'vehicle_detection' if entity_type == 'vehicle'
+            else entity_type + '_detection'
+        )
+        with get_cursor(commit=False) as cursor:
+            cursor.execute("""
+                SELECT t.id, t.camera_id, t.scenario, t.member_count,
+                       t.bbox_centroid_x, t.bbox_centroid_y,
+                       t.avg_bbox_width, t.avg_bbox_height,
+                       t.anchor_status, t.anchor_classification,
+                       t.first_seen, t.last_seen,
+                       t.cross_camera_identity_id
+                FROM camera_object_tracks t
+                WHERE t.camera_id = ANY(%s)
+                  AND t.scenario = %s
+                  AND t.anchor_status IN ('approved', 'conflict')
+                  AND (t.first_seen IS NOT NULL AND t.first_seen > 0)
+                ORDER BY t.first_seen
+            """, (cameras, scenario))
+            all_tracks = [dict(r) for r in cursor.fetchall()]
+            track_ids = [t['id'] for t in all_tracks]
+
+            # Path data: one anchor video per track
+            cursor.execute("""
+                SELECT DISTINCT ON (p.camera_object_track_id)
+                       p.camera_object_track_id AS track_id,
+                       v.metadata, v.width, v.height
+                FROM ai_predictions p
+                JOIN videos v ON v.id = p.video_id
+                WHERE p.camera_object_track_id = ANY(%s)
+                  AND v.metadata IS NOT NULL
+                ORDER BY p.camera_object_track_id, p.id
+            """, (track_ids,))
+            meta_rows = {r['track_id']: r for r in cursor.fetchall()}
+
+            directions = {}
+            path_times = {}
+            for tid in track_ids:
+                row = meta_rows.get(tid)
+                directions[tid] = None
+                if row is None:
+                    continue
+                directions[tid] = self._direction_from_metadata(
+                    row['metadata'], row['width'], row['height'])
+                pt = self._path_time_from_metadata(row['metadata'])
+                if pt:
+                    path_times[tid] = pt
+
+            # Fallback direction from bbox movement for multi-member tracks
+            moving = [t['id'] for t in all_tracks
+                      if directions[t['id']] is None and (t.get('member_count') or 1) > 1]
+            if moving:
+                cursor.execute("""
+                    SELECT camera_object_track_id AS track_id, COUNT(*) AS n,
+                           (array_agg(bbox_x + bbox_width / 2.0 ORDER BY timestamp ASC))[1]  AS first_cx,
+                           (array_agg(bbox_y + bbox_height / 2.0 ORDER BY timestamp ASC))[1] AS first_cy,
+                           (array_agg(bbox_x + bbox_width / 2.0 ORDER BY timestamp DESC))[1]  AS last_cx,
+                           (array_agg(bbox_y + bbox_height / 2.0 ORDER BY timestamp DESC))[1] AS last_cy
+                    FROM ai_predictions
+                    WHERE camera_object_track_id = ANY(%s)
+                    GROUP BY camera_object_track_id
+                """, (moving,))
+                for r in cursor.fetchall():
+                    if r['n'] >= 2:
+                        directions[r['track_id']] = self._direction_from_movement(
+                            r['first_cx'], r['first_cy'], r['last_cx'], r['last_cy'])
+
+            cursor.execute("""
+                SELECT track_a_id, track_b_id, status FROM cross_camera_links
+                WHERE status IN ('confirmed', 'rejected')
+            """)
+            confirmed_ids = set()
+            rejected = {}  # track_id -> set of rejected partner ids
+            for row in cursor:
+                a, b = row['track_a_id'], row['track_b_id']
+                if row['status'] == 'confirmed':
+                    confirmed_ids.add(a)
+                    confirmed_ids.add(b)
+                else:
+                    rejected.setdefault(a, set()).add(b)
+                    rejected.setdefault(b, set()).add(a)
+
+        tracks = {}
+        for t in all_tracks:
+            tracks.setdefault(t['camera_id'], []).append(t)
+
+        self._run = {
+            'entity_type': entity_type,
+            'cameras': set(cameras),
+            'tracks': tracks,
+            'directions': directions,
+            'path_times': path_times,
+            'confirmed_ids': confirmed_ids,
+            'rejected': rejected,
+            'reid': self._load_embeddings(track_ids) if visual else {},
+            'color': self._load_color_histograms(all_tracks) if visual else {},
+        }
+        logger.info(
+            "Loaded match run for %d cameras: %d tracks, %d with direction, "
+            "%d path times, %d embeddings, %d histograms in %.0fms",
+            len(cameras), len(all_tracks),
+            sum(1 for d in directions.values() if d is not None),
+            len(path_times), len(self._run['reid']), len(self._run['color']),
+            (time.monotonic() - started) * 1000)
+        return self._run
+
     # ------------------------------------------------------------------
     # Geometric helpers
     # ------------------------------------------------------------------
@@ -186,6 +322,9 @@ class CrossingLineMatcher:
         Returns:
             (dx, dy) normalised direction vector, or None if undetermined.
         """
+        if self._run is not None and track['id'] in self._run['directions']:
+            return self._run['directions'][track['id']]
+
         # --- Source 1: Frigate path_data from video metadata ---
         direction = self._direction_from_path_data(track)
         if direction is not None:
@@ -208,10 +347,14 @@ class CrossingLineMatcher:
         if len(rows) < 2:
             return None
 
-        first = rows[0]
-        last = rows[-1]
-        dx = float(last['cx'] - first['cx'])
-        dy = float(last['cy'] - first['cy'])
+        return self._direction_from_movement(
+            rows[0]['cx'], rows[0]['cy'], rows[-1]['cx'], rows[-1]['cy'])
+
+    @staticmethod
+    def _direction_from_movement(first_cx, first_cy, last_cx, last_cy):
+        """Direction from first to last bbox centroid of a multi-member track."""
+        dx = float(last_cx - first_cx)
+        dy = float(last_cy - first_cy)
         length = np.sqrt(dx * dx + dy * dy)
 
         # Require meaningful displacement — at least 5% of frame diagonal.
@@ -231,6 +374,9 @@ class CrossingLineMatcher:
         Returns:
             (start_time, mid_time, end_time) tuple, or None if no path_data.
         """
+        if self._run is not None and track['id'] in self._run['directions']:
+            return self._run['path_times'].get(track['id'])
+
         with get_cursor(commit=False) as cursor:
             cursor.execute("""
                 SELECT v.metadata
@@ -244,8 +390,11 @@ class CrossingLineMatcher:
 
         if row is None:
             return None
+        return self._path_time_from_metadata(row['metadata'])
 
-        metadata = row['metadata']
+    @staticmethod
+    def _path_time_from_metadata(metadata):
+        """(start, mid, end) path_data timestamps from video metadata, or None."""
         if not isinstance(metadata, dict):
             return None
 
@@ -299,8 +448,11 @@ class CrossingLineMatcher:
 
         if row is None:
             return None
+        return self._direction_from_metadata(row['metadata'], row.get('width'), row.get('height'))
 
-        metadata = row['metadata']
+    @staticmethod
+    def _direction_from_metadata(metadata, width, height):
+        """Pixel-space travel direction from path_data in video metadata, or None."""
         if not isinstance(metadata, dict):
             return None
 
@@ -335,8 +487,8 @@ class CrossingLineMatcher:
                 return None
 
         # Convert normalised coords to pixel space using video dimensions
-        vid_w = row.get('width') or 1920
-        vid_h = row.get('height') or 1080
+        vid_w = width or 1920
+        vid_h = height or 1080
         dx = (last_cx - first_cx) * vid_w
         dy = (last_cy - first_cy) * vid_h
         length = np.sqrt(dx * dx + dy * dy)
@@ -437,45 +589,113 @@ class CrossingLineMatcher:
 
     THUMBNAIL_DIR = '/opt/groundtruth-studio/thumbnails'
 
+    # Threads decoding thumbnails for histograms missing from the cache
+    HISTOGRAM_WORKERS = 8
+
     def _load_color_histograms(self, tracks):
-        """Compute HSV color histograms for vehicle crops.
+        """Load HSV color histograms for vehicle crops.
+
+        Histograms are persisted in track_color_histograms, keyed by the
+        track's anchor prediction and the thumbnail mtime, so they are
+        computed once.  Anchors and cached histograms for the whole track
+        list come back in one query; missing or stale ones are computed in
+        a thread pool that decodes each thumbnail once for all tracks
+        sharing it, then written back.
 
         Returns dict: track_id -> normalised HSV histogram (flattened).
         """
-        histograms = {}
-        for t in tracks:
-            hist = self._compute_crop_histogram(t)
-            if hist is not None:
-                histograms[t['id']] = hist
-        return histograms
+        if not tracks:
+            return {}
 
-    def _compute_crop_histogram(self, track):
-        """Crop the vehicle bbox from thumbnail and compute HSV histogram."""
-        # Find the thumbnail path for this track's anchor prediction
         with get_cursor(commit=False) as cursor:
             cursor.execute("""
-                SELECT v.thumbnail_path, p.bbox_x, p.bbox_y,
-                       p.bbox_width, p.bbox_height
+                SELECT DISTINCT ON (p.camera_object_track_id)
+                       p.camera_object_track_id AS track_id,
+                       p.id AS prediction_id, v.thumbnail_path,
+                       p.bbox_x, p.bbox_y, p.bbox_width, p.bbox_height,
+                       h.prediction_id AS cached_prediction_id,
+                       h.thumbnail_mtime AS cached_mtime, h.hist
                 FROM ai_predictions p
                 JOIN videos v ON v.id = p.video_id
-                WHERE p.camera_object_track_id = %s
-                ORDER BY p.id
-                LIMIT 1
-            """, (track['id'],))
-            row = cursor.fetchone()
+                LEFT JOIN track_color_histograms h
+                       ON h.track_id = p.camera_object_track_id
+                WHERE p.camera_object_track_id = ANY(%s)
+                ORDER BY p.camera_object_track_id, p.id
+            """, ([t['id'] for t in tracks],))
+            rows = [dict(r) for r in cursor.fetchall()]
 
-        if row is None:
-            return None
+        histograms = {}
+        mtimes = {}
+        by_thumbnail = {}  # thumbnail_path -> [anchor rows needing a histogram]
+        for row in rows:
+            thumb_path = row['thumbnail_path']
+            if not thumb_path:
+                continue
+            if thumb_path not in mtimes:
+                try:
+                    mtimes[thumb_path] = os.path.getmtime(thumb_path)
+                except OSError:
+                    mtimes[thumb_path] = None
+            mtime = mtimes[thumb_path]
+            if mtime is None:
+                continue
+            if (row['hist'] is not None
+                    and row['cached_prediction_id'] == row['prediction_id']
+                    and row['cached_mtime'] == mtime):
+                histograms[row['track_id']] = np.asarray(row['hist'], dtype=np.float32)
+            else:
+                by_thumbnail.setdefault(thumb_path, []).append(row)
 
-        row = dict(row)
-        thumb_path = row['thumbnail_path']
-        if not thumb_path or not os.path.isfile(thumb_path):
-            return None
+        if not by_thumbnail:
+            return histograms
+
+        computed = []
+        with ThreadPoolExecutor(max_workers=self.HISTOGRAM_WORKERS) as pool:
+            for results in pool.map(self._compute_thumbnail_histograms,
+                                    by_thumbnail.items()):
+                computed.extend(results)
+
+        for row, hist in computed:
+            histograms[row['track_id']] = hist
+
+        if computed:
+            with get_cursor() as cursor:
+                extras.execute_values(cursor, """
+                    INSERT INTO track_color_histograms
+                        (track_id, prediction_id, thumbnail_mtime, hist)
+                    VALUES %s
+                    ON CONFLICT (track_id) DO UPDATE SET
+                        prediction_id = EXCLUDED.prediction_id,
+                        thumbnail_mtime = EXCLUDED.thumbnail_mtime,
+                        hist = EXCLUDED.hist,
+                        updated_at = NOW()
+                """, [(row['track_id'], row['prediction_id'],
+                       mtimes[row['thumbnail_path']], hist.tolist())
+                      for row, hist in computed])
+            logger.info("Computed %d color histograms from %d thumbnails",
+                        len(computed), len(by_thumbnail))
+
+        return histograms
+
+    def _compute_thumbnail_histograms(self, item):
+        """Decode one thumbnail and histogram every anchor bbox on it.
 
+        Returns list of (anchor_row, histogram).
+        """
+        thumb_path, rows = item
         img = cv2.imread(thumb_path)
         if img is None:
-            return None
+            return []
+        results = []
+        for row in rows:
+            hist = self._compute_crop_histogram(img, row)
+            if hist is not None:
+                results.append((row, hist))
+        return results
 
+    @staticmethod
+    def _compute_crop_histogram(img, row):
+        """Crop the vehicle bbox from a decoded thumbnail and compute HSV histogram."""
         # Crop to bbox
         x = max(0, int(row['bbox_x'] or 0))
         y = max(0, int(row['bbox_y'] or 0))
@@ -501,6 +721,34 @@ class CrossingLineMatcher:
             return None
         return float(cv2.compareHist(hist_a, hist_b, cv2.HISTCMP_CORREL))
 
+    @staticmethod
+    def _color_similarity_matrix(ids_a, ids_b, histograms):
+        """Correlation between every pair of histograms in one matrix product.
+
+        Same measure as _color_similarity (cv2.HISTCMP_CORREL): histograms
+        are mean-centred and L2-normalised, so the dot product is the
+        Pearson correlation.
+
+        Returns:
+            (index_a, index_b, matrix) where index maps track_id -> row/col,
+            covering only tracks that have a histogram.
+        """
+        def _centred(ids):
+            ids = [i for i in ids if i in histograms]
+            if not ids:
+                return {}, np.zeros((0, 0), dtype=np.float32)
+            mat = np.stack([histograms[i] for i in ids]).astype(np.float64)
+            mat -= mat.mean(axis=1, keepdims=True)
+            norms = np.linalg.norm(mat, axis=1, keepdims=True)
+            mat /= np.where(norms > 0, norms, 1.0)
+            return {tid: k for k, tid in enumerate(ids)}, mat
+
+        index_a, mat_a = _centred(ids_a)
+        index_b, mat_b = _centred(ids_b)
+        if not index_a or not index_b:
+            return index_a, index_b, np.zeros((len(index_a), len(index_b)))
+        return index_a, index_b, mat_a @ mat_b.T
+
     # ------------------------------------------------------------------
     # Scoring
     # ------------------------------------------------------------------
@@ -627,7 +875,8 @@ class CrossingLineMatcher:
     DIRECTION_SIZE_WEIGHT = 0.20
     DIRECTION_MATCH_THRESHOLD = 0.40
 
-    def match_camera_pair_by_direction(self, cam_a, cam_b, entity_type='vehicle'):
+    def match_camera_pair_by_direction(self, cam_a, cam_b, entity_type='vehicle',
+                                       assignment='mutual'):
         """Match tracks across a camera pair using path_data direction.
 
         Direction of travel determines the lane on a two-lane road:
@@ -635,11 +884,23 @@ class CrossingLineMatcher:
         grouped by direction and only matched within the same group.
 
         Within each direction group, scoring uses temporal proximity and
-        size similarity with mutual best-match.
+        size similarity with mutual best-match (or, with
+        assignment='hungarian', an optimal one-to-one assignment).
+
+        Uses the data preloaded by _load_run() when called from match_all();
+        standalone calls load just these two cameras.
 
         Returns:
             list of dicts with track_a_id, track_b_id, score_info.
         """
+        run = self._run
+        if run is None or run['entity_type'] != entity_type or not {cam_a, cam_b} <= run['cameras']:
+            self._load_run([cam_a, cam_b], entity_type)
+            try:
+                return self.match_camera_pair_by_direction(cam_a, cam_b, entity_type, assignment)
+            finally:
+                self._run = None
+
         # Topology
         topo = self._get_topology(cam_a, cam_b) or self._get_topology(cam_b, cam_a)
         if topo is None:
@@ -662,60 +923,32 @@ class CrossingLineMatcher:
             span = ls - fs
             return span <= max_span
 
-        tracks_a = [t for t in tracks_a if _is_transiting(t)]
-        tracks_b = [t for t in tracks_b if _is_transiting(t)]
-
-        if not tracks_a or not tracks_b:
-            return []
-
         # Exclude tracks that already have a confirmed cross-camera link
         # (they're settled — no need to re-match).
-        with get_cursor(commit=False) as cursor:
-            cursor.execute(
-                "SELECT track_a_id, track_b_id FROM cross_camera_links "
-                "WHERE status = 'confirmed'")
-            confirmed_ids = set()
-            for row in cursor:
-                confirmed_ids.add(row['track_a_id'])
-                confirmed_ids.add(row['track_b_id'])
-
-        tracks_a = [t for t in tracks_a if t['id'] not in confirmed_ids]
-        tracks_b = [t for t in tracks_b if t['id'] not in confirmed_ids]
+        confirmed_ids = run['confirmed_ids']
+        tracks_a = [t for t in tracks_a if _is_transiting(t) and t['id'] not in confirmed_ids]
+        tracks_b = [t for t in tracks_b if _is_transiting(t) and t['id'] not in confirmed_ids]
 
         if not tracks_a or not tracks_b:
             return []
 
-        # Compute directions and path timestamps for all tracks
-        dirs_a = {}
-        dirs_b = {}
-        path_times = {}  # track_id -> (start, mid, end)
-
-        for t in tracks_a:
-            dirs_a[t['id']] = self.compute_direction(t)
-            pt = self._get_path_time(t)
-            if pt:
-                path_times[t['id']] = pt
-
-        for t in tracks_b:
-            dirs_b[t['id']] = self.compute_direction(t)
-            pt = self._get_path_time(t)
-            if pt:
-                path_times[t['id']] = pt
-
-        # Pre-load ReID embeddings and color histograms for all tracks
-        all_ids = [t['id'] for t in tracks_a] + [t['id'] for t in tracks_b]
-        reid_embeddings = self._load_embeddings(all_ids)
-        color_histograms = self._load_color_histograms(tracks_a + tracks_b)
-        logger.info(
-            "Loaded %d ReID embeddings, %d color histograms for %d tracks",
-            len(reid_embeddings), len(color_histograms), len(all_ids))
+        dirs_a = {t['id']: run['directions'].get(t['id']) for t in tracks_a}
+        dirs_b = {t['id']: run['directions'].get(t['id']) for t in tracks_b}
 
         # Bundle precomputed data for scoring
+        color_histograms = run['color']
         precomputed = {
-            'path_times': path_times,
-            'reid': reid_embeddings,
+            'path_times': run['path_times'],
+            'reid': run['reid'],
             'color': color_histograms,
+            'color_matrix': self._color_similarity_matrix(
+                [t['id'] for t in tracks_a], [t['id'] for t in tracks_b],
+                color_histograms),
+            'rejected': run['rejected'],
+            'assignment': assignment,
+            'timing': {'pairs_scored': 0, 'scoring_ms': 0.0},
         }
+        self.last_pair_timing = precomputed['timing']
 
         # Group by direction sign (dx > 0 vs dx < 0)
         # Tracks without direction go into a separate "unknown" group
@@ -921,9 +1154,15 @@ class CrossingLineMatcher:
             reid_score = 0.0
 
         # -- Color histogram similarity --
-        hist_a = color_hists.get(track_a['id'])
-        hist_b = color_hists.get(track_b['id'])
-        color_sim = self._color_similarity(hist_a, hist_b)
+        color_matrix = precomputed.get('color_matrix')
+        if color_matrix is not None:
+            index_a, index_b, matrix = color_matrix
+            ia = index_a.get(track_a['id'])
+            ib = index_b.get(track_b['id'])
+            color_sim = float(matrix[ia, ib]) if ia is not None and ib is not None else None
+        else:
+            color_sim = self._color_similarity(color_hists.get(track_a['id']),
+                                               color_hists.get(track_b['id']))
         if color_sim is not None:
             # Correlation ranges from -1 to 1; map 0.0→0, 1.0→full weight
             color_score = self.DIRECTION_COLOR_WEIGHT * max(0.0, color_sim)
@@ -953,55 +1192,185 @@ class CrossingLineMatcher:
             'rejected': None,
         }
 
+    def _direction_score_matrix(self, tracks_a, tracks_b, topology,
+                                direction_bucket, precomputed):
+        """Vectorised _score_direction_pair over every (track_a, track_b).
+
+        Returns a dict of len(tracks_a) x len(tracks_b) arrays: 'total'
+        (rounded like the scalar scorer), its components, 'reid_sim', 'gap'
+        and a boolean 'valid' mask that is False where the scalar scorer
+        would reject the pair or it was rejected by a reviewer.
+        """
+        path_times = precomputed.get('path_times', {})
+        reid_embs = precomputed.get('reid', {})
+        rejected = precomputed.get('rejected', {})
+        max_transit = topology['max_transit_seconds']
+        n, m = len(tracks_a), len(tracks_b)
+
+        def _times(tracks):
+            mid = np.array([path_times[t['id']][1] if t['id'] in path_times else np.nan
+                            for t in tracks], dtype=np.float64)
+            first = np.array([t.get('first_seen') or 0 for t in tracks], dtype=np.float64)
+            return mid, first
+
+        mid_a, first_a = _times(tracks_a)
+        mid_b, first_b = _times(tracks_b)
+
+        # Temporal gap — prefer path_data timestamps (sub-second accuracy)
+        has_pt = ~np.isnan(mid_a)[:, None] & ~np.isnan(mid_b)[None, :]
+        signed_gap = np.where(has_pt, mid_b[None, :] - mid_a[:, None],
+                              first_b[None, :] - first_a[:, None])
+        gap = np.abs(signed_gap)
+
+        valid = gap <= max_transit
+        if direction_bucket == 'unknown_a_first':
+            valid &= signed_gap >= 0
+        elif direction_bucket == 'unknown_b_first':
+            valid &= signed_gap <= 0
+
+        # Hard filter: classification mismatch
+        codes = {}
+        cls_a = np.array([codes.setdefault(c, len(codes)) if c is not None else -1
+                          for c in map(self._get_vehicle_subtype, tracks_a)])
+        cls_b = np.array([codes.setdefault(c, len(codes)) if c is not None else -1
+                          for c in map(self._get_vehicle_subtype, tracks_b)])
+        valid &= ~((cls_a[:, None] >= 0) & (cls_b[None, :] >= 0)
+                   & (cls_a[:, None] != cls_b[None, :]))
+
+        # Skip pairs already rejected by a human reviewer
+        index_b = {t['id']: j for j, t in enumerate(tracks_b)}
+        for i, t in enumerate(tracks_a):
+            for partner in rejected.get(t['id'], ()):
+                j = index_b.get(partner)
+                if j is not None:
+                    valid[i, j] = False
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            temporal = self.DIRECTION_TEMPORAL_WEIGHT * np.maximum(0.0, 1.0 - gap / max_transit)
+
+        # ReID similarity: one matrix product over tracks with embeddings
+        reid_sim = np.full((n, m), np.nan)
+        rows_a = [i for i, t in enumerate(tracks_a) if t['id'] in reid_embs]
+        cols_b = [j for j, t in enumerate(tracks_b) if t['id'] in reid_embs]
+        if rows_a and cols_b:
+            emb_a = np.stack([reid_embs[tracks_a[i]['id']] for i in rows_a])
+            emb_b = np.stack([reid_embs[tracks_b[j]['id']] for j in cols_b])
+            reid_sim[np.ix_(rows_a, cols_b)] = emb_a @ emb_b.T
+        # Fine-tuned model: matches ~0.67, non-matches ~0.24
+        # Map: 0.20 → 0, 0.70 → full weight
+        reid_score = np.where(
+            np.isnan(reid_sim), 0.0,
+            self.DIRECTION_REID_WEIGHT * np.clip((reid_sim - 0.20) / 0.50, 0.0, 1.0))
+
+        # Color histogram similarity, gathered from the pair's correlation matrix
+        color_sim = np.full((n, m), np.nan)
+        color_matrix = precomputed.get('color_matrix')
+        if color_matrix is not None:
+            cidx_a, cidx_b, matrix = color_matrix
+            rows = [(i, cidx_a[t['id']]) for i, t in enumerate(tracks_a) if t['id'] in cidx_a]
+            cols = [(j, cidx_b[t['id']]) for j, t in enumerate(tracks_b) if t['id'] in cidx_b]
+            if rows and cols:
+                color_sim[np.ix_([r[0] for r in rows], [c[0] for c in cols])] = \
+                    matrix[np.ix_([r[1] for r in rows], [c[1] for c in cols])]
+        # Correlation ranges from -1 to 1; map 0.0→0, 1.0→full weight
+        color_score = np.where(np.isnan(color_sim), 0.0,
+                               self.DIRECTION_COLOR_WEIGHT * np.maximum(0.0, color_sim))
+
+        # Size similarity
+        def _areas(tracks):
+            return np.array([(t['avg_bbox_width'] or 0) * (t['avg_bbox_height'] or 0)
+                             for t in tracks], dtype=np.float64)
+
+        area_a = _areas(tracks_a)[:, None]
+        area_b = _areas(tracks_b)[None, :]
+        both = (area_a > 0) & (area_b > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            size_ratio = np.where(both, np.minimum(area_a, area_b) / np.maximum(area_a, area_b), 0.0)
+        size_score = self.DIRECTION_SIZE_WEIGHT * size_ratio
+
+        total = np.round(temporal + reid_score + color_score + size_score, 4)
+        return {
+            'total': total, 'valid': valid, 'gap': gap,
+            'temporal_score': temporal, 'reid_score': reid_score,
+            'color_score': color_score, 'size_score': size_score,
+            'reid_sim': reid_sim,
+        }
+
     def _mutual_best_match(self, tracks_a, tracks_b, topology, direction_bucket,
                            precomputed=None):
         """Mutual best-match within a direction bucket.
 
+        Scores every pair at once with _direction_score_matrix.  A pair
+        matches when each side is the other's best candidate above
+        DIRECTION_MATCH_THRESHOLD (ties go to the earlier track, as in a
+        row-by-row scan).  With precomputed['assignment'] == 'hungarian'
+        the candidates are instead solved as a maximum-score one-to-one
+        assignment.
+
         Skips pairs that have already been rejected by a human reviewer,
         so those tracks can find different partners.
         """
-        # Load rejected pairs to skip (normalised: smaller id first)
-        if not hasattr(self, '_rejected_pairs'):
-            self._rejected_pairs = set()
-            with get_cursor(commit=False) as cursor:
-                cursor.execute(
-                    "SELECT track_a_id, track_b_id FROM cross_camera_links "
-                    "WHERE status = 'rejected'")
-                for row in cursor:
-                    a, b = row['track_a_id'], row['track_b_id']
-                    self._rejected_pairs.add((min(a, b), max(a, b)))
-
-        best_for_a = {}
-        best_for_b = {}
-
-        for ta in tracks_a:
-            for tb in tracks_b:
-                # Skip previously rejected pairs
-                pair_key = (min(ta['id'], tb['id']), max(ta['id'], tb['id']))
-                if pair_key in self._rejected_pairs:
-                    continue
+        precomputed = precomputed or {}
+        if 'rejected' not in precomputed:
+            precomputed = dict(precomputed, rejected=(self._run or {}).get('rejected', {}))
+        started = time.monotonic()
 
-                info = self._score_direction_pair(ta, tb, topology,
-                                                  direction_bucket, precomputed)
-                if info['total'] < self.DIRECTION_MATCH_THRESHOLD:
-                    continue
+        sm = self._direction_score_matrix(tracks_a, tracks_b, topology,
+                                          direction_bucket, precomputed)
+        candidate = sm['valid'] & (sm['total'] >= self.DIRECTION_MATCH_THRESHOLD)
+        scores = np.where(candidate, sm['total'], -np.inf)
 
-                score = info['total']
-                if ta['id'] not in best_for_a or score > best_for_a[ta['id']][0]:
-                    best_for_a[ta['id']] = (score, tb['id'], info)
-                if tb['id'] not in best_for_b or score > best_for_b[tb['id']][0]:
-                    best_for_b[tb['id']] = (score, ta['id'], info)
+        pairs = []
+        if candidate.any():
+            if precomputed.get('assignment') == 'hungarian':
+                pairs = self._hungarian_pairs(scores, candidate)
+            else:
+                best_b = scores.argmax(axis=1)
+                best_a = scores.argmax(axis=0)
+                for i, j in enumerate(best_b):
+                    if candidate[i, j] and best_a[j] == i:
+                        pairs.append((i, int(j)))
 
         matches = []
-        for a_id, (score_a, b_id, info) in best_for_a.items():
-            if b_id in best_for_b and best_for_b[b_id][1] == a_id:
-                matches.append({
-                    'track_a_id': a_id,
-                    'track_b_id': b_id,
-                    'score_info': info,
-                })
+        for i, j in pairs:
+            reid_sim = sm['reid_sim'][i, j]
+            matches.append({
+                'track_a_id': tracks_a[i]['id'],
+                'track_b_id': tracks_b[j]['id'],
+                'score_info': {
+                    'total': float(sm['total'][i, j]),
+                    'temporal_score': round(float(sm['temporal_score'][i, j]), 4),
+                    'reid_score': round(float(sm['reid_score'][i, j]), 4),
+                    'color_score': round(float(sm['color_score'][i, j]), 4),
+                    'size_score': round(float(sm['size_score'][i, j]), 4),
+                    'reid_similarity': None if np.isnan(reid_sim) else round(float(reid_sim), 4),
+                    'direction_bucket': direction_bucket,
+                    'temporal_gap': round(float(sm['gap'][i, j]), 1),
+                    'rejected': None,
+                },
+            })
+
+        timing = precomputed.get('timing')
+        if timing is not None:
+            timing['pairs_scored'] += len(tracks_a) * len(tracks_b)
+            timing['scoring_ms'] += (time.monotonic() - started) * 1000
         return matches
 
+    @staticmethod
+    def _hungarian_pairs(scores, candidate):
+        """Maximum-score one-to-one assignment over candidate pairs."""
+        try:
+            from scipy.optimize import linear_sum_assignment
+        except ImportError:
+            logger.warning("scipy not installed; falling back to mutual best-match")
+            best_b = scores.argmax(axis=1)
+            best_a = scores.argmax(axis=0)
+            return [(i, int(j)) for i, j in enumerate(best_b)
+                    if candidate[i, j] and best_a[j] == i]
+        cost = np.where(candidate, -scores, 1e6)
+        rows, cols = linear_sum_assignment(cost)
+        return [(int(i), int(j)) for i, j in zip(rows, cols) if candidate[i, j]]
+
     # ------------------------------------------------------------------
     # Crossing-line matching (MOTHBALLED — kept for future use)
     # ------------------------------------------------------------------
@@ -1073,41 +1442,60 @@ class CrossingLineMatcher:
     # Full run
     # ------------------------------------------------------------------
 
-    def match_all(self, entity_type='vehicle'):
+    def match_all(self, entity_type='vehicle', assignment='mutual'):
         """Run spatial matching for all topology-connected camera pairs.
 
         Primary method: direction-based matching using Frigate path_data.
         Crossing-line matching is mothballed but available via
         match_all_crossing_lines().
 
+        Track data for every camera involved is loaded once up front.
+
+        Args:
+            assignment: 'mutual' (mutual best-match) or 'hungarian'
+
         Returns:
-            dict with total_links_created, per_pair results.
+            dict with total_links_created, per_pair results (including
+            per-pair timing) and load_ms.
         """
         # Get all camera pairs from topology
         camera_pairs = self._get_all_topology_pairs()
         total_links = 0
         per_pair = []
 
-        for cam_a, cam_b in camera_pairs:
-            matches = self.match_camera_pair_by_direction(
-                cam_a, cam_b, entity_type)
-            pair_links = 0
-
-            for m in matches:
-                link_id = self.create_link(
-                    m['track_a_id'], m['track_b_id'], entity_type,
-                    m['score_info'],
-                )
-                if link_id is not None:
-                    pair_links += 1
-
-            total_links += pair_links
-            per_pair.append({
-                'camera_a': cam_a,
-                'camera_b': cam_b,
-                'matches_found': len(matches),
-                'links_created': pair_links,
-            })
+        load_started = time.monotonic()
+        self._load_run({cam for pair in camera_pairs for cam in pair}, entity_type)
+        load_ms = (time.monotonic() - load_started) * 1000
+        try:
+            for cam_a, cam_b in camera_pairs:
+                pair_started = time.monotonic()
+                self.last_pair_timing = {'pairs_scored': 0, 'scoring_ms': 0.0}
+                matches = self.match_camera_pair_by_direction(
+                    cam_a, cam_b, entity_type, assignment)
+                match_ms = (time.monotonic() - pair_started) * 1000
+                pair_links = 0
+
+                for m in matches:
+                    link_id = self.create_link(
+                        m['track_a_id'], m['track_b_id'], entity_type,
+                        m['score_info'],
+                    )
+                    if link_id is not None:
+                        pair_links += 1
+
+                total_links += pair_links
+                per_pair.append({
+                    'camera_a': cam_a,
+                    'camera_b': cam_b,
+                    'matches_found': len(matches),
+                    'links_created': pair_links,
+                    'pairs_scored': self.last_pair_timing['pairs_scored'],
+                    'scoring_ms': round(self.last_pair_timing['scoring_ms'], 1),
+                    'match_ms': round(match_ms, 1),
+                    'elapsed_ms': round((time.monotonic() - pair_started) * 1000, 1),
+                })
+        finally:
+            self._run = None
 
         logger.info("Direction-based matching complete: %d total links "
                      "across %d camera pairs", total_links, len(camera_pairs))
@@ -1116,40 +1504,51 @@ class CrossingLineMatcher:
             'total_links_created': total_links,
             'camera_pairs_processed': len(camera_pairs),
             'per_pair': per_pair,
+            'load_ms': round(load_ms, 1),
         }
 
     def match_all_crossing_lines(self, entity_type='vehicle'):
         """Run crossing-line matching for every paired line (MOTHBALLED).
 
         Kept for future use (intrusion detection, multi-lane roads).
+        Tracks and directions come from one _load_run() for all lines'
+        cameras rather than per-track queries inside every pair score.
         """
         pairs = self.get_paired_crossing_lines()
         total_links = 0
         per_pair = []
 
-        for line_a, line_b in pairs:
-            matches = self.match_crossing_line_pair(line_a, line_b, entity_type)
-            pair_links = 0
-
-            for m in matches:
-                link_id = self.create_link(
-                    m['track_a_id'], m['track_b_id'], entity_type,
-                    m['score_info'],
-                    crossing_line_id=line_a['id'],
-                    method='crossing_line',
-                )
-                if link_id is not None:
-                    pair_links += 1
-
-            total_links += pair_links
-            per_pair.append({
-                'line_a_id': line_a['id'],
-                'line_b_id': line_b['id'],
-                'camera_a': line_a['camera_id'],
-                'camera_b': line_b['camera_id'],
-                'matches_found': len(matches),
-                'links_created': pair_links,
-            })
+        self._load_run({line['camera_id'] for pair in pairs for line in pair}, entity_type,
+                       visual=False)
+        try:
+            for line_a, line_b in pairs:
+                pair_started = time.monotonic()
+                matches = self.match_crossing_line_pair(line_a, line_b, entity_type)
+                match_ms = (time.monotonic() - pair_started) * 1000
+                pair_links = 0
+
+                for m in matches:
+                    link_id = self.create_link(
+                        m['track_a_id'], m['track_b_id'], entity_type,
+                        m['score_info'],
+                        crossing_line_id=line_a['id'],
+                        method='crossing_line',
+                    )
+                    if link_id is not None:
+                        pair_links += 1
+
+                total_links += pair_links
+                per_pair.append({
+                    'line_a_id': line_a['id'],
+                    'line_b_id': line_b['id'],
+                    'camera_a': line_a['camera_id'],
+                    'camera_b': line_b['camera_id'],
+                    'matches_found': len(matches),
+                    'links_created': pair_links,
+                    'match_ms': round(match_ms, 1),
+                })
+        finally:
+            self._run = None
 
         return {
             'total_links_created': total_links,
@@ -0,0 +1,420 @@
+"""
+Batch synthetic document generation from annotated templates.
+
+Renders images with the external doc_synthesizer module (render_from_template,
+fold cropping, photocopy/scene/overlay augmentation) on a process pool.
+Each image gets its own seed derived from the job seed and its index, so a
+job is reproducible regardless of how images are spread across workers.
+Images, metadata sidecars and YOLO labels are written atomically (temp file
++ rename), and job progress is kept in a JSON file per job next to the
+template so status survives a restart.
+
+start_job runs each job in its own interpreter (python -m doc_generation)
+so the pool workers re-import this module as their __main__ rather than the
+API's: importing api.py pulls in services, which starts the DB pool,
+migrations and background threads at import time.  Keep this module free of
+Flask/services imports for the same reason.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Merged YOLO dataset every generated image is also added to (train split)
+YOLO_TRAIN_DIR = Path("/mnt/storage/training-material/documents/yolo-doc-detect/merged/train")
+
+GENERATION_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+JOBS_DIRNAME = 'generation_jobs'
+# Job file is rewritten at least this often while running (progress + heartbeat)
+HEARTBEAT_SECONDS = 2.0
+# A 'running' job whose heartbeat is older than this was cut off by a restart
+STALE_JOB_SECONDS = 60.0
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Per-process worker state, set by _init_worker
+_worker_config = None
+
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def _atomic_write_text(path: Path, text: str):
+    _atomic_write_bytes(path, text.encode())
+
+
+def _load_json(path: Path) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def item_seed(job_seed: int, index: int) -> int:
+    """Seed for one template render, independent of worker assignment."""
+    digest = hashlib.sha1(f"{job_seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:4], 'big')
+
+
+def _seed_globals(seed: int):
+    """Seed the global RNGs doc_synthesizer draws from."""
+    random.seed(seed)
+    try:
+        import numpy as np
+        np.random.seed(seed)
+    except ImportError:
+        pass
+
+
+def _init_worker(config: Dict):
+    global _worker_config
+    synth_dir = config.get('synth_dir')
+    if synth_dir and synth_dir not in sys.path:
+        sys.path.insert(0, synth_dir)
+    _worker_config = config
+
+
+def _augment(vimg, vmeta, rng: random.Random, options: Dict):
+    """Photocopy or scene composite (mutually exclusive), as the options allow."""
+    if rng.random() < options['photocopy_pct']:
+        try:
+            from doc_synthesizer import apply_photocopy_effect
+            mode = "oversaturated" if rng.random() < options['oversaturated_pct'] else "washout"
+            if mode == "oversaturated":
+                intensity = rng.uniform(options['oversat_min'], options['oversat_max'])
+            else:
+                intensity = rng.uniform(options['washout_min'], options['washout_max'])
+            vimg = apply_photocopy_effect(vimg, washout_level=intensity, mode=mode)
+            vmeta["photocopy"] = True
+            vmeta["photocopy_intensity"] = round(intensity, 3)
+            vmeta["photocopy_mode"] = mode
+            # Apply photocopy overlay artifacts
+            if options['overlay_pct'] > 0:
+                try:
+                    from doc_synthesizer import apply_photocopy_overlays
+                    vimg, overlay_meta = apply_photocopy_overlays(
+                        vimg,
+                        overlay_pct=options['overlay_pct'],
+                        opacity_min=options['overlay_opacity_min'],
+                        opacity_max=options['overlay_opacity_max'],
+                    )
+                    vmeta.update(overlay_meta)
+                except Exception:
+                    pass
+        except Exception:
+            pass
+    elif rng.random() < options['scene_pct']:
+        try:
+            from doc_synthesizer import apply_scene_composite
+            scene_config = {
+                "max_perspective": options['max_perspective'],
+                "max_rotation": options['max_rotation'],
+            }
+            vimg, bbox = apply_scene_composite(vimg, scene_config)
+            vmeta["scene"] = True
+            vmeta["bbox"] = list(bbox)
+        except Exception:
+            pass
+    return vimg, vmeta
+
+
+def generate_one(index: int) -> Dict:
+    """Render, augment and write one template image (and its fold variants).
+
+    Runs in a pool worker configured by _init_worker.  Returns a dict with
+    index, files (variants written) and error (None on success).
+    """
+    from PIL import Image
+    from doc_synthesizer import render_from_template, apply_fold_crop
+
+    config = _worker_config
+    tpl = config['template']
+    seed = item_seed(config['seed'], index)
+    _seed_globals(seed)
+    rng = random.Random(seed)
+
+    try:
+        img = render_from_template(Path(config['template_dir']))
+        if isinstance(img, tuple):
+            img, metadata = img
+        else:
+            metadata = {}
+
+        # Apply fold cropping if template has fold lines
+        # Returns list of (img, metadata) tuples — 1 for full, 2 for folded
+        fold_lines = [r for r in tpl.get("regions", []) if r.get("type") == "line" and r.get("fold_line")]
+        if fold_lines:
+            variants = apply_fold_crop(img, fold_lines, metadata)
+        else:
+            metadata["fold_variant"] = "full"
+            variants = [(img, metadata)]
+
+        out = Path(config['output_dir'])
+        yolo_dir = Path(config['yolo_dir'])
+        written = 0
+        for vimg, vmeta in variants:
+            vimg, vmeta = _augment(vimg, vmeta, rng, config['options'])
+            vmeta["seed"] = seed
+
+            fold_suffix = f"_{vmeta.get('fold_variant', 'full')}" if len(variants) > 1 else ""
+            filename = f"{config['name_prefix']}_{index:04d}{fold_suffix}"
+
+            # Encode once; the same bytes go to the output dir and the YOLO dataset
+            jpeg = None
+            if isinstance(vimg, Image.Image):
+                buf = io.BytesIO()
+                vimg.convert('RGB').save(buf, 'JPEG', quality=95)
+                jpeg = buf.getvalue()
+                _atomic_write_bytes(out / f"{filename}.jpg", jpeg)
+
+            # Save metadata sidecar
+            if vmeta:
+                _atomic_write_text(out / "metadata" / f"{filename}.json", json.dumps(vmeta, indent=2))
+
+            if jpeg is not None:
+                _atomic_write_bytes(yolo_dir / "images" / f"{filename}.jpg", jpeg)
+
+            # Write YOLO label: class_id x_center y_center width height
+            class_id = tpl.get('class_id', 0)
+            if vmeta.get("bbox"):
+                # Scene composite: bbox is [x_center, y_center, width, height] normalized
+                bx, by, bw, bh = vmeta["bbox"]
+            else:
+                # Full document: fills entire image
+                bx, by, bw, bh = 0.5, 0.5, 1.0, 1.0
+            _atomic_write_text(yolo_dir / "labels" / f"{filename}.txt",
+                               f"{class_id} {bx:.6f} {by:.6f} {bw:.6f} {bh:.6f}\n")
+            written += 1
+
+        return {'index': index, 'files': written, 'error': None}
+
+    except Exception as e:
+        return {'index': index, 'files': 0, 'error': str(e)}
+
+
+# ── Job records ───────────────────────────────────────────────────────────
+
+def _jobs_dir(template_dir: Path) -> Path:
+    return Path(template_dir) / JOBS_DIRNAME
+
+
+def _job_path(template_dir: Path, job_id: str) -> Path:
+    return _jobs_dir(template_dir) / f"{os.path.basename(job_id)}.json"
+
+
+def _save_job(template_dir: Path, job: Dict):
+    job['updated_at'] = time.time()
+    _atomic_write_text(_job_path(template_dir, job['job_id']), json.dumps(job, indent=2))
+
+
+def _with_liveness(job: Dict) -> Dict:
+    """Report a 'running' job whose owner stopped heartbeating as interrupted."""
+    if job.get('status') == 'running' and time.time() - job.get('updated_at', 0) > STALE_JOB_SECONDS:
+        job = dict(job, status='interrupted',
+                   error='Generation stopped without finishing (server restarted?)')
+    return job
+
+
+def load_job(template_dir: Path, job_id: str) -> Optional[Dict]:
+    job = _load_json(_job_path(template_dir, job_id))
+    return _with_liveness(job) if job else None
+
+
+def list_jobs(template_dir: Path) -> List[Dict]:
+    """All jobs for a template, newest first."""
+    jobs_dir = _jobs_dir(template_dir)
+    if not jobs_dir.is_dir():
+        return []
+    jobs = [_load_json(p) for p in jobs_dir.glob('*.json')]
+    return sorted((_with_liveness(j) for j in jobs if j),
+                  key=lambda j: j.get('started_at', 0), reverse=True)
+
+
+def latest_job(template_dir: Path) -> Optional[Dict]:
+    jobs = list_jobs(template_dir)
+    return jobs[0] if jobs else None
+
+
+@contextlib.contextmanager
+def job_lock(template_dir: Path):
+    """Exclusive per-template lock; hold it around latest_job + create_job."""
+    jobs_dir = _jobs_dir(template_dir)
+    jobs_dir.mkdir(parents=True, exist_ok=True)
+    with open(jobs_dir / '.lock', 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def create_job(template_id: str, template_dir: Path, count: int, options: Dict,
+               output_dir: Path, seed: Optional[int] = None, workers: Optional[int] = None) -> Dict:
+    """Write a new job record in 'running' state and return it."""
+    _jobs_dir(template_dir).mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    job = {
+        'job_id': uuid.uuid4().hex[:12],
+        'template_id': template_id,
+        'status': 'running',
+        'total': count,
+        'completed': 0,
+        'errors': 0,
+        'files_written': 0,
+        'seed': int(seed) if seed is not None else random.randrange(2**31),
+        'workers': max(1, min(workers or GENERATION_WORKERS, count or 1)),
+        'output_dir': str(output_dir),
+        'options': options,
+        'started_at': now,
+        'finished_at': None,
+        'images_per_sec': None,
+        'error': None,
+    }
+    _save_job(template_dir, job)
+    return job
+
+
+def run_job(job: Dict, template: Dict, template_dir: Path, synth_dir: Path,
+            yolo_dir: Path = YOLO_TRAIN_DIR) -> Dict:
+    """Generate every image of a job on a process pool, persisting progress.
+
+    Blocks until the job finishes.  The API does not call this directly but
+    through start_job, so the workers never import the API's __main__.
+    """
+    out = Path(job['output_dir'])
+    try:
+        (out / "metadata").mkdir(parents=True, exist_ok=True)
+        (Path(yolo_dir) / "images").mkdir(parents=True, exist_ok=True)
+        (Path(yolo_dir) / "labels").mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        job.update(status='failed', error=str(e), finished_at=time.time())
+        _save_job(template_dir, job)
+        return job
+
+    config = {
+        'synth_dir': str(synth_dir),
+        'template': template,
+        'template_dir': str(template_dir),
+        'seed': job['seed'],
+        'options': job['options'],
+        'output_dir': str(out),
+        'yolo_dir': str(yolo_dir),
+        # Job start time keeps names unique across jobs and stable within one
+        'name_prefix': f"tpl_{template['class_name']}_{job['template_id']}_{int(job['started_at'] * 1000)}",
+    }
+
+    started = time.monotonic()
+    try:
+        # forkserver, not fork: the pool's own management thread runs in
+        # this process, and forking a threaded process isn't safe
+        with ProcessPoolExecutor(max_workers=job['workers'],
+                                 mp_context=multiprocessing.get_context('forkserver'),
+                                 initializer=_init_worker, initargs=(config,)) as pool:
+            pending = {pool.submit(generate_one, i) for i in range(job['total'])}
+            while pending:
+                done, pending = wait(pending, timeout=HEARTBEAT_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    job['completed'] += 1
+                    job['files_written'] += result['files']
+                    if result['error']:
+                        job['errors'] += 1
+                        logger.error(f"Generation error for {job['template_id']} "
+                                     f"image {result['index']}: {result['error']}")
+                elapsed = time.monotonic() - started
+                job['images_per_sec'] = round(job['completed'] / elapsed, 2) if elapsed > 0 else None
+                _save_job(template_dir, job)
+    except Exception as e:
+        # e.g. doc_synthesizer missing in the workers, or a worker died
+        logger.error(f"Generation job {job['job_id']} for {job['template_id']} failed: {e}")
+        job.update(status='failed', error=str(e), finished_at=time.time())
+        _save_job(template_dir, job)
+        return job
+
+    job.update(status='completed', finished_at=time.time())
+    _save_job(template_dir, job)
+    logger.info(f"Generation job {job['job_id']} for {job['template_id']}: {job['completed']} images "
+                f"({job['errors']} errors) at {job['images_per_sec']}/s on {job['workers']} workers")
+    return job
+
+
+def start_job(job: Dict, template_dir: Path, synth_dir: Path,
+              yolo_dir: Path = YOLO_TRAIN_DIR) -> subprocess.Popen:
+    """Run a created job in a separate `python -m doc_generation` process.
+
+    Returns the process; a daemon thread reaps it when it exits.  Progress
+    is reported through the job record only.  If the process can't be
+    started the job is marked failed before the error is re-raised, so it
+    doesn't block new jobs as a 'running' one.
+    """
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'doc_generation', str(_job_path(template_dir, job['job_id'])),
+             '--synth-dir', str(synth_dir), '--yolo-dir', str(yolo_dir)],
+            cwd=str(APP_DIR), stdin=subprocess.DEVNULL,
+        )
+    except Exception as e:
+        logger.error(f"Generation job {job['job_id']} for {job['template_id']} did not start: {e}")
+        job.update(status='failed', error=f'could not start generation process: {e}',
+                   finished_at=time.time())
+        _save_job(template_dir, job)
+        raise
+    threading.Thread(target=proc.wait, daemon=True,
+                     name=f"gen-{job['template_id']}-{job['job_id']}").start()
+    return proc
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run one persisted generation job.")
+    parser.add_argument('job_path', help='job record written by create_job')
+    parser.add_argument('--synth-dir', required=True)
+    parser.add_argument('--yolo-dir', default=str(YOLO_TRAIN_DIR))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    job_path = Path(args.job_path)
+    template_dir = job_path.parent.parent
+    job = _load_json(job_path)
+    if job is None:
+        logger.error(f"Generation job record {job_path} not readable")
+        return 1
+    template = _load_json(template_dir / 'template.json')
+    if template is None:
+        job.update(status='failed', error='template.json not readable', finished_at=time.time())
+        _save_job(template_dir, job)
+        return 1
+
+    job = run_job(job, template, template_dir, Path(args.synth_dir), yolo_dir=Path(args.yolo_dir))
+    return 0 if job['status'] == 'completed' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
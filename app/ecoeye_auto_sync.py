@@ -148,19 +148,20 @@ class EcoEyeAutoSync:
 
         downloaded = 0
         failed = 0
+        # row[2] is timestamp, not used directly in download logic
+        cameras = {row[0]: row[1] for row in rows}
 
-        for row in rows:
-            alert_id = row[0]
-            camera_id = row[1]
-            # row[2] is timestamp, not used directly in download logic
+        # Clips download concurrently; each is recorded and processed as it lands
+        for outcome in self.ecoeye_client.download_alerts(cameras):
+            alert_id = outcome['alert_id']
+            camera_id = cameras[alert_id]
 
             try:
-                # Download the video clip
-                success, filepath = self.ecoeye_client.download_alert_video(alert_id)
-                if not success:
-                    logger.warning("EcoEye download failed for alert %s", alert_id)
+                if outcome['status'] != 'success':
+                    logger.warning("EcoEye download failed for alert %s: %s", alert_id, outcome['error'])
                     failed += 1
                     continue
+                filepath = outcome['path']
 
                 # Mark as downloaded in DB
                 with get_connection() as conn:
@@ -33,8 +33,10 @@ Security features:
 import requests
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 import hmac
@@ -43,6 +45,53 @@ from db_connection import get_connection, get_cursor
 
 logger = logging.getLogger(__name__)
 
+# Relay limits: 100 req/min sustained, 10 req/sec burst
+RATE_LIMIT_PER_SEC = 100 / 60
+RATE_LIMIT_BURST = 10
+
+# Concurrent alert downloads in download_pending_videos / download_alerts
+DOWNLOAD_WORKERS = 4
+# Connections kept per host in the shared session; also caps workers
+HTTP_POOL_SIZE = 10
+# Streaming attempts per video; each one resumes the .part file with a Range request
+DOWNLOAD_RESUME_ATTEMPTS = 3
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class _TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/sec, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def _response_total_size(response: requests.Response, offset: int) -> int:
+    """Full file size implied by a (possibly 206) response, 0 if unknown."""
+    content_range = response.headers.get('content-range', '')
+    if response.status_code == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1].strip()
+        if total.isdigit():
+            return int(total)
+    length = int(response.headers.get('content-length', 0) or 0)
+    return offset + length if length else 0
+
 
 class EcoEyeSyncClient:
     """Client for syncing with alert.ecoeyetech.com (EcoEye Alert Relay)"""
@@ -69,10 +118,14 @@ class EcoEyeSyncClient:
             'User-Agent': 'GroundtruthStudio/1.0',
             'Accept': 'application/json'
         })
+        # One connection pool shared by all download workers
+        adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE,
+                                                pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.5  # 500ms between requests
+        # Rate limiting, shared across threads
+        self._limiter = _TokenBucket(RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST)
 
         # Create downloads directory if needed
         self.download_dir.mkdir(parents=True, exist_ok=True)
@@ -89,14 +142,12 @@ class EcoEyeSyncClient:
         self.api_secret = api_secret
 
     def _rate_limit(self):
-        """Enforce rate limiting between requests"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+        """Enforce the relay rate limit (token bucket shared by all threads)"""
+        self._limiter.acquire()
 
     def _make_request(self, method: str, endpoint: str, params: Dict = None,
-                     json_data: Dict = None, stream: bool = False) -> requests.Response:
+                     json_data: Dict = None, stream: bool = False,
+                     headers: Dict = None) -> requests.Response:
         """
         Make request to EcoEye Alert Relay API with HMAC-SHA256 signing
 
@@ -106,6 +157,7 @@ class EcoEyeSyncClient:
             params: Query parameters
             json_data: JSON body
             stream: Whether to stream response (for large downloads)
+            headers: Extra request headers (e.g. Range)
 
         Returns:
             Response object
@@ -143,7 +195,9 @@ class EcoEyeSyncClient:
             ).hexdigest()
             auth_headers['X-Signature'] = signature
 
-        self.session.headers.update(auth_headers)
+        # Per-request headers: the session is shared by download threads
+        if headers:
+            auth_headers.update(headers)
 
         # Make request with retries
         max_retries = 3
@@ -154,6 +208,7 @@ class EcoEyeSyncClient:
                     url=url,
                     params=params,
                     json=json_data,
+                    headers=auth_headers,
                     stream=stream,
                     timeout=(10, 300) if stream else 30
                 )
@@ -161,7 +216,9 @@ class EcoEyeSyncClient:
                 return response
 
             except requests.exceptions.RequestException as e:
-                if attempt == max_retries - 1:
+                # An unsatisfiable Range won't change on retry
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if attempt == max_retries - 1 or status == 416:
                     logger.error(f"Request failed after {max_retries} attempts: {e}")
                     raise
 
@@ -336,12 +393,30 @@ class EcoEyeSyncClient:
         Returns:
             Tuple of (success, file_path or error_message)
         """
+        outcome = self._download_outcome(alert_id, video_info)
+        if outcome['status'] == 'success':
+            return True, outcome['path']
+        return False, outcome['error']
+
+    def _download_outcome(self, alert_id: str, video_info: Dict = None) -> Dict:
+        """
+        Download one alert's video and describe what happened
+
+        Returns:
+            Dict with alert_id, status ('success', 'unavailable' or 'failed'),
+            path or error, bytes on disk, resumed_from (bytes already in the
+            .part file when this call started) and seconds
+        """
+        started = time.monotonic()
+        outcome = {'alert_id': alert_id, 'status': 'failed', 'path': None, 'error': None,
+                   'bytes': 0, 'resumed_from': 0, 'seconds': 0.0}
         try:
             # Get video info if not provided
             if not video_info:
                 video_info = self.get_alert_video(alert_id)
                 if not video_info or not video_info.get('success'):
-                    return False, "Video not available for this alert"
+                    outcome.update(status='unavailable', error="Video not available for this alert")
+                    return outcome
 
             # Generate filename from metadata
             camera_id = video_info.get('camera_id', 'unknown')
@@ -360,50 +435,138 @@ class EcoEyeSyncClient:
             # Construct download URL from video_path
             video_path = video_info.get('video_path')
             if not video_path:
-                return False, "No video path available"
+                outcome['error'] = "No video path available"
+                return outcome
 
             # Extract relative path from video_path
             if '/videos/' in video_path:
                 relative_path = video_path.split('/videos/')[-1]
                 download_url = f"{self.base_url}/videos/{relative_path}"
             else:
-                return False, f"Invalid video path format: {video_path}"
+                outcome['error'] = f"Invalid video path format: {video_path}"
+                return outcome
 
             # Download video with streaming
             logger.info(f"Downloading video from {download_url}")
+            outcome.update(self._fetch_video(alert_id, f'/videos/{relative_path}', filepath))
+            return outcome
 
-            response = self._make_request('GET', f'/videos/{relative_path}', stream=True)
+        except Exception as e:
+            logger.error(f"Failed to download video for alert {alert_id}: {e}")
+            outcome['error'] = str(e)
+            return outcome
+        finally:
+            outcome['seconds'] = round(time.monotonic() - started, 3)
 
-            # Stream to file
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
+    def _fetch_video(self, alert_id: str, endpoint: str, filepath: Path) -> Dict:
+        """
+        Stream a relay video into `ecoeye_<alert_id>.mp4.part`, resuming with Range requests
 
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
+        A dropped connection or short body leaves the .part file in place and
+        the next attempt (or the next sync) asks only for the missing bytes.
+        The file is renamed to `filepath` once its size matches the total the
+        server reported.
 
-                        # Log progress for large files
-                        if total_size > 0 and downloaded % (1024 * 1024) == 0:
-                            progress = (downloaded / total_size) * 100
-                            logger.debug(f"Download progress: {progress:.1f}%")
+        Returns:
+            Dict of outcome fields: status, path or error, bytes, resumed_from
+        """
+        # Keyed on the alert alone: filepath embeds the alert timestamp, which
+        # falls back to the current time when the relay doesn't report one
+        part = filepath.with_name(f"ecoeye_{alert_id}.mp4.part")
+        resumed_from = part.stat().st_size if part.exists() else 0
+        size = resumed_from
+        total_size = 0
+
+        for attempt in range(DOWNLOAD_RESUME_ATTEMPTS):
+            offset = part.stat().st_size if part.exists() else 0
+            try:
+                response = self._make_request(
+                    'GET', endpoint, stream=True,
+                    headers={'Range': f'bytes={offset}-'} if offset else None)
+            except requests.exceptions.HTTPError as e:
+                if offset and getattr(e.response, 'status_code', None) == 416:
+                    # Partial file doesn't fit the server's copy; start over
+                    logger.warning(f"Range rejected for alert {alert_id} at {offset} bytes, restarting")
+                    part.unlink(missing_ok=True)
+                    resumed_from = 0
+                    continue
+                raise
+
+            if offset and response.status_code != 206:
+                # Server ignored the Range header and is sending the whole file
+                offset = 0
+                resumed_from = 0
+
+            total_size = _response_total_size(response, offset)
+            size = offset
+
+            try:
+                with open(part, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                            size += len(chunk)
+
+                            # Log progress for large files
+                            if total_size > 0 and size % (1024 * 1024) == 0:
+                                progress = (size / total_size) * 100
+                                logger.debug(f"Download progress: {progress:.1f}%")
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Download of alert {alert_id} interrupted at {size} bytes "
+                               f"(attempt {attempt + 1}/{DOWNLOAD_RESUME_ATTEMPTS}): {e}")
+                continue
+            finally:
+                response.close()
+
+            if total_size > 0 and size > total_size:
+                part.unlink(missing_ok=True)
+                return {'status': 'failed', 'bytes': 0, 'resumed_from': resumed_from,
+                        'error': f"Download overran: {size}/{total_size} bytes"}
 
             # Verify download integrity
-            if total_size > 0 and downloaded != total_size:
-                logger.error(
-                    f"Download truncated for alert {alert_id}: "
-                    f"expected {total_size} bytes, got {downloaded} bytes"
-                )
-                filepath.unlink(missing_ok=True)
-                return False, f"Download truncated: {downloaded}/{total_size} bytes"
+            if total_size > 0 and size < total_size:
+                logger.warning(f"Download short for alert {alert_id}: {size}/{total_size} bytes "
+                               f"(attempt {attempt + 1}/{DOWNLOAD_RESUME_ATTEMPTS})")
+                continue
+
+            part.replace(filepath)
+            suffix = f", resumed from {resumed_from}" if resumed_from else ""
+            logger.info(f"Successfully downloaded video to {filepath} ({size} bytes{suffix})")
+            return {'status': 'success', 'path': str(filepath), 'bytes': size,
+                    'resumed_from': resumed_from}
+
+        logger.error(
+            f"Download truncated for alert {alert_id}: "
+            f"expected {total_size} bytes, got {size} bytes"
+        )
+        return {'status': 'failed', 'bytes': size, 'resumed_from': resumed_from,
+                'error': f"Download truncated: {size}/{total_size} bytes"}
+
+    def download_alerts(self, alert_ids: Iterable[str], workers: int = None) -> Iterator[Dict]:
+        """
+        Download several alerts' videos concurrently
 
-            logger.info(f"Successfully downloaded video to {filepath} ({downloaded} bytes)")
-            return True, str(filepath)
+        Up to `workers` alerts are fetched at once over the shared session;
+        every request still passes through the shared rate limiter.  Outcomes
+        (see _download_outcome) are yielded in completion order so the caller
+        can record and post-process each video while the rest download.
 
-        except Exception as e:
-            logger.error(f"Failed to download video for alert {alert_id}: {e}")
-            return False, str(e)
+        Args:
+            alert_ids: Alert IDs to download
+            workers: Concurrent downloads (default DOWNLOAD_WORKERS)
+
+        Yields:
+            Per-alert outcome dicts
+        """
+        alert_ids = list(alert_ids)
+        if not alert_ids:
+            return
+        workers = max(1, min(workers or DOWNLOAD_WORKERS, HTTP_POOL_SIZE, len(alert_ids)))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ecoeye-download') as pool:
+            futures = [pool.submit(self._download_outcome, alert_id) for alert_id in alert_ids]
+            for future in as_completed(futures):
+                yield future.result()
 
     def acknowledge_download(self, alert_id: str) -> bool:
         """
@@ -573,15 +736,20 @@ class EcoEyeSyncClient:
                 'error': str(e)
             }
 
-    def download_pending_videos(self, limit: int = 10) -> Dict:
+    def download_pending_videos(self, limit: int = 10, workers: int = None) -> Dict:
         """
         Download videos for alerts that have videos available but not yet downloaded
 
+        Downloads run on a bounded worker pool (see download_alerts); database
+        updates, acknowledgement and post-processing happen here as each one
+        finishes.
+
         Args:
             limit: Maximum number of videos to download
+            workers: Concurrent downloads (default DOWNLOAD_WORKERS)
 
         Returns:
-            Dict with download results
+            Dict with download results, including one outcome per alert
         """
         try:
             with get_connection() as conn:
@@ -602,13 +770,14 @@ class EcoEyeSyncClient:
                 downloaded = 0
                 failed = 0
                 results = []
+                cameras = {alert_id: camera_id for alert_id, camera_id, _timestamp in pending}
 
-                for alert_id, camera_id, timestamp in pending:
-                    logger.info(f"Downloading video for alert {alert_id}")
-
-                    success, result = self.download_alert_video(alert_id)
+                for outcome in self.download_alerts(cameras, workers):
+                    alert_id = outcome['alert_id']
+                    camera_id = cameras[alert_id]
+                    result = outcome['path']
 
-                    if success:
+                    if outcome['status'] == 'success':
                         # Update database
                         cursor.execute('''
                             UPDATE ecoeye_alerts
@@ -620,14 +789,13 @@ class EcoEyeSyncClient:
                         downloaded += 1
 
                         # Acknowledge download to relay for retention management
-                        self.acknowledge_download(alert_id)
+                        outcome['acknowledged'] = self.acknowledge_download(alert_id)
 
                         # Create videos record + trigger detection pipeline
                         try:
                             from services import db as _db, processor as _proc
                             from vehicle_detect_runner import trigger_vehicle_detect as _tvd
                             from clip_tracker import run_clip_tracking
-                            import threading
 
                             vid_id = _db.add_video(
                                 filename=Path(result).name,
@@ -652,19 +820,11 @@ class EcoEyeSyncClient:
                                 ).start()
                         except Exception as proc_err:
                             logger.warning(f"Post-processing failed for EcoEye {alert_id}: {proc_err}")
-
-                        results.append({
-                            'alert_id': alert_id,
-                            'status': 'success',
-                            'path': result
-                        })
                     else:
                         failed += 1
-                        results.append({
-                            'alert_id': alert_id,
-                            'status': 'failed',
-                            'error': result
-                        })
+                        logger.warning(f"EcoEye download {outcome['status']} for alert {alert_id}: "
+                                       f"{outcome['error']}")
+                    results.append(outcome)
 
             return {
                 'success': True,
@@ -9,7 +9,6 @@ import logging
 import numpy as np
 from typing import List, Tuple, Dict, Optional
 from datetime import datetime
-import hdbscan
 from db_connection import get_cursor, get_connection
 from psycopg2 import extras
 
@@ -87,6 +86,7 @@ class FaceClusterer:
             )
             return np.full(len(vectors), -1)
 
+        import hdbscan  # heavy (numba/sklearn); only needed when clustering
         clusterer = hdbscan.HDBSCAN(
             min_cluster_size=self.min_cluster_size,
             min_samples=self.min_samples,
@@ -0,0 +1,352 @@
+"""
+Face Photo Index
+
+SQLite index of the face photo library (originals + background-removed
+"white" variants) for the Face Photo Manager.  One row per face filename
+holds the mtime of each variant plus the profile and gender metadata the
+listing shows, so stats, filters and pagination are answered by queries
+instead of listing both directories and loading every profile per request.
+
+refresh() is cheap when nothing changed: it stats the two directories and
+only rescans them (one scandir pass each, diffed by name and mtime) when a
+directory mtime moved or the last full scan is older than RESCAN_INTERVAL.
+Metadata is (re)loaded only for rows that are new, whose original image
+changed, or that were invalidated by a profile/gender edit, and always on a
+background thread: refresh() never waits for it, and rows still pending are
+served (meta_pending) with empty profile/gender columns until it lands.
+Rows shown on a page get their metadata re-checked once it is older than
+META_TTL, which bounds how stale edits made outside the app (e.g. the
+synthesizer bumping generation_count) can get.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = '.face_index.sqlite'
+RESCAN_INTERVAL = 86400
+META_TTL = 3600
+META_BATCH = 500
+
+VARIANT_FILTERS = {
+    'original': 'original_mtime IS NOT NULL',
+    'white': 'white_mtime IS NOT NULL',
+    'both': '1 = 1',
+}
+
+
+class FaceIndex:
+    """Incremental name/mtime index of the original and white face directories.
+
+    meta_loader(filename) returns the cached columns for one face:
+    {'gender', 'has_profile', 'profile_name', 'generation_count', 'doc_types'}.
+    """
+
+    def __init__(self, faces_dir, whites_dir, db_path,
+                 meta_loader: Callable[[str], Dict]):
+        self.faces_dir = str(faces_dir)
+        self.whites_dir = str(whites_dir)
+        self.db_path = str(db_path)
+        self.meta_loader = meta_loader
+        self._init_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._initialized = False
+        self._meta_lock = threading.Lock()
+        self._meta_thread = None
+        self._meta_requested = False
+
+    # ------------------------------------------------------------------
+    # SQLite plumbing
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _db(self):
+        self._ensure_schema()
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS faces (
+                        name TEXT PRIMARY KEY,
+                        original_mtime REAL,
+                        white_mtime REAL,
+                        gender TEXT,
+                        gender_json TEXT,
+                        has_profile INTEGER NOT NULL DEFAULT 0,
+                        profile_name TEXT,
+                        generation_count INTEGER NOT NULL DEFAULT 0,
+                        doc_types TEXT NOT NULL DEFAULT '[]',
+                        meta_at REAL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_faces_meta_at ON faces(meta_at)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_faces_gender ON faces(gender, name)')
+                conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)')
+                conn.commit()
+            finally:
+                conn.close()
+            self._initialized = True
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _dir_mtime(path) -> float:
+        try:
+            return os.stat(path).st_mtime_ns / 1e9
+        except OSError:
+            return 0.0
+
+    @staticmethod
+    def _scan_dir(path) -> Dict[str, float]:
+        found = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith('.png'):
+                        continue
+                    try:
+                        found[entry.name] = entry.stat().st_mtime
+                    except OSError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return found
+
+    def refresh(self, force: bool = False) -> bool:
+        """Bring the index up to date; returns True if the directories were rescanned."""
+        with self._refresh_lock:
+            faces_mtime = self._dir_mtime(self.faces_dir)
+            whites_mtime = self._dir_mtime(self.whites_dir)
+            with self._db() as conn:
+                seen = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+            scan = (force
+                    or seen.get('faces_mtime') != faces_mtime
+                    or seen.get('whites_mtime') != whites_mtime
+                    or time.time() - seen.get('scanned_at', 0) > RESCAN_INTERVAL)
+            if scan:
+                self._rescan(faces_mtime, whites_mtime)
+            with self._db() as conn:
+                pending = conn.execute('SELECT 1 FROM faces WHERE meta_at IS NULL LIMIT 1').fetchone()
+            if pending:
+                self._start_meta_fill()
+            return scan
+
+    def _rescan(self, faces_mtime: float, whites_mtime: float):
+        start = time.time()
+        originals = self._scan_dir(self.faces_dir)
+        whites = self._scan_dir(self.whites_dir)
+
+        with self._db() as conn:
+            indexed = {row['name']: (row['original_mtime'], row['white_mtime'])
+                       for row in conn.execute('SELECT name, original_mtime, white_mtime FROM faces')}
+            on_disk = originals.keys() | whites.keys()
+
+            gone = indexed.keys() - on_disk
+            conn.executemany('DELETE FROM faces WHERE name = ?', [(n,) for n in gone])
+
+            changed = []
+            for name in on_disk:
+                mtimes = (originals.get(name), whites.get(name))
+                if indexed.get(name) != mtimes:
+                    changed.append((name, mtimes[0], mtimes[1]))
+            # A new or rewritten original needs its metadata re-read; a new
+            # white variant doesn't change the profile or gender
+            conn.executemany('''
+                INSERT INTO faces (name, original_mtime, white_mtime) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    original_mtime = excluded.original_mtime,
+                    white_mtime = excluded.white_mtime,
+                    meta_at = CASE WHEN original_mtime IS excluded.original_mtime
+                                   THEN meta_at END
+            ''', changed)
+
+            conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', [
+                ('faces_mtime', faces_mtime),
+                ('whites_mtime', whites_mtime),
+                ('scanned_at', time.time()),
+            ])
+        if gone or changed:
+            logger.info(f"Face index rescan: {len(changed)} changed, {len(gone)} removed "
+                        f"({len(on_disk)} faces, {time.time() - start:.2f}s)")
+
+    def _start_meta_fill(self):
+        """Load pending metadata on the background thread, starting it if idle."""
+        with self._meta_lock:
+            self._meta_requested = True
+            if self._meta_thread is not None:
+                return
+            self._meta_thread = threading.Thread(target=self._meta_fill_loop, daemon=True,
+                                                 name="face-index-meta")
+            self._meta_thread.start()
+
+    def _meta_fill_loop(self):
+        while True:
+            with self._meta_lock:
+                if not self._meta_requested:
+                    self._meta_thread = None
+                    return
+                self._meta_requested = False
+            try:
+                self._load_missing_meta()
+            except Exception as e:
+                logger.warning(f"Face index: metadata fill failed: {e}")
+
+    def _load_missing_meta(self):
+        """Load metadata for rows that have none, in batches."""
+        while True:
+            with self._db() as conn:
+                names = [row['name'] for row in conn.execute(
+                    'SELECT name FROM faces WHERE meta_at IS NULL LIMIT ?', (META_BATCH,))]
+            if not names:
+                return
+            self._store_meta(names)
+            if len(names) < META_BATCH:
+                return
+
+    def _store_meta(self, names: List[str]):
+        now = time.time()
+        rows = []
+        for name in names:
+            try:
+                meta = self.meta_loader(name)
+            except Exception as e:
+                logger.warning(f"Face index: metadata load failed for {name}: {e}")
+                meta = {}
+            gender = meta.get('gender')
+            rows.append((
+                _gender_label(gender),
+                json.dumps(gender) if gender is not None else None,
+                1 if meta.get('has_profile') else 0,
+                meta.get('profile_name'),
+                int(meta.get('generation_count') or 0),
+                json.dumps(list(meta.get('doc_types') or [])),
+                now,
+                name,
+            ))
+        with self._db() as conn:
+            conn.executemany('''
+                UPDATE faces SET gender = ?, gender_json = ?, has_profile = ?, profile_name = ?,
+                                 generation_count = ?, doc_types = ?, meta_at = ?
+                WHERE name = ?
+            ''', rows)
+
+    def invalidate(self, name: str):
+        """Drop cached metadata for one face and re-read it in the background."""
+        with self._db() as conn:
+            conn.execute('UPDATE faces SET meta_at = NULL WHERE name = ?', (name,))
+        self._start_meta_fill()
+
+    def forget(self, name: str):
+        with self._db() as conn:
+            conn.execute('DELETE FROM faces WHERE name = ?', (name,))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _where(variant: str, gender: Optional[str], has_profile: Optional[bool]):
+        clauses = [VARIANT_FILTERS.get(variant, VARIANT_FILTERS['both'])]
+        params = []
+        if gender == 'unknown':
+            clauses.append('gender IS NULL')
+        elif gender:
+            clauses.append('gender = ?')
+            params.append(gender)
+        if has_profile is not None:
+            clauses.append('has_profile = ?')
+            params.append(1 if has_profile else 0)
+        return ' AND '.join(clauses), params
+
+    def stats(self) -> Dict:
+        with self._db() as conn:
+            row = conn.execute('''
+                SELECT COUNT(original_mtime) AS originals,
+                       COUNT(white_mtime) AS preprocessed,
+                       COALESCE(SUM(original_mtime IS NOT NULL AND white_mtime IS NULL), 0) AS unprocessed,
+                       COALESCE(SUM(original_mtime IS NOT NULL AND gender IS NULL
+                                    AND meta_at IS NOT NULL), 0) AS missing_gender,
+                       COALESCE(SUM(has_profile), 0) AS with_profile,
+                       COALESCE(SUM(meta_at IS NULL), 0) AS meta_pending
+                FROM faces
+            ''').fetchone()
+        return dict(row)
+
+    def count(self, variant: str = 'both', gender: Optional[str] = None,
+              has_profile: Optional[bool] = None) -> int:
+        where, params = self._where(variant, gender, has_profile)
+        with self._db() as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM faces WHERE {where}', params).fetchone()[0]
+
+    def page(self, variant: str = 'both', limit: int = 60, after: Optional[str] = None,
+             offset: int = 0, gender: Optional[str] = None,
+             has_profile: Optional[bool] = None) -> List[Dict]:
+        """One page of faces ordered by name.
+
+        Pass the last name of the previous page as ``after`` for keyset
+        pagination (cost independent of depth); ``offset`` is kept for
+        callers that jump to an arbitrary page number.
+        """
+        where, params = self._where(variant, gender, has_profile)
+        if after is not None:
+            where += ' AND name > ?'
+            params.append(after)
+            offset = 0
+        sql = f'SELECT * FROM faces WHERE {where} ORDER BY name LIMIT ? OFFSET ?'
+        with self._db() as conn:
+            rows = [dict(r) for r in conn.execute(sql, params + [limit, offset])]
+
+        # Pending rows are left to the background fill
+        stale_before = time.time() - META_TTL
+        stale = [r['name'] for r in rows if r['meta_at'] is not None and r['meta_at'] < stale_before]
+        if stale:
+            self._store_meta(stale)
+            with self._db() as conn:
+                marks = ','.join('?' * len(stale))
+                fresh = {r['name']: dict(r) for r in conn.execute(
+                    f'SELECT * FROM faces WHERE name IN ({marks})', stale)}
+            rows = [fresh.get(r['name'], r) for r in rows]
+
+        for r in rows:
+            r['meta_pending'] = r['meta_at'] is None
+            r['detected_gender'] = json.loads(r['gender_json']) if r['gender_json'] else None
+            r['doc_types'] = json.loads(r['doc_types'] or '[]')
+        return rows
+
+    def names(self, variant: str = 'both', gender: Optional[str] = None) -> List[str]:
+        where, params = self._where(variant, gender, None)
+        with self._db() as conn:
+            return [r[0] for r in conn.execute(f'SELECT name FROM faces WHERE {where} ORDER BY name', params)]
+
+
+def _gender_label(value) -> Optional[str]:
+    """Filterable label from whatever the gender detector stored."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        value = value.get('gender') or value.get('label')
+    return str(value).lower() if value else None
@@ -4,9 +4,18 @@ FastReID Voter — Nearest-neighbor classification voter using DINOv2 embeddings
 For each new prediction, finds the closest approved prediction by embedding
 similarity and votes with that neighbor's classification. Provides a
 visual-similarity-based signal to the multi-voter consensus system.
+
+Approved embeddings are held in an in-process index per scenario (faiss or
+hnswlib HNSW when installed, NumPy brute force otherwise) that is refreshed
+incrementally as approvals land, so a vote is one matrix search instead of a
+candidate query plus a Python cosine loop.  Neighbours are re-checked
+against ai_predictions before they vote, so an approval undone since the
+index loaded it never decides a vote.
 """
 
 import logging
+import threading
+import time
 from typing import Dict, List, Optional
 
 import numpy as np
@@ -15,9 +24,175 @@ from db_connection import get_cursor
 
 logger = logging.getLogger(__name__)
 
+# Optional ANN backends
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
 DEFAULT_SIMILARITY_THRESHOLD = 0.75
 DEFAULT_MAX_CANDIDATES = 50
 
+# Below this many vectors an exact matrix product beats building a graph
+ANN_MIN_SIZE = 5000
+# Pick up approvals newer than the last refresh at most this often
+INDEX_REFRESH_SECONDS = 30
+# Rebuild from scratch periodically to compact rows dropped as un-approved
+INDEX_REBUILD_SECONDS = 3600
+
+
+def _normalize_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.where(norms > 0, norms, 1.0)
+
+
+class ApprovedEmbeddingIndex:
+    """
+    Cosine-similarity index over approved-prediction ReID embeddings for
+    one scenario.
+
+    Vectors are L2-normalised on insert so inner product equals cosine.
+    Each row carries the candidate's prediction metadata.  Rows are only
+    appended between rebuilds; rows whose approval was undone are marked
+    dropped (the ANN graphs can't delete) and skipped by the voter until
+    the next full rebuild.
+    """
+
+    def __init__(self, backend: str = 'auto'):
+        self.backend = backend
+        self.dim = None
+        self.meta: List[dict] = []
+        self.prediction_ids = np.zeros(0, dtype=np.int64)
+        self._vectors = None       # NumPy backend / source for ANN rebuilds
+        self._ann = None
+        self._ann_kind = None
+        self._ann_size = 0
+        self.dropped_rows = set()  # row indices no longer approved
+        self.dropped_ids = set()   # their prediction ids
+
+    def __len__(self):
+        return len(self.meta)
+
+    def drop(self, row_indices):
+        """Mark rows whose prediction is no longer approved."""
+        for i in row_indices:
+            self.dropped_rows.add(i)
+            self.dropped_ids.add(int(self.prediction_ids[i]))
+
+    def add(self, rows: List[dict]):
+        """Append rows with 'id', classification fields and 'reid_embedding'."""
+        vecs = []
+        kept = []
+        for row in rows:
+            vec = np.asarray(row['reid_embedding'], dtype=np.float32)
+            if vec.ndim != 1 or vec.size == 0:
+                continue
+            if self.dim is None:
+                self.dim = vec.size
+            if vec.size != self.dim:
+                continue
+            vecs.append(vec)
+            kept.append({k: v for k, v in row.items() if k != 'reid_embedding'})
+        if not vecs:
+            return
+
+        block = _normalize_rows(np.stack(vecs))
+        self._vectors = block if self._vectors is None else np.vstack([self._vectors, block])
+        self.meta.extend(kept)
+        self.prediction_ids = np.concatenate(
+            [self.prediction_ids, np.array([m['id'] for m in kept], dtype=np.int64)])
+        self._update_ann(block)
+
+    def _choose_backend(self) -> Optional[str]:
+        if self.backend == 'numpy' or (self.backend == 'auto' and len(self) < ANN_MIN_SIZE):
+            return None
+        if self.backend in ('auto', 'faiss') and FAISS_AVAILABLE:
+            return 'faiss'
+        if self.backend in ('auto', 'hnswlib') and HNSWLIB_AVAILABLE:
+            return 'hnswlib'
+        return None
+
+    def _update_ann(self, block: np.ndarray):
+        kind = self._choose_backend()
+        if kind is None:
+            return
+        if self._ann is None or self._ann_kind != kind:
+            # First time over the size threshold: index everything so far
+            block = self._vectors
+            self._ann_size = 0
+            if kind == 'faiss':
+                self._ann = faiss.IndexHNSWFlat(self.dim, 32, faiss.METRIC_INNER_PRODUCT)
+                self._ann.hnsw.efSearch = 128
+            else:
+                self._ann = hnswlib.Index(space='ip', dim=self.dim)
+                self._ann.init_index(max_elements=max(len(self) * 2, 1024),
+                                     ef_construction=200, M=32)
+                self._ann.set_ef(128)
+            self._ann_kind = kind
+
+        if kind == 'faiss':
+            self._ann.add(np.ascontiguousarray(block, dtype=np.float32))
+        else:
+            needed = self._ann_size + len(block)
+            if needed > self._ann.get_max_elements():
+                self._ann.resize_index(needed * 2)
+            self._ann.add_items(block, np.arange(self._ann_size, needed))
+        self._ann_size += len(block)
+
+    def search(self, queries: np.ndarray, k: int):
+        """
+        Top-k neighbours for each query row.
+
+        Returns:
+            (similarities, row_indices), both shaped (n_queries, k'), where
+            k' = min(k, len(self)).  Rows are sorted by descending similarity.
+        """
+        queries = _normalize_rows(np.atleast_2d(queries).astype(np.float32))
+        k = min(k, len(self))
+        if k == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty, empty.astype(np.int64)
+
+        if self._ann_kind == 'faiss':
+            sims, idx = self._ann.search(np.ascontiguousarray(queries), k)
+            return sims, idx
+        if self._ann_kind == 'hnswlib':
+            idx, dist = self._ann.knn_query(queries, k=k)
+            return 1.0 - dist, idx.astype(np.int64)
+
+        sims = queries @ self._vectors.T
+        if k < sims.shape[1]:
+            idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.tile(np.arange(sims.shape[1]), (len(queries), 1))
+        top = np.take_along_axis(sims, idx, axis=1)
+        order = np.argsort(-top, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+
+class _ScenarioIndex:
+    """An ApprovedEmbeddingIndex plus the bookkeeping to keep it fresh."""
+
+    def __init__(self, scenario: str):
+        self.scenario = scenario
+        self.index = ApprovedEmbeddingIndex()
+        self.watermark = None      # max approved_at loaded so far
+        self.seen_ids = set()      # (prediction_id, video_track_id) already indexed
+        self.built_at = 0.0
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+
+
+_indexes: Dict[str, _ScenarioIndex] = {}
+_indexes_lock = threading.Lock()
+
 
 class FastReIDVoter:
     """Nearest-neighbor voter using DINOv2/ReID embeddings."""
@@ -25,99 +200,180 @@ class FastReIDVoter:
     def __init__(self, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
                  max_candidates: int = DEFAULT_MAX_CANDIDATES):
         self.similarity_threshold = similarity_threshold
+        # Neighbours retrieved per query; only the best one that isn't the
+        # query itself is used
         self.max_candidates = max_candidates
 
-    def find_nearest_approved(self, prediction_id: int) -> Optional[dict]:
-        """
-        Find the nearest approved prediction by embedding similarity.
+    # ------------------------------------------------------------------
+    # Approved-embedding index
+    # ------------------------------------------------------------------
 
-        Looks up the embedding for the given prediction via its video_track,
-        then compares against approved predictions with embeddings.
+    def _get_index(self, scenario: str) -> ApprovedEmbeddingIndex:
+        """Return the scenario's index, loading approvals since the last refresh."""
+        with _indexes_lock:
+            entry = _indexes.get(scenario)
+            if entry is None or (entry.built_at
+                                 and time.monotonic() - entry.built_at > INDEX_REBUILD_SECONDS):
+                entry = _ScenarioIndex(scenario)
+                _indexes[scenario] = entry
 
-        Returns:
-            dict with prediction_id, classification, vehicle_tier1/2/3, similarity
-            or None if no match above threshold
-        """
-        # Get the prediction's embedding via video_track
-        with get_cursor(commit=False) as cursor:
-            # First try via camera_object_track -> video_tracks
-            cursor.execute("""
-                SELECT vt.reid_embedding, p.scenario
-                FROM ai_predictions p
-                LEFT JOIN video_tracks vt ON vt.video_id = p.video_id
-                    AND vt.camera_id = (SELECT v.camera_id FROM videos v WHERE v.id = p.video_id)
-                WHERE p.id = %s
-                  AND vt.reid_embedding IS NOT NULL
-                LIMIT 1
-            """, (prediction_id,))
-            row = cursor.fetchone()
+        with entry.lock:
+            now = time.monotonic()
+            if entry.built_at and now - entry.refreshed_at < INDEX_REFRESH_SECONDS:
+                return entry.index
 
-            if not row or not row['reid_embedding']:
-                logger.debug("No embedding found for prediction %d", prediction_id)
-                return None
+            # Rows approved without a reviewed_at (e.g. inserted already
+            # approved) would never pass a reviewed_at watermark; they count
+            # from created_at instead
+            with get_cursor(commit=False) as cursor:
+                cursor.execute("""
+                    SELECT p.id, vt.id AS video_track_id, p.classification,
+                           p.vehicle_tier1, p.vehicle_tier2, p.vehicle_tier3,
+                           p.vehicle_role, vt.reid_embedding,
+                           COALESCE(p.reviewed_at, p.created_at) AS approved_at
+                    FROM ai_predictions p
+                    JOIN videos v ON v.id = p.video_id
+                    JOIN video_tracks vt ON vt.video_id = p.video_id
+                        AND vt.camera_id = v.camera_id
+                    WHERE p.review_status = 'approved'
+                      AND p.scenario = %s
+                      AND vt.reid_embedding IS NOT NULL
+                      AND (%s::timestamptz IS NULL
+                           OR COALESCE(p.reviewed_at, p.created_at) >= %s::timestamptz)
+                """, (scenario, entry.watermark, entry.watermark))
+                rows = cursor.fetchall()
 
-            query_embedding = np.array(row['reid_embedding'], dtype=np.float32)
-            scenario = row['scenario']
+            fresh = []
+            for row in rows:
+                key = (row['id'], row['video_track_id'])
+                if key in entry.seen_ids:
+                    # Dropped as un-approved, then approved again: re-add
+                    if row['id'] not in entry.index.dropped_ids:
+                        continue
+                entry.seen_ids.add(key)
+                fresh.append(dict(row))
+                if row['approved_at'] and (entry.watermark is None
+                                           or row['approved_at'] > entry.watermark):
+                    entry.watermark = row['approved_at']
+            entry.index.dropped_ids.difference_update(row['id'] for row in fresh)
+            entry.index.add(fresh)
+            if not entry.built_at:
+                entry.built_at = now
+                logger.info("FastReID index for %s built: %d embeddings (%s)",
+                            scenario, len(entry.index),
+                            entry.index._ann_kind or 'numpy')
+            elif fresh:
+                logger.debug("FastReID index for %s: +%d embeddings", scenario, len(fresh))
+            entry.refreshed_at = now
+            return entry.index
 
-            # Find approved predictions with embeddings in the same scenario
+    def _load_query_embeddings(self, prediction_ids: List[int]) -> Dict[int, dict]:
+        """One query for the embedding and scenario of each prediction."""
+        with get_cursor(commit=False) as cursor:
             cursor.execute("""
-                SELECT p.id, p.classification, p.vehicle_tier1, p.vehicle_tier2,
-                       p.vehicle_tier3, p.vehicle_role, vt.reid_embedding
+                SELECT DISTINCT ON (p.id) p.id, p.scenario, vt.reid_embedding
                 FROM ai_predictions p
+                JOIN videos v ON v.id = p.video_id
                 JOIN video_tracks vt ON vt.video_id = p.video_id
-                    AND vt.camera_id = (SELECT v.camera_id FROM videos v WHERE v.id = p.video_id)
-                WHERE p.review_status = 'approved'
-                  AND p.id != %s
+                    AND vt.camera_id = v.camera_id
+                WHERE p.id = ANY(%s)
                   AND vt.reid_embedding IS NOT NULL
-                  AND p.scenario = %s
-                ORDER BY p.quality_score DESC NULLS LAST
-                LIMIT %s
-            """, (prediction_id, scenario, self.max_candidates))
+                ORDER BY p.id, vt.id
+            """, (list(prediction_ids),))
+            return {row['id']: dict(row) for row in cursor.fetchall()}
+
+    @staticmethod
+    def _still_approved(prediction_ids) -> set:
+        """The subset of prediction_ids that are approved right now."""
+        if not prediction_ids:
+            return set()
+        with get_cursor(commit=False) as cursor:
+            cursor.execute("""
+                SELECT id FROM ai_predictions
+                WHERE id = ANY(%s) AND review_status = 'approved'
+            """, (list(prediction_ids),))
+            return {row['id'] for row in cursor.fetchall()}
 
-            candidates = cursor.fetchall()
+    def find_nearest_batch(self, prediction_ids: List[int]) -> Dict[int, Optional[dict]]:
+        """
+        Nearest approved prediction for each ID, one matrix search per scenario.
 
-        if not candidates:
-            logger.debug("No approved candidates found for prediction %d", prediction_id)
-            return None
+        Returns:
+            {prediction_id: match dict or None}, see find_nearest_approved
+        """
+        results: Dict[int, Optional[dict]] = {pid: None for pid in prediction_ids}
+        queries = self._load_query_embeddings(prediction_ids)
 
-        # Compute similarities
-        best_match = None
-        best_similarity = -1.0
+        by_scenario: Dict[str, List[dict]] = {}
+        for row in queries.values():
+            by_scenario.setdefault(row['scenario'], []).append(row)
 
-        for cand in candidates:
-            cand_embedding = np.array(cand['reid_embedding'], dtype=np.float32)
-            similarity = self._cosine_similarity(query_embedding, cand_embedding)
+        for scenario, rows in by_scenario.items():
+            index = self._get_index(scenario)
+            rows = [r for r in rows if len(r['reid_embedding']) == index.dim]
+            if not rows:
+                continue
+            mat = np.array([r['reid_embedding'] for r in rows], dtype=np.float32)
+            sims, idx = index.search(mat, self.max_candidates)
 
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match = cand
+            # Neighbours above the threshold, best first, skipping the query
+            # itself and rows already dropped as un-approved
+            candidates = []
+            for row, row_sims, row_idx in zip(rows, sims, idx):
+                above = []
+                for sim, i in zip(row_sims, row_idx):
+                    if i < 0 or i in index.dropped_rows or index.prediction_ids[i] == row['id']:
+                        continue
+                    if sim < self.similarity_threshold:
+                        if not above:
+                            logger.debug("Best match for prediction %d has similarity %.3f "
+                                         "(below threshold %.3f)",
+                                         row['id'], sim, self.similarity_threshold)
+                        break
+                    above.append((float(sim), int(i)))
+                candidates.append(above)
 
-        if best_similarity < self.similarity_threshold:
-            logger.debug("Best match for prediction %d has similarity %.3f (below threshold %.3f)",
-                        prediction_id, best_similarity, self.similarity_threshold)
-            return None
+            # The index only learns of new approvals; check the neighbours
+            # are still approved before they vote
+            neighbour_ids = {int(index.prediction_ids[i]) for above in candidates for _, i in above}
+            approved = self._still_approved(neighbour_ids)
+            index.drop({i for above in candidates for _, i in above
+                        if int(index.prediction_ids[i]) not in approved})
 
-        return {
-            'prediction_id': best_match['id'],
-            'classification': best_match['classification'],
-            'vehicle_tier1': best_match['vehicle_tier1'],
-            'vehicle_tier2': best_match['vehicle_tier2'],
-            'vehicle_tier3': best_match['vehicle_tier3'],
-            'vehicle_role': best_match['vehicle_role'],
-            'similarity': round(float(best_similarity), 4),
-        }
+            for row, above in zip(rows, candidates):
+                best = next(((sim, index.meta[i]) for sim, i in above
+                             if int(index.prediction_ids[i]) in approved), None)
+                if best is None:
+                    continue
+                similarity, cand = best
+                results[row['id']] = {
+                    'prediction_id': cand['id'],
+                    'classification': cand['classification'],
+                    'vehicle_tier1': cand['vehicle_tier1'],
+                    'vehicle_tier2': cand['vehicle_tier2'],
+                    'vehicle_tier3': cand['vehicle_tier3'],
+                    'vehicle_role': cand['vehicle_role'],
+                    'similarity': round(similarity, 4),
+                }
+        return results
 
-    def vote_for_prediction(self, prediction_id: int) -> Optional[dict]:
+    def find_nearest_approved(self, prediction_id: int) -> Optional[dict]:
         """
-        Find nearest approved match and record vote via VoteAggregator.
+        Find the nearest approved prediction by embedding similarity.
+
+        Looks up the embedding for the given prediction via its video_track,
+        then searches the approved-embedding index for its scenario.
 
         Returns:
-            The consensus result from VoteAggregator, or None if no match found
+            dict with prediction_id, classification, vehicle_tier1/2/3, similarity
+            or None if no match above threshold
         """
-        match = self.find_nearest_approved(prediction_id)
-        if not match:
-            return None
+        match = self.find_nearest_batch([prediction_id])[prediction_id]
+        if match is None:
+            logger.debug("No approved match for prediction %d", prediction_id)
+        return match
 
+    def _record_vote(self, prediction_id: int, match: dict) -> dict:
         from vote_aggregator import VoteAggregator
         aggregator = VoteAggregator()
         return aggregator.record_vote(
@@ -130,10 +386,25 @@ class FastReIDVoter:
             metadata={'nearest_prediction_id': match['prediction_id']}
         )
 
+    def vote_for_prediction(self, prediction_id: int) -> Optional[dict]:
+        """
+        Find nearest approved match and record vote via VoteAggregator.
+
+        Returns:
+            The consensus result from VoteAggregator, or None if no match found
+        """
+        match = self.find_nearest_approved(prediction_id)
+        if not match:
+            return None
+        return self._record_vote(prediction_id, match)
+
     def vote_batch(self, prediction_ids: List[int]) -> dict:
         """
         Process multiple predictions through FastReID voting.
 
+        All query embeddings are resolved with one matrix search per
+        scenario; votes are then recorded per prediction.
+
         Returns:
             Summary dict with voted, skipped, errors counts
         """
@@ -141,9 +412,20 @@ class FastReIDVoter:
         skipped = 0
         errors = 0
 
+        try:
+            matches = self.find_nearest_batch(prediction_ids)
+        except Exception as e:
+            logger.warning("FastReID batch search failed: %s", e)
+            matches = None
+
         for pred_id in prediction_ids:
             try:
-                result = self.vote_for_prediction(pred_id)
+                if matches is None:
+                    result = self.vote_for_prediction(pred_id)
+                elif matches.get(pred_id):
+                    result = self._record_vote(pred_id, matches[pred_id])
+                else:
+                    result = None
                 if result:
                     voted += 1
                 else:
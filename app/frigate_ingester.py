@@ -4,21 +4,28 @@ Frigate MQTT event-driven ingester for Groundtruth Studio.
 Subscribes to Frigate's MQTT events and captures snapshots when
 objects (people, vehicles, boats) are detected. Much more efficient
 than time-based polling — only ingests when there's something to see.
+
+Captures run on a bounded worker pool sharing one keep-alive session to
+Frigate; clip caching has its own smaller pool so slow clip downloads
+never hold up snapshot ingestion.
 """
 
 import argparse
-import cv2
+import heapq
+import io
+import itertools
 import json
 import logging
 import os
+import struct
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 
-import numpy as np
-import paho.mqtt.client as mqtt
 import requests
+from requests.adapters import HTTPAdapter
 
 from database import VideoDatabase
 from vehicle_detect_runner import trigger_vehicle_detect
@@ -29,6 +36,63 @@ logger = logging.getLogger(__name__)
 DOC_DETECT_CAMERAS = set(os.environ.get('DOC_DETECT_CAMERAS', '').split(',')) - {''}
 
 
+CAPTURE_WORKERS = int(os.environ.get('FRIGATE_CAPTURE_WORKERS', '4'))
+CLIP_WORKERS = int(os.environ.get('FRIGATE_CLIP_WORKERS', '2'))
+# Captures waiting beyond this are dropped rather than queued unboundedly
+MAX_PENDING_CAPTURES = 64
+MAX_PENDING_CLIPS = 32
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG's SOF header without decoding it."""
+    if data[:2] != b'\xff\xd8':
+        return None
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        seg_len = struct.unpack('>H', data[i + 2:i + 4])[0]
+        # SOF0-SOF15 except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if i + 9 > n:
+                return None
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + seg_len
+    return None
+
+
+def _image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """JPEG header fast path, falling back to PIL for other formats.
+
+    None for images that are truncated or corrupt: a JPEG must end with the
+    EOI marker (the header parse alone accepts a cut-off download), anything
+    else must pass PIL's verify().
+    """
+    if data[:2] == b'\xff\xd8':
+        if not data.endswith(b'\xff\xd9'):
+            return None
+        dims = _jpeg_dimensions(data)
+        if dims:
+            return dims
+    try:
+        from PIL import Image
+        img = Image.open(io.BytesIO(data))
+        size = img.size
+        img.verify()
+        return size
+    except Exception:
+        return None
+
+
 def _trigger_doc_detect_if_configured(camera, video_id, thumbnail_path):
     """Trigger document detection on cameras configured for it."""
     if not DOC_DETECT_CAMERAS or camera not in DOC_DETECT_CAMERAS:
@@ -83,11 +147,137 @@ class FrigateEventIngester:
             'snapshots_captured': 0,
             'duplicates_skipped': 0,
             'cooldown_skipped': 0,
-            'errors': 0
+            'errors': 0,
+            # Pipeline stages: current queue depth, drops, and average latency
+            'capture_queue_depth': 0,
+            'capture_dropped': 0,
+            'clip_queue_depth': 0,
+            'clip_dropped': 0,
+            'clips_cached': 0,
+            'fetch_ms_avg': 0.0,
+            'store_ms_avg': 0.0,
+            'clip_ms_avg': 0.0,
         }
+        self._stats_lock = threading.Lock()
+
+        # Delayed submissions (motion bursts) without a sleeping thread each
+        self._timers = []
+        self._timer_seq = itertools.count()
+        self._timers_cv = threading.Condition()
+        self._timer_thread = None
+
+        self._open_pipeline()
 
         os.makedirs(self.thumbnail_dir, exist_ok=True)
 
+    # ------------------------------------------------------------------
+    # Pipeline plumbing
+    # ------------------------------------------------------------------
+
+    def _open_pipeline(self):
+        """Create the shared keep-alive session and bounded worker pools."""
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=CAPTURE_WORKERS + CLIP_WORKERS)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._capture_pool = ThreadPoolExecutor(max_workers=CAPTURE_WORKERS,
+                                                thread_name_prefix='frigate-capture')
+        self._clip_pool = ThreadPoolExecutor(max_workers=CLIP_WORKERS,
+                                             thread_name_prefix='frigate-clip')
+        self._pipeline_open = True
+
+    def _close_pipeline(self):
+        """Drop pending timers, cancel queued work and close the session.
+
+        Captures and clips already running finish in the background; start()
+        opens a fresh pipeline if the ingester is restarted.
+        """
+        with self._timers_cv:
+            self._timers.clear()
+            self._timer_thread = None
+            self._timers_cv.notify_all()
+        self._capture_pool.shutdown(wait=False, cancel_futures=True)
+        self._clip_pool.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+        with self._stats_lock:
+            # Cancelled work never runs its depth decrement
+            self.stats['capture_queue_depth'] = 0
+            self.stats['clip_queue_depth'] = 0
+        self._pipeline_open = False
+
+    def _record_latency(self, stage: str, ms: float):
+        """Exponential moving average of per-stage latency in self.stats."""
+        key = f'{stage}_ms_avg'
+        with self._stats_lock:
+            prev = self.stats[key]
+            self.stats[key] = round(ms if prev == 0 else prev * 0.9 + ms * 0.1, 1)
+
+    def _submit(self, stage: str, pool: ThreadPoolExecutor, limit: int, fn, *args) -> bool:
+        """Queue work on a bounded pool; drops (and counts) it when backed up."""
+        depth_key = f'{stage}_queue_depth'
+        with self._stats_lock:
+            if self.stats[depth_key] >= limit:
+                self.stats[f'{stage}_dropped'] += 1
+                return False
+            self.stats[depth_key] += 1
+
+        def run():
+            try:
+                fn(*args)
+            finally:
+                with self._stats_lock:
+                    # Clamped: stop() zeroes the depth while tasks still run
+                    self.stats[depth_key] = max(0, self.stats[depth_key] - 1)
+
+        try:
+            pool.submit(run)
+        except RuntimeError:
+            # Pool shut down by stop() while this event was in flight
+            with self._stats_lock:
+                self.stats[depth_key] -= 1
+            return False
+        return True
+
+    def _submit_capture(self, fn, *args) -> bool:
+        if not self._submit('capture', self._capture_pool, MAX_PENDING_CAPTURES, fn, *args):
+            logger.warning("Capture queue full, dropping snapshot capture")
+            return False
+        return True
+
+    def _submit_later(self, delay: float, fn, *args):
+        """Submit a capture after a delay, via one shared timer thread."""
+        with self._timers_cv:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_seq), fn, args))
+            if self._timer_thread is None or not self._timer_thread.is_alive():
+                self._timer_thread = threading.Thread(target=self._timer_loop, daemon=True,
+                                                      name='frigate-timers')
+                self._timer_thread.start()
+            self._timers_cv.notify()
+
+    def _timer_loop(self):
+        me = threading.current_thread()
+        while True:
+            with self._timers_cv:
+                while not self._timers and self._timer_thread is me:
+                    self._timers_cv.wait()
+                if self._timer_thread is not me:
+                    return  # stopped (or replaced after a restart)
+                due, _, fn, args = self._timers[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._timers_cv.wait(wait)
+                    continue
+                heapq.heappop(self._timers)
+            self._submit_capture(fn, *args)
+
+    def _fetch(self, url: str, **params):
+        """GET from Frigate on the shared session, timing the fetch stage."""
+        start = time.monotonic()
+        try:
+            return self._session.get(url, params=params, timeout=10)
+        finally:
+            self._record_latency('fetch', (time.monotonic() - start) * 1000)
+
     def _on_connect(self, client, userdata, flags, reason_code, properties=None):
         """Called when MQTT connection is established."""
         if reason_code == 0:
@@ -185,14 +375,9 @@ class FrigateEventIngester:
 
         logger.info(f"Event: {event_type} {camera} {label} score={score:.2f} event={event_id[:8]}")
 
-        # Capture in background to not block MQTT
-        thread = threading.Thread(
-            target=self._capture_event_snapshot,
-            args=(camera, label, score, event_id, has_snapshot, data),
-            daemon=True,
-            name=f"capture-{event_id[:8]}"
-        )
-        thread.start()
+        # Capture on the worker pool to not block MQTT
+        self._submit_capture(self._capture_event_snapshot,
+                             camera, label, score, event_id, has_snapshot, data)
 
     def _handle_motion(self, camera: str):
         """Handle a motion ON event — capture snapshot for YOLO-World classification.
@@ -212,26 +397,13 @@ class FrigateEventIngester:
         logger.info(f"Motion trigger: {camera}")
 
         # Burst capture: take 3 snapshots over 4 seconds to catch fast-moving objects
-        def _burst_capture():
-            for i, delay in enumerate([0.5, 1.5, 2.0]):
-                time.sleep(delay)
-                self._capture_motion_snapshot(camera, burst_index=i)
-
-        thread = threading.Thread(
-            target=_burst_capture,
-            daemon=True,
-            name=f"motion-{camera}-{int(time.time())}"
-        )
-        thread.start()
+        for i, offset in enumerate([0.5, 2.0, 4.0]):
+            self._submit_later(offset, self._capture_motion_snapshot, camera, i)
 
     def _capture_motion_snapshot(self, camera: str, burst_index: int = 0):
         """Fetch a snapshot triggered by motion and run YOLO-World on it."""
         try:
-            resp = requests.get(
-                f"{self.frigate_url}/api/{camera}/latest.jpg",
-                params={'quality': 95},
-                timeout=10
-            )
+            resp = self._fetch(f"{self.frigate_url}/api/{camera}/latest.jpg", quality=95)
             resp.raise_for_status()
             image_bytes = resp.content
 
@@ -239,13 +411,13 @@ class FrigateEventIngester:
                 logger.debug(f"Motion snapshot too small for {camera}, skipping")
                 return
 
-            np_arr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-            if img is None:
+            dims = _image_dimensions(image_bytes)
+            if dims is None:
                 logger.warning(f"Failed to decode motion snapshot for {camera}")
                 return
 
-            height, width = img.shape[:2]
+            width, height = dims
+            store_start = time.monotonic()
 
             timestamp = datetime.now()
             ts_str = timestamp.strftime("%Y%m%d_%H%M%S")
@@ -276,6 +448,8 @@ class FrigateEventIngester:
                 metadata=metadata
             )
 
+            self._record_latency('store', (time.monotonic() - store_start) * 1000)
+
             # Run YOLO-World — this is the key: it knows snowmobile, ATV, UTV, etc.
             trigger_vehicle_detect(video_id, thumbnail_path, force_review=True)
             _trigger_doc_detect_if_configured(camera, video_id, thumbnail_path)
@@ -301,10 +475,9 @@ class FrigateEventIngester:
 
             if has_snapshot:
                 try:
-                    resp = requests.get(
+                    resp = self._fetch(
                         f"{self.frigate_url}/api/events/{event_id}/snapshot.jpg",
-                        params={'crop': 0, 'quality': 95},  # Full frame, high quality
-                        timeout=10
+                        crop=0, quality=95  # Full frame, high quality
                     )
                     if resp.status_code == 200 and len(resp.content) > 1000:
                         image_bytes = resp.content
@@ -312,23 +485,19 @@ class FrigateEventIngester:
                     logger.debug(f"Event snapshot failed, falling back to latest: {e}")
 
             if image_bytes is None:
-                resp = requests.get(
-                    f"{self.frigate_url}/api/{camera}/latest.jpg",
-                    params={'quality': 95},
-                    timeout=10
-                )
+                resp = self._fetch(f"{self.frigate_url}/api/{camera}/latest.jpg", quality=95)
                 resp.raise_for_status()
                 image_bytes = resp.content
 
-            # Decode to get dimensions
-            np_arr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-            if img is None:
+            # Dimensions from the JPEG header; no full decode needed
+            dims = _image_dimensions(image_bytes)
+            if dims is None:
                 logger.warning(f"Failed to decode snapshot for {camera}")
                 self.stats['errors'] += 1
                 return
 
-            height, width = img.shape[:2]
+            width, height = dims
+            store_start = time.monotonic()
 
             # Generate filename
             timestamp = datetime.now()
@@ -387,30 +556,13 @@ class FrigateEventIngester:
                 metadata=metadata
             )
 
+            self._record_latency('store', (time.monotonic() - store_start) * 1000)
+
             # Proactively cache the event clip (prevents expiration before review)
             if metadata.get('has_clip', False) and event_id:
-                def _cache_clip(_frigate_url, _event_id, _camera):
-                    try:
-                        from video_utils import VideoProcessor
-                        vp = VideoProcessor()
-                        clip_result = vp.fetch_frigate_clip(
-                            frigate_url=_frigate_url,
-                            event_id=_event_id,
-                            camera=_camera
-                        )
-                        if clip_result['success']:
-                            logger.info(f"Cached clip for event {_event_id}")
-                        else:
-                            logger.debug(f"Clip not available for event {_event_id}: {clip_result.get('error')}")
-                    except Exception as e:
-                        logger.debug(f"Clip cache failed for {_event_id}: {e}")
-
-                threading.Thread(
-                    target=_cache_clip,
-                    args=(self.frigate_url, event_id, camera),
-                    daemon=True,
-                    name=f"clip-cache-{event_id[:8]}"
-                ).start()
+                if not self._submit('clip', self._clip_pool, MAX_PENDING_CLIPS,
+                                    self._cache_clip, event_id, camera):
+                    logger.debug(f"Clip queue full, not caching clip for {event_id}")
 
             # Trigger our YOLO-World pipeline for detailed classification
             trigger_vehicle_detect(video_id, thumbnail_path, force_review=True)
@@ -426,6 +578,28 @@ class FrigateEventIngester:
             logger.error(f"Failed to capture snapshot for {camera}: {e}", exc_info=True)
             self.stats['errors'] += 1
 
+    def _cache_clip(self, event_id: str, camera: str):
+        """Clip-pool stage: download the event clip into the clip cache."""
+        start = time.monotonic()
+        try:
+            from video_utils import VideoProcessor
+            vp = VideoProcessor()
+            clip_result = vp.fetch_frigate_clip(
+                frigate_url=self.frigate_url,
+                event_id=event_id,
+                camera=camera
+            )
+            if clip_result['success']:
+                with self._stats_lock:
+                    self.stats['clips_cached'] += 1
+                logger.info(f"Cached clip for event {event_id}")
+            else:
+                logger.debug(f"Clip not available for event {event_id}: {clip_result.get('error')}")
+        except Exception as e:
+            logger.debug(f"Clip cache failed for {event_id}: {e}")
+        finally:
+            self._record_latency('clip', (time.monotonic() - start) * 1000)
+
     def _cleanup_cooldowns(self):
         """Periodically clean up old cooldown entries to prevent memory growth."""
         while not self._stop_flag.is_set():
@@ -448,11 +622,15 @@ class FrigateEventIngester:
         logger.info(f"  Min score: {self.MIN_SCORE}")
         logger.info(f"  Cooldown: {self.CAMERA_COOLDOWN}s per event")
 
+        if not self._pipeline_open:
+            self._open_pipeline()
+
         # Start cooldown cleanup thread
         cleanup_thread = threading.Thread(target=self._cleanup_cooldowns, daemon=True)
         cleanup_thread.start()
 
         # Set up MQTT client
+        import paho.mqtt.client as mqtt
         self._client = mqtt.Client(
             client_id="groundtruth-frigate-ingester",
             callback_api_version=mqtt.CallbackAPIVersion.VERSION2
@@ -490,7 +668,7 @@ class FrigateEventIngester:
     def get_cameras(self):
         """Get list of Frigate cameras."""
         try:
-            resp = requests.get(f"{self.frigate_url}/api/config", timeout=5)
+            resp = self._session.get(f"{self.frigate_url}/api/config", timeout=5)
             if resp.ok:
                 config = resp.json()
                 return list(config.get('cameras', {}).keys())
@@ -512,6 +690,7 @@ class FrigateEventIngester:
         self._stop_flag.set()
         if self._client:
             self._client.disconnect()
+        self._close_pipeline()
 
 
 # Module-level singleton for API integration
@@ -13,6 +13,93 @@ import cv2
 logger = logging.getLogger(__name__)
 
 
+# Usability thresholds shared by the single-crop and batch paths
+MIN_SHARPNESS = 50
+MIN_BRIGHTNESS = 30
+MAX_BRIGHTNESS = 240
+MIN_CONTRAST = 15
+MIN_AREA = 3600  # 60x60
+
+# Batch scoring switches from per-crop slices of the shared grayscale frame
+# to a whole-frame Laplacian + integral images once the crops together cover
+# this many frames' worth of pixels (the whole-frame pass costs about as much
+# as slicing one frame's area of crops).
+BATCH_INTEGRAL_MIN_COVERAGE = 1.0
+
+
+def _clamp_bbox(bbox: dict, img_w: int, img_h: int):
+    """Clamp a bbox dict to the frame, returning integer (x, y, w, h)."""
+    x = int(bbox.get('x', 0))
+    y = int(bbox.get('y', 0))
+    w = int(bbox.get('width', 0))
+    h = int(bbox.get('height', 0))
+
+    x = max(0, min(x, img_w - 1))
+    y = max(0, min(y, img_h - 1))
+    w = min(w, img_w - x)
+    h = min(h, img_h - y)
+    return x, y, w, h
+
+
+def _empty_quality(area: int, flag: str) -> dict:
+    return {
+        'quality_score': 0.0,
+        'sharpness': 0.0,
+        'brightness': 0.0,
+        'contrast': 0.0,
+        'area': area,
+        'usable': False,
+        'flags': [flag],
+    }
+
+
+def _quality_result(sharpness: float, brightness: float, contrast: float, area: int) -> dict:
+    """Apply usability thresholds and the composite score to raw metrics."""
+    flags = []
+    if sharpness < MIN_SHARPNESS:
+        flags.append('too_blurry')
+    if brightness < MIN_BRIGHTNESS:
+        flags.append('too_dark')
+    if brightness > MAX_BRIGHTNESS:
+        flags.append('washed_out')
+    if contrast < MIN_CONTRAST:
+        flags.append('low_contrast')
+    if area < MIN_AREA:
+        flags.append('too_small')
+
+    usable = len(flags) == 0
+
+    # Composite quality score: normalized product of sharpness and contrast
+    # Clamped to [0, 1]
+    quality_score = min(1.0, (sharpness / 500.0) * (contrast / 80.0))
+    quality_score = max(0.0, quality_score)
+
+    return {
+        'quality_score': round(quality_score, 4),
+        'sharpness': round(sharpness, 2),
+        'brightness': round(brightness, 2),
+        'contrast': round(contrast, 2),
+        'area': area,
+        'usable': usable,
+        'flags': flags,
+    }
+
+
+def _gray_crop_quality(gray: np.ndarray) -> dict:
+    """Quality dict for an already-extracted grayscale crop."""
+    # Sharpness: variance of Laplacian (higher = sharper)
+    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
+    sharpness = float(laplacian.var())
+
+    # Brightness: mean pixel intensity
+    brightness = float(gray.mean())
+
+    # Contrast: standard deviation of pixel intensities
+    contrast = float(gray.std())
+
+    return _quality_result(sharpness, brightness, contrast, gray.shape[0] * gray.shape[1])
+
+
 def compute_crop_quality(image_bgr, bbox: dict) -> dict:
     """Compute quality metrics for a detection crop.
 
@@ -36,28 +123,12 @@ def compute_crop_quality(image_bgr, bbox: dict) -> dict:
             image_bgr = np.array(image_bgr.convert('RGB'))
             image_bgr = cv2.cvtColor(image_bgr, cv2.COLOR_RGB2BGR)
 
-        x = int(bbox.get('x', 0))
-        y = int(bbox.get('y', 0))
-        w = int(bbox.get('width', 0))
-        h = int(bbox.get('height', 0))
-
         # Clamp to image bounds
         img_h, img_w = image_bgr.shape[:2]
-        x = max(0, min(x, img_w - 1))
-        y = max(0, min(y, img_h - 1))
-        w = min(w, img_w - x)
-        h = min(h, img_h - y)
+        x, y, w, h = _clamp_bbox(bbox, img_w, img_h)
 
         if w < 5 or h < 5:
-            return {
-                'quality_score': 0.0,
-                'sharpness': 0.0,
-                'brightness': 0.0,
-                'contrast': 0.0,
-                'area': w * h,
-                'usable': False,
-                'flags': ['too_small'],
-            }
+            return _empty_quality(w * h, 'too_small')
 
         # Extract crop
         crop = image_bgr[y:y+h, x:x+w]
@@ -65,57 +136,126 @@ def compute_crop_quality(image_bgr, bbox: dict) -> dict:
         # Convert to grayscale for metrics
         gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
 
-        # Sharpness: variance of Laplacian (higher = sharper)
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        sharpness = float(laplacian.var())
-
-        # Brightness: mean pixel intensity
-        brightness = float(gray.mean())
-
-        # Contrast: standard deviation of pixel intensities
-        contrast = float(gray.std())
-
-        # Area
-        area = w * h
-
-        # Determine usability flags
-        flags = []
-        if sharpness < 50:
-            flags.append('too_blurry')
-        if brightness < 30:
-            flags.append('too_dark')
-        if brightness > 240:
-            flags.append('washed_out')
-        if contrast < 15:
-            flags.append('low_contrast')
-        if area < 3600:  # 60x60
-            flags.append('too_small')
-
-        usable = len(flags) == 0
-
-        # Composite quality score: normalized product of sharpness and contrast
-        # Clamped to [0, 1]
-        quality_score = min(1.0, (sharpness / 500.0) * (contrast / 80.0))
-        quality_score = max(0.0, quality_score)
-
-        return {
-            'quality_score': round(quality_score, 4),
-            'sharpness': round(sharpness, 2),
-            'brightness': round(brightness, 2),
-            'contrast': round(contrast, 2),
-            'area': area,
-            'usable': usable,
-            'flags': flags,
-        }
+        return _gray_crop_quality(gray)
 
     except Exception as e:
         logger.warning(f"Failed to compute crop quality: {e}")
-        return {
-            'quality_score': 0.0,
-            'sharpness': 0.0,
-            'brightness': 0.0,
-            'contrast': 0.0,
-            'area': 0,
-            'usable': False,
-            'flags': ['error'],
-        }
+        return _empty_quality(0, 'error')
+
+
+def _frame_gray(frame) -> np.ndarray:
+    """Grayscale of a full frame (BGR/gray ndarray or PIL Image), converted once."""
+    if not isinstance(frame, np.ndarray):
+        # RGB2GRAY on the RGB array matches RGB->BGR->GRAY without the extra copy
+        return cv2.cvtColor(np.array(frame.convert('RGB')), cv2.COLOR_RGB2GRAY)
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def _rect_sum(integral: np.ndarray, x: int, y: int, w: int, h: int) -> float:
+    return float(integral[y + h, x + w] - integral[y, x + w]
+                 - integral[y + h, x] + integral[y, x])
+
+
+def _crop_ring(lap: np.ndarray, x: int, y: int, w: int, h: int) -> np.ndarray:
+    """The 1-pixel border ring of a crop, in a fixed order (top, bottom, left, right)."""
+    return np.concatenate((
+        lap[y, x:x + w],
+        lap[y + h - 1, x:x + w],
+        lap[y + 1:y + h - 1, x],
+        lap[y + 1:y + h - 1, x + w - 1],
+    ))
+
+
+def _crop_ring_laplacian(gray: np.ndarray, x: int, y: int, w: int, h: int) -> np.ndarray:
+    """Laplacian of a crop's border ring as if the crop were filtered on its own.
+
+    The 3x3 kernel only reaches one pixel out, so a 3-pixel strip along each
+    edge reproduces the crop's own reflected border exactly.
+    """
+    crop = gray[y:y + h, x:x + w]
+    top = cv2.Laplacian(np.ascontiguousarray(crop[:3]), cv2.CV_64F)
+    bottom = cv2.Laplacian(np.ascontiguousarray(crop[-3:]), cv2.CV_64F)
+    left = cv2.Laplacian(np.ascontiguousarray(crop[:, :3]), cv2.CV_64F)
+    right = cv2.Laplacian(np.ascontiguousarray(crop[:, -3:]), cv2.CV_64F)
+    return np.concatenate((top[0], bottom[-1], left[1:-1, 0], right[1:-1, -1]))
+
+
+def compute_crop_quality_batch(frame, bboxes) -> list:
+    """Compute quality metrics for every detection crop in one frame.
+
+    Same per-crop dicts as compute_crop_quality, in bbox order, but the frame
+    is converted to grayscale once.  When the crops together cover less than
+    BATCH_INTEGRAL_MIN_COVERAGE frames, each is scored from a slice of that
+    grayscale frame.  Otherwise the Laplacian is run once over the whole frame
+    and per-crop sums come from integral images; the crop's border ring, where
+    a standalone Laplacian would reflect at the crop edge instead of seeing the
+    neighbouring pixels, is swapped for its crop-local values.
+
+    Args:
+        frame: numpy array (BGR format) or PIL Image of the full frame
+        bboxes: iterable of dicts with 'x', 'y', 'width', 'height' keys
+
+    Returns:
+        list of quality dicts, one per bbox
+    """
+    bboxes = list(bboxes)
+    if not bboxes:
+        return []
+
+    try:
+        gray = _frame_gray(frame)
+        img_h, img_w = gray.shape[:2]
+        rects = [_clamp_bbox(bbox, img_w, img_h) for bbox in bboxes]
+    except Exception as e:
+        logger.warning(f"Failed to compute crop quality batch: {e}")
+        return [_empty_quality(0, 'error') for _ in bboxes]
+
+    covered = sum(w * h for _x, _y, w, h in rects if w >= 5 and h >= 5)
+    integrals = None
+    if covered >= BATCH_INTEGRAL_MIN_COVERAGE * img_w * img_h:
+        try:
+            lap = cv2.Laplacian(gray, cv2.CV_64F)
+            integrals = (lap,
+                         cv2.integral2(gray, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F),
+                         cv2.integral2(lap, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F))
+        except Exception as e:
+            logger.warning(f"Failed to compute crop quality batch: {e}")
+            return [_empty_quality(0, 'error') for _ in bboxes]
+
+    results = []
+    for x, y, w, h in rects:
+        if w < 5 or h < 5:
+            results.append(_empty_quality(w * h, 'too_small'))
+            continue
+        try:
+            if integrals is None:
+                results.append(_gray_crop_quality(gray[y:y + h, x:x + w]))
+            else:
+                results.append(_integral_crop_quality(gray, integrals, x, y, w, h))
+        except Exception as e:
+            logger.warning(f"Failed to compute crop quality: {e}")
+            results.append(_empty_quality(0, 'error'))
+
+    return results
+
+
+def _integral_crop_quality(gray: np.ndarray, integrals, x: int, y: int, w: int, h: int) -> dict:
+    """Quality dict for one crop from whole-frame Laplacian and integral images."""
+    lap, (gray_sum, gray_sqsum), (lap_sum, lap_sqsum) = integrals
+    area = w * h
+
+    brightness = _rect_sum(gray_sum, x, y, w, h) / area
+    contrast = float(np.sqrt(max(0.0, _rect_sum(gray_sqsum, x, y, w, h) / area
+                                 - brightness * brightness)))
+
+    frame_ring = _crop_ring(lap, x, y, w, h)
+    crop_ring = _crop_ring_laplacian(gray, x, y, w, h)
+    lap_total = _rect_sum(lap_sum, x, y, w, h) - frame_ring.sum() + crop_ring.sum()
+    lap_sq_total = (_rect_sum(lap_sqsum, x, y, w, h)
+                    - np.dot(frame_ring, frame_ring) + np.dot(crop_ring, crop_ring))
+    lap_mean = lap_total / area
+    sharpness = float(max(0.0, lap_sq_total / area - lap_mean * lap_mean))
+
+    return _quality_result(sharpness, float(brightness), contrast, area)
@@ -7,19 +7,27 @@ positions. Instead of blindly interpolating bbox coordinates, we run real
 detection and match results to the expected object using class + IoU.
 
 Frame images are cached to disk for the filmstrip review page.
+
+Intermediate frames are decoded in one forward pass over the video, run
+through the model in batches, and their cache JPEGs written by a small
+thread pool.  Interpolation jobs go through a single worker queue so
+concurrent requests share the model instead of contending for it.
 """
 
 import os
+import queue
 import time
 import logging
 import threading
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 
-import cv2
 import requests
 
+from video_utils import decode_frames_at
+
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -30,6 +38,9 @@ DOWNLOAD_DIR = "/opt/groundtruth-studio/downloads"
 API_BASE_URL = "http://localhost:5050"
 MODEL_NAME = "vehicle-world-v1"
 MODEL_VERSION = "2.0"
+INFERENCE_BATCH_SIZE = 8  # frames per model.predict call
+CACHE_WRITE_WORKERS = 2
+INTERP_QUEUE_MAX = 500  # queued interpolation jobs before submits are refused
 
 
 def _interpolate_bbox(bbox_start: Dict, bbox_end: Dict, fraction: float) -> Dict:
@@ -134,16 +145,63 @@ def _ensure_frame_cache_dir(video_id: int) -> str:
     return cache_dir
 
 
+def _parse_detections(result) -> List[Dict]:
+    """Convert one YOLO-World result into filtered vehicle detection dicts."""
+    from vehicle_detect_runner import (ALL_CLASSES, VEHICLE_DISPLAY_NAMES, CLASS_CONF_THRESHOLDS,
+                                       DEFAULT_CONF_THRESHOLD, PERSON_CLASS_ID)
+    detections = []
+    if result.boxes is None or len(result.boxes) == 0:
+        return detections
+    for box in result.boxes:
+        x1, y1, x2, y2 = box.xyxy[0].tolist()
+        confidence = float(box.conf[0])
+        class_id = int(box.cls[0])
+
+        if class_id == PERSON_CLASS_ID:
+            continue
+
+        raw_class = ALL_CLASSES[class_id] if class_id < len(ALL_CLASSES) else "unknown"
+        det_class = VEHICLE_DISPLAY_NAMES.get(raw_class, raw_class)
+
+        min_conf = CLASS_CONF_THRESHOLDS.get(det_class, DEFAULT_CONF_THRESHOLD)
+        if confidence < min_conf:
+            continue
+
+        det_bbox = {
+            'x': int(x1), 'y': int(y1),
+            'width': int(x2 - x1), 'height': int(y2 - y1)
+        }
+
+        # Skip degenerate boxes
+        if det_bbox['width'] < 5 or det_bbox['height'] < 5:
+            continue
+
+        detections.append({
+            'class': det_class,
+            'bbox': det_bbox,
+            'confidence': confidence,
+        })
+    return detections
+
+
+def _write_cache_frame(frame_path: str, frame_bgr):
+    import cv2
+    cv2.imwrite(frame_path, frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, 85])
+
+
 def run_guided_interpolation(video_id: int, start_pred_id: int, end_pred_id: int) -> Optional[Dict]:
     """
     Run guided interpolation between two approved keyframe predictions.
 
     For each 1-second intermediate frame:
-    1. Extract the frame from video
-    2. Save frame JPEG to cache for review page
-    3. Run YOLO-World inference
+    1. Extract the frame from video (one sequential decode pass)
+    2. Save frame JPEG to cache for review page (thread pool)
+    3. Run YOLO-World inference (batched)
     4. Match detections to expected class + interpolated position
-    5. Submit matched detections as predictions
+    5. Submit all frames' predictions in one batch request
+
+    Prefer submit_interpolation() from request handlers; it runs jobs one
+    at a time on a shared worker.
 
     Args:
         video_id: GT Studio video ID
@@ -153,6 +211,7 @@ def run_guided_interpolation(video_id: int, start_pred_id: int, end_pred_id: int
     Returns:
         Result dict with counts, or None on failure
     """
+    import cv2
     from database import VideoDatabase
     db = VideoDatabase()
 
@@ -250,7 +309,7 @@ def run_guided_interpolation(video_id: int, start_pred_id: int, end_pred_id: int
         )
 
         # Load YOLO-World model (reuse singleton from vehicle_detect_runner)
-        from vehicle_detect_runner import _get_model, CONF_THRESHOLD, DEVICE, ALL_CLASSES, VEHICLE_DISPLAY_NAMES, CLASS_CONF_THRESHOLDS, DEFAULT_CONF_THRESHOLD, PERSON_CLASS_ID
+        from vehicle_detect_runner import _get_model, CONF_THRESHOLD, DEVICE
         model = _get_model()
         if model is None:
             logger.error("Interpolation failed: YOLO-World model not available")
@@ -263,115 +322,91 @@ def run_guided_interpolation(video_id: int, start_pred_id: int, end_pred_id: int
         predictions = []
         frames_detected = 0
         total_duration = end_ts - start_ts
+        frame_times = {int(ts * fps): ts for ts in sample_times}
 
-        for timestamp in sample_times:
-            # Seek to frame
-            frame_number = int(timestamp * fps)
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame_bgr = cap.read()
-            if not ret:
-                logger.warning(f"Interpolation: could not read frame at {timestamp}s")
-                continue
-
-            img_height, img_width = frame_bgr.shape[:2]
-
-            # Save frame to cache
-            timestamp_ms = int(timestamp * 1000)
-            frame_filename = f"frame_{timestamp_ms}.jpg"
-            frame_path = os.path.join(cache_dir, frame_filename)
-            cv2.imwrite(frame_path, frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, 85])
-
-            # Compute expected position via linear interpolation
-            fraction = (timestamp - start_ts) / total_duration
-            expected_bbox = _interpolate_bbox(start_bbox, end_bbox, fraction)
-
-            # Run YOLO-World inference
+        def infer_batch(batch):
+            """Run one model.predict over a batch of (timestamp, frame_bgr)."""
+            nonlocal frames_detected
             from PIL import Image
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            pil_img = Image.fromarray(frame_rgb)
+            images = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for _, frame in batch]
 
             start_time = time.time()
             results = model.predict(
-                source=pil_img,
+                source=images,
                 conf=CONF_THRESHOLD,
                 device=DEVICE,
                 verbose=False
             )
-            inference_ms = (time.time() - start_time) * 1000
-
-            # Parse detections
-            frame_detections = []
-            result = results[0]
-            if result.boxes is not None and len(result.boxes) > 0:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    confidence = float(box.conf[0])
-                    class_id = int(box.cls[0])
-
-                    if class_id == PERSON_CLASS_ID:
-                        continue
-
-                    raw_class = ALL_CLASSES[class_id] if class_id < len(ALL_CLASSES) else "unknown"
-                    det_class = VEHICLE_DISPLAY_NAMES.get(raw_class, raw_class)
-
-                    min_conf = CLASS_CONF_THRESHOLDS.get(det_class, DEFAULT_CONF_THRESHOLD)
-                    if confidence < min_conf:
-                        continue
-
-                    det_bbox = {
-                        'x': int(x1), 'y': int(y1),
-                        'width': int(x2 - x1), 'height': int(y2 - y1)
-                    }
-
-                    # Skip degenerate boxes
-                    if det_bbox['width'] < 5 or det_bbox['height'] < 5:
-                        continue
-
-                    frame_detections.append({
-                        'class': det_class,
-                        'bbox': det_bbox,
-                        'confidence': confidence,
+            inference_ms = (time.time() - start_time) * 1000 / len(batch)
+
+            for (timestamp, _frame), result in zip(batch, results):
+                frame_filename = f"frame_{int(timestamp * 1000)}.jpg"
+
+                # Compute expected position via linear interpolation
+                fraction = (timestamp - start_ts) / total_duration
+                expected_bbox = _interpolate_bbox(start_bbox, end_bbox, fraction)
+
+                # Match to expected object
+                match = _match_to_expected(_parse_detections(result), class_name, expected_bbox)
+
+                if match:
+                    frames_detected += 1
+                    predictions.append({
+                        'prediction_type': 'keyframe',
+                        'confidence': round(match['confidence'], 4),
+                        'timestamp': timestamp,
+                        'scenario': 'vehicle_detection',
+                        'tags': {
+                            'class': class_name,
+                            'vehicle_type': class_name,
+                            'source': 'interpolation',
+                            'track_id': track_id,
+                            'match_iou': round(match.get('match_iou', 0), 4),
+                            'frame_cache': frame_filename,
+                        },
+                        'bbox': match['bbox'],
+                        'inference_time_ms': round(inference_ms, 2),
+                    })
+                else:
+                    # Store unmatched frame info as prediction with low confidence
+                    predictions.append({
+                        'prediction_type': 'keyframe',
+                        'confidence': 0.0,
+                        'timestamp': timestamp,
+                        'scenario': 'vehicle_detection',
+                        'tags': {
+                            'class': class_name,
+                            'vehicle_type': class_name,
+                            'source': 'interpolation',
+                            'track_id': track_id,
+                            'unmatched': True,
+                            'frame_cache': frame_filename,
+                        },
+                        'bbox': expected_bbox,
+                        'inference_time_ms': round(inference_ms, 2),
                     })
 
-            # Match to expected object
-            match = _match_to_expected(frame_detections, class_name, expected_bbox)
-
-            if match:
-                frames_detected += 1
-                predictions.append({
-                    'prediction_type': 'keyframe',
-                    'confidence': round(match['confidence'], 4),
-                    'timestamp': timestamp,
-                    'scenario': 'vehicle_detection',
-                    'tags': {
-                        'class': class_name,
-                        'vehicle_type': class_name,
-                        'source': 'interpolation',
-                        'track_id': track_id,
-                        'match_iou': round(match.get('match_iou', 0), 4),
-                        'frame_cache': frame_filename,
-                    },
-                    'bbox': match['bbox'],
-                    'inference_time_ms': round(inference_ms, 2),
-                })
-            else:
-                # Store unmatched frame info as prediction with low confidence
-                predictions.append({
-                    'prediction_type': 'keyframe',
-                    'confidence': 0.0,
-                    'timestamp': timestamp,
-                    'scenario': 'vehicle_detection',
-                    'tags': {
-                        'class': class_name,
-                        'vehicle_type': class_name,
-                        'source': 'interpolation',
-                        'track_id': track_id,
-                        'unmatched': True,
-                        'frame_cache': frame_filename,
-                    },
-                    'bbox': expected_bbox,
-                    'inference_time_ms': round(inference_ms, 2),
-                })
+        with ThreadPoolExecutor(max_workers=CACHE_WRITE_WORKERS) as writer:
+            writes = []
+            batch = []
+            for frame_number, frame_bgr in decode_frames_at(cap, sorted(frame_times)):
+                timestamp = frame_times[frame_number]
+                if frame_bgr is None:
+                    logger.warning(f"Interpolation: could not read frame at {timestamp}s")
+                    continue
+
+                # Save frame to cache (off the decode/inference path)
+                frame_path = os.path.join(cache_dir, f"frame_{int(timestamp * 1000)}.jpg")
+                writes.append(writer.submit(_write_cache_frame, frame_path, frame_bgr))
+
+                batch.append((timestamp, frame_bgr))
+                if len(batch) >= INFERENCE_BATCH_SIZE:
+                    infer_batch(batch)
+                    batch = []
+            if batch:
+                infer_batch(batch)
+            for w in writes:
+                w.result()
 
         # Submit predictions via API
         if predictions:
@@ -430,3 +465,60 @@ def run_guided_interpolation(video_id: int, start_pred_id: int, end_pred_id: int
         return None
     finally:
         cap.release()
+
+
+# ---------------------------------------------------------------------------
+# Job queue
+# ---------------------------------------------------------------------------
+
+_job_queue: "queue.Queue[Tuple[int, int, int]]" = queue.Queue(maxsize=INTERP_QUEUE_MAX)
+_pending_jobs = set()
+_pending_lock = threading.Lock()
+_worker_thread = None
+
+
+def _interpolation_worker():
+    while True:
+        video_id, start_pred_id, end_pred_id = _job_queue.get()
+        try:
+            run_guided_interpolation(video_id, start_pred_id, end_pred_id)
+        except Exception as e:
+            logger.error(f"Interpolation job {start_pred_id}->{end_pred_id} crashed: {e}", exc_info=True)
+        finally:
+            with _pending_lock:
+                _pending_jobs.discard((start_pred_id, end_pred_id))
+            _job_queue.task_done()
+
+
+def submit_interpolation(video_id: int, start_pred_id: int, end_pred_id: int) -> bool:
+    """Queue a guided interpolation job on the shared worker.
+
+    Jobs run one at a time so concurrent requests don't contend for the
+    model.  Returns False if the same anchor pair is already queued or the
+    queue already holds INTERP_QUEUE_MAX jobs.
+    """
+    global _worker_thread
+    key = (start_pred_id, end_pred_id)
+    with _pending_lock:
+        if key in _pending_jobs:
+            return False
+        _pending_jobs.add(key)
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_interpolation_worker, daemon=True,
+                                              name="interpolation-worker")
+            _worker_thread.start()
+    try:
+        _job_queue.put_nowait((video_id, start_pred_id, end_pred_id))
+    except queue.Full:
+        with _pending_lock:
+            _pending_jobs.discard(key)
+        logger.warning(f"Interpolation queue full ({INTERP_QUEUE_MAX}), "
+                       f"dropped {start_pred_id}->{end_pred_id}")
+        return False
+    return True
+
+
+def get_queue_depth() -> int:
+    """Number of interpolation jobs waiting or running."""
+    with _pending_lock:
+        return len(_pending_jobs)
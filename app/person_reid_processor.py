@@ -25,6 +25,7 @@ os.environ.setdefault(
 )
 
 sys.path.insert(0, '/opt/groundtruth-studio/app')
+from clip_cache import get_clip_cache
 from db_connection import init_connection_pool, get_cursor
 from track_builder import TrackBuilder
 
@@ -109,6 +110,18 @@ def image_to_base64(img):
     return base64.b64encode(buf.getvalue()).decode('utf-8')
 
 
+def _index_clip(clip_path, hit=False):
+    """Record a fetched clip (or a cache hit) in the clip cache index."""
+    try:
+        index = get_clip_cache(CLIPS_DIR)
+        if hit:
+            index.touch(clip_path)
+        else:
+            index.record(clip_path)
+    except Exception as e:
+        logger.debug("Clip index update failed for %s: %s", clip_path, e)
+
+
 def find_clip(video_metadata, camera_id):
     """Find best clip source for a prediction.
 
@@ -135,9 +148,11 @@ def find_clip(video_metadata, camera_id):
     if event_id:
         cached_clip = os.path.join(CLIPS_DIR, f'frigate_{event_id}.mp4')
         if os.path.exists(cached_clip):
+            _index_clip(cached_clip, hit=True)
             return cached_clip
 
         # 3. Fetch from Frigate API on-demand
+        tmp_clip = f'{cached_clip}.{os.getpid()}.part'
         try:
             os.makedirs(CLIPS_DIR, exist_ok=True)
             resp = requests.get(
@@ -146,12 +161,17 @@ def find_clip(video_metadata, camera_id):
                 stream=True,
             )
             resp.raise_for_status()
-            with open(cached_clip, 'wb') as f:
+            # Temp file + rename: a half-written clip is never cached or indexed
+            with open(tmp_clip, 'wb') as f:
                 for chunk in resp.iter_content(chunk_size=8192):
                     f.write(chunk)
+            os.replace(tmp_clip, cached_clip)
+            _index_clip(cached_clip)
             logger.info("Fetched Frigate clip for event %s", event_id)
             return cached_clip
         except Exception as e:
+            if os.path.exists(tmp_clip):
+                os.unlink(tmp_clip)
             logger.debug("Could not fetch Frigate clip for event %s: %s", event_id, e)
 
     return None
@@ -7,12 +7,19 @@ with format validation against known state/province patterns.
 
 import logging
 import re
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
 
 from db_connection import get_cursor
+from video_utils import decode_frames_at
 
 logger = logging.getLogger(__name__)
 
+# Concurrent VLM requests in process_predictions; crops waiting on the VLM
+# are capped at twice this so decoding never runs far ahead of it.
+VLM_WORKERS = 4
+
 # Common US/Canadian plate format patterns
 PLATE_PATTERNS = {
     'US_standard': r'^[A-Z0-9]{5,8}$',
@@ -200,6 +207,52 @@ class PlateReader:
 
             return str(identity_id)
 
+    def _rear_crop_b64(self, full_frame, pred) -> str:
+        """Base64 crop of the rear half of a prediction's bbox, where plates sit."""
+        from vlm_reviewer import _crop_with_padding, _image_to_base64
+
+        bbox = {
+            'x': pred['bbox_x'], 'y': pred['bbox_y'],
+            'width': pred['bbox_width'], 'height': pred['bbox_height']
+        }
+
+        # Crop rear area (lower portion of bbox where plate typically is)
+        rear_bbox = {
+            'x': bbox['x'],
+            'y': bbox['y'] + bbox['height'] * 0.5,
+            'width': bbox['width'],
+            'height': bbox['height'] * 0.5,
+        }
+        crop = _crop_with_padding(full_frame, rear_bbox, padding=0.2)
+        return _image_to_base64(crop)
+
+    def _finish(self, prediction_id: int, text_result: Optional[Dict]) -> Optional[Dict]:
+        """Validate extracted text and link it to an identity."""
+        if not text_result:
+            return None
+
+        # Validate
+        validation = self.validate_plate_format(
+            text_result['plate_text'],
+            text_result.get('state_guess')
+        )
+
+        if not validation['is_valid']:
+            return None
+
+        # Link to identity
+        identity_id = self.link_to_identity(
+            validation['cleaned_text'], prediction_id
+        )
+
+        return {
+            'prediction_id': prediction_id,
+            'plate_text': validation['cleaned_text'],
+            'confidence': text_result['confidence'],
+            'state_guess': text_result.get('state_guess'),
+            'identity_id': identity_id,
+        }
+
     def process_prediction(self, prediction_id: int) -> Optional[Dict]:
         """Full pipeline: detect plate, extract text, validate, link.
 
@@ -224,7 +277,7 @@ class PlateReader:
             return None
 
         try:
-            from vlm_reviewer import _extract_frame, _crop_with_padding, _image_to_base64
+            from vlm_reviewer import _extract_frame
             from PIL import Image
             from io import BytesIO
 
@@ -233,48 +286,131 @@ class PlateReader:
                 return None
 
             full_frame = Image.open(BytesIO(frame_bytes)).convert('RGB')
-            bbox = {
-                'x': pred['bbox_x'], 'y': pred['bbox_y'],
-                'width': pred['bbox_width'], 'height': pred['bbox_height']
-            }
-
-            # Crop rear area (lower portion of bbox where plate typically is)
-            rear_bbox = {
-                'x': bbox['x'],
-                'y': bbox['y'] + bbox['height'] * 0.5,
-                'width': bbox['width'],
-                'height': bbox['height'] * 0.5,
-            }
-            crop = _crop_with_padding(full_frame, rear_bbox, padding=0.2)
-            crop_b64 = _image_to_base64(crop)
+            crop_b64 = self._rear_crop_b64(full_frame, pred)
 
             # Extract text directly from crop
             text_result = self.extract_plate_text(crop_b64)
-            if not text_result:
-                return None
+            return self._finish(prediction_id, text_result)
 
-            # Validate
-            validation = self.validate_plate_format(
-                text_result['plate_text'],
-                text_result.get('state_guess')
-            )
+        except Exception as e:
+            logger.warning(f"Plate processing failed for prediction {prediction_id}: {e}")
+            return None
 
-            if not validation['is_valid']:
-                return None
+    def process_predictions(self, prediction_ids: Iterable[int]) -> Dict[int, Optional[Dict]]:
+        """Batch pipeline for many predictions, decoding each video once.
 
-            # Link to identity
-            identity_id = self.link_to_identity(
-                validation['cleaned_text'], prediction_id
-            )
+        Rows are fetched in one query and grouped by video; each video's
+        frames are decoded in a single forward pass and the rear crops are
+        sent to the VLM with at most VLM_WORKERS requests in flight.
+        Validation and identity linking stay on the calling thread so two
+        sightings of a new plate cannot race to create two identities.
 
-            return {
-                'prediction_id': prediction_id,
-                'plate_text': validation['cleaned_text'],
-                'confidence': text_result['confidence'],
-                'state_guess': text_result.get('state_guess'),
-                'identity_id': identity_id,
-            }
+        Args:
+            prediction_ids: Prediction IDs to process
+
+        Returns:
+            dict mapping every requested prediction_id to the same result
+            process_prediction would give (None when no valid plate was read)
+        """
+        ids = list(dict.fromkeys(int(i) for i in prediction_ids))
+        if not ids:
+            return {}
 
+        with get_cursor(commit=False) as cursor:
+            cursor.execute("""
+                SELECT p.id, p.video_id, p.timestamp,
+                       p.bbox_x, p.bbox_y, p.bbox_width, p.bbox_height,
+                       v.filename
+                FROM ai_predictions p
+                JOIN videos v ON v.id = p.video_id
+                WHERE p.id = ANY(%s)
+                ORDER BY p.video_id, p.timestamp, p.id
+            """, (ids,))
+            rows = cursor.fetchall()
+
+        results = {pid: None for pid in ids}
+        results.update(self._read_plates(rows))
+        return results
+
+    def _read_plates(self, preds: List[Dict]) -> Dict[int, Optional[Dict]]:
+        """Decode, crop, OCR and link prediction rows (see process_predictions)."""
+        results = {}
+        by_video = OrderedDict()
+        for pred in preds:
+            by_video.setdefault(pred['filename'], []).append(pred)
+
+        pending = {}
+
+        def collect(futures):
+            for future in futures:
+                prediction_id = pending.pop(future)
+                try:
+                    results[prediction_id] = self._finish(prediction_id, future.result())
+                except Exception as e:
+                    logger.warning(f"Plate processing failed for prediction {prediction_id}: {e}")
+                    results[prediction_id] = None
+
+        with ThreadPoolExecutor(max_workers=VLM_WORKERS, thread_name_prefix='plate-vlm') as pool:
+            for filename, video_preds in by_video.items():
+                for pred, full_frame in _frames_for_predictions(filename, video_preds):
+                    prediction_id = pred['id']
+                    if full_frame is None:
+                        results[prediction_id] = None
+                        continue
+                    try:
+                        crop_b64 = self._rear_crop_b64(full_frame, pred)
+                    except Exception as e:
+                        logger.warning(f"Plate processing failed for prediction {prediction_id}: {e}")
+                        results[prediction_id] = None
+                        continue
+                    while len(pending) >= VLM_WORKERS * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    pending[pool.submit(self.extract_plate_text, crop_b64)] = prediction_id
+                    collect([f for f in pending if f.done()])
+            collect(list(pending))
+
+        return results
+
+
+def _frames_for_predictions(filename, preds: List[Dict]):
+    """Yield (pred, PIL RGB frame or None) for one video's predictions.
+
+    Frames are decoded in a single forward pass with OpenCV; any timestamp it
+    cannot decode (or a video it cannot open) falls back to the per-frame
+    ffmpeg extraction process_prediction uses.
+    """
+    import cv2
+    from PIL import Image
+    from io import BytesIO
+    from vlm_reviewer import _extract_frame
+
+    def ffmpeg_frame(pred):
+        try:
+            frame_bytes = _extract_frame(filename, pred['timestamp'] or 0)
+            return Image.open(BytesIO(frame_bytes)).convert('RGB') if frame_bytes else None
         except Exception as e:
-            logger.warning(f"Plate processing failed for prediction {prediction_id}: {e}")
+            logger.warning(f"Frame extraction failed for prediction {pred['id']}: {e}")
             return None
+
+    cap = cv2.VideoCapture(str(filename))
+    try:
+        if not cap.isOpened():
+            for pred in preds:
+                yield pred, ffmpeg_frame(pred)
+            return
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        by_frame = OrderedDict()
+        for pred in sorted(preds, key=lambda p: p['timestamp'] or 0):
+            frame_number = int(round((pred['timestamp'] or 0) * fps))
+            by_frame.setdefault(frame_number, []).append(pred)
+
+        for frame_number, frame in decode_frames_at(cap, list(by_frame)):
+            full_frame = None
+            if frame is not None:
+                full_frame = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            for pred in by_frame[frame_number]:
+                yield pred, full_frame if full_frame is not None else ffmpeg_frame(pred)
+    finally:
+        cap.release()
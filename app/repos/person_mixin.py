@@ -33,6 +33,55 @@ def _cosine_similarity(vec_a, vec_b):
         return dot / norm if norm > 0 else 0.0
 
 
+# Embedding columns returned to callers; the vec_<type> pgvector mirrors
+# maintained by the schema trigger are internal to nearest_embeddings()
+EMBEDDING_COLUMNS = ('embedding_id, identity_id, embedding_type, vector, confidence, '
+                     'source_image_path, camera_id, is_reference, session_date, created_at')
+
+# nearest_embeddings() filter name -> SQL condition
+_EMBEDDING_FILTERS = {
+    'identity_id': 'identity_id = %s',
+    'camera_id': 'camera_id = %s',
+    'is_reference': 'is_reference = %s',
+    'session_date': 'session_date = %s',
+    'created_after': 'created_at >= %s',
+}
+
+# embedding_type -> (column, SQL type) of its pgvector column.  Cached only
+# once the embedding_vectors migration is recorded: its columns appear as
+# soon as they are added, but are only complete after the backfill, which
+# runs in the background after startup.  Until then searches brute-force.
+_vector_columns = None
+
+
+def _get_vector_columns(cursor) -> Dict[str, tuple]:
+    global _vector_columns
+    if _vector_columns is None:
+        cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL AS present")
+        if not cursor.fetchone()['present']:
+            return {}
+        cursor.execute("SELECT 1 FROM schema_migrations WHERE name = 'embedding_vectors'")
+        if cursor.fetchone() is None:
+            return {}
+        cursor.execute("""
+            SELECT attname, format_type(atttypid, atttypmod) AS coltype, atttypmod AS dim
+            FROM pg_attribute
+            WHERE attrelid = 'embeddings'::regclass AND attname LIKE 'vec\\_%%' AND NOT attisdropped
+        """)
+        columns = {row['attname'][len('vec_'):]: (row['attname'], row['coltype'], row['dim'])
+                   for row in cursor.fetchall()}
+        if not columns:
+            return columns
+        _vector_columns = columns
+    return _vector_columns
+
+
+def reset_vector_columns():
+    """Forget the cached pgvector columns (after the schema step changes them)."""
+    global _vector_columns
+    _vector_columns = None
+
+
 class PersonMixin:
     """Person identities, embeddings, associations, person-tracks, and sightings."""
 
@@ -132,12 +181,12 @@ class PersonMixin:
                          is_reference: bool = False, session_date=None) -> Dict:
         """Insert a new embedding vector."""
         with get_cursor() as cursor:
-            cursor.execute('''
+            cursor.execute(f'''
                 INSERT INTO embeddings
                 (identity_id, embedding_type, vector, confidence,
                  source_image_path, camera_id, is_reference, session_date)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING *
+                RETURNING {EMBEDDING_COLUMNS}
             ''', (identity_id, embedding_type, vector, confidence,
                   source_image_path, camera_id, is_reference, session_date))
             row = cursor.fetchone()
@@ -163,7 +212,7 @@ class PersonMixin:
 
         with get_cursor(commit=False) as cursor:
             cursor.execute(f'''
-                SELECT * FROM embeddings
+                SELECT {EMBEDDING_COLUMNS} FROM embeddings
                 {where}
                 ORDER BY created_at DESC
                 LIMIT %s
@@ -174,35 +223,76 @@ class PersonMixin:
     def find_similar_embeddings(self, vector: list, embedding_type: str,
                                 threshold: float = 0.6, limit: int = 10,
                                 session_date=None) -> List[Dict]:
-        """Find similar embeddings by cosine similarity. Fetches candidates then
-        computes similarity in Python."""
+        """Find similar embeddings by cosine similarity, best first."""
+        filters = {'session_date': session_date} if session_date is not None else None
+        results = []
+        for row in self.nearest_embeddings(embedding_type, vector, k=limit, filters=filters):
+            if row['similarity'] >= threshold:
+                row['similarity'] = round(row['similarity'], 6)
+                results.append(row)
+        return results
+
+    def nearest_embeddings(self, embedding_type: str, vector: list, k: int = 10,
+                           filters: Optional[Dict] = None) -> List[Dict]:
+        """The k embeddings of a type nearest to vector by cosine similarity.
+
+        filters may hold identity_id, camera_id, is_reference, session_date
+        and created_after.  Uses the type's pgvector column and HNSW index
+        once the embedding_vectors migration has finished; otherwise (not
+        yet backfilled, no extension, or a vector of another length) scores
+        the filtered rows by brute force.  Raises ValueError for a vector
+        with NaN or infinite values.  Rows carry a 'similarity' key, best first.
+        """
+        if not all(math.isfinite(v) for v in vector):
+            raise ValueError("Query vector contains NaN or infinite values")
         conditions = ['embedding_type = %s']
         params = [embedding_type]
-        if session_date is not None:
-            conditions.append('session_date = %s')
-            params.append(session_date)
-
-        where = 'WHERE ' + ' AND '.join(conditions)
+        for key, value in (filters or {}).items():
+            if key not in _EMBEDDING_FILTERS:
+                raise ValueError(f"Unknown embedding filter: {key}")
+            if value is not None:
+                conditions.append(_EMBEDDING_FILTERS[key])
+                params.append(value)
 
         with get_cursor(commit=False) as cursor:
+            column = _get_vector_columns(cursor).get(embedding_type)
+            if column is not None and column[2] == len(vector):
+                col, coltype, _dim = column
+                # Post-filtering on top of the ANN scan needs a wider beam
+                ef_search = min(1000, max(40, k * (10 if len(conditions) > 1 else 2)))
+                cursor.execute(f'SET LOCAL hnsw.ef_search = {int(ef_search)}')
+                literal = '[' + ','.join(str(float(v)) for v in vector) + ']'
+                where = ' AND '.join(conditions + [f'{col} IS NOT NULL'])
+                cursor.execute(f'''
+                    SELECT {EMBEDDING_COLUMNS}, 1 - ({col} <=> %s::{coltype}) AS similarity
+                    FROM embeddings
+                    WHERE {where}
+                    ORDER BY {col} <=> %s::{coltype}
+                    LIMIT %s
+                ''', [literal] + params + [literal, k])
+                return [dict(row, similarity=float(row['similarity'])) for row in cursor.fetchall()]
+
             cursor.execute(f'''
-                SELECT * FROM embeddings
-                {where}
-                ORDER BY created_at DESC
+                SELECT {EMBEDDING_COLUMNS} FROM embeddings
+                WHERE {' AND '.join(conditions)}
             ''', params)
-            rows = cursor.fetchall()
-
-        results = []
+            rows = [dict(row) for row in cursor.fetchall()
+                    if row['vector'] and len(row['vector']) == len(vector)]
+
+        if not rows:
+            return []
+        if _HAS_NUMPY:
+            mat = np.asarray([row['vector'] for row in rows], dtype=np.float32)
+            query = np.asarray(vector, dtype=np.float32)
+            norms = np.linalg.norm(mat, axis=1) * np.linalg.norm(query)
+            sims = np.divide(mat @ query, norms, out=np.zeros(len(rows), dtype=np.float32),
+                             where=norms > 0)
+            order = np.argsort(-sims)[:k]
+            return [dict(rows[i], similarity=float(sims[i])) for i in order]
         for row in rows:
-            row_dict = dict(row)
-            candidate_vector = row_dict['vector']
-            similarity = _cosine_similarity(vector, candidate_vector)
-            if similarity >= threshold:
-                row_dict['similarity'] = round(similarity, 6)
-                results.append(row_dict)
-
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:limit]
+            row['similarity'] = _cosine_similarity(vector, row['vector'])
+        rows.sort(key=lambda r: r['similarity'], reverse=True)
+        return rows[:k]
 
     def delete_embedding(self, embedding_id: str) -> bool:
         """Delete an embedding by ID."""
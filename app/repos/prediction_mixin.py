@@ -90,6 +90,28 @@ def get_hierarchy_for_class(class_name):
     return (None, None, None)
 
 
+# Review filter chip -> scenarios it counts (pending predictions)
+REVIEW_FILTER_CHIPS = {
+    'vehicle_detection': 'vehicles',
+    'person_detection': 'people',
+    'face_detection': 'people',
+    'person_identification': 'people',
+    'license_plate': 'plates',
+    'boat_registration': 'boat_reg',
+    'document_detection': 'documents',
+    'document_ocr': 'documents',
+}
+
+
+def _confidence_bucket(threshold):
+    """review_queue_counters bucket for a threshold, or None if it isn't on a 1% boundary."""
+    scaled = float(threshold) * 100
+    bucket = round(scaled)
+    if abs(scaled - bucket) > 1e-6 or not 0 <= bucket <= 100:
+        return None
+    return bucket
+
+
 class PredictionMixin:
     """AI prediction CRUD, review, classification, and grouping methods."""
 
@@ -538,7 +560,54 @@ class PredictionMixin:
     def get_review_filter_counts(self, min_confidence=None, max_confidence=None, camera_id=None):
         """Get counts for each review queue filter chip.
         Uses confidence >= 0.10 to match the review queue/summary filters.
-        Optional min_confidence/max_confidence params filter prediction counts."""
+        Optional min_confidence/max_confidence params filter prediction counts.
+
+        Reads the trigger-maintained review_queue_counters table, so the cost
+        depends on cameras x scenarios rather than on the size of
+        ai_predictions.  Thresholds that don't fall on a 1% bucket boundary
+        (and any max_confidence below 1.0) fall back to scanning."""
+        min_bucket = _confidence_bucket(0.10 if min_confidence is None else min_confidence)
+        if min_bucket is None or (max_confidence is not None and max_confidence < 1.0):
+            return self._scan_review_filter_counts(min_confidence, max_confidence, camera_id)
+
+        with get_cursor(commit=False) as cursor:
+            camera_filter = ""
+            params = [min_bucket]
+            if camera_id:
+                camera_filter = "AND camera_id = %s"
+                params.append(camera_id)
+            cursor.execute('''
+                SELECT scenario,
+                       COALESCE(SUM(prediction_count) FILTER (
+                           WHERE review_status = 'pending' AND confidence_bucket >= %s), 0) AS pending,
+                       COALESCE(SUM(prediction_count) FILTER (
+                           WHERE review_status = 'needs_reclassification'), 0) AS needs_reclassification
+                FROM review_queue_counters
+                WHERE review_status IN ('pending', 'needs_reclassification') ''' + camera_filter + '''
+                GROUP BY scenario
+            ''', params)
+            counts = dict.fromkeys(
+                ('predictions', 'vehicles', 'people', 'plates', 'boat_reg', 'documents',
+                 'needs_reclassification'), 0)
+            for row in cursor.fetchall():
+                pending = int(row['pending'])
+                counts['predictions'] += pending
+                counts['needs_reclassification'] += int(row['needs_reclassification'])
+                chip = REVIEW_FILTER_CHIPS.get(row['scenario'])
+                if chip:
+                    counts[chip] += pending
+
+            self._add_auxiliary_filter_counts(cursor, counts)
+            return counts
+
+    def reconcile_review_queue_counters(self) -> int:
+        """Rebuild review_queue_counters from ai_predictions; returns drifted key count."""
+        from schema import reconcile_review_queue_counters
+        with get_cursor() as cursor:
+            return reconcile_review_queue_counters(cursor)
+
+    def _scan_review_filter_counts(self, min_confidence=None, max_confidence=None, camera_id=None):
+        """Filter-chip counts computed directly from ai_predictions."""
         with get_cursor(commit=False) as cursor:
             # Build optional confidence filter for predictions
             conf_filter = "AND p.confidence >= 0.10"
@@ -581,28 +650,31 @@ class PredictionMixin:
             row = cursor.fetchone()
             counts = dict(row) if row else {}
 
-            # Cross-camera count
-            cursor.execute("SELECT COUNT(*) as cnt FROM cross_camera_links WHERE status = 'auto'")
-            cc_row = cursor.fetchone()
-            counts['cross_camera'] = cc_row['cnt'] if cc_row else 0
-
-            # Cluster count (only clusters with 2+ members)
-            cursor.execute("""
-                SELECT COUNT(*) as cnt FROM (
-                    SELECT corrected_tags->>'static_cluster'
-                    FROM ai_predictions
-                    WHERE corrected_tags->>'batch_reviewable' = 'true'
-                      AND review_status = 'pending'
-                      AND predicted_tags->>'class' = 'unknown vehicle'
-                    GROUP BY corrected_tags->>'static_cluster'
-                    HAVING COUNT(*) >= 2
-                ) sub
-            """)
-            cl_row = cursor.fetchone()
-            counts['clusters'] = cl_row['cnt'] if cl_row else 0
-
+            self._add_auxiliary_filter_counts(cursor, counts)
             return counts
 
+    def _add_auxiliary_filter_counts(self, cursor, counts):
+        """Add the cross-camera and static-cluster chip counts."""
+        # Cross-camera count
+        cursor.execute("SELECT COUNT(*) as cnt FROM cross_camera_links WHERE status = 'auto'")
+        cc_row = cursor.fetchone()
+        counts['cross_camera'] = cc_row['cnt'] if cc_row else 0
+
+        # Cluster count (only clusters with 2+ members)
+        cursor.execute("""
+            SELECT COUNT(*) as cnt FROM (
+                SELECT corrected_tags->>'static_cluster'
+                FROM ai_predictions
+                WHERE corrected_tags->>'batch_reviewable' = 'true'
+                  AND review_status = 'pending'
+                  AND predicted_tags->>'class' = 'unknown vehicle'
+                GROUP BY corrected_tags->>'static_cluster'
+                HAVING COUNT(*) >= 2
+            ) sub
+        """)
+        cl_row = cursor.fetchone()
+        counts['clusters'] = cl_row['cnt'] if cl_row else 0
+
     def batch_review_predictions(self, reviews, reviewer='studio_user'):
         """Batch review multiple predictions. Returns summary."""
         results = {'approved': 0, 'rejected': 0, 'needs_reclassification': 0, 'failed': 0, 'annotation_ids': []}
@@ -843,6 +915,54 @@ class PredictionMixin:
                     results['failed'] += 1
         return results
 
+    # --------------- Vehicle Metrics Rollup ---------------
+
+    def get_vehicle_metrics_rollup(self, since=None, until=None):
+        """Vehicle prediction counts per (model class, human class, status)
+        from vehicle_metrics_rollup, optionally limited to predictions
+        created on days in [since, until].  Empty classes come back as None."""
+        with get_cursor(commit=False) as cursor:
+            conditions = ["prediction_count <> 0"]
+            params = []
+            if since:
+                conditions.append("day >= %s")
+                params.append(since)
+            if until:
+                conditions.append("day <= %s")
+                params.append(until)
+            cursor.execute('''
+                SELECT NULLIF(original_class, '') AS original_class,
+                       NULLIF(corrected_class, '') AS corrected_class,
+                       NULLIF(review_status, '') AS review_status,
+                       SUM(prediction_count)::bigint AS count
+                FROM vehicle_metrics_rollup
+                WHERE ''' + " AND ".join(conditions) + '''
+                GROUP BY 1, 2, 3
+            ''', params)
+            return [dict(r) for r in cursor.fetchall()]
+
+    def get_vehicle_weekly_trends(self, weeks=8):
+        """Weekly detection/review/correction counts from vehicle_metrics_rollup."""
+        with get_cursor(commit=False) as cursor:
+            cursor.execute('''
+                SELECT date_trunc('week', day)::date AS week,
+                       SUM(prediction_count)::bigint AS detections,
+                       COALESCE(SUM(prediction_count) FILTER (WHERE review_status = 'approved'), 0)::bigint AS approved,
+                       COALESCE(SUM(prediction_count) FILTER (WHERE review_status = 'rejected'), 0)::bigint AS rejected,
+                       COALESCE(SUM(prediction_count) FILTER (WHERE corrected_class <> ''), 0)::bigint AS corrected
+                FROM vehicle_metrics_rollup
+                WHERE day >= (NOW() - make_interval(weeks => %s))::date
+                GROUP BY week
+                ORDER BY week
+            ''', (weeks,))
+            return [dict(r) for r in cursor.fetchall()]
+
+    def reconcile_vehicle_metrics_rollup(self) -> int:
+        """Rebuild vehicle_metrics_rollup from ai_predictions; returns drifted key count."""
+        from schema import reconcile_vehicle_metrics_rollup
+        with get_cursor() as cursor:
+            return reconcile_vehicle_metrics_rollup(cursor)
+
     # --------------- Class Detail Page Methods ---------------
 
     def get_predictions_by_class(self, class_name, status=None, limit=200, offset=0):
@@ -885,23 +1005,16 @@ class PredictionMixin:
             return [dict(r) for r in rows]
 
     def get_predictions_count_by_class(self, class_name, status=None):
-        """Get total count for a class (for pagination)."""
+        """Get total count for a class (for pagination), from vehicle_metrics_rollup."""
         with get_cursor(commit=False) as cursor:
             sql = '''
-                SELECT COUNT(*) as total
-                FROM ai_predictions p
-                WHERE (p.scenario = 'vehicle_detection'
-                       OR p.predicted_tags->>'vehicle_type' IS NOT NULL)
-                  AND COALESCE(
-                       p.corrected_tags->>'vehicle_subtype',
-                       p.corrected_tags->>'actual_class',
-                       p.predicted_tags->>'vehicle_type',
-                       p.predicted_tags->>'class'
-                  ) = %s
+                SELECT COALESCE(SUM(prediction_count), 0)::bigint as total
+                FROM vehicle_metrics_rollup
+                WHERE COALESCE(NULLIF(corrected_class, ''), original_class) = %s
             '''
             params = [class_name]
             if status and status != 'all':
-                sql += ' AND p.review_status = %s'
+                sql += ' AND review_status = %s'
                 params.append(status)
             cursor.execute(sql, params)
             return cursor.fetchone()['total']
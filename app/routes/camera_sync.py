@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify, render_template
 from db_connection import get_connection
 from psycopg2 import extras
 import requests as http_requests
+from snapshot_cache import snapshot_cache
 import logging
 import math
 import os
@@ -332,38 +333,28 @@ def webrtc_offer():
 
 @camera_sync_bp.route('/api/camera-sync/snapshot/<camera_id>')
 def camera_snapshot(camera_id):
-    """Proxy snapshot — tries go2rtc frame.jpeg first, falls back to Frigate latest.jpg."""
+    """Proxy snapshot — go2rtc frame.jpeg, falling back to Frigate latest.jpg.
+
+    Served from the shared snapshot cache: concurrent viewers of the same
+    camera share one upstream grab per TTL.  Full resolution unless ?h=
+    asks for a server-side downscale.
+    """
     from flask import Response
-    h = request.args.get('h', '720')
+    h = request.args.get('h', type=int)
+    h = h if h and h > 0 else None
 
-    # Try go2rtc first (faster, no auth)
-    try:
-        resp = http_requests.get(
-            f'{GO2RTC_API}/api/frame.jpeg',
-            timeout=5,
-            params={'src': camera_id}
-        )
-        if resp.status_code == 200 and len(resp.content) > 100:
-            return Response(resp.content, mimetype='image/jpeg',
-                            headers={'Cache-Control': 'no-cache'})
-    except Exception:
-        pass
+    data, age = snapshot_cache.get(camera_id, h)
+    if data is None:
+        return jsonify({'success': False, 'error': 'No snapshot source available'}), 502
+    return Response(data, mimetype='image/jpeg',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Snapshot-Age': f'{age:.2f}'})
 
-    # Fallback to Frigate snapshot
-    try:
-        resp = http_requests.get(
-            f'{FRIGATE_API}/api/{camera_id}/latest.jpg',
-            timeout=5,
-            params={'h': h},
-            verify=False
-        )
-        if resp.status_code == 200:
-            return Response(resp.content, mimetype='image/jpeg',
-                            headers={'Cache-Control': 'no-cache'})
-    except Exception:
-        pass
 
-    return jsonify({'success': False, 'error': 'No snapshot source available'}), 502
+@camera_sync_bp.route('/api/camera-sync/snapshot-stats')
+def camera_snapshot_stats():
+    """Snapshot cache hit rate and upstream fetch latency."""
+    return jsonify({'success': True, 'stats': snapshot_cache.get_stats()})
 
 
 @camera_sync_bp.route('/api/camera-sync/selections', methods=['POST'])
@@ -5,18 +5,18 @@ preview rendering and batch generation endpoints.
 """
 import json
 import logging
+import importlib.util
 import os
-import random
 import shutil
 import sys
-import threading
 import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
 from flask import Blueprint, request, jsonify, render_template, send_file, send_from_directory
-from PIL import Image
+
+import doc_generation
 
 doc_template_annotator_bp = Blueprint('doc_template_annotator', __name__)
 logger = logging.getLogger(__name__)
@@ -43,9 +43,6 @@ CLASS_NAMES = {
 }
 CLASS_NAMES_REVERSE = {v: k for k, v in CLASS_NAMES.items()}
 
-# ── In-memory status tracking for background generation ──────────────────
-_generation_status = {}
-
 ALLOWED_IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
 
 
@@ -102,6 +99,7 @@ def _save_template(tpl, tpl_dir):
 
 def _make_thumbnail(image_path, thumb_path, width=200):
     """Create a JPEG thumbnail of the given width."""
+    from PIL import Image
     try:
         with Image.open(image_path) as img:
             ratio = width / img.width
@@ -147,6 +145,7 @@ def create_template():
       - name: human-readable template name
       - class_id: integer class ID (0-4)
     """
+    from PIL import Image
     try:
         if 'background' not in request.files:
             return jsonify({'success': False, 'error': 'No background image provided'}), 400
@@ -299,6 +298,7 @@ def preview_template(template_id):
 
     Optionally accepts JSON body with field overrides.
     """
+    from PIL import Image
     try:
         tpl, tpl_dir = _load_template(template_id)
         if tpl is None:
@@ -346,11 +346,13 @@ def preview_template(template_id):
 
 @doc_template_annotator_bp.route('/api/doc-templates/<template_id>/generate', methods=['POST'])
 def start_generation(template_id):
-    """Start batch generation in a background thread.
+    """Start batch generation in a job process with its own pool (see doc_generation).
 
     JSON body:
       - count: number of images to generate (default 10)
       - output_dir: optional override for output directory
+      - seed: optional job seed; the same seed and options reproduce the images
+      - workers: optional worker process count
     """
     try:
         tpl, tpl_dir = _load_template(template_id)
@@ -360,155 +362,48 @@ def start_generation(template_id):
         data = request.get_json(silent=True) or {}
         count = int(data.get('count', 10))
         output_dir = data.get('output_dir')
-        scene_pct = float(data.get('scene_pct', 30)) / 100.0  # UI sends 0-100 integer, convert to 0-1
-        max_perspective = float(data.get('max_perspective', 8)) / 100.0  # UI sends 0-25 integer %, convert to 0-1 fraction
-        max_rotation = int(data.get('max_rotation', 3))
-        photocopy_pct = float(data.get('photocopy_pct', 0)) / 100.0
-        oversaturated_pct = float(data.get('oversaturated_pct', 30)) / 100.0
-        washout_min = float(data.get('washout_min', 20)) / 100.0
-        washout_max = float(data.get('washout_max', 70)) / 100.0
-        oversat_min = float(data.get('oversat_min', 20)) / 100.0
-        oversat_max = float(data.get('oversat_max', 70)) / 100.0
-        overlay_pct = float(data.get('overlay_pct', 0)) / 100.0
-        overlay_opacity_min = float(data.get('overlay_opacity_min', 30)) / 100.0
-        overlay_opacity_max = float(data.get('overlay_opacity_max', 70)) / 100.0
-
-        if template_id in _generation_status and _generation_status[template_id].get('status') == 'running':
-            return jsonify({'success': False, 'error': 'Generation already in progress for this template'}), 409
-
-        _generation_status[template_id] = {
-            'status': 'running',
-            'total': count,
-            'completed': 0,
-            'errors': 0,
-            'started_at': time.time(),
+        options = {
+            'scene_pct': float(data.get('scene_pct', 30)) / 100.0,  # UI sends 0-100 integer, convert to 0-1
+            'max_perspective': float(data.get('max_perspective', 8)) / 100.0,  # UI sends 0-25 integer %, convert to 0-1 fraction
+            'max_rotation': int(data.get('max_rotation', 3)),
+            'photocopy_pct': float(data.get('photocopy_pct', 0)) / 100.0,
+            'oversaturated_pct': float(data.get('oversaturated_pct', 30)) / 100.0,
+            'washout_min': float(data.get('washout_min', 20)) / 100.0,
+            'washout_max': float(data.get('washout_max', 70)) / 100.0,
+            'oversat_min': float(data.get('oversat_min', 20)) / 100.0,
+            'oversat_max': float(data.get('oversat_max', 70)) / 100.0,
+            'overlay_pct': float(data.get('overlay_pct', 0)) / 100.0,
+            'overlay_opacity_min': float(data.get('overlay_opacity_min', 30)) / 100.0,
+            'overlay_opacity_max': float(data.get('overlay_opacity_max', 70)) / 100.0,
         }
-
-        def _run():
-            try:
-                from doc_synthesizer import render_from_template, apply_fold_crop
-            except ImportError:
-                _generation_status[template_id] = {
-                    'status': 'failed',
-                    'error': 'doc_synthesizer module not found',
-                }
-                return
-
-            out = Path(output_dir) if output_dir else (SYNTH_DIR / "output")
-            out.mkdir(parents=True, exist_ok=True)
-            meta_dir = out / "metadata"
-            meta_dir.mkdir(exist_ok=True)
-
-            for i in range(count):
-                try:
-                    img = render_from_template(tpl_dir)
-                    if isinstance(img, tuple):
-                        img, metadata = img
-                    else:
-                        metadata = {}
-
-                    # Apply fold cropping if template has fold lines
-                    # Returns list of (img, metadata) tuples — 1 for full, 2 for folded
-                    fold_lines = [r for r in tpl.get("regions", []) if r.get("type") == "line" and r.get("fold_line")]
-                    if fold_lines:
-                        variants = apply_fold_crop(img, fold_lines, metadata)
-                    else:
-                        metadata["fold_variant"] = "full"
-                        variants = [(img, metadata)]
-
-                    for vi, (vimg, vmeta) in enumerate(variants):
-                        # Decide: photocopy or potential scene composite (mutually exclusive)
-                        if random.random() < photocopy_pct:
-                            try:
-                                from doc_synthesizer import apply_photocopy_effect
-                                mode = "oversaturated" if random.random() < oversaturated_pct else "washout"
-                                if mode == "oversaturated":
-                                    intensity = random.uniform(oversat_min, oversat_max)
-                                else:
-                                    intensity = random.uniform(washout_min, washout_max)
-                                vimg = apply_photocopy_effect(vimg, washout_level=intensity, mode=mode)
-                                vmeta["photocopy"] = True
-                                vmeta["photocopy_intensity"] = round(intensity, 3)
-                                vmeta["photocopy_mode"] = mode
-                                # Apply photocopy overlay artifacts
-                                if overlay_pct > 0:
-                                    try:
-                                        from doc_synthesizer import apply_photocopy_overlays
-                                        vimg, overlay_meta = apply_photocopy_overlays(
-                                            vimg,
-                                            overlay_pct=overlay_pct,
-                                            opacity_min=overlay_opacity_min,
-                                            opacity_max=overlay_opacity_max,
-                                        )
-                                        vmeta.update(overlay_meta)
-                                    except Exception:
-                                        pass
-                            except Exception:
-                                pass
-                        elif random.random() < scene_pct:
-                            try:
-                                from doc_synthesizer import apply_scene_composite
-                                scene_config = {
-                                    "max_perspective": max_perspective,
-                                    "max_rotation": max_rotation,
-                                }
-                                vimg, bbox = apply_scene_composite(vimg, scene_config)
-                                vmeta["scene"] = True
-                                vmeta["bbox"] = list(bbox)
-                            except Exception:
-                                pass
-
-                        timestamp = int(time.time() * 1000)
-                        fold_suffix = f"_{vmeta.get('fold_variant', 'full')}" if len(variants) > 1 else ""
-                        filename = f"tpl_{tpl['class_name']}_{template_id}_{timestamp}_{i:04d}{fold_suffix}"
-                        img_path = out / f"{filename}.jpg"
-                        if isinstance(vimg, Image.Image):
-                            vimg.convert('RGB').save(str(img_path), 'JPEG', quality=95)
-
-                        # Save metadata sidecar
-                        if vmeta:
-                            with open(meta_dir / f"{filename}.json", 'w') as f:
-                                json.dump(vmeta, f, indent=2)
-
-                        # Save to merged YOLO dataset (train split)
-                        yolo_root = Path("/mnt/storage/training-material/documents/yolo-doc-detect/merged/train")
-                        yolo_img_dir = yolo_root / "images"
-                        yolo_lbl_dir = yolo_root / "labels"
-                        yolo_img_dir.mkdir(parents=True, exist_ok=True)
-                        yolo_lbl_dir.mkdir(parents=True, exist_ok=True)
-
-                        # Copy image to YOLO dataset
-                        yolo_img_path = yolo_img_dir / f"{filename}.jpg"
-                        if isinstance(vimg, Image.Image):
-                            vimg.convert('RGB').save(str(yolo_img_path), 'JPEG', quality=95)
-
-                        # Write YOLO label: class_id x_center y_center width height
-                        class_id = tpl.get('class_id', 0)
-                        if vmeta.get("bbox"):
-                            # Scene composite: bbox is [x_center, y_center, width, height] normalized
-                            bx, by, bw, bh = vmeta["bbox"]
-                        else:
-                            # Full document: fills entire image
-                            bx, by, bw, bh = 0.5, 0.5, 1.0, 1.0
-                        with open(yolo_lbl_dir / f"{filename}.txt", 'w') as f:
-                            f.write(f"{class_id} {bx:.6f} {by:.6f} {bw:.6f} {bh:.6f}\n")
-
-                    _generation_status[template_id]['completed'] = i + 1
-                except Exception as e:
-                    logger.error(f"Generation error for {template_id} image {i}: {e}")
-                    _generation_status[template_id]['errors'] = \
-                        _generation_status[template_id].get('errors', 0) + 1
-
-            _generation_status[template_id]['status'] = 'completed'
-            _generation_status[template_id]['finished_at'] = time.time()
-
-        thread = threading.Thread(target=_run, daemon=True, name=f"gen-{template_id}")
-        thread.start()
+        seed = data.get('seed')
+        workers = data.get('workers')
+
+        if importlib.util.find_spec('doc_synthesizer') is None:
+            return jsonify({'success': False, 'error': 'doc_synthesizer module not found'}), 501
+
+        out = Path(output_dir) if output_dir else (SYNTH_DIR / "output")
+        # Check and create under the template lock so two POSTs cannot both start a job
+        with doc_generation.job_lock(tpl_dir):
+            latest = doc_generation.latest_job(tpl_dir)
+            if latest and latest.get('status') == 'running':
+                return jsonify({'success': False, 'error': 'Generation already in progress for this template',
+                                'job_id': latest['job_id']}), 409
+            job = doc_generation.create_job(
+                template_id, tpl_dir, count, options, out,
+                seed=int(seed) if seed is not None else None,
+                workers=int(workers) if workers else None,
+            )
+
+        doc_generation.start_job(job, tpl_dir, SYNTH_DIR)
 
         return jsonify({
             'success': True,
             'message': f'Generation started: {count} images',
             'template_id': template_id,
+            'job_id': job['job_id'],
+            'seed': job['seed'],
+            'workers': job['workers'],
         })
 
     except Exception as e:
@@ -518,10 +413,16 @@ def start_generation(template_id):
 
 @doc_template_annotator_bp.route('/api/doc-templates/<template_id>/generate/status', methods=['GET'])
 def generation_status(template_id):
-    """Check generation progress."""
+    """Check generation progress of a job (?job_id=...), default the latest one."""
     try:
-        status = _generation_status.get(template_id)
+        tpl, tpl_dir = _load_template(template_id)
+        if tpl is None:
+            return jsonify({'success': False, 'error': 'Template not found'}), 404
+        job_id = request.args.get('job_id')
+        status = doc_generation.load_job(tpl_dir, job_id) if job_id else doc_generation.latest_job(tpl_dir)
         if status is None:
+            if job_id:
+                return jsonify({'success': False, 'error': 'Job not found'}), 404
             return jsonify({'success': True, 'status': 'idle'})
         return jsonify({'success': True, **status})
     except Exception as e:
@@ -529,6 +430,19 @@ def generation_status(template_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@doc_template_annotator_bp.route('/api/doc-templates/<template_id>/generate/jobs', methods=['GET'])
+def generation_jobs(template_id):
+    """List generation jobs for a template, newest first."""
+    try:
+        tpl, tpl_dir = _load_template(template_id)
+        if tpl is None:
+            return jsonify({'success': False, 'error': 'Template not found'}), 404
+        return jsonify({'success': True, 'jobs': doc_generation.list_jobs(tpl_dir)})
+    except Exception as e:
+        logger.error(f"Error listing generation jobs for {template_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 # ── API: Fonts ───────────────────────────────────────────────────────────
 
 @doc_template_annotator_bp.route('/api/doc-templates/fonts', methods=['GET'])
@@ -694,6 +608,7 @@ def list_scene_backgrounds():
 
     Returns JSON array of objects with: filename, url, size (bytes), dimensions.
     """
+    from PIL import Image
     try:
         results = []
         for entry in sorted(SCENE_BG_DIR.iterdir()):
@@ -2,7 +2,6 @@
 from flask import Blueprint, request, jsonify, render_template, send_file
 from pathlib import Path
 from functools import lru_cache
-from PIL import Image
 import logging
 import os
 import zipfile
@@ -183,6 +182,7 @@ def _parse_issuer(filename):
 @lru_cache(maxsize=4096)
 def _get_image_size(image_path):
     """Get image dimensions, cached in memory."""
+    from PIL import Image
     try:
         with Image.open(image_path) as img:
             return img.size  # (width, height)
@@ -689,6 +689,7 @@ def doc_training_image(split, filename):
 @doc_training_browser_bp.route('/api/doc-training/thumbnail/<split>/<filename>')
 def doc_training_thumbnail(split, filename):
     """Serve a cached 300x300 JPEG thumbnail, generating it on first request."""
+    from PIL import Image
     if split not in SPLITS:
         return jsonify({'error': 'Invalid split'}), 400
 
@@ -13,19 +13,23 @@ from pathlib import Path
 
 from flask import Blueprint, request, jsonify, render_template, send_file
 
+from face_index import FaceIndex
+
 sys.path.insert(0, str(Path("/mnt/storage/training-material/documents/synthesizer")))
 from profile_store import (
     load_profile, save_profile, get_or_create_profile,
     delete_profile, list_profiles, update_profile_identity, bulk_stats
 )
-from gender_detector import (
-    detect_and_store_gender, detect_all_missing, ensure_models,
-    read_gender_meta, write_gender_meta,
-)
 
 face_photo_manager_bp = Blueprint('face_photo_manager', __name__)
 logger = logging.getLogger(__name__)
 
+
+def _gender_detector():
+    """Import gender_detector (model runtime) on first use, not at app start."""
+    import gender_detector
+    return gender_detector
+
 FACES_DIR = Path("/mnt/storage/training-material/documents/synthesizer/faces")
 FACES_WHITE_DIR = Path("/mnt/storage/training-material/documents/synthesizer/faces_white")
 FLUXSYNID_DIR = Path("/mnt/storage/training-material/documents/synthesizer/face-generators/FLUXSynID")
@@ -35,6 +39,8 @@ PYTHON_BIN = "/opt/groundtruth-studio/venv/bin/python"
 # Filename pattern: face_NNNNN.png
 FACE_RE = re.compile(r'^face_(\d+)\.png$')
 
+FACE_INDEX_PATH = FACES_DIR.parent / '.face_index.sqlite'
+
 # ── Background preprocessing state ──────────────────────────────────────
 _preprocess_lock = threading.Lock()
 _preprocess_state = {
@@ -48,14 +54,45 @@ _preprocess_state = {
 
 # ── Helpers ─────────────────────────────────────────────────────────────
 
-def _list_faces(directory: Path) -> list[str]:
-    """Return sorted list of face PNG filenames in *directory*."""
-    if not directory.is_dir():
-        return []
-    return sorted(
-        f for f in os.listdir(directory)
-        if f.lower().endswith('.png')
-    )
+def _face_meta(fname: str) -> dict:
+    """Profile and gender columns cached in the face index for one face."""
+    meta = {'gender': _gender_detector().read_gender_meta(fname)}
+    profile = load_profile(fname)
+    if profile:
+        identity = profile.get('identity', {})
+        meta.update({
+            'has_profile': True,
+            'profile_name': f"{identity.get('first_name', '')} {identity.get('last_name', '')}",
+            'generation_count': profile.get('generation_count', 0),
+            'doc_types': list(profile.get('documents', {}).keys()),
+        })
+    return meta
+
+
+_face_index = None
+_face_index_lock = threading.Lock()
+
+
+def _get_face_index() -> FaceIndex:
+    """Shared face index, refreshed from directory changes on each call."""
+    global _face_index
+    with _face_index_lock:
+        if _face_index is None:
+            _face_index = FaceIndex(FACES_DIR, FACES_WHITE_DIR, FACE_INDEX_PATH, _face_meta)
+    _face_index.refresh()
+    return _face_index
+
+
+def _invalidate_face(fname: str):
+    """Re-read a face's cached profile/gender on the next index refresh."""
+    if _face_index is not None:
+        _face_index.invalidate(fname)
+
+
+def _parse_bool(value):
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes')
 
 
 def _next_face_number() -> int:
@@ -86,11 +123,7 @@ def face_photo_manager_page():
 def face_stats():
     """Return face photo counts and FLUXSynID setup status."""
     try:
-        originals = _list_faces(FACES_DIR)
-        whites = _list_faces(FACES_WHITE_DIR)
-        whites_set = set(whites)
-
-        unprocessed = sum(1 for f in originals if f not in whites_set)
+        counts = _get_face_index().stats()
 
         # FLUXSynID: exists and has a venv directory
         fluxsynid_exists = FLUXSYNID_DIR.is_dir()
@@ -105,9 +138,11 @@ def face_stats():
 
         return jsonify({
             'success': True,
-            'originals': len(originals),
-            'preprocessed': len(whites),
-            'unprocessed': unprocessed,
+            'originals': counts['originals'],
+            'preprocessed': counts['preprocessed'],
+            'unprocessed': counts['unprocessed'],
+            'missing_gender': counts['missing_gender'],
+            'meta_pending': counts['meta_pending'],
             'profiles': profile_count,
             'fluxsynid': {
                 'installed': fluxsynid_exists,
@@ -123,38 +158,38 @@ def face_stats():
 
 @face_photo_manager_bp.route('/api/faces/items')
 def face_items():
-    """Paginated listing of face photos.
+    """Paginated listing of face photos, served from the face index.
 
     Query params:
-        page      - page number (default 1)
-        per_page  - items per page (default 60)
-        variant   - 'original', 'white', or 'both' (default 'white')
+        page        - page number (default 1)
+        per_page    - items per page (default 60)
+        variant     - 'original', 'white', or 'both' (default 'white')
+        after       - keyset cursor: the last filename of the previous page
+                      (takes precedence over page; use next_cursor)
+        gender      - detected gender label, or 'unknown' for none
+        has_profile - 'true' / 'false'
     """
     try:
         page = max(1, int(request.args.get('page', 1)))
         per_page = max(1, min(200, int(request.args.get('per_page', 60))))
         variant = request.args.get('variant', 'white')
-
-        originals = set(_list_faces(FACES_DIR))
-        whites = set(_list_faces(FACES_WHITE_DIR))
-
-        if variant == 'original':
-            all_filenames = sorted(originals)
-        elif variant == 'white':
-            all_filenames = sorted(whites)
-        else:
-            # 'both' — union of both sets, showing pair info
-            all_filenames = sorted(originals | whites)
-
-        total = len(all_filenames)
+        after = request.args.get('after') or None
+        filters = {
+            'gender': request.args.get('gender') or None,
+            'has_profile': _parse_bool(request.args.get('has_profile')),
+        }
+
+        index = _get_face_index()
+        total = index.count(variant, **filters)
         total_pages = max(1, (total + per_page - 1) // per_page)
-        start = (page - 1) * per_page
-        page_filenames = all_filenames[start:start + per_page]
+        rows = index.page(variant, limit=per_page, after=after,
+                          offset=(page - 1) * per_page, **filters)
 
         items = []
-        for fname in page_filenames:
-            has_original = fname in originals
-            has_white = fname in whites
+        for row in rows:
+            fname = row['name']
+            has_original = row['original_mtime'] is not None
+            has_white = row['white_mtime'] is not None
 
             # Determine the image URL based on variant preference
             if variant == 'original':
@@ -172,23 +207,14 @@ def face_items():
                 'image_url': image_url,
                 'has_original': has_original,
                 'has_white': has_white,
-                'detected_gender': read_gender_meta(fname),
+                'detected_gender': row['detected_gender'],
+                'has_profile': bool(row['has_profile']),
+                'profile_name': row['profile_name'],
+                'generation_count': row['generation_count'],
+                'doc_types': row['doc_types'],
+                'meta_pending': row['meta_pending'],
             }
 
-            # Add profile info if available
-            profile = load_profile(fname)
-            if profile:
-                identity = profile.get('identity', {})
-                item['has_profile'] = True
-                item['profile_name'] = f"{identity.get('first_name', '')} {identity.get('last_name', '')}"
-                item['generation_count'] = profile.get('generation_count', 0)
-                item['doc_types'] = list(profile.get('documents', {}).keys())
-            else:
-                item['has_profile'] = False
-                item['profile_name'] = None
-                item['generation_count'] = 0
-                item['doc_types'] = []
-
             # For 'both' variant, also include URLs for both versions
             if variant == 'both':
                 if has_original:
@@ -204,6 +230,7 @@ def face_items():
             'total': total,
             'page': page,
             'pages': total_pages,
+            'next_cursor': items[-1]['id'] if len(items) == per_page else None,
         })
     except Exception as e:
         logger.error(f"Error loading face items: {e}")
@@ -407,6 +434,7 @@ def face_profile_update(filename):
         if not updates:
             return jsonify({'success': False, 'error': 'No identity updates provided'}), 400
         profile = update_profile_identity(safe_name, updates)
+        _invalidate_face(safe_name)
         if profile is None:
             return jsonify({'success': False, 'error': 'Profile not found'}), 404
         return jsonify({'success': True, 'profile': profile})
@@ -421,6 +449,7 @@ def face_profile_delete(filename):
     try:
         safe_name = _safe_filename(filename)
         deleted = delete_profile(safe_name)
+        _invalidate_face(safe_name)
         return jsonify({'success': True, 'deleted': deleted})
     except Exception as e:
         logger.error(f"Error deleting profile for {filename}: {e}")
@@ -493,9 +522,7 @@ def face_preprocess():
         if filenames:
             count = len(filenames)
         else:
-            originals = set(_list_faces(FACES_DIR))
-            whites = set(_list_faces(FACES_WHITE_DIR))
-            count = len(originals - whites)
+            count = _get_face_index().stats()['unprocessed']
 
         if count == 0:
             return jsonify({
@@ -571,24 +598,21 @@ def _run_gender_detection():
     global _gender_state
     try:
         # Ensure model files are available
-        if not ensure_models():
+        if not _gender_detector().ensure_models():
             logger.error("Gender detection: failed to download models.")
             return
 
-        faces = sorted(
-            f for f in os.listdir(FACES_DIR)
-            if f.lower().endswith('.png')
-        ) if FACES_DIR.is_dir() else []
-
-        # Filter to those missing gender metadata
-        missing = [f for f in faces if read_gender_meta(f) is None]
+        # Index candidates, re-checked in case a detection landed since
+        candidates = _get_face_index().names('original', gender='unknown')
+        missing = [f for f in candidates if _gender_detector().read_gender_meta(f) is None]
 
         with _gender_lock:
             _gender_state['total'] = len(missing)
             _gender_state['progress'] = 0
 
         for i, fname in enumerate(missing, 1):
-            detect_and_store_gender(fname)
+            _gender_detector().detect_and_store_gender(fname)
+            _invalidate_face(fname)
             with _gender_lock:
                 _gender_state['progress'] = i
 
@@ -619,11 +643,7 @@ def face_detect_gender():
                 }), 409
 
         # Count how many need detection
-        faces = sorted(
-            f for f in os.listdir(FACES_DIR)
-            if f.lower().endswith('.png')
-        ) if FACES_DIR.is_dir() else []
-        missing = [f for f in faces if read_gender_meta(f) is None]
+        missing = _get_face_index().names('original', gender='unknown')
 
         if not missing:
             return jsonify({
@@ -682,7 +702,7 @@ def face_gender_get(filename):
     """Get the detected gender for a single face."""
     try:
         safe_name = _safe_filename(filename)
-        gender = read_gender_meta(safe_name)
+        gender = _gender_detector().read_gender_meta(safe_name)
         return jsonify({'success': True, 'filename': safe_name, 'detected_gender': gender})
     except Exception as e:
         logger.error(f"Error getting gender for {filename}: {e}")
@@ -1,3 +1,4 @@
+import io
 import logging
 
 from flask import Blueprint, request, jsonify
@@ -12,6 +13,9 @@ logger = logging.getLogger(__name__)
 # Keys that are never allowed in any identity or face payload
 _FORBIDDEN_KEYS = frozenset({'image', 'photo', 'thumbnail', 'url', 'path', 'file'})
 
+# Rows per COPY round-trip when staging embeddings; bounds the text buffer
+INGEST_COPY_CHUNK = 2000
+
 
 def _has_forbidden_keys(d):
     """Return the first forbidden key found in dict d, or None."""
@@ -21,6 +25,137 @@ def _has_forbidden_keys(d):
     return None
 
 
+def _face_error(face):
+    """Return why a face payload can't be stored, or None if it is valid."""
+    if not isinstance(face, dict):
+        return 'each face must be an object'
+
+    # reject forbidden keys at the face level
+    bad_key = _has_forbidden_keys(face)
+    if bad_key:
+        return f'forbidden key: {bad_key}'
+
+    embedding = face.get('embedding')
+    if not isinstance(embedding, list) or len(embedding) != 512:
+        return 'embedding must be a list of exactly 512 floats'
+    if not all(isinstance(v, (int, float)) for v in embedding):
+        return 'embedding values must all be numeric'
+
+    confidence = face.get('confidence')
+    if confidence is None or not isinstance(confidence, (int, float)):
+        return 'confidence is required and must be a number'
+    if not (0.0 <= float(confidence) <= 1.0):
+        return 'confidence must be between 0.0 and 1.0'
+    return None
+
+
+def _apply_embedding_ingest(cursor, source_system, staged_identities, staged_faces):
+    """Upsert identities and replace their reference face embeddings set-wise.
+
+    staged_identities: [(result_index, external_id, name)]
+    staged_faces: COPY text rows "result_index<TAB>{v1,...,v512}<TAB>confidence"
+    Returns the number of reference embeddings the identities now hold.  Runs
+    in the caller's transaction.
+    """
+    cursor.execute('''
+        CREATE TEMP TABLE ingest_identities (
+            ord INTEGER PRIMARY KEY,
+            external_id TEXT NOT NULL,
+            name TEXT NOT NULL
+        ) ON COMMIT DROP
+    ''')
+    cursor.execute('''
+        CREATE TEMP TABLE ingest_faces (
+            ord INTEGER NOT NULL,
+            vector REAL[] NOT NULL,
+            confidence REAL NOT NULL
+        ) ON COMMIT DROP
+    ''')
+    extras.execute_values(
+        cursor,
+        'INSERT INTO ingest_identities (ord, external_id, name) VALUES %s',
+        staged_identities,
+        page_size=1000,
+    )
+    for start in range(0, len(staged_faces), INGEST_COPY_CHUNK):
+        chunk = staged_faces[start:start + INGEST_COPY_CHUNK]
+        cursor.copy_expert('COPY ingest_faces (ord, vector, confidence) FROM STDIN',
+                           io.StringIO('\n'.join(chunk) + '\n'))
+
+    # Last occurrence of each external_id wins, for both name and faces
+    cursor.execute('''
+        CREATE TEMP TABLE ingest_latest ON COMMIT DROP AS
+        SELECT DISTINCT ON (external_id) ord, external_id, name
+        FROM ingest_identities
+        ORDER BY external_id, ord DESC
+    ''')
+
+    cursor.execute(
+        '''
+        INSERT INTO identities (identity_type, name, external_id, source_system)
+        SELECT 'person', name, external_id, %s FROM ingest_latest
+        ON CONFLICT (source_system, external_id) WHERE external_id IS NOT NULL
+        DO UPDATE SET name = EXCLUDED.name, last_seen = NOW()
+        ''',
+        (source_system,),
+    )
+
+    # Target reference set per identity, numbered within identical
+    # (vector, confidence) so repeated faces match one-to-one
+    cursor.execute(
+        '''
+        CREATE TEMP TABLE ingest_target ON COMMIT DROP AS
+        SELECT i.identity_id, f.vector, f.confidence,
+               ROW_NUMBER() OVER (PARTITION BY i.identity_id, f.vector, f.confidence) AS n
+        FROM ingest_faces f
+        JOIN ingest_latest l ON l.ord = f.ord
+        JOIN identities i ON i.source_system = %s AND i.external_id = l.external_id
+        ''',
+        (source_system,),
+    )
+    cursor.execute(
+        '''
+        CREATE TEMP TABLE ingest_current ON COMMIT DROP AS
+        SELECT e.embedding_id, e.identity_id, e.vector, e.confidence,
+               ROW_NUMBER() OVER (PARTITION BY e.identity_id, e.vector, e.confidence) AS n
+        FROM embeddings e
+        JOIN identities i ON i.identity_id = e.identity_id
+        JOIN ingest_latest l ON l.external_id = i.external_id
+        WHERE i.source_system = %s
+          AND e.embedding_type = 'face'
+          AND e.is_reference = true
+          AND e.source_image_path IS NULL
+        ''',
+        (source_system,),
+    )
+
+    # Replace by difference: embeddings already stored as sent are kept, so
+    # a re-sync of an unchanged gallery writes (and re-indexes) nothing
+    cursor.execute('''
+        DELETE FROM embeddings e
+        USING ingest_current c
+        WHERE e.embedding_id = c.embedding_id
+          AND NOT EXISTS (
+              SELECT 1 FROM ingest_target t
+              WHERE t.identity_id = c.identity_id AND t.vector = c.vector
+                AND t.confidence = c.confidence AND t.n = c.n)
+    ''')
+    removed = cursor.rowcount
+    cursor.execute('''
+        INSERT INTO embeddings (identity_id, embedding_type, vector, confidence, is_reference, source_image_path)
+        SELECT t.identity_id, 'face', t.vector, t.confidence, true, NULL
+        FROM ingest_target t
+        WHERE NOT EXISTS (
+            SELECT 1 FROM ingest_current c
+            WHERE c.identity_id = t.identity_id AND c.vector = t.vector
+              AND c.confidence = t.confidence AND c.n = t.n)
+    ''')
+    logger.info(f"Embedding ingest for {source_system}: {cursor.rowcount} inserted, {removed} removed")
+
+    cursor.execute('SELECT COUNT(*) FROM ingest_target')
+    return cursor.fetchone()[0]
+
+
 # ── POST /api/identities/sync ─────────────────────────────────────
 
 @identities_bp.route('/api/identities/sync', methods=['POST'])
@@ -137,126 +272,62 @@ def ingest_embeddings():
         if results is None or not isinstance(results, list):
             return jsonify({'success': False, 'error': 'results is required and must be a list'}), 400
 
-        identities_resolved = 0
-        embeddings_stored = 0
+        # Validate the whole payload before touching the database; rows are
+        # staged by their result index so duplicate external_ids resolve to
+        # the last occurrence, as the row-at-a-time upsert did.
+        staged_identities = []
+        staged_faces = []
         errors = []
 
-        with get_connection() as conn:
-            try:
-                cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
-
-                for idx, result in enumerate(results):
-                    if not isinstance(result, dict):
-                        errors.append({'index': idx, 'error': 'each result must be an object'})
-                        continue
-
-                    # reject forbidden keys at the result level
-                    bad_key = _has_forbidden_keys(result)
-                    if bad_key:
-                        errors.append({'index': idx, 'error': f'forbidden key: {bad_key}'})
-                        continue
-
-                    external_id = result.get('external_id')
-                    if not external_id or not isinstance(external_id, str):
-                        errors.append({'index': idx, 'error': 'external_id is required'})
-                        continue
-
-                    name = result.get('name')
-                    if not name or not isinstance(name, str) or not name.strip():
-                        errors.append({'index': idx, 'error': 'name is required and must be a non-empty string'})
-                        continue
-
-                    faces = result.get('faces', [])
-                    if not isinstance(faces, list):
-                        errors.append({'index': idx, 'error': 'faces must be a list'})
-                        continue
-
-                    # 1. Upsert identity
-                    cursor.execute(
-                        '''
-                        INSERT INTO identities (identity_type, name, external_id, source_system)
-                        VALUES ('person', %s, %s, %s)
-                        ON CONFLICT (source_system, external_id) WHERE external_id IS NOT NULL
-                        DO UPDATE SET name = EXCLUDED.name, last_seen = NOW()
-                        RETURNING identity_id
-                        ''',
-                        (name.strip(), external_id, source_system),
-                    )
-                    row = cursor.fetchone()
-                    identity_id = row['identity_id']
-                    identities_resolved += 1
-
-                    # Clear existing reference embeddings for this identity from this source
-                    cursor.execute(
-                        '''
-                        DELETE FROM embeddings
-                        WHERE identity_id = %s
-                          AND embedding_type = 'face'
-                          AND is_reference = true
-                          AND source_image_path IS NULL
-                        ''',
-                        (identity_id,),
-                    )
-
-                    # 2. Insert each face embedding
-                    for face_idx, face in enumerate(faces):
-                        if not isinstance(face, dict):
-                            errors.append({'index': idx, 'face_index': face_idx, 'error': 'each face must be an object'})
-                            continue
-
-                        # reject forbidden keys at the face level
-                        bad_key = _has_forbidden_keys(face)
-                        if bad_key:
-                            errors.append({'index': idx, 'face_index': face_idx, 'error': f'forbidden key: {bad_key}'})
-                            continue
-
-                        embedding = face.get('embedding')
-                        if not isinstance(embedding, list) or len(embedding) != 512:
-                            errors.append({
-                                'index': idx,
-                                'face_index': face_idx,
-                                'error': 'embedding must be a list of exactly 512 floats',
-                            })
-                            continue
-
-                        if not all(isinstance(v, (int, float)) for v in embedding):
-                            errors.append({
-                                'index': idx,
-                                'face_index': face_idx,
-                                'error': 'embedding values must all be numeric',
-                            })
-                            continue
-
-                        confidence = face.get('confidence')
-                        if confidence is None or not isinstance(confidence, (int, float)):
-                            errors.append({
-                                'index': idx,
-                                'face_index': face_idx,
-                                'error': 'confidence is required and must be a number',
-                            })
-                            continue
-
-                        if not (0.0 <= float(confidence) <= 1.0):
-                            errors.append({
-                                'index': idx,
-                                'face_index': face_idx,
-                                'error': 'confidence must be between 0.0 and 1.0',
-                            })
-                            continue
-
-                        cursor.execute(
-                            '''
-                            INSERT INTO embeddings (identity_id, embedding_type, vector, confidence, is_reference, source_image_path)
-                            VALUES (%s, 'face', %s, %s, true, NULL)
-                            ''',
-                            (identity_id, embedding, float(confidence)),
-                        )
-                        embeddings_stored += 1
+        for idx, result in enumerate(results):
+            if not isinstance(result, dict):
+                errors.append({'index': idx, 'error': 'each result must be an object'})
+                continue
+
+            # reject forbidden keys at the result level
+            bad_key = _has_forbidden_keys(result)
+            if bad_key:
+                errors.append({'index': idx, 'error': f'forbidden key: {bad_key}'})
+                continue
+
+            external_id = result.get('external_id')
+            if not external_id or not isinstance(external_id, str):
+                errors.append({'index': idx, 'error': 'external_id is required'})
+                continue
+
+            name = result.get('name')
+            if not name or not isinstance(name, str) or not name.strip():
+                errors.append({'index': idx, 'error': 'name is required and must be a non-empty string'})
+                continue
+
+            faces = result.get('faces', [])
+            if not isinstance(faces, list):
+                errors.append({'index': idx, 'error': 'faces must be a list'})
+                continue
+
+            staged_identities.append((idx, external_id, name.strip()))
+
+            for face_idx, face in enumerate(faces):
+                error = _face_error(face)
+                if error:
+                    errors.append({'index': idx, 'face_index': face_idx, 'error': error})
+                    continue
+                vector = ','.join(repr(float(v)) for v in face['embedding'])
+                staged_faces.append(f"{idx}\t{{{vector}}}\t{float(face['confidence'])!r}")
+
+        identities_resolved = len(staged_identities)
+        embeddings_stored = 0
 
-                conn.commit()
-            except Exception:
-                conn.rollback()
-                raise
+        if staged_identities:
+            with get_connection() as conn:
+                try:
+                    cursor = conn.cursor()
+                    embeddings_stored = _apply_embedding_ingest(
+                        cursor, source_system, staged_identities, staged_faces)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
 
         return jsonify({
             'success': True,
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, render_template, send_from_directory, send_file, g, redirect
 from pathlib import Path
+from datetime import date, timedelta
 from psycopg2 import extras
 from db_connection import get_connection, get_cursor
 import services
@@ -999,124 +1000,81 @@ def get_all_pending_predictions():
 
 @predictions_bp.route('/api/ai/vehicle-metrics')
 def get_vehicle_metrics():
-    """Get vehicle detection metrics: per-class counts, correction rates, confusion matrix."""
+    """Get vehicle detection metrics: per-class counts, correction rates, confusion matrix.
+
+    Served from the vehicle_metrics_rollup table.  Optional ``since`` /
+    ``until`` (YYYY-MM-DD, by prediction creation day) or ``days`` slice the
+    class stats and confusion matrix to a time window."""
     try:
+        try:
+            since = request.args.get('since')
+            since = date.fromisoformat(since) if since else None
+            until = request.args.get('until')
+            until = date.fromisoformat(until) if until else None
+            days = request.args.get('days')
+            days = int(days) if days else None
+        except ValueError:
+            return jsonify({'success': False,
+                            'error': 'since/until must be YYYY-MM-DD and days an integer'}), 400
+        if days is not None and days < 1:
+            return jsonify({'success': False, 'error': 'days must be at least 1'}), 400
+        if days and not since:
+            since = date.today() - timedelta(days=days - 1)
+
+        # 1-3. Per-class status counts, correction counts and the model -> human
+        # confusion matrix.  The effective class is the corrected class when
+        # there is one (vehicle_subtype from classify, actual_class from
+        # reject-reclassify), else the model prediction.
+        class_stats = {}
+        confusion = {}
+        for row in db.get_vehicle_metrics_rollup(since=since, until=until):
+            cls = row['corrected_class'] or row['original_class'] or 'unknown'
+            if cls not in class_stats:
+                class_stats[cls] = {'pending': 0, 'approved': 0, 'rejected': 0, 'corrected': 0, 'auto_approved': 0, 'total': 0}
+            status = row['review_status'] or 'pending'
+            class_stats[cls][status] = class_stats[cls].get(status, 0) + row['count']
+            class_stats[cls]['total'] += row['count']
+            if row['corrected_class']:
+                class_stats[cls]['corrected'] += row['count']
+                key = (row['original_class'], row['corrected_class'])
+                confusion[key] = confusion.get(key, 0) + row['count']
+        confusion_matrix = [
+            {'original_class': original, 'corrected_class': corrected, 'count': count}
+            for (original, corrected), count in sorted(confusion.items(), key=lambda kv: -kv[1])
+        ]
+
+        # 4. Weekly detection trends (last 8 weeks)
+        weekly_trends = []
+        for row in db.get_vehicle_weekly_trends(weeks=8):
+            weekly_trends.append({
+                'week': row['week'].isoformat() if row['week'] else None,
+                'detections': row['detections'],
+                'approved': row['approved'],
+                'rejected': row['rejected'],
+                'corrected': row['corrected']
+            })
+
+        # 5. Fine-tuning readiness (200+ corrected samples per class)
+        readiness = {}
+        for cls, stats in class_stats.items():
+            reviewed = stats.get('approved', 0) + stats.get('corrected', 0)
+            readiness[cls] = {
+                'reviewed_count': reviewed,
+                'target': 200,
+                'ready': reviewed >= 200,
+                'progress_pct': min(100, round(reviewed / 200 * 100, 1))
+            }
+
+        # 6. Summary totals
+        total_predictions = sum(s['total'] for s in class_stats.values())
+        total_approved = sum(s.get('approved', 0) + s.get('auto_approved', 0) for s in class_stats.values())
+        total_rejected = sum(s.get('rejected', 0) for s in class_stats.values())
+        total_corrected = sum(s.get('corrected', 0) for s in class_stats.values())
+        total_pending = sum(s.get('pending', 0) for s in class_stats.values())
+
+        # 7. Today's review count (by reviewed_at, so not from the rollup)
         with get_connection() as conn:
             cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
-
-            # 1. Per-class counts by review status
-            # Use corrected class when available (vehicle_subtype from classify,
-            # actual_class from reject-reclassify), fall back to model prediction
-            cursor.execute('''
-                SELECT
-                    COALESCE(
-                        corrected_tags->>'vehicle_subtype',
-                        corrected_tags->>'actual_class',
-                        predicted_tags->>'vehicle_type',
-                        predicted_tags->>'class'
-                    ) as vehicle_class,
-                    review_status,
-                    COUNT(*) as count
-                FROM ai_predictions
-                WHERE scenario = 'vehicle_detection'
-                   OR predicted_tags->>'vehicle_type' IS NOT NULL
-                GROUP BY vehicle_class, review_status
-                ORDER BY vehicle_class, review_status
-            ''')
-            class_status_rows = cursor.fetchall()
-
-            # Build per-class stats
-            class_stats = {}
-            for row in class_status_rows:
-                cls = row['vehicle_class'] or 'unknown'
-                if cls not in class_stats:
-                    class_stats[cls] = {'pending': 0, 'approved': 0, 'rejected': 0, 'corrected': 0, 'auto_approved': 0, 'total': 0}
-                status = row['review_status'] or 'pending'
-                class_stats[cls][status] = class_stats[cls].get(status, 0) + row['count']
-                class_stats[cls]['total'] += row['count']
-
-            # 2. Correction counts (how many were reclassified/classified)
-            cursor.execute('''
-                SELECT
-                    COALESCE(
-                        corrected_tags->>'vehicle_subtype',
-                        corrected_tags->>'actual_class',
-                        predicted_tags->>'vehicle_type',
-                        predicted_tags->>'class'
-                    ) as vehicle_class,
-                    COUNT(*) as corrected_count
-                FROM ai_predictions
-                WHERE (scenario = 'vehicle_detection'
-                       OR predicted_tags->>'vehicle_type' IS NOT NULL)
-                  AND (corrected_tags->>'vehicle_subtype' IS NOT NULL
-                       OR corrected_tags->>'actual_class' IS NOT NULL)
-                GROUP BY vehicle_class
-            ''')
-            for row in cursor.fetchall():
-                cls = row['vehicle_class'] or 'unknown'
-                if cls in class_stats:
-                    class_stats[cls]['corrected'] = row['corrected_count']
-
-            # 3. Confusion matrix: model prediction -> human correction
-            cursor.execute('''
-                SELECT
-                    COALESCE(predicted_tags->>'vehicle_type', predicted_tags->>'class') as original_class,
-                    COALESCE(corrected_tags->>'vehicle_subtype', corrected_tags->>'actual_class') as corrected_class,
-                    COUNT(*) as count
-                FROM ai_predictions
-                WHERE (scenario = 'vehicle_detection'
-                       OR predicted_tags->>'vehicle_type' IS NOT NULL)
-                  AND (corrected_tags->>'vehicle_subtype' IS NOT NULL
-                       OR corrected_tags->>'actual_class' IS NOT NULL)
-                GROUP BY original_class, corrected_class
-                ORDER BY count DESC
-            ''')
-            confusion_matrix = [dict(row) for row in cursor.fetchall()]
-
-            # 4. Weekly detection trends (last 8 weeks)
-            cursor.execute('''
-                SELECT
-                    date_trunc('week', created_at)::date as week,
-                    COUNT(*) as detections,
-                    COUNT(*) FILTER (WHERE review_status = 'approved') as approved,
-                    COUNT(*) FILTER (WHERE review_status = 'rejected') as rejected,
-                    COUNT(*) FILTER (WHERE corrected_tags->>'vehicle_subtype' IS NOT NULL
-                                         OR corrected_tags->>'actual_class' IS NOT NULL) as corrected
-                FROM ai_predictions
-                WHERE (scenario = 'vehicle_detection' OR predicted_tags->>'vehicle_type' IS NOT NULL)
-                  AND created_at >= NOW() - INTERVAL '8 weeks'
-                GROUP BY week
-                ORDER BY week
-            ''')
-            weekly_trends = []
-            for row in cursor.fetchall():
-                weekly_trends.append({
-                    'week': row['week'].isoformat() if row['week'] else None,
-                    'detections': row['detections'],
-                    'approved': row['approved'],
-                    'rejected': row['rejected'],
-                    'corrected': row['corrected']
-                })
-
-            # 5. Fine-tuning readiness (200+ corrected samples per class)
-            readiness = {}
-            for cls, stats in class_stats.items():
-                reviewed = stats.get('approved', 0) + stats.get('corrected', 0)
-                readiness[cls] = {
-                    'reviewed_count': reviewed,
-                    'target': 200,
-                    'ready': reviewed >= 200,
-                    'progress_pct': min(100, round(reviewed / 200 * 100, 1))
-                }
-
-            # 6. Summary totals
-            total_predictions = sum(s['total'] for s in class_stats.values())
-            total_approved = sum(s.get('approved', 0) + s.get('auto_approved', 0) for s in class_stats.values())
-            total_rejected = sum(s.get('rejected', 0) for s in class_stats.values())
-            total_corrected = sum(s.get('corrected', 0) for s in class_stats.values())
-            total_pending = sum(s.get('pending', 0) for s in class_stats.values())
-
-            # 7. Today's review count
             cursor.execute('''
                 SELECT COUNT(*) as count
                 FROM ai_predictions
@@ -1126,27 +1084,43 @@ def get_vehicle_metrics():
             ''')
             reviewed_today = cursor.fetchone()['count']
 
-            return jsonify({
-                'success': True,
-                'summary': {
-                    'total': total_predictions,
-                    'approved': total_approved,
-                    'rejected': total_rejected,
-                    'corrected': total_corrected,
-                    'pending': total_pending,
-                    'reviewed_today': reviewed_today,
-                    'class_count': len(class_stats)
-                },
-                'class_stats': class_stats,
-                'confusion_matrix': confusion_matrix,
-                'weekly_trends': weekly_trends,
-                'readiness': readiness
-            })
+        return jsonify({
+            'success': True,
+            'summary': {
+                'total': total_predictions,
+                'approved': total_approved,
+                'rejected': total_rejected,
+                'corrected': total_corrected,
+                'pending': total_pending,
+                'reviewed_today': reviewed_today,
+                'class_count': len(class_stats)
+            },
+            'window': {'since': since.isoformat() if since else None,
+                       'until': until.isoformat() if until else None},
+            'class_stats': class_stats,
+            'confusion_matrix': confusion_matrix,
+            'weekly_trends': weekly_trends,
+            'readiness': readiness
+        })
     except Exception as e:
         logger.error(f'Failed to get vehicle metrics: {e}')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@predictions_bp.route('/api/ai/vehicle-metrics/refresh', methods=['POST'])
+def refresh_vehicle_metrics():
+    """Rebuild the vehicle-metrics rollup from ai_predictions in the background."""
+    def _run():
+        try:
+            drifted = db.reconcile_vehicle_metrics_rollup()
+            logger.info(f'Vehicle metrics rollup refreshed ({drifted} keys corrected)')
+        except Exception as e:
+            logger.error(f'Vehicle metrics rollup refresh failed: {e}')
+
+    threading.Thread(target=_run, daemon=True, name="vehicle-metrics-refresh").start()
+    return jsonify({'success': True, 'message': 'Rollup refresh started'})
+
+
 # ---- Predictions by Class ----
 
 @predictions_bp.route('/api/ai/predictions/by-class')
@@ -1637,13 +1611,8 @@ def _check_and_trigger_interpolation(approved_pred):
         # Trigger in background
         logger.info(f"Triggering guided interpolation: video {approved_pred['video_id']}, "
                      f"class '{class_name}', preds {start_id}->{end_id}")
-        from interpolation_runner import run_guided_interpolation
-        threading.Thread(
-            target=run_guided_interpolation,
-            args=(approved_pred['video_id'], start_id, end_id),
-            daemon=True,
-            name=f"interp-{start_id}-{end_id}"
-        ).start()
+        from interpolation_runner import submit_interpolation
+        submit_interpolation(approved_pred['video_id'], start_id, end_id)
 
 
 @predictions_bp.route('/api/ai/feedback', methods=['POST'])
@@ -6,7 +6,6 @@ import os
 import json
 import logging
 import time
-import threading
 
 tracks_bp = Blueprint('tracks', __name__)
 logger = logging.getLogger(__name__)
@@ -81,13 +80,8 @@ def _check_and_trigger_interpolation(approved_pred):
         # Trigger in background
         logger.info(f"Triggering guided interpolation: video {approved_pred['video_id']}, "
                      f"class '{class_name}', preds {start_id}->{end_id}")
-        from interpolation_runner import run_guided_interpolation
-        threading.Thread(
-            target=run_guided_interpolation,
-            args=(approved_pred['video_id'], start_id, end_id),
-            daemon=True,
-            name=f"interp-{start_id}-{end_id}"
-        ).start()
+        from interpolation_runner import submit_interpolation
+        submit_interpolation(approved_pred['video_id'], start_id, end_id)
 
 
 # ── Camera Object Tracks ──────────────────────────────────────────────────
@@ -249,8 +243,17 @@ def get_crossing_lines():
 
 @tracks_bp.route('/api/ai/crossing-lines/<camera_id>/frame', methods=['GET'])
 def get_camera_frame(camera_id):
-    """Get a sample frame for the given camera."""
+    """Get a sample frame for the given camera.
+
+    Uses the latest video thumbnail; with ?live=1, or when no thumbnail
+    exists, serves a current frame from the shared snapshot cache.
+    """
     try:
+        if request.args.get('live') in ('1', 'true'):
+            live = _live_camera_frame(camera_id)
+            if live is not None:
+                return live
+
         with get_cursor(commit=False) as cursor:
             cursor.execute("""
                 SELECT v.id, v.thumbnail_path
@@ -262,6 +265,9 @@ def get_camera_frame(camera_id):
 
             result = cursor.fetchone()
             if not result:
+                live = _live_camera_frame(camera_id)
+                if live is not None:
+                    return live
                 return jsonify({'success': False, 'error': 'No videos found for camera'}), 404
 
             video = dict(result)
@@ -277,12 +283,26 @@ def get_camera_frame(camera_id):
                     if os.path.exists(thumbnail_file):
                         return send_from_directory(THUMBNAIL_DIR, thumb_path)
 
+        live = _live_camera_frame(camera_id)
+        if live is not None:
+            return live
         return jsonify({'success': False, 'error': 'No thumbnail available'}), 404
     except Exception as e:
         logger.error("Get camera frame error: %s", e, exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _live_camera_frame(camera_id):
+    """Current camera frame from the snapshot cache as a response, or None."""
+    from flask import Response
+    from snapshot_cache import snapshot_cache
+    data, age = snapshot_cache.get(camera_id)
+    if data is None:
+        return None
+    return Response(data, mimetype='image/jpeg',
+                    headers={'Cache-Control': 'no-cache', 'X-Snapshot-Age': f'{age:.2f}'})
+
+
 @tracks_bp.route('/api/ai/crossing-lines', methods=['POST'])
 def create_crossing_line():
     """Create or update a crossing line."""
@@ -461,10 +481,13 @@ def cross_camera_match_spatial():
     try:
         data = request.json or {}
         entity_type = data.get('entity_type', 'vehicle')
+        assignment = data.get('assignment', 'mutual')
+        if assignment not in ('mutual', 'hungarian'):
+            return jsonify({'success': False, 'error': 'assignment must be mutual or hungarian'}), 400
 
         from crossing_line_matcher import CrossingLineMatcher
         matcher = CrossingLineMatcher()
-        result = matcher.match_all(entity_type)
+        result = matcher.match_all(entity_type, assignment=assignment)
 
         return jsonify({'success': True, **result})
     except Exception as e:
@@ -1305,15 +1328,12 @@ def scan_and_trigger_interpolation():
                     skipped += 1
                     continue
 
-                # Trigger in background
-                from interpolation_runner import run_guided_interpolation
-                threading.Thread(
-                    target=run_guided_interpolation,
-                    args=(video_id, pred_a['id'], pred_b['id']),
-                    daemon=True,
-                    name=f"interp-scan-{pred_a['id']}-{pred_b['id']}"
-                ).start()
-                triggered += 1
+                # Queue on the shared interpolation worker
+                from interpolation_runner import submit_interpolation
+                if submit_interpolation(video_id, pred_a['id'], pred_b['id']):
+                    triggered += 1
+                else:
+                    skipped += 1
 
         return jsonify({
             'success': True,
@@ -1525,7 +1545,7 @@ def trigger_interpolation_manual():
 
         # Trigger interpolation between consecutive keyframe pairs
         tracks_created = 0
-        from interpolation_runner import run_guided_interpolation
+        from interpolation_runner import submit_interpolation
         for i in range(len(pred_ids) - 1):
             start_id = pred_ids[i]
             end_id = pred_ids[i + 1]
@@ -1534,13 +1554,9 @@ def trigger_interpolation_manual():
             if db.interpolation_track_exists(start_id, end_id):
                 continue
 
-            threading.Thread(
-                target=run_guided_interpolation,
-                args=(video_id, start_id, end_id),
-                daemon=True,
-                name=f"interp-manual-{start_id}-{end_id}"
-            ).start()
-            tracks_created += 1
+            # False when the pair is already queued or the queue is full
+            if submit_interpolation(video_id, start_id, end_id):
+                tracks_created += 1
 
         return jsonify({
             'success': True,
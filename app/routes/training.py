@@ -48,7 +48,9 @@ def submit_training_job():
         else:
             if export_config_id and not export_path:
                 output_name = data.get('output_name')
-                result = yolo_exporter.export_dataset(export_config_id, output_name)
+                result = yolo_exporter.export_dataset(
+                    export_config_id, output_name,
+                    incremental=bool(data.get('incremental', False)))
                 if not result.get('success'):
                     return jsonify({'success': False, 'error': 'Export failed', 'details': result}), 500
                 export_path = result['export_path']
@@ -448,6 +448,8 @@ def serve_thumbnail(filename):
 @videos_bp.route('/clips/<path:filename>')
 def serve_clip(filename):
     """Serve cached video clip"""
+    if filename.endswith('.mp4') and '/' not in filename:
+        processor._index_clip(CLIPS_DIR, CLIPS_DIR / filename, hit=True)
     return send_from_directory(CLIPS_DIR, filename)
 
 @videos_bp.route('/api/clips/cleanup', methods=['POST'])
@@ -455,29 +457,19 @@ def cleanup_clips():
     """Clean up cached video clips based on age and size limits."""
     if not g.can_write:
         return jsonify({'success': False, 'error': 'Read-only mode'}), 403
-    max_age = request.json.get('max_age_days', 7) if request.is_json else 7
-    max_size = request.json.get('max_size_mb', 500) if request.is_json else 500
-    result = processor.cleanup_clips(max_age_days=max_age, max_size_mb=max_size)
+    data = (request.json if request.is_json else None) or {}
+    max_age = data.get('max_age_days', 7)
+    max_size = data.get('max_size_mb', 500)
+    result = processor.cleanup_clips(max_age_days=max_age, max_size_mb=max_size,
+                                     rescan=bool(data.get('rescan')))
     return jsonify(result)
 
 @videos_bp.route('/api/clips/stats', methods=['GET'])
 def clips_stats():
     """Get clip cache statistics."""
-    clips_dir = CLIPS_DIR
-    if not clips_dir.exists():
+    if not CLIPS_DIR.exists():
         return jsonify({'count': 0, 'total_mb': 0, 'oldest_days': 0})
-    import time
-    clips = list(clips_dir.glob('*.mp4'))
-    total = sum(f.stat().st_size for f in clips) if clips else 0
-    oldest_age = 0
-    if clips:
-        oldest_mtime = min(f.stat().st_mtime for f in clips)
-        oldest_age = round((time.time() - oldest_mtime) / 86400, 1)
-    return jsonify({
-        'count': len(clips),
-        'total_mb': round(total / (1024 * 1024), 1),
-        'oldest_days': oldest_age
-    })
+    return jsonify(processor.clip_stats(str(CLIPS_DIR)))
 
 @videos_bp.route('/api/system/status', methods=['GET'])
 def system_status():
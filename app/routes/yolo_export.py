@@ -254,8 +254,9 @@ def export_yolo_dataset(config_id):
     try:
         data = request.get_json() or {}
         output_name = data.get('output_name')
+        incremental = bool(data.get('incremental', False))
 
-        result = yolo_exporter.export_dataset(config_id, output_name)
+        result = yolo_exporter.export_dataset(config_id, output_name, incremental=incremental)
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
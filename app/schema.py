@@ -5,8 +5,15 @@ This module defines all database tables and provides initialization functions.
 PostgreSQL schema with native types and features.
 """
 
-from db_connection import get_cursor
+import argparse
 import logging
+import threading
+import time
+from typing import Dict, List
+
+from psycopg2 import extras
+
+from db_connection import get_cursor, get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -1062,990 +1069,1543 @@ def verify_schema():
         }
 
 
-def run_migrations():
-    """Run database migrations for schema changes."""
-    logger.info("Running database migrations...")
-
-    try:
-        with get_cursor() as cursor:
-            # Migration: Add camera_id column to videos table if missing
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'videos' AND column_name = 'camera_id'
-            """)
-            if not cursor.fetchone():
-                cursor.execute("ALTER TABLE videos ADD COLUMN camera_id TEXT")
-                logger.info("Added camera_id column to videos table")
-
-                # Backfill camera_id from original_url for ecoeye imports
-                # URL format: ecoeye://{timestamp}_{MAC}_{type}
-                cursor.execute("""
-                    UPDATE videos
-                    SET camera_id = split_part(
-                        split_part(replace(original_url, 'ecoeye://', ''), '_', 2),
-                        '_', 1
-                    )
-                    WHERE original_url LIKE 'ecoeye://%%'
-                    AND camera_id IS NULL
-                    AND original_url ~ 'ecoeye://[^_]+_[A-Fa-f0-9]+'
-                """)
-                logger.info("Backfilled camera_id from original_url for existing ecoeye imports")
-
-            # Migration: Add is_active column to model_registry if missing
-            try:
-                cursor.execute("ALTER TABLE model_registry ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE")
-            except Exception as e:
-                logger.warning(f"is_active migration note: {e}")
-
-            # Migration: Create content_libraries tables if missing
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS content_libraries (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT NOT NULL UNIQUE,
-                    is_default BOOLEAN DEFAULT FALSE,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS content_library_items (
-                    library_id INTEGER NOT NULL,
-                    video_id INTEGER NOT NULL,
-                    added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (library_id, video_id),
-                    FOREIGN KEY (library_id) REFERENCES content_libraries(id) ON DELETE CASCADE,
-                    FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_content_libraries_name ON content_libraries(name)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_library_items_library ON content_library_items(library_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_library_items_video ON content_library_items(video_id)")
-            # Seed default "Uncategorized" library
-            cursor.execute("""
-                INSERT INTO content_libraries (name, is_default)
-                VALUES ('Uncategorized', TRUE)
-                ON CONFLICT (name) DO NOTHING
-            """)
-            logger.info("Content libraries tables ready")
-
-            # Migration: Create Multi-Entity Detection System tables
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS identities (
-                    identity_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    name VARCHAR(255),
-                    identity_type VARCHAR(20) NOT NULL CHECK (identity_type IN ('person', 'vehicle', 'boat', 'trailer')),
-                    first_seen TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
-                    last_seen TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
-                    metadata JSONB DEFAULT '{}',
-                    is_flagged BOOLEAN NOT NULL DEFAULT FALSE,
-                    notes TEXT,
-                    external_id VARCHAR(255),
-                    source_system VARCHAR(50),
-                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS embeddings (
-                    embedding_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    identity_id UUID NOT NULL REFERENCES identities(identity_id) ON DELETE CASCADE,
-                    embedding_type VARCHAR(30) NOT NULL CHECK (embedding_type IN ('face', 'body_reid', 'boat_reid', 'vehicle_appearance')),
-                    vector REAL[] NOT NULL,
-                    confidence REAL NOT NULL CHECK (confidence >= 0.0 AND confidence <= 1.0),
-                    source_image_path VARCHAR(500),
-                    camera_id VARCHAR(100),
-                    is_reference BOOLEAN NOT NULL DEFAULT FALSE,
-                    session_date DATE,
-                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS associations (
-                    association_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    identity_a UUID NOT NULL REFERENCES identities(identity_id) ON DELETE CASCADE,
-                    identity_b UUID NOT NULL REFERENCES identities(identity_id) ON DELETE CASCADE,
-                    association_type VARCHAR(30) NOT NULL CHECK (association_type IN ('person_vehicle', 'vehicle_trailer', 'trailer_boat', 'person_boat')),
-                    confidence REAL NOT NULL DEFAULT 0.0 CHECK (confidence >= 0.0 AND confidence <= 1.0),
-                    observation_count INTEGER NOT NULL DEFAULT 1,
-                    first_observed TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
-                    last_observed TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
-                    UNIQUE(identity_a, identity_b, association_type)
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tracks (
-                    track_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    camera_id VARCHAR(100) NOT NULL,
-                    entity_type VARCHAR(20) NOT NULL CHECK (entity_type IN ('person', 'vehicle', 'boat', 'trailer')),
-                    start_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
-                    end_time TIMESTAMP WITH TIME ZONE,
-                    identity_method VARCHAR(20) CHECK (identity_method IN ('face', 'reid', 'plate', 'registration', 'manual', 'association')),
-                    identity_confidence REAL CHECK (identity_confidence >= 0.0 AND identity_confidence <= 1.0)
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sightings (
-                    sighting_id BIGSERIAL PRIMARY KEY,
-                    track_id UUID NOT NULL REFERENCES tracks(track_id) ON DELETE CASCADE,
-                    timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-                    bbox REAL[4] NOT NULL,
-                    confidence REAL NOT NULL CHECK (confidence >= 0.0 AND confidence <= 1.0),
-                    face_visible BOOLEAN NOT NULL DEFAULT FALSE
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS camera_topology_learned (
-                    camera_a VARCHAR(100) NOT NULL,
-                    camera_b VARCHAR(100) NOT NULL,
-                    min_transit_seconds INTEGER NOT NULL,
-                    max_transit_seconds INTEGER NOT NULL,
-                    avg_transit_seconds REAL,
-                    observation_count INTEGER NOT NULL DEFAULT 0,
-                    PRIMARY KEY (camera_a, camera_b)
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS violations (
-                    violation_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    violation_type VARCHAR(50) NOT NULL CHECK (violation_type IN ('power_loading', 'unauthorized_dock', 'speed_violation', 'no_wake_zone', 'other')),
-                    camera_id VARCHAR(100) NOT NULL,
-                    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
-                    person_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    vehicle_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    boat_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    trailer_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    evidence_paths TEXT[] NOT NULL DEFAULT '{}',
-                    confidence REAL NOT NULL CHECK (confidence >= 0.0 AND confidence <= 1.0),
-                    status VARCHAR(20) NOT NULL DEFAULT 'detected' CHECK (status IN ('detected', 'confirmed', 'false_positive', 'actioned')),
-                    reviewed_by VARCHAR(100),
-                    notes TEXT,
-                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS visits (
-                    visit_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    person_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    vehicle_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    boat_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    arrival_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
-                    departure_time TIMESTAMP WITH TIME ZONE,
-                    violation_ids UUID[] DEFAULT '{}',
-                    track_ids UUID[] NOT NULL DEFAULT '{}',
-                    camera_timeline JSONB NOT NULL DEFAULT '[]',
-                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
-                )
-            """)
-            # Create indexes for Multi-Entity Detection System
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_type ON identities(identity_type)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_name ON identities(name)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_flagged ON identities(is_flagged) WHERE is_flagged = TRUE")
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_identities_external ON identities(source_system, external_id) WHERE external_id IS NOT NULL")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_last_seen ON identities(last_seen)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_identity ON embeddings(identity_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_type ON embeddings(embedding_type)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_session ON embeddings(session_date)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_camera ON embeddings(camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_associations_identity_a ON associations(identity_a)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_associations_identity_b ON associations(identity_b)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_associations_type ON associations(association_type)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_identity ON tracks(identity_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_camera ON tracks(camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_camera_time ON tracks(camera_id, start_time)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_entity_type ON tracks(entity_type)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sightings_track ON sightings(track_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sightings_track_time ON sightings(track_id, timestamp)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_type ON violations(violation_type)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_status ON violations(status)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_camera ON violations(camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_timestamp ON violations(timestamp)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_person ON violations(person_identity_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_person ON visits(person_identity_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_vehicle ON visits(vehicle_identity_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_arrival ON visits(arrival_time)")
-            logger.info("Multi-Entity Detection System tables ready")
-
-            # Migration: Create interpolation_tracks table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS interpolation_tracks (
-                    id SERIAL PRIMARY KEY,
-                    video_id INTEGER NOT NULL,
-                    class_name VARCHAR(255) NOT NULL,
-                    start_prediction_id INTEGER NOT NULL,
-                    end_prediction_id INTEGER NOT NULL,
-                    start_timestamp REAL NOT NULL,
-                    end_timestamp REAL NOT NULL,
-                    frame_interval REAL DEFAULT 1.0,
-                    status VARCHAR(20) DEFAULT 'pending'
-                        CHECK (status IN ('pending', 'processing', 'ready', 'approved', 'rejected')),
-                    frames_generated INTEGER DEFAULT 0,
-                    frames_detected INTEGER DEFAULT 0,
-                    batch_id VARCHAR(255),
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    reviewed_at TIMESTAMP WITH TIME ZONE,
-                    reviewed_by VARCHAR(255),
-                    FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_interp_tracks_video ON interpolation_tracks(video_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_interp_tracks_status ON interpolation_tracks(status)")
-            logger.info("Interpolation tracks table ready")
-
-            # Migration: Add metadata JSONB column to videos table
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'videos' AND column_name = 'metadata'
-            """)
-            if not cursor.fetchone():
-                cursor.execute("ALTER TABLE videos ADD COLUMN metadata JSONB DEFAULT '{}'")
-                logger.info("Added metadata column to videos table")
-
-            # Migration: Create prediction_groups table and add prediction_group_id to ai_predictions
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS prediction_groups (
-                    id BIGSERIAL PRIMARY KEY,
-                    camera_id TEXT NOT NULL,
-                    scenario VARCHAR(255) NOT NULL,
-                    representative_prediction_id BIGINT,
-                    bbox_centroid_x INTEGER NOT NULL,
-                    bbox_centroid_y INTEGER NOT NULL,
-                    avg_bbox_width INTEGER NOT NULL,
-                    avg_bbox_height INTEGER NOT NULL,
-                    member_count INTEGER NOT NULL DEFAULT 1,
-                    min_confidence REAL,
-                    max_confidence REAL,
-                    avg_confidence REAL,
-                    min_timestamp REAL,
-                    max_timestamp REAL,
-                    review_status VARCHAR(20) DEFAULT 'pending'
-                        CHECK (review_status IN ('pending', 'approved', 'rejected', 'partial')),
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pred_groups_camera ON prediction_groups(camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pred_groups_status ON prediction_groups(review_status)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pred_groups_scenario ON prediction_groups(scenario)")
-
-            # Add prediction_group_id column to ai_predictions if not exists
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'ai_predictions' AND column_name = 'prediction_group_id'
-            """)
-            if not cursor.fetchone():
-                cursor.execute("""
-                    ALTER TABLE ai_predictions ADD COLUMN prediction_group_id BIGINT
-                    REFERENCES prediction_groups(id) ON DELETE SET NULL
-                """)
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_group ON ai_predictions(prediction_group_id)")
-                logger.info("Added prediction_group_id column to ai_predictions table")
-            logger.info("Prediction groups table ready")
+def _reconcile_rollup(cursor, table: str, key_columns: str, fresh_select: str) -> int:
+    """
+    Repair a trigger-maintained rollup table from its source query.
 
-            # Camera object tracks table + column migration
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables
-                    WHERE table_name = 'camera_object_tracks'
-                )
-            """)
-            if not cursor.fetchone()['exists']:
-                cursor.execute("""
-                    CREATE TABLE camera_object_tracks (
-                        id BIGSERIAL PRIMARY KEY,
-                        camera_id TEXT NOT NULL,
-                        scenario VARCHAR(255) NOT NULL,
-                        bbox_centroid_x INTEGER NOT NULL,
-                        bbox_centroid_y INTEGER NOT NULL,
-                        avg_bbox_width INTEGER NOT NULL,
-                        avg_bbox_height INTEGER NOT NULL,
-                        member_count INTEGER NOT NULL DEFAULT 0,
-                        approved_count INTEGER NOT NULL DEFAULT 0,
-                        rejected_count INTEGER NOT NULL DEFAULT 0,
-                        pending_count INTEGER NOT NULL DEFAULT 0,
-                        auto_approved_count INTEGER NOT NULL DEFAULT 0,
-                        anchor_status VARCHAR(20) DEFAULT 'pending'
-                            CHECK (anchor_status IN ('pending', 'approved', 'rejected', 'conflict')),
-                        anchor_classification JSONB,
-                        classification_conflict BOOLEAN DEFAULT FALSE,
-                        representative_prediction_id BIGINT,
-                        min_confidence REAL,
-                        max_confidence REAL,
-                        avg_confidence REAL,
-                        first_seen REAL,
-                        last_seen REAL,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                """)
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_camera ON camera_object_tracks(camera_id)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_status ON camera_object_tracks(anchor_status)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_scenario ON camera_object_tracks(scenario)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_camera_scenario ON camera_object_tracks(camera_id, scenario)")
-                logger.info("Created camera_object_tracks table")
+    The drift per key is read in one statement, so the recount and the
+    rollup come from the same snapshot and concurrent trigger deltas can't
+    skew it.  Only drifted keys are then corrected, by adding the drift the
+    same way the triggers add their deltas, so no table lock is taken and
+    writers never wait on the scan.  A transaction-level advisory lock per
+    rollup lets only one process reconcile it at a time; the others return
+    without scanning.
 
-            # Add camera_object_track_id to ai_predictions
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'ai_predictions' AND column_name = 'camera_object_track_id'
-            """)
-            if not cursor.fetchone():
-                cursor.execute("""
-                    ALTER TABLE ai_predictions ADD COLUMN camera_object_track_id BIGINT
-                    REFERENCES camera_object_tracks(id) ON DELETE SET NULL
-                """)
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_cam_track ON ai_predictions(camera_object_track_id)")
-                logger.info("Added camera_object_track_id to ai_predictions")
+    Returns:
+        Number of rollup keys whose stored count had drifted (0 when another
+        process holds the reconcile lock)
+    """
+    cursor.execute("SELECT pg_try_advisory_xact_lock(%s, hashtext(%s)) AS locked",
+                   (ROLLUP_RECONCILE_LOCK_KEY, table))
+    if not cursor.fetchone()['locked']:
+        logger.info(f"{table} reconcile already running elsewhere, skipped")
+        return 0
+    cursor.execute(f"""
+        CREATE TEMP TABLE {table}_drift ON COMMIT DROP AS
+        SELECT {key_columns},
+               COALESCE(f.prediction_count, 0) - COALESCE(c.prediction_count, 0) AS drift
+        FROM {table} c
+        FULL JOIN ({fresh_select}) f USING ({key_columns})
+        WHERE COALESCE(c.prediction_count, 0) <> COALESCE(f.prediction_count, 0)
+    """)
+    drifted = cursor.rowcount
+    if drifted:
+        cursor.execute(f"""
+            INSERT INTO {table} AS r ({key_columns}, prediction_count)
+            SELECT {key_columns}, drift FROM {table}_drift
+            ORDER BY {key_columns}
+            ON CONFLICT ({key_columns})
+            DO UPDATE SET prediction_count = r.prediction_count + EXCLUDED.prediction_count
+        """)
+    cursor.execute(f"DELETE FROM {table} WHERE prediction_count = 0")
+    cursor.execute(f"DROP TABLE {table}_drift")
+    return drifted
+
+
+def reconcile_review_queue_counters(cursor) -> int:
+    """Recompute review_queue_counters from ai_predictions; returns drifted key count."""
+    return _reconcile_rollup(cursor, 'review_queue_counters',
+                             'camera_id, scenario, review_status, confidence_bucket', """
+        SELECT COALESCE(v.camera_id, '') AS camera_id, p.scenario,
+               COALESCE(p.review_status, '') AS review_status,
+               LEAST(FLOOR(p.confidence * 100), 100)::smallint AS confidence_bucket,
+               COUNT(*) AS prediction_count
+        FROM ai_predictions p
+        JOIN videos v ON v.id = p.video_id
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+# Vehicle-metrics rows: vehicle detections plus anything the classifier typed
+VEHICLE_METRICS_PREDICATE = "(scenario = 'vehicle_detection' OR predicted_tags->>'vehicle_type' IS NOT NULL)"
+# Model class and human class as stored in vehicle_metrics_rollup ('' = none)
+VEHICLE_ORIGINAL_CLASS_SQL = "COALESCE(predicted_tags->>'vehicle_type', predicted_tags->>'class', '')"
+VEHICLE_CORRECTED_CLASS_SQL = "COALESCE(corrected_tags->>'vehicle_subtype', corrected_tags->>'actual_class', '')"
+VEHICLE_DAY_SQL = "COALESCE(created_at::date, DATE '1970-01-01')"
+
+
+def reconcile_vehicle_metrics_rollup(cursor) -> int:
+    """Recompute vehicle_metrics_rollup from ai_predictions; returns drifted key count."""
+    return _reconcile_rollup(cursor, 'vehicle_metrics_rollup',
+                             'day, original_class, corrected_class, review_status', f"""
+        SELECT {VEHICLE_DAY_SQL} AS day,
+               {VEHICLE_ORIGINAL_CLASS_SQL} AS original_class,
+               {VEHICLE_CORRECTED_CLASS_SQL} AS corrected_class,
+               COALESCE(review_status, '') AS review_status,
+               COUNT(*) AS prediction_count
+        FROM ai_predictions
+        WHERE {VEHICLE_METRICS_PREDICATE}
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def _install_rollup_triggers(cursor, table: str, key_columns: str, key_sql: str,
+                             from_sql: str = '', where_sql: str = 'TRUE'):
+    """
+    (Re)create statement-level triggers on ai_predictions that keep a
+    prediction_count rollup current from the transition tables.
 
-            # Migration: Add rejection_reason to cross_camera_links
-            cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS rejection_reason VARCHAR(100)")
+    key_sql computes key_columns over the changed rows, aliased ``d``;
+    from_sql can join extra tables to it and where_sql restricts which rows
+    count.  Updates only touch keys whose net count moved.
+    """
+    sources = {
+        'INSERT': "SELECT *, 1 AS delta FROM new_rows",
+        'DELETE': "SELECT *, -1 AS delta FROM old_rows",
+        'UPDATE': "SELECT *, -1 AS delta FROM old_rows UNION ALL SELECT *, 1 AS delta FROM new_rows",
+    }
+    branches = []
+    for op, source in sources.items():
+        branches.append(f"""
+            IF TG_OP = '{op}' THEN
+                INSERT INTO {table} AS r ({key_columns}, prediction_count)
+                SELECT {key_sql}, SUM(d.delta)
+                FROM ({source}) d {from_sql}
+                WHERE {where_sql}
+                GROUP BY 1, 2, 3, 4
+                HAVING SUM(d.delta) <> 0
+                ORDER BY 1, 2, 3, 4
+                ON CONFLICT ({key_columns})
+                DO UPDATE SET prediction_count = r.prediction_count + EXCLUDED.prediction_count;
+            END IF;""")
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION {table}_apply() RETURNS trigger AS $$
+        BEGIN{''.join(branches)}
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for op, tables in (('INSERT', 'NEW TABLE AS new_rows'),
+                       ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+                       ('DELETE', 'OLD TABLE AS old_rows')):
+        trigger = f"trg_{table}_{op.lower()}"
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger} ON ai_predictions")
+        cursor.execute(f"""
+            CREATE TRIGGER {trigger}
+            AFTER {op} ON ai_predictions
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_apply()
+        """)
 
-            # Migration: Create camera_crossing_lines table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS camera_crossing_lines (
-                    id SERIAL PRIMARY KEY,
-                    camera_id TEXT NOT NULL,
-                    line_name VARCHAR(100) NOT NULL,
-                    x1 INTEGER NOT NULL,
-                    y1 INTEGER NOT NULL,
-                    x2 INTEGER NOT NULL,
-                    y2 INTEGER NOT NULL,
-                    forward_dx REAL NOT NULL DEFAULT 1.0,
-                    forward_dy REAL NOT NULL DEFAULT 0.0,
-                    paired_camera_id TEXT,
-                    paired_line_id INTEGER REFERENCES camera_crossing_lines(id) ON DELETE SET NULL,
-                    lane_mapping_reversed BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(camera_id, line_name)
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_crossing_lines_camera ON camera_crossing_lines(camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_crossing_lines_paired ON camera_crossing_lines(paired_line_id)")
-            logger.info("Camera crossing lines table ready")
 
-            # Migration: Add 'auto_confirmed' to cross_camera_links status CHECK
-            try:
-                cursor.execute("""
-                    SELECT conname, pg_get_constraintdef(oid) as condef
-                    FROM pg_constraint
-                    WHERE conrelid = 'cross_camera_links'::regclass
-                      AND contype = 'c'
-                      AND pg_get_constraintdef(oid) LIKE '%%status%%'
-                """)
-                xcam_constraint = cursor.fetchone()
-                if xcam_constraint:
-                    cname = xcam_constraint['conname']
-                    condef = xcam_constraint.get('condef') or ''
-                    if 'auto_confirmed' not in condef:
-                        cursor.execute(f"ALTER TABLE cross_camera_links DROP CONSTRAINT {cname}")
-                        cursor.execute("""
-                            ALTER TABLE cross_camera_links ADD CONSTRAINT cross_camera_links_status_check
-                            CHECK (status IN ('auto', 'confirmed', 'rejected', 'auto_confirmed'))
-                        """)
-                        logger.info("Updated cross_camera_links status CHECK to include 'auto_confirmed'")
-            except Exception as e:
-                logger.warning(f"cross_camera_links status constraint migration note: {e}")
-
-            # Migration: Add spatial match columns to cross_camera_links
-            cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS lane_distance REAL")
-            cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS crossing_line_id INTEGER")
-
-            # Migration: Add 'processing' to review_status CHECK constraint
-            # Allows predictions to be held back from review until automated processing completes
-            try:
-                cursor.execute("""
-                    SELECT conname, pg_get_constraintdef(oid) as condef
-                    FROM pg_constraint
-                    WHERE conrelid = 'ai_predictions'::regclass
-                      AND contype = 'c'
-                      AND pg_get_constraintdef(oid) LIKE '%%review_status%%'
-                """)
-                existing = cursor.fetchone()
-                if existing:
-                    constraint_name = existing['conname']
-                    condef = existing.get('condef') or ''
-                    if 'processing' not in condef:
-                        cursor.execute(f"ALTER TABLE ai_predictions DROP CONSTRAINT {constraint_name}")
-                        cursor.execute("""
-                            ALTER TABLE ai_predictions ADD CONSTRAINT ai_predictions_review_status_check
-                            CHECK (review_status IN ('pending', 'approved', 'rejected', 'needs_correction',
-                                                     'auto_approved', 'auto_rejected', 'processing'))
-                        """)
-                        logger.info("Updated review_status CHECK constraint to include 'processing'")
-            except Exception as e:
-                logger.warning(f"review_status constraint migration note: {e}")
-
-            # Migration: Add parent_prediction_id to ai_predictions (for two-stage detection: plate/reg linked to parent entity)
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'ai_predictions' AND column_name = 'parent_prediction_id'
-            """)
-            if not cursor.fetchone():
-                cursor.execute("""
-                    ALTER TABLE ai_predictions ADD COLUMN parent_prediction_id BIGINT
-                    REFERENCES ai_predictions(id) ON DELETE SET NULL
-                """)
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_parent ON ai_predictions(parent_prediction_id)")
-                logger.info("Added parent_prediction_id to ai_predictions")
+def _migration_baseline(cursor):
+    """Every migration that predates schema_migrations, in its original order."""
+    # Migration: Add camera_id column to videos table if missing
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'videos' AND column_name = 'camera_id'
+    """)
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE videos ADD COLUMN camera_id TEXT")
+        logger.info("Added camera_id column to videos table")
 
-            # Migration: Create classification_classes lookup table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS classification_classes (
-                    name VARCHAR(100) PRIMARY KEY,
-                    scenario VARCHAR(100) NOT NULL,
-                    display_name VARCHAR(200),
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_classification_classes_scenario ON classification_classes(scenario)")
-            logger.info("classification_classes table ready")
+        # Backfill camera_id from original_url for ecoeye imports
+        # URL format: ecoeye://{timestamp}_{MAC}_{type}
+        cursor.execute("""
+            UPDATE videos
+            SET camera_id = split_part(
+                split_part(replace(original_url, 'ecoeye://', ''), '_', 2),
+                '_', 1
+            )
+            WHERE original_url LIKE 'ecoeye://%%'
+            AND camera_id IS NULL
+            AND original_url ~ 'ecoeye://[^_]+_[A-Fa-f0-9]+'
+        """)
+        logger.info("Backfilled camera_id from original_url for existing ecoeye imports")
 
-            # Migration: Add classification column to ai_predictions (lookup table for training class of record)
-            cursor.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'ai_predictions' AND column_name = 'classification'
-            """)
-            if not cursor.fetchone():
+    # Migration: Add is_active column to model_registry if missing
+    try:
+        cursor.execute("ALTER TABLE model_registry ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE")
+    except Exception as e:
+        logger.warning(f"is_active migration note: {e}")
+
+    # Migration: Create content_libraries tables if missing
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS content_libraries (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            is_default BOOLEAN DEFAULT FALSE,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS content_library_items (
+            library_id INTEGER NOT NULL,
+            video_id INTEGER NOT NULL,
+            added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (library_id, video_id),
+            FOREIGN KEY (library_id) REFERENCES content_libraries(id) ON DELETE CASCADE,
+            FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_content_libraries_name ON content_libraries(name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_library_items_library ON content_library_items(library_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_library_items_video ON content_library_items(video_id)")
+    # Seed default "Uncategorized" library
+    cursor.execute("""
+        INSERT INTO content_libraries (name, is_default)
+        VALUES ('Uncategorized', TRUE)
+        ON CONFLICT (name) DO NOTHING
+    """)
+    logger.info("Content libraries tables ready")
+
+    # Migration: Create Multi-Entity Detection System tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS identities (
+            identity_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            name VARCHAR(255),
+            identity_type VARCHAR(20) NOT NULL CHECK (identity_type IN ('person', 'vehicle', 'boat', 'trailer')),
+            first_seen TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            last_seen TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            metadata JSONB DEFAULT '{}',
+            is_flagged BOOLEAN NOT NULL DEFAULT FALSE,
+            notes TEXT,
+            external_id VARCHAR(255),
+            source_system VARCHAR(50),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings (
+            embedding_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            identity_id UUID NOT NULL REFERENCES identities(identity_id) ON DELETE CASCADE,
+            embedding_type VARCHAR(30) NOT NULL CHECK (embedding_type IN ('face', 'body_reid', 'boat_reid', 'vehicle_appearance')),
+            vector REAL[] NOT NULL,
+            confidence REAL NOT NULL CHECK (confidence >= 0.0 AND confidence <= 1.0),
+            source_image_path VARCHAR(500),
+            camera_id VARCHAR(100),
+            is_reference BOOLEAN NOT NULL DEFAULT FALSE,
+            session_date DATE,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS associations (
+            association_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            identity_a UUID NOT NULL REFERENCES identities(identity_id) ON DELETE CASCADE,
+            identity_b UUID NOT NULL REFERENCES identities(identity_id) ON DELETE CASCADE,
+            association_type VARCHAR(30) NOT NULL CHECK (association_type IN ('person_vehicle', 'vehicle_trailer', 'trailer_boat', 'person_boat')),
+            confidence REAL NOT NULL DEFAULT 0.0 CHECK (confidence >= 0.0 AND confidence <= 1.0),
+            observation_count INTEGER NOT NULL DEFAULT 1,
+            first_observed TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            last_observed TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            UNIQUE(identity_a, identity_b, association_type)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tracks (
+            track_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            camera_id VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(20) NOT NULL CHECK (entity_type IN ('person', 'vehicle', 'boat', 'trailer')),
+            start_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            end_time TIMESTAMP WITH TIME ZONE,
+            identity_method VARCHAR(20) CHECK (identity_method IN ('face', 'reid', 'plate', 'registration', 'manual', 'association')),
+            identity_confidence REAL CHECK (identity_confidence >= 0.0 AND identity_confidence <= 1.0)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sightings (
+            sighting_id BIGSERIAL PRIMARY KEY,
+            track_id UUID NOT NULL REFERENCES tracks(track_id) ON DELETE CASCADE,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            bbox REAL[4] NOT NULL,
+            confidence REAL NOT NULL CHECK (confidence >= 0.0 AND confidence <= 1.0),
+            face_visible BOOLEAN NOT NULL DEFAULT FALSE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS camera_topology_learned (
+            camera_a VARCHAR(100) NOT NULL,
+            camera_b VARCHAR(100) NOT NULL,
+            min_transit_seconds INTEGER NOT NULL,
+            max_transit_seconds INTEGER NOT NULL,
+            avg_transit_seconds REAL,
+            observation_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (camera_a, camera_b)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS violations (
+            violation_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            violation_type VARCHAR(50) NOT NULL CHECK (violation_type IN ('power_loading', 'unauthorized_dock', 'speed_violation', 'no_wake_zone', 'other')),
+            camera_id VARCHAR(100) NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            person_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            vehicle_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            boat_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            trailer_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            evidence_paths TEXT[] NOT NULL DEFAULT '{}',
+            confidence REAL NOT NULL CHECK (confidence >= 0.0 AND confidence <= 1.0),
+            status VARCHAR(20) NOT NULL DEFAULT 'detected' CHECK (status IN ('detected', 'confirmed', 'false_positive', 'actioned')),
+            reviewed_by VARCHAR(100),
+            notes TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS visits (
+            visit_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            person_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            vehicle_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            boat_identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            arrival_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            departure_time TIMESTAMP WITH TIME ZONE,
+            violation_ids UUID[] DEFAULT '{}',
+            track_ids UUID[] NOT NULL DEFAULT '{}',
+            camera_timeline JSONB NOT NULL DEFAULT '[]',
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+        )
+    """)
+    # Create indexes for Multi-Entity Detection System
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_type ON identities(identity_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_name ON identities(name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_flagged ON identities(is_flagged) WHERE is_flagged = TRUE")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_identities_external ON identities(source_system, external_id) WHERE external_id IS NOT NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identities_last_seen ON identities(last_seen)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_identity ON embeddings(identity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_type ON embeddings(embedding_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_session ON embeddings(session_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_camera ON embeddings(camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_associations_identity_a ON associations(identity_a)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_associations_identity_b ON associations(identity_b)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_associations_type ON associations(association_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_identity ON tracks(identity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_camera ON tracks(camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_camera_time ON tracks(camera_id, start_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_entity_type ON tracks(entity_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sightings_track ON sightings(track_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sightings_track_time ON sightings(track_id, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_type ON violations(violation_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_status ON violations(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_camera ON violations(camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_timestamp ON violations(timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_violations_person ON violations(person_identity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_person ON visits(person_identity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_vehicle ON visits(vehicle_identity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_arrival ON visits(arrival_time)")
+    logger.info("Multi-Entity Detection System tables ready")
+
+    # Migration: Create interpolation_tracks table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS interpolation_tracks (
+            id SERIAL PRIMARY KEY,
+            video_id INTEGER NOT NULL,
+            class_name VARCHAR(255) NOT NULL,
+            start_prediction_id INTEGER NOT NULL,
+            end_prediction_id INTEGER NOT NULL,
+            start_timestamp REAL NOT NULL,
+            end_timestamp REAL NOT NULL,
+            frame_interval REAL DEFAULT 1.0,
+            status VARCHAR(20) DEFAULT 'pending'
+                CHECK (status IN ('pending', 'processing', 'ready', 'approved', 'rejected')),
+            frames_generated INTEGER DEFAULT 0,
+            frames_detected INTEGER DEFAULT 0,
+            batch_id VARCHAR(255),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            reviewed_at TIMESTAMP WITH TIME ZONE,
+            reviewed_by VARCHAR(255),
+            FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interp_tracks_video ON interpolation_tracks(video_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interp_tracks_status ON interpolation_tracks(status)")
+    logger.info("Interpolation tracks table ready")
+
+    # Migration: Add metadata JSONB column to videos table
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'videos' AND column_name = 'metadata'
+    """)
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE videos ADD COLUMN metadata JSONB DEFAULT '{}'")
+        logger.info("Added metadata column to videos table")
+
+    # Migration: Create prediction_groups table and add prediction_group_id to ai_predictions
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prediction_groups (
+            id BIGSERIAL PRIMARY KEY,
+            camera_id TEXT NOT NULL,
+            scenario VARCHAR(255) NOT NULL,
+            representative_prediction_id BIGINT,
+            bbox_centroid_x INTEGER NOT NULL,
+            bbox_centroid_y INTEGER NOT NULL,
+            avg_bbox_width INTEGER NOT NULL,
+            avg_bbox_height INTEGER NOT NULL,
+            member_count INTEGER NOT NULL DEFAULT 1,
+            min_confidence REAL,
+            max_confidence REAL,
+            avg_confidence REAL,
+            min_timestamp REAL,
+            max_timestamp REAL,
+            review_status VARCHAR(20) DEFAULT 'pending'
+                CHECK (review_status IN ('pending', 'approved', 'rejected', 'partial')),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pred_groups_camera ON prediction_groups(camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pred_groups_status ON prediction_groups(review_status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pred_groups_scenario ON prediction_groups(scenario)")
+
+    # Add prediction_group_id column to ai_predictions if not exists
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'ai_predictions' AND column_name = 'prediction_group_id'
+    """)
+    if not cursor.fetchone():
+        cursor.execute("""
+            ALTER TABLE ai_predictions ADD COLUMN prediction_group_id BIGINT
+            REFERENCES prediction_groups(id) ON DELETE SET NULL
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_group ON ai_predictions(prediction_group_id)")
+        logger.info("Added prediction_group_id column to ai_predictions table")
+    logger.info("Prediction groups table ready")
+
+    # Camera object tracks table + column migration
+    cursor.execute("""
+        SELECT EXISTS (
+            SELECT FROM information_schema.tables
+            WHERE table_name = 'camera_object_tracks'
+        )
+    """)
+    if not cursor.fetchone()['exists']:
+        cursor.execute("""
+            CREATE TABLE camera_object_tracks (
+                id BIGSERIAL PRIMARY KEY,
+                camera_id TEXT NOT NULL,
+                scenario VARCHAR(255) NOT NULL,
+                bbox_centroid_x INTEGER NOT NULL,
+                bbox_centroid_y INTEGER NOT NULL,
+                avg_bbox_width INTEGER NOT NULL,
+                avg_bbox_height INTEGER NOT NULL,
+                member_count INTEGER NOT NULL DEFAULT 0,
+                approved_count INTEGER NOT NULL DEFAULT 0,
+                rejected_count INTEGER NOT NULL DEFAULT 0,
+                pending_count INTEGER NOT NULL DEFAULT 0,
+                auto_approved_count INTEGER NOT NULL DEFAULT 0,
+                anchor_status VARCHAR(20) DEFAULT 'pending'
+                    CHECK (anchor_status IN ('pending', 'approved', 'rejected', 'conflict')),
+                anchor_classification JSONB,
+                classification_conflict BOOLEAN DEFAULT FALSE,
+                representative_prediction_id BIGINT,
+                min_confidence REAL,
+                max_confidence REAL,
+                avg_confidence REAL,
+                first_seen REAL,
+                last_seen REAL,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_camera ON camera_object_tracks(camera_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_status ON camera_object_tracks(anchor_status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_scenario ON camera_object_tracks(scenario)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cam_obj_tracks_camera_scenario ON camera_object_tracks(camera_id, scenario)")
+        logger.info("Created camera_object_tracks table")
+
+    # Add camera_object_track_id to ai_predictions
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'ai_predictions' AND column_name = 'camera_object_track_id'
+    """)
+    if not cursor.fetchone():
+        cursor.execute("""
+            ALTER TABLE ai_predictions ADD COLUMN camera_object_track_id BIGINT
+            REFERENCES camera_object_tracks(id) ON DELETE SET NULL
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_cam_track ON ai_predictions(camera_object_track_id)")
+        logger.info("Added camera_object_track_id to ai_predictions")
+
+    # Migration: Add rejection_reason to cross_camera_links
+    cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS rejection_reason VARCHAR(100)")
+
+    # Migration: Create camera_crossing_lines table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS camera_crossing_lines (
+            id SERIAL PRIMARY KEY,
+            camera_id TEXT NOT NULL,
+            line_name VARCHAR(100) NOT NULL,
+            x1 INTEGER NOT NULL,
+            y1 INTEGER NOT NULL,
+            x2 INTEGER NOT NULL,
+            y2 INTEGER NOT NULL,
+            forward_dx REAL NOT NULL DEFAULT 1.0,
+            forward_dy REAL NOT NULL DEFAULT 0.0,
+            paired_camera_id TEXT,
+            paired_line_id INTEGER REFERENCES camera_crossing_lines(id) ON DELETE SET NULL,
+            lane_mapping_reversed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            UNIQUE(camera_id, line_name)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_crossing_lines_camera ON camera_crossing_lines(camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_crossing_lines_paired ON camera_crossing_lines(paired_line_id)")
+    logger.info("Camera crossing lines table ready")
+
+    # Migration: Add 'auto_confirmed' to cross_camera_links status CHECK
+    try:
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid) as condef
+            FROM pg_constraint
+            WHERE conrelid = 'cross_camera_links'::regclass
+              AND contype = 'c'
+              AND pg_get_constraintdef(oid) LIKE '%%status%%'
+        """)
+        xcam_constraint = cursor.fetchone()
+        if xcam_constraint:
+            cname = xcam_constraint['conname']
+            condef = xcam_constraint.get('condef') or ''
+            if 'auto_confirmed' not in condef:
+                cursor.execute(f"ALTER TABLE cross_camera_links DROP CONSTRAINT {cname}")
                 cursor.execute("""
-                    ALTER TABLE ai_predictions ADD COLUMN classification VARCHAR(100)
-                    REFERENCES classification_classes(name) ON UPDATE CASCADE
+                    ALTER TABLE cross_camera_links ADD CONSTRAINT cross_camera_links_status_check
+                    CHECK (status IN ('auto', 'confirmed', 'rejected', 'auto_confirmed'))
                 """)
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_classification ON ai_predictions(classification)")
-                logger.info("Added classification column to ai_predictions")
+                logger.info("Updated cross_camera_links status CHECK to include 'auto_confirmed'")
+    except Exception as e:
+        logger.warning(f"cross_camera_links status constraint migration note: {e}")
 
-            # Backfill classification_classes and ai_predictions.classification (one-time)
-            cursor.execute("SELECT COUNT(*) as cnt FROM classification_classes")
-            if cursor.fetchone()['cnt'] == 0:
-                # Seed from existing approved predictions
-                cursor.execute("""
-                    INSERT INTO classification_classes (name, scenario, display_name)
-                    SELECT DISTINCT
-                        LOWER(TRIM(class_val)) as name,
-                        COALESCE(p.scenario, 'unknown') as scenario,
-                        INITCAP(REPLACE(TRIM(class_val), '_', ' ')) as display_name
-                    FROM ai_predictions p,
-                    LATERAL (
-                        SELECT COALESCE(
-                            p.corrected_tags->>'vehicle_subtype',
-                            p.corrected_tags->>'actual_class',
-                            p.predicted_tags->>'activity_tag',
-                            p.predicted_tags->>'class'
-                        ) as class_val
-                    ) cv
-                    WHERE class_val IS NOT NULL
-                      AND TRIM(class_val) != ''
-                    ON CONFLICT (name) DO NOTHING
-                """)
-                seeded = cursor.rowcount
-                logger.info(f"Seeded {seeded} classification classes from existing predictions")
+    # Migration: Add spatial match columns to cross_camera_links
+    cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS lane_distance REAL")
+    cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS crossing_line_id INTEGER")
 
-                # Backfill classification column
+    # Migration: Add 'processing' to review_status CHECK constraint
+    # Allows predictions to be held back from review until automated processing completes
+    try:
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid) as condef
+            FROM pg_constraint
+            WHERE conrelid = 'ai_predictions'::regclass
+              AND contype = 'c'
+              AND pg_get_constraintdef(oid) LIKE '%%review_status%%'
+        """)
+        existing = cursor.fetchone()
+        if existing:
+            constraint_name = existing['conname']
+            condef = existing.get('condef') or ''
+            if 'processing' not in condef:
+                cursor.execute(f"ALTER TABLE ai_predictions DROP CONSTRAINT {constraint_name}")
                 cursor.execute("""
-                    UPDATE ai_predictions SET classification = LOWER(TRIM(COALESCE(
-                        corrected_tags->>'vehicle_subtype',
-                        corrected_tags->>'actual_class',
-                        predicted_tags->>'activity_tag',
-                        predicted_tags->>'class'
-                    )))
-                    WHERE classification IS NULL
-                      AND COALESCE(
-                          corrected_tags->>'vehicle_subtype',
-                          corrected_tags->>'actual_class',
-                          predicted_tags->>'activity_tag',
-                          predicted_tags->>'class'
-                      ) IS NOT NULL
-                """)
-                backfilled = cursor.rowcount
-                logger.info(f"Backfilled classification for {backfilled} predictions")
-
-            # Migration: Create video_tracks table (ByteTrack MOT results)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS video_tracks (
-                    id BIGSERIAL PRIMARY KEY,
-                    video_id INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
-                    camera_id TEXT NOT NULL,
-                    tracker_track_id INTEGER NOT NULL,
-                    class_name TEXT,
-                    first_seen DOUBLE PRECISION NOT NULL,
-                    last_seen DOUBLE PRECISION NOT NULL,
-                    first_seen_epoch DOUBLE PRECISION,
-                    last_seen_epoch DOUBLE PRECISION,
-                    trajectory JSONB NOT NULL,
-                    best_crop_path TEXT,
-                    avg_confidence REAL,
-                    bbox_centroid_x INTEGER,
-                    bbox_centroid_y INTEGER,
-                    avg_bbox_width INTEGER,
-                    avg_bbox_height INTEGER,
-                    reid_embedding REAL[],
-                    reid_embedding_id UUID,
-                    cross_camera_identity_id BIGINT,
-                    status VARCHAR(20) DEFAULT 'active',
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(video_id, tracker_track_id)
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_camera ON video_tracks(camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_camera_epoch ON video_tracks(camera_id, first_seen_epoch)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_xcam_identity ON video_tracks(cross_camera_identity_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_status ON video_tracks(status)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_video ON video_tracks(video_id)")
-            logger.info("Video tracks table ready")
-
-            # Migration: Add source_track_type to cross_camera_links
-            cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS source_track_type VARCHAR(20) DEFAULT 'camera_object'")
-            logger.info("cross_camera_links source_track_type column ready")
-
-            # Migration: Drop FK constraints on track_a_id/track_b_id (polymorphic: camera_object_tracks OR video_tracks)
-            for fk_name in ('cross_camera_links_track_a_id_fkey', 'cross_camera_links_track_b_id_fkey'):
-                cursor.execute(f"ALTER TABLE cross_camera_links DROP CONSTRAINT IF EXISTS {fk_name}")
-            logger.info("cross_camera_links FK constraints dropped (polymorphic track IDs)")
-
-            # Migration: Add camera map placement fields to camera_locations
-            map_columns = [
-                ("bearing", "REAL DEFAULT 0"),
-                ("fov_angle", "REAL DEFAULT 90"),
-                ("fov_range", "REAL DEFAULT 30"),
-                ("map_color", "VARCHAR(20) DEFAULT '#4CAF50'"),
-                ("is_ptz", "BOOLEAN DEFAULT FALSE"),
-                ("ptz_pan_range", "REAL DEFAULT 180"),
-                ("is_indoor", "BOOLEAN DEFAULT FALSE"),
-            ]
-            for col_name, col_type in map_columns:
-                cursor.execute(f"""
-                    ALTER TABLE camera_locations ADD COLUMN IF NOT EXISTS {col_name} {col_type}
-                """)
-            logger.info("Camera map placement columns ready")
-
-            # Migration: Add ONVIF credentials to camera_locations
-            onvif_columns = [
-                ("onvif_host", "TEXT"),
-                ("onvif_port", "INTEGER DEFAULT 80"),
-                ("onvif_username", "TEXT"),
-                ("onvif_password", "TEXT"),
-            ]
-            for col_name, col_type in onvif_columns:
-                cursor.execute(f"""
-                    ALTER TABLE camera_locations ADD COLUMN IF NOT EXISTS {col_name} {col_type}
+                    ALTER TABLE ai_predictions ADD CONSTRAINT ai_predictions_review_status_check
+                    CHECK (review_status IN ('pending', 'approved', 'rejected', 'needs_correction',
+                                             'auto_approved', 'auto_rejected', 'processing'))
                 """)
-            logger.info("ONVIF credential columns ready")
+                logger.info("Updated review_status CHECK constraint to include 'processing'")
+    except Exception as e:
+        logger.warning(f"review_status constraint migration note: {e}")
+
+    # Migration: Add parent_prediction_id to ai_predictions (for two-stage detection: plate/reg linked to parent entity)
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'ai_predictions' AND column_name = 'parent_prediction_id'
+    """)
+    if not cursor.fetchone():
+        cursor.execute("""
+            ALTER TABLE ai_predictions ADD COLUMN parent_prediction_id BIGINT
+            REFERENCES ai_predictions(id) ON DELETE SET NULL
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_parent ON ai_predictions(parent_prediction_id)")
+        logger.info("Added parent_prediction_id to ai_predictions")
+
+    # Migration: Create classification_classes lookup table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS classification_classes (
+            name VARCHAR(100) PRIMARY KEY,
+            scenario VARCHAR(100) NOT NULL,
+            display_name VARCHAR(200),
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_classification_classes_scenario ON classification_classes(scenario)")
+    logger.info("classification_classes table ready")
+
+    # Migration: Add classification column to ai_predictions (lookup table for training class of record)
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'ai_predictions' AND column_name = 'classification'
+    """)
+    if not cursor.fetchone():
+        cursor.execute("""
+            ALTER TABLE ai_predictions ADD COLUMN classification VARCHAR(100)
+            REFERENCES classification_classes(name) ON UPDATE CASCADE
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_classification ON ai_predictions(classification)")
+        logger.info("Added classification column to ai_predictions")
 
-            # Migration: Create camera_aliases table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS camera_aliases (
-                    id SERIAL PRIMARY KEY,
-                    alias_id TEXT NOT NULL UNIQUE,
-                    primary_camera_id TEXT NOT NULL,
-                    alias_type VARCHAR(50),
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_camera_aliases_alias ON camera_aliases(alias_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_camera_aliases_primary ON camera_aliases(primary_camera_id)")
-            logger.info("Camera aliases table ready")
+    # Backfill classification_classes and ai_predictions.classification (one-time)
+    cursor.execute("SELECT COUNT(*) as cnt FROM classification_classes")
+    if cursor.fetchone()['cnt'] == 0:
+        # Seed from existing approved predictions
+        cursor.execute("""
+            INSERT INTO classification_classes (name, scenario, display_name)
+            SELECT DISTINCT
+                LOWER(TRIM(class_val)) as name,
+                COALESCE(p.scenario, 'unknown') as scenario,
+                INITCAP(REPLACE(TRIM(class_val), '_', ' ')) as display_name
+            FROM ai_predictions p,
+            LATERAL (
+                SELECT COALESCE(
+                    p.corrected_tags->>'vehicle_subtype',
+                    p.corrected_tags->>'actual_class',
+                    p.predicted_tags->>'activity_tag',
+                    p.predicted_tags->>'class'
+                ) as class_val
+            ) cv
+            WHERE class_val IS NOT NULL
+              AND TRIM(class_val) != ''
+            ON CONFLICT (name) DO NOTHING
+        """)
+        seeded = cursor.rowcount
+        logger.info(f"Seeded {seeded} classification classes from existing predictions")
 
-            # Migration: Create clip_analysis_results table (single-camera clip consensus analysis)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS clip_analysis_results (
-                    id BIGSERIAL PRIMARY KEY,
-                    video_id INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
-                    video_track_id BIGINT REFERENCES video_tracks(id) ON DELETE SET NULL,
-                    camera_id TEXT NOT NULL,
-                    consensus_class TEXT NOT NULL,
-                    consensus_confidence REAL NOT NULL,
-                    consensus_method VARCHAR(30) DEFAULT 'weighted_vote',
-                    frame_classifications JSONB NOT NULL DEFAULT '[]',
-                    class_distribution JSONB NOT NULL DEFAULT '{}',
-                    frame_quality_scores JSONB NOT NULL DEFAULT '[]',
-                    training_frames_exported INTEGER DEFAULT 0,
-                    training_batch_id VARCHAR(255),
-                    total_frames INTEGER NOT NULL DEFAULT 0,
-                    duration_seconds REAL,
-                    direction_of_travel TEXT,
-                    status VARCHAR(20) DEFAULT 'pending',
-                    review_status VARCHAR(20) DEFAULT 'pending',
-                    reviewed_by VARCHAR(100),
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(video_id, video_track_id)
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_video ON clip_analysis_results(video_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_camera ON clip_analysis_results(camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_status ON clip_analysis_results(status)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_review ON clip_analysis_results(review_status)")
-            logger.info("Clip analysis results table ready")
-
-            # Migration: EcoEye auto-sync indexes
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ecoeye_alerts_download_status ON ecoeye_alerts(video_available, video_downloaded)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ecoeye_alerts_timestamp ON ecoeye_alerts(timestamp)")
-            logger.info("EcoEye auto-sync indexes ready")
-
-            # Migration: Add quality scoring columns to ai_predictions
-            cursor.execute("ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS quality_score REAL")
-            cursor.execute("ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS quality_flags JSONB DEFAULT '{}'")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_quality ON ai_predictions(quality_score)")
-            logger.info("AI predictions quality columns ready")
-
-            # Migration: Add min_quality_score to yolo_export_configs
-            cursor.execute("ALTER TABLE yolo_export_configs ADD COLUMN IF NOT EXISTS min_quality_score REAL DEFAULT 0.0")
-            logger.info("YOLO export config quality column ready")
-
-            # Migration: Add validation and deployment columns to training_jobs
-            cursor.execute("ALTER TABLE training_jobs ADD COLUMN IF NOT EXISTS validation_map REAL")
-            cursor.execute("ALTER TABLE training_jobs ADD COLUMN IF NOT EXISTS validation_results JSONB")
-            cursor.execute("ALTER TABLE training_jobs ADD COLUMN IF NOT EXISTS deploy_status VARCHAR(20) DEFAULT 'none'")
-            logger.info("Training jobs validation columns ready")
-
-            # Migration: Create model_deployments table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS model_deployments (
-                    id SERIAL PRIMARY KEY,
-                    model_name VARCHAR(255) NOT NULL,
-                    model_version VARCHAR(50) NOT NULL,
-                    model_path TEXT NOT NULL,
-                    training_job_id INTEGER REFERENCES training_jobs(id),
-                    validation_map REAL,
-                    validation_results JSONB,
-                    status VARCHAR(20) NOT NULL DEFAULT 'pending'
-                        CHECK (status IN ('pending', 'canary', 'active', 'rolled_back', 'superseded')),
-                    deployed_at TIMESTAMP WITH TIME ZONE,
-                    rolled_back_at TIMESTAMP WITH TIME ZONE,
-                    rollback_reason TEXT,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        # Backfill classification column
+        cursor.execute("""
+            UPDATE ai_predictions SET classification = LOWER(TRIM(COALESCE(
+                corrected_tags->>'vehicle_subtype',
+                corrected_tags->>'actual_class',
+                predicted_tags->>'activity_tag',
+                predicted_tags->>'class'
+            )))
+            WHERE classification IS NULL
+              AND COALESCE(
+                  corrected_tags->>'vehicle_subtype',
+                  corrected_tags->>'actual_class',
+                  predicted_tags->>'activity_tag',
+                  predicted_tags->>'class'
+              ) IS NOT NULL
+        """)
+        backfilled = cursor.rowcount
+        logger.info(f"Backfilled classification for {backfilled} predictions")
+
+    # Migration: Create video_tracks table (ByteTrack MOT results)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS video_tracks (
+            id BIGSERIAL PRIMARY KEY,
+            video_id INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+            camera_id TEXT NOT NULL,
+            tracker_track_id INTEGER NOT NULL,
+            class_name TEXT,
+            first_seen DOUBLE PRECISION NOT NULL,
+            last_seen DOUBLE PRECISION NOT NULL,
+            first_seen_epoch DOUBLE PRECISION,
+            last_seen_epoch DOUBLE PRECISION,
+            trajectory JSONB NOT NULL,
+            best_crop_path TEXT,
+            avg_confidence REAL,
+            bbox_centroid_x INTEGER,
+            bbox_centroid_y INTEGER,
+            avg_bbox_width INTEGER,
+            avg_bbox_height INTEGER,
+            reid_embedding REAL[],
+            reid_embedding_id UUID,
+            cross_camera_identity_id BIGINT,
+            status VARCHAR(20) DEFAULT 'active',
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            UNIQUE(video_id, tracker_track_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_camera ON video_tracks(camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_camera_epoch ON video_tracks(camera_id, first_seen_epoch)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_xcam_identity ON video_tracks(cross_camera_identity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_status ON video_tracks(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_tracks_video ON video_tracks(video_id)")
+    logger.info("Video tracks table ready")
+
+    # Migration: Add source_track_type to cross_camera_links
+    cursor.execute("ALTER TABLE cross_camera_links ADD COLUMN IF NOT EXISTS source_track_type VARCHAR(20) DEFAULT 'camera_object'")
+    logger.info("cross_camera_links source_track_type column ready")
+
+    # Migration: Drop FK constraints on track_a_id/track_b_id (polymorphic: camera_object_tracks OR video_tracks)
+    for fk_name in ('cross_camera_links_track_a_id_fkey', 'cross_camera_links_track_b_id_fkey'):
+        cursor.execute(f"ALTER TABLE cross_camera_links DROP CONSTRAINT IF EXISTS {fk_name}")
+    logger.info("cross_camera_links FK constraints dropped (polymorphic track IDs)")
+
+    # Migration: Add camera map placement fields to camera_locations
+    map_columns = [
+        ("bearing", "REAL DEFAULT 0"),
+        ("fov_angle", "REAL DEFAULT 90"),
+        ("fov_range", "REAL DEFAULT 30"),
+        ("map_color", "VARCHAR(20) DEFAULT '#4CAF50'"),
+        ("is_ptz", "BOOLEAN DEFAULT FALSE"),
+        ("ptz_pan_range", "REAL DEFAULT 180"),
+        ("is_indoor", "BOOLEAN DEFAULT FALSE"),
+    ]
+    for col_name, col_type in map_columns:
+        cursor.execute(f"""
+            ALTER TABLE camera_locations ADD COLUMN IF NOT EXISTS {col_name} {col_type}
+        """)
+    logger.info("Camera map placement columns ready")
+
+    # Migration: Add ONVIF credentials to camera_locations
+    onvif_columns = [
+        ("onvif_host", "TEXT"),
+        ("onvif_port", "INTEGER DEFAULT 80"),
+        ("onvif_username", "TEXT"),
+        ("onvif_password", "TEXT"),
+    ]
+    for col_name, col_type in onvif_columns:
+        cursor.execute(f"""
+            ALTER TABLE camera_locations ADD COLUMN IF NOT EXISTS {col_name} {col_type}
+        """)
+    logger.info("ONVIF credential columns ready")
+
+    # Migration: Create camera_aliases table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS camera_aliases (
+            id SERIAL PRIMARY KEY,
+            alias_id TEXT NOT NULL UNIQUE,
+            primary_camera_id TEXT NOT NULL,
+            alias_type VARCHAR(50),
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_camera_aliases_alias ON camera_aliases(alias_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_camera_aliases_primary ON camera_aliases(primary_camera_id)")
+    logger.info("Camera aliases table ready")
+
+    # Migration: Create clip_analysis_results table (single-camera clip consensus analysis)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clip_analysis_results (
+            id BIGSERIAL PRIMARY KEY,
+            video_id INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+            video_track_id BIGINT REFERENCES video_tracks(id) ON DELETE SET NULL,
+            camera_id TEXT NOT NULL,
+            consensus_class TEXT NOT NULL,
+            consensus_confidence REAL NOT NULL,
+            consensus_method VARCHAR(30) DEFAULT 'weighted_vote',
+            frame_classifications JSONB NOT NULL DEFAULT '[]',
+            class_distribution JSONB NOT NULL DEFAULT '{}',
+            frame_quality_scores JSONB NOT NULL DEFAULT '[]',
+            training_frames_exported INTEGER DEFAULT 0,
+            training_batch_id VARCHAR(255),
+            total_frames INTEGER NOT NULL DEFAULT 0,
+            duration_seconds REAL,
+            direction_of_travel TEXT,
+            status VARCHAR(20) DEFAULT 'pending',
+            review_status VARCHAR(20) DEFAULT 'pending',
+            reviewed_by VARCHAR(100),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            UNIQUE(video_id, video_track_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_video ON clip_analysis_results(video_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_camera ON clip_analysis_results(camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_status ON clip_analysis_results(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_analysis_review ON clip_analysis_results(review_status)")
+    logger.info("Clip analysis results table ready")
+
+    # Migration: EcoEye auto-sync indexes
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ecoeye_alerts_download_status ON ecoeye_alerts(video_available, video_downloaded)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ecoeye_alerts_timestamp ON ecoeye_alerts(timestamp)")
+    logger.info("EcoEye auto-sync indexes ready")
+
+    # Migration: Add quality scoring columns to ai_predictions
+    cursor.execute("ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS quality_score REAL")
+    cursor.execute("ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS quality_flags JSONB DEFAULT '{}'")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_quality ON ai_predictions(quality_score)")
+    logger.info("AI predictions quality columns ready")
+
+    # Migration: Add min_quality_score to yolo_export_configs
+    cursor.execute("ALTER TABLE yolo_export_configs ADD COLUMN IF NOT EXISTS min_quality_score REAL DEFAULT 0.0")
+    logger.info("YOLO export config quality column ready")
+
+    # Migration: Add validation and deployment columns to training_jobs
+    cursor.execute("ALTER TABLE training_jobs ADD COLUMN IF NOT EXISTS validation_map REAL")
+    cursor.execute("ALTER TABLE training_jobs ADD COLUMN IF NOT EXISTS validation_results JSONB")
+    cursor.execute("ALTER TABLE training_jobs ADD COLUMN IF NOT EXISTS deploy_status VARCHAR(20) DEFAULT 'none'")
+    logger.info("Training jobs validation columns ready")
+
+    # Migration: Create model_deployments table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS model_deployments (
+            id SERIAL PRIMARY KEY,
+            model_name VARCHAR(255) NOT NULL,
+            model_version VARCHAR(50) NOT NULL,
+            model_path TEXT NOT NULL,
+            training_job_id INTEGER REFERENCES training_jobs(id),
+            validation_map REAL,
+            validation_results JSONB,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'canary', 'active', 'rolled_back', 'superseded')),
+            deployed_at TIMESTAMP WITH TIME ZONE,
+            rolled_back_at TIMESTAMP WITH TIME ZONE,
+            rollback_reason TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_model_deployments_name ON model_deployments(model_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_model_deployments_status ON model_deployments(status)")
+    logger.info("Model deployments table ready")
+
+    # Migration: Rename 'auto_approved' to 'no_detection' for scan markers
+    cursor.execute("""
+        ALTER TABLE ai_predictions DROP CONSTRAINT IF EXISTS ai_predictions_review_status_check
+    """)
+    cursor.execute("""
+        ALTER TABLE ai_predictions ADD CONSTRAINT ai_predictions_review_status_check
+        CHECK (review_status IN ('pending', 'approved', 'rejected', 'needs_correction',
+                                 'auto_approved', 'auto_rejected', 'processing',
+                                 'needs_reclassification', 'no_detection'))
+    """)
+    cursor.execute("""
+        UPDATE ai_predictions SET review_status = 'no_detection'
+        WHERE review_status = 'auto_approved' AND scenario = 'prescreen_scan'
+    """)
+    logger.info("Renamed scan marker status to 'no_detection'")
+
+    # Migration: Document scanning and identity document tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS document_scans (
+            id BIGSERIAL PRIMARY KEY,
+            prediction_id BIGINT REFERENCES ai_predictions(id) ON DELETE SET NULL,
+            video_id INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+            document_type VARCHAR(50),
+            source_method VARCHAR(30) NOT NULL DEFAULT 'manual_upload'
+                CHECK (source_method IN ('camera', 'scanner', 'manual_upload')),
+            crop_image_path TEXT,
+            ocr_status VARCHAR(20) DEFAULT 'pending'
+                CHECK (ocr_status IN ('pending', 'processing', 'completed', 'failed')),
+            ocr_completed_at TIMESTAMP WITH TIME ZONE,
+            identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            metadata JSONB DEFAULT '{}',
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_prediction ON document_scans(prediction_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_video ON document_scans(video_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_status ON document_scans(ocr_status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_type ON document_scans(document_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_identity ON document_scans(identity_id)")
+    logger.info("Document scans table ready")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS identity_documents (
+            id BIGSERIAL PRIMARY KEY,
+            identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
+            document_scan_id BIGINT NOT NULL REFERENCES document_scans(id) ON DELETE CASCADE,
+            document_type VARCHAR(50) NOT NULL,
+            document_number TEXT,
+            holder_name TEXT,
+            expiry_date DATE,
+            issuing_authority TEXT,
+            extracted_fields JSONB DEFAULT '{}',
+            verified_by VARCHAR(255),
+            verified_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            UNIQUE(document_scan_id, document_type)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_identity ON identity_documents(identity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_scan ON identity_documents(document_scan_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_number ON identity_documents(document_number)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_holder ON identity_documents(holder_name)")
+    logger.info("Identity documents table ready")
+
+    # Migration: Camera Sync tables (overlap groups and bbox selections)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS camera_overlap_groups (
+            id SERIAL PRIMARY KEY,
+            group_name TEXT NOT NULL,
+            description TEXT,
+            is_auto_computed BOOLEAN DEFAULT TRUE,
+            manual_override BOOLEAN DEFAULT FALSE,
+            camera_ids TEXT[] NOT NULL,
+            overlap_scores JSONB DEFAULT '{}',
+            computed_at TIMESTAMP,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_overlap_groups_name ON camera_overlap_groups(group_name)")
+    logger.info("Camera overlap groups table ready")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS camera_sync_selections (
+            id BIGSERIAL PRIMARY KEY,
+            source_camera_id TEXT NOT NULL,
+            group_id INTEGER REFERENCES camera_overlap_groups(id) ON DELETE SET NULL,
+            bbox_x REAL NOT NULL,
+            bbox_y REAL NOT NULL,
+            bbox_width REAL NOT NULL,
+            bbox_height REAL NOT NULL,
+            frame_width INTEGER,
+            frame_height INTEGER,
+            thumbnail_path TEXT,
+            label TEXT,
+            metadata JSONB DEFAULT '{}',
+            created_by TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_selections_camera ON camera_sync_selections(source_camera_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_selections_group ON camera_sync_selections(group_id)")
+    logger.info("Camera sync selections table ready")
+
+    # Migration: PTZ calibration reference points table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ptz_calibration_points (
+            id BIGSERIAL PRIMARY KEY,
+            source_camera_id TEXT NOT NULL,
+            target_camera_id TEXT NOT NULL,
+            source_bbox_x REAL NOT NULL,
+            source_bbox_y REAL NOT NULL,
+            estimated_pan REAL,
+            estimated_tilt REAL,
+            actual_pan REAL NOT NULL,
+            actual_tilt REAL NOT NULL,
+            label TEXT,
+            confirmed_by TEXT,
+            error_pan REAL GENERATED ALWAYS AS (actual_pan - estimated_pan) STORED,
+            error_tilt REAL GENERATED ALWAYS AS (actual_tilt - estimated_tilt) STORED,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ptz_cal_pair ON ptz_calibration_points(source_camera_id, target_camera_id)")
+    logger.info("PTZ calibration points table ready")
+
+    # ============================================================
+    # EcoEye Vision System Improvement Migrations
+    # ============================================================
+
+    # New tables for vision improvement system
+    for tbl_sql in [
+        """CREATE TABLE IF NOT EXISTS spatial_scale_models (
+            id BIGSERIAL PRIMARY KEY,
+            camera_id VARCHAR(100) NOT NULL,
+            classification VARCHAR(100) NOT NULL,
+            grid_x INTEGER NOT NULL,
+            grid_y INTEGER NOT NULL,
+            sample_count INTEGER DEFAULT 0,
+            mean_width REAL, mean_height REAL,
+            std_width REAL, std_height REAL,
+            p5_width REAL, p95_width REAL,
+            p5_height REAL, p95_height REAL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            UNIQUE(camera_id, classification, grid_x, grid_y)
+        )""",
+        """CREATE TABLE IF NOT EXISTS classification_hierarchy (
+            id SERIAL PRIMARY KEY,
+            tier1 VARCHAR(50) NOT NULL,
+            tier2 VARCHAR(100) NOT NULL,
+            tier3 VARCHAR(100),
+            yolo_prompt VARCHAR(200),
+            display_name VARCHAR(200),
+            enforcement_eligible BOOLEAN DEFAULT FALSE,
+            disqualification_reason TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            UNIQUE(tier1, tier2, tier3)
+        )""",
+        """CREATE TABLE IF NOT EXISTS classification_roles (
+            name VARCHAR(50) PRIMARY KEY,
+            display_name VARCHAR(100),
+            visual_cues TEXT,
+            is_active BOOLEAN DEFAULT TRUE
+        )""",
+        """CREATE TABLE IF NOT EXISTS classification_votes (
+            id BIGSERIAL PRIMARY KEY,
+            prediction_id BIGINT NOT NULL REFERENCES ai_predictions(id) ON DELETE CASCADE,
+            voter VARCHAR(50) NOT NULL,
+            voted_tier1 VARCHAR(50),
+            voted_tier2 VARCHAR(100),
+            voted_tier3 VARCHAR(100),
+            voted_role VARCHAR(50),
+            voted_cargo VARCHAR(100),
+            confidence REAL,
+            metadata JSONB,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            UNIQUE(prediction_id, voter)
+        )""",
+        """CREATE TABLE IF NOT EXISTS visit_consistency_flags (
+            id BIGSERIAL PRIMARY KEY,
+            visit_id UUID REFERENCES visits(visit_id),
+            identity_id UUID REFERENCES identities(identity_id),
+            camera_a VARCHAR(100),
+            camera_b VARCHAR(100),
+            class_a VARCHAR(100),
+            class_b VARCHAR(100),
+            flag_type VARCHAR(50),
+            resolved BOOLEAN DEFAULT FALSE,
+            resolution TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )""",
+        """CREATE TABLE IF NOT EXISTS ptz_stationary_references (
+            id BIGSERIAL PRIMARY KEY,
+            camera_id VARCHAR(100) NOT NULL,
+            reference_label TEXT,
+            observations JSONB DEFAULT '[]',
+            estimated_distance REAL,
+            estimated_real_width REAL,
+            estimated_real_height REAL,
+            confidence REAL,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )""",
+        """CREATE TABLE IF NOT EXISTS ptz_zoom_calibration (
+            id SERIAL PRIMARY KEY,
+            camera_id VARCHAR(100) NOT NULL,
+            zoom_level REAL NOT NULL,
+            effective_focal_length REAL,
+            pixels_per_degree_h REAL,
+            pixels_per_degree_v REAL,
+            sample_count INTEGER DEFAULT 0,
+            UNIQUE(camera_id, zoom_level)
+        )""",
+        """CREATE TABLE IF NOT EXISTS seasonal_priors (
+            id SERIAL PRIMARY KEY,
+            tier3_class VARCHAR(100) NOT NULL,
+            month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
+            prior_weight REAL DEFAULT 1.0,
+            source VARCHAR(20) DEFAULT 'manual',
+            observation_count INTEGER DEFAULT 0,
+            UNIQUE(tier3_class, month)
+        )""",
+        """CREATE TABLE IF NOT EXISTS background_references (
+            id SERIAL PRIMARY KEY,
+            camera_id VARCHAR(100) NOT NULL,
+            image_path TEXT NOT NULL,
+            time_category VARCHAR(20),
+            season VARCHAR(20),
+            frame_count INTEGER,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )""",
+        """CREATE TABLE IF NOT EXISTS camera_degradation_profiles (
+            id SERIAL PRIMARY KEY,
+            camera_id VARCHAR(100) NOT NULL,
+            distance_bucket VARCHAR(20),
+            avg_crop_width REAL, avg_crop_height REAL,
+            noise_level REAL,
+            compression_quality REAL,
+            motion_blur_kernel REAL,
+            color_profile JSONB,
+            sample_count INTEGER DEFAULT 0,
+            UNIQUE(camera_id, distance_bucket)
+        )""",
+    ]:
+        try:
+            cursor.execute(tbl_sql)
+        except Exception as e:
+            logger.debug(f"Table creation note: {e}")
+
+    # Indexes for new tables
+    new_indexes = [
+        "CREATE INDEX IF NOT EXISTS idx_spatial_scale_camera ON spatial_scale_models(camera_id)",
+        "CREATE INDEX IF NOT EXISTS idx_spatial_scale_class ON spatial_scale_models(classification)",
+        "CREATE INDEX IF NOT EXISTS idx_class_hierarchy_tier1 ON classification_hierarchy(tier1)",
+        "CREATE INDEX IF NOT EXISTS idx_class_hierarchy_tier2 ON classification_hierarchy(tier2)",
+        "CREATE INDEX IF NOT EXISTS idx_class_hierarchy_tier3 ON classification_hierarchy(tier3)",
+        "CREATE INDEX IF NOT EXISTS idx_class_votes_prediction ON classification_votes(prediction_id)",
+        "CREATE INDEX IF NOT EXISTS idx_class_votes_voter ON classification_votes(voter)",
+        "CREATE INDEX IF NOT EXISTS idx_visit_flags_visit ON visit_consistency_flags(visit_id)",
+        "CREATE INDEX IF NOT EXISTS idx_visit_flags_resolved ON visit_consistency_flags(resolved)",
+        "CREATE INDEX IF NOT EXISTS idx_ptz_stationary_camera ON ptz_stationary_references(camera_id)",
+        "CREATE INDEX IF NOT EXISTS idx_ptz_zoom_camera ON ptz_zoom_calibration(camera_id)",
+        "CREATE INDEX IF NOT EXISTS idx_seasonal_priors_class ON seasonal_priors(tier3_class)",
+        "CREATE INDEX IF NOT EXISTS idx_bg_refs_camera ON background_references(camera_id)",
+        "CREATE INDEX IF NOT EXISTS idx_camera_degrade_camera ON camera_degradation_profiles(camera_id)",
+    ]
+    for idx_sql in new_indexes:
+        try:
+            cursor.execute(idx_sql)
+        except Exception:
+            pass
+    logger.info("EcoEye Vision Improvement tables ready")
+
+    # New columns on ai_predictions for tiered classification + voting
+    ai_pred_columns = [
+        ("vehicle_tier1", "VARCHAR(50)"),
+        ("vehicle_tier2", "VARCHAR(100)"),
+        ("vehicle_tier3", "VARCHAR(100)"),
+        ("vehicle_role", "VARCHAR(50)"),
+        ("confidence_tier1", "REAL"),
+        ("confidence_tier2", "REAL"),
+        ("confidence_tier3", "REAL"),
+        ("confidence_role", "REAL"),
+        ("enforcement_eligible", "BOOLEAN"),
+        ("disqualification_reason", "TEXT"),
+        ("cargo_type", "VARCHAR(100)"),
+        ("cargo_count", "INTEGER"),
+        ("source_type", "VARCHAR(20) DEFAULT 'real'"),
+        ("parent_entity_prediction_id", "BIGINT REFERENCES ai_predictions(id)"),
+        ("entity_relationship", "VARCHAR(50)"),
+        ("is_training_candidate", "BOOLEAN DEFAULT TRUE"),
+        ("training_exclusion_reason", "VARCHAR(100)"),
+        ("voter_count", "INTEGER DEFAULT 0"),
+        ("voter_agreement", "INTEGER DEFAULT 0"),
+        ("consensus_tier", "VARCHAR(20)"),
+        ("review_queue", "VARCHAR(20)"),
+    ]
+    for col_name, col_type in ai_pred_columns:
+        cursor.execute(f"ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS {col_name} {col_type}")
+
+    # Indexes for new ai_predictions columns
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_tier1 ON ai_predictions(vehicle_tier1)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_tier2 ON ai_predictions(vehicle_tier2)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_review_queue ON ai_predictions(review_queue)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_consensus ON ai_predictions(consensus_tier)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_training ON ai_predictions(is_training_candidate)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_entity_parent ON ai_predictions(parent_entity_prediction_id)")
+    logger.info("ai_predictions tiered classification columns ready")
+
+    # New column on camera_object_tracks
+    cursor.execute("ALTER TABLE camera_object_tracks ADD COLUMN IF NOT EXISTS best_crop_prediction_id BIGINT")
+    logger.info("camera_object_tracks best_crop_prediction_id ready")
+
+    # Add overlap_zones column to camera_overlap_groups
+    cursor.execute("ALTER TABLE camera_overlap_groups ADD COLUMN IF NOT EXISTS overlap_zones JSONB")
+    logger.info("camera_overlap_groups overlap_zones ready")
+
+
+def _migration_track_color_histograms(cursor):
+    # Per-track crop colour histograms for CrossingLineMatcher, keyed
+    # by anchor prediction + thumbnail mtime so stale rows are recomputed
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS track_color_histograms (
+            track_id BIGINT PRIMARY KEY REFERENCES camera_object_tracks(id) ON DELETE CASCADE,
+            prediction_id BIGINT NOT NULL,
+            thumbnail_mtime DOUBLE PRECISION NOT NULL,
+            hist REAL[] NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+
+
+def _migration_review_queue_counters(cursor):
+    # Review queue counters: prediction counts per (camera, scenario,
+    # status, 1% confidence bucket), kept current by statement-level
+    # triggers on ai_predictions so the filter-count endpoint doesn't
+    # scan the whole table on every poll.  Video deletes and camera_id
+    # changes are counted by the videos triggers from migration 7.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS review_queue_counters (
+            camera_id TEXT NOT NULL,
+            scenario VARCHAR(255) NOT NULL,
+            review_status VARCHAR(32) NOT NULL,
+            confidence_bucket SMALLINT NOT NULL,
+            prediction_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (camera_id, scenario, review_status, confidence_bucket)
+        )
+    """)
+    _install_rollup_triggers(
+        cursor, 'review_queue_counters',
+        'camera_id, scenario, review_status, confidence_bucket',
+        "COALESCE(v.camera_id, ''), d.scenario, COALESCE(d.review_status, ''), "
+        "LEAST(FLOOR(d.confidence * 100), 100)::smallint",
+        from_sql='JOIN videos v ON v.id = d.video_id')
+    reconcile_review_queue_counters(cursor)
+
+
+def _migration_review_queue_counter_video_triggers(cursor):
+    # The ai_predictions triggers take camera_id from videos, so they
+    # can't count a video's predictions once the video is gone (the
+    # cascade deletes them after the video row) or when the video moves
+    # to another camera.  Row triggers on videos cover both: before a
+    # delete they subtract the video's predictions, and after a camera_id
+    # change they move its counts from the old camera to the new one.
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION review_queue_counters_video_apply() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO review_queue_counters AS r
+                (camera_id, scenario, review_status, confidence_bucket, prediction_count)
+            SELECT k.camera_id, p.scenario, COALESCE(p.review_status, ''),
+                   LEAST(FLOOR(p.confidence * 100), 100)::smallint, SUM(k.delta)
+            FROM ai_predictions p
+            CROSS JOIN (
+                SELECT COALESCE(OLD.camera_id, '') AS camera_id, -1 AS delta
+                UNION ALL
+                SELECT COALESCE(NEW.camera_id, ''), 1 WHERE TG_OP = 'UPDATE'
+            ) k
+            WHERE p.video_id = OLD.id
+            GROUP BY 1, 2, 3, 4
+            HAVING SUM(k.delta) <> 0
+            ORDER BY 1, 2, 3, 4
+            ON CONFLICT (camera_id, scenario, review_status, confidence_bucket)
+            DO UPDATE SET prediction_count = r.prediction_count + EXCLUDED.prediction_count;
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_review_queue_counters_video_delete ON videos")
+    cursor.execute("""
+        CREATE TRIGGER trg_review_queue_counters_video_delete
+        BEFORE DELETE ON videos
+        FOR EACH ROW EXECUTE FUNCTION review_queue_counters_video_apply()
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_review_queue_counters_video_camera ON videos")
+    cursor.execute("""
+        CREATE TRIGGER trg_review_queue_counters_video_camera
+        AFTER UPDATE OF camera_id ON videos
+        FOR EACH ROW WHEN (OLD.camera_id IS DISTINCT FROM NEW.camera_id)
+        EXECUTE FUNCTION review_queue_counters_video_apply()
+    """)
+    # Repair what deletes and camera moves left behind before this step
+    reconcile_review_queue_counters(cursor)
+
+
+def _migration_vehicle_metrics_rollup(cursor):
+    # Vehicle-metrics rollup: vehicle predictions per (created day,
+    # model class, human class, status), maintained like the review
+    # counters so /api/ai/vehicle-metrics never scans ai_predictions
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vehicle_metrics_rollup (
+            day DATE NOT NULL,
+            original_class TEXT NOT NULL,
+            corrected_class TEXT NOT NULL,
+            review_status VARCHAR(32) NOT NULL,
+            prediction_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, original_class, corrected_class, review_status)
+        )
+    """)
+    _install_rollup_triggers(
+        cursor, 'vehicle_metrics_rollup',
+        'day, original_class, corrected_class, review_status',
+        f"{VEHICLE_DAY_SQL}, {VEHICLE_ORIGINAL_CLASS_SQL}, "
+        f"{VEHICLE_CORRECTED_CLASS_SQL}, COALESCE(review_status, '')",
+        where_sql=VEHICLE_METRICS_PREDICATE)
+    reconcile_vehicle_metrics_rollup(cursor)
+
+
+def _migration_rollup_indexes(cursor):
+    # Static-cluster chip count groups only pending batch-reviewable unknowns
+    _create_index_concurrently(cursor, 'idx_ai_predictions_pending_static_cluster', """
+        ON ai_predictions ((corrected_tags->>'static_cluster'))
+        WHERE corrected_tags->>'batch_reviewable' = 'true'
+          AND review_status = 'pending'
+          AND predicted_tags->>'class' = 'unknown vehicle'
+    """)
+    # Class drill-down pages filter and page on the effective class
+    _create_index_concurrently(cursor, 'idx_ai_predictions_vehicle_effective_class', f"""
+        ON ai_predictions ((COALESCE(
+            corrected_tags->>'vehicle_subtype', corrected_tags->>'actual_class',
+            predicted_tags->>'vehicle_type', predicted_tags->>'class')), created_at DESC)
+        WHERE {VEHICLE_METRICS_PREDICATE}
+    """)
+    _create_index_concurrently(cursor, 'idx_ai_predictions_vehicle_reviewed_at', f"""
+        ON ai_predictions (reviewed_at) WHERE {VEHICLE_METRICS_PREDICATE}
+    """)
+
+
+# Native pgvector column per embedding type, vec_<type>.  Dimensions are
+# the model defaults; the migration uses the dominant length found in the
+# table when it differs.  HNSW on vector is capped at 2000 dimensions, so
+# wider types are stored as halfvec when pgvector >= 0.7 provides it.
+EMBEDDING_VECTOR_DIMS = {
+    'face': 512,
+    'body_reid': 2048,
+    'boat_reid': 2048,
+    'vehicle_appearance': 2048,
+}
+HNSW_MAX_DIMS = 2000
+EMBEDDING_BACKFILL_BATCH = 5000
+# pgvector rejects non-finite components; such rows keep a NULL column
+_FINITE_VECTOR_SQL = "NOT ({col} && ARRAY['NaN', 'Infinity', '-Infinity']::real[])"
+
+
+def _migration_embedding_vectors(cursor):
+    # embeddings.vector stays the REAL[] source of truth; a BEFORE trigger
+    # mirrors it into vec_<type> so existing writers need no changes, and
+    # per-type partial HNSW indexes serve nearest_embeddings().  Without
+    # the extension this is a no-op and searches fall back to NumPy;
+    # `python schema.py vectors` re-runs it once pgvector is installed.
+    cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")
+    if not cursor.fetchone():
+        logger.warning("pgvector not available; embeddings keep REAL[] only")
+        return
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    except Exception as e:
+        logger.warning(f"Could not create pgvector extension ({e}); embeddings keep REAL[] only")
+        return
+    cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    version = tuple(int(p) for p in cursor.fetchone()['extversion'].split('.')[:2])
+    has_halfvec = version >= (0, 7)
+
+    cursor.execute("""
+        SELECT attname, format_type(atttypid, atttypmod) AS coltype, atttypmod AS dim
+        FROM pg_attribute
+        WHERE attrelid = 'embeddings'::regclass AND attname LIKE 'vec\\_%%' AND NOT attisdropped
+    """)
+    existing = {row['attname']: row for row in cursor.fetchall()}
+
+    columns = {}
+    for etype, default_dim in EMBEDDING_VECTOR_DIMS.items():
+        if f'vec_{etype}' in existing:
+            row = existing[f'vec_{etype}']
+            columns[etype] = (row['attname'], row['coltype'], row['dim'])
+            continue
+        cursor.execute("""
+            SELECT array_length(vector, 1) AS dim FROM embeddings
+            WHERE embedding_type = %s
+            GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1
+        """, (etype,))
+        row = cursor.fetchone()
+        dim = (row and row['dim']) or default_dim
+        kind = 'halfvec' if dim > HNSW_MAX_DIMS and has_halfvec else 'vector'
+        columns[etype] = (f'vec_{etype}', f'{kind}({dim})', dim)
+        cursor.execute(f"ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS vec_{etype} {kind}({dim})")
+
+    # Trigger first, so rows written during the backfill are covered
+    assignments = '\n'.join(
+        f"    NEW.{col} := CASE WHEN NEW.embedding_type = '{etype}'"
+        f" AND array_length(NEW.vector, 1) = {dim}"
+        f" AND {_FINITE_VECTOR_SQL.format(col='NEW.vector')}"
+        f" THEN NEW.vector::{coltype} END;"
+        for etype, (col, coltype, dim) in columns.items())
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION embeddings_sync_vectors() RETURNS trigger AS $$
+        BEGIN
+        {assignments}
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_embeddings_sync_vectors ON embeddings")
+    cursor.execute("""
+        CREATE TRIGGER trg_embeddings_sync_vectors
+        BEFORE INSERT OR UPDATE OF vector, embedding_type ON embeddings
+        FOR EACH ROW EXECUTE FUNCTION embeddings_sync_vectors()
+    """)
+
+    for etype, (col, coltype, dim) in columns.items():
+        # Batches commit individually (this step runs in autocommit mode)
+        backfilled = 0
+        while True:
+            cursor.execute(f"""
+                UPDATE embeddings SET {col} = vector::{coltype}
+                WHERE embedding_id IN (
+                    SELECT embedding_id FROM embeddings
+                    WHERE embedding_type = %s AND {col} IS NULL
+                      AND array_length(vector, 1) = %s
+                      AND {_FINITE_VECTOR_SQL.format(col='vector')}
+                    LIMIT %s
                 )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_model_deployments_name ON model_deployments(model_name)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_model_deployments_status ON model_deployments(status)")
-            logger.info("Model deployments table ready")
+            """, (etype, dim, EMBEDDING_BACKFILL_BATCH))
+            backfilled += cursor.rowcount
+            if cursor.rowcount < EMBEDDING_BACKFILL_BATCH:
+                break
+        if backfilled:
+            logger.info(f"Backfilled {backfilled} {etype} vectors into {col} {coltype}")
+
+        if dim > HNSW_MAX_DIMS and not coltype.startswith('halfvec'):
+            logger.warning(f"{col} has {dim} dimensions; pgvector {version[0]}.{version[1]} "
+                           f"can't index it with HNSW, searches on it are exact")
+            continue
+        ops = 'halfvec_cosine_ops' if coltype.startswith('halfvec') else 'vector_cosine_ops'
+        _create_index_concurrently(cursor, f'idx_embeddings_{etype}_hnsw', f"""
+            ON embeddings USING hnsw ({col} {ops}) WHERE embedding_type = '{etype}'
+        """)
 
-            # Migration: Rename 'auto_approved' to 'no_detection' for scan markers
-            cursor.execute("""
-                ALTER TABLE ai_predictions DROP CONSTRAINT IF EXISTS ai_predictions_review_status_check
-            """)
-            cursor.execute("""
-                ALTER TABLE ai_predictions ADD CONSTRAINT ai_predictions_review_status_check
-                CHECK (review_status IN ('pending', 'approved', 'rejected', 'needs_correction',
-                                         'auto_approved', 'auto_rejected', 'processing',
-                                         'needs_reclassification', 'no_detection'))
-            """)
-            cursor.execute("""
-                UPDATE ai_predictions SET review_status = 'no_detection'
-                WHERE review_status = 'auto_approved' AND scenario = 'prescreen_scan'
-            """)
-            logger.info("Renamed scan marker status to 'no_detection'")
+    # Let this process's nearest_embeddings() pick up the new columns
+    from repos.person_mixin import reset_vector_columns
+    reset_vector_columns()
 
-            # Migration: Document scanning and identity document tables
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS document_scans (
-                    id BIGSERIAL PRIMARY KEY,
-                    prediction_id BIGINT REFERENCES ai_predictions(id) ON DELETE SET NULL,
-                    video_id INTEGER NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
-                    document_type VARCHAR(50),
-                    source_method VARCHAR(30) NOT NULL DEFAULT 'manual_upload'
-                        CHECK (source_method IN ('camera', 'scanner', 'manual_upload')),
-                    crop_image_path TEXT,
-                    ocr_status VARCHAR(20) DEFAULT 'pending'
-                        CHECK (ocr_status IN ('pending', 'processing', 'completed', 'failed')),
-                    ocr_completed_at TIMESTAMP WITH TIME ZONE,
-                    identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    metadata JSONB DEFAULT '{}',
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_prediction ON document_scans(prediction_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_video ON document_scans(video_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_status ON document_scans(ocr_status)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_type ON document_scans(document_type)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_scans_identity ON document_scans(identity_id)")
-            logger.info("Document scans table ready")
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS identity_documents (
-                    id BIGSERIAL PRIMARY KEY,
-                    identity_id UUID REFERENCES identities(identity_id) ON DELETE SET NULL,
-                    document_scan_id BIGINT NOT NULL REFERENCES document_scans(id) ON DELETE CASCADE,
-                    document_type VARCHAR(50) NOT NULL,
-                    document_number TEXT,
-                    holder_name TEXT,
-                    expiry_date DATE,
-                    issuing_authority TEXT,
-                    extracted_fields JSONB DEFAULT '{}',
-                    verified_by VARCHAR(255),
-                    verified_at TIMESTAMP WITH TIME ZONE,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(document_scan_id, document_type)
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_identity ON identity_documents(identity_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_scan ON identity_documents(document_scan_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_number ON identity_documents(document_number)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_identity_docs_holder ON identity_documents(holder_name)")
-            logger.info("Identity documents table ready")
+def rebuild_embedding_vectors():
+    """Re-run the embedding vector step, e.g. after installing pgvector.
 
-            # Migration: Camera Sync tables (overlap groups and bbox selections)
+    The step is un-recorded first, so nearest_embeddings() in every process
+    falls back to brute force until the backfill and indexes are done.
+    """
+    version, name, func, concurrent = next(m for m in MIGRATIONS if m[1] == 'embedding_vectors')
+    if version in get_applied_migrations():
+        with get_cursor() as cursor:
+            cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (version,))
+    from repos.person_mixin import reset_vector_columns
+    reset_vector_columns()
+    _apply_migration(version, name, func, concurrent)
+
+
+def _create_index_concurrently(cursor, name: str, definition: str):
+    """CREATE INDEX CONCURRENTLY, first dropping an invalid leftover of a failed build."""
+    cursor.execute("""
+        SELECT i.indisvalid FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s
+    """, (name,))
+    row = cursor.fetchone()
+    if row and not row['indisvalid']:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    cursor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+# Ordered schema migrations: (version, name, function, concurrent).  Each
+# runs once and is recorded in schema_migrations; steps must stay idempotent
+# because databases that predate the table replay them all once.  Concurrent
+# steps run outside a transaction so they can build indexes CONCURRENTLY.
+# Append new steps at the end -- never renumber or edit an applied one.
+MIGRATIONS = [
+    (1, 'baseline', _migration_baseline, False),
+    (2, 'track_color_histograms', _migration_track_color_histograms, False),
+    (3, 'review_queue_counters', _migration_review_queue_counters, False),
+    (4, 'vehicle_metrics_rollup', _migration_vehicle_metrics_rollup, False),
+    (5, 'rollup_indexes', _migration_rollup_indexes, True),
+    (6, 'embedding_vectors', _migration_embedding_vectors, True),
+    (7, 'review_queue_counter_video_triggers', _migration_review_queue_counter_video_triggers, False),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# pg_advisory_lock key serialising migration runs across processes
+MIGRATION_LOCK_KEY = 0x67747374
+# First half of the (key, hashtext(table)) advisory lock held while a rollup reconciles
+ROLLUP_RECONCILE_LOCK_KEY = 0x67747372
+
+
+def get_applied_migrations() -> Dict[int, Dict]:
+    """Applied migrations by version (empty if schema_migrations doesn't exist yet)."""
+    with get_cursor(commit=False) as cursor:
+        cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL AS present")
+        if not cursor.fetchone()['present']:
+            return {}
+        cursor.execute("SELECT version, name, applied_at, duration_ms FROM schema_migrations")
+        return {row['version']: dict(row) for row in cursor.fetchall()}
+
+
+def pending_migrations() -> List[tuple]:
+    applied = get_applied_migrations()
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def _apply_migration(version: int, name: str, func, concurrent: bool) -> bool:
+    """Run one migration step under the advisory lock; False if another process beat us to it."""
+    with get_connection() as conn:
+        cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+        try:
+            if concurrent:
+                conn.autocommit = True
+                cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+            else:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS camera_overlap_groups (
-                    id SERIAL PRIMARY KEY,
-                    group_name TEXT NOT NULL,
-                    description TEXT,
-                    is_auto_computed BOOLEAN DEFAULT TRUE,
-                    manual_override BOOLEAN DEFAULT FALSE,
-                    camera_ids TEXT[] NOT NULL,
-                    overlap_scores JSONB DEFAULT '{}',
-                    computed_at TIMESTAMP,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    duration_ms INTEGER
                 )
             """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_overlap_groups_name ON camera_overlap_groups(group_name)")
-            logger.info("Camera overlap groups table ready")
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+            if cursor.fetchone():
+                if not concurrent:
+                    conn.rollback()
+                return False
+            started = time.monotonic()
+            func(cursor)
+            duration_ms = int((time.monotonic() - started) * 1000)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)",
+                (version, name, duration_ms))
+            if not concurrent:
+                conn.commit()
+            logger.info(f"Applied migration {version} ({name}) in {duration_ms}ms")
+            return True
+        except Exception:
+            if not concurrent:
+                conn.rollback()
+            raise
+        finally:
+            if concurrent:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+                conn.autocommit = False
+            cursor.close()
+
+
+def run_migrations(defer_concurrent: bool = False):
+    """
+    Bring the schema up to SCHEMA_VERSION.
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS camera_sync_selections (
-                    id BIGSERIAL PRIMARY KEY,
-                    source_camera_id TEXT NOT NULL,
-                    group_id INTEGER REFERENCES camera_overlap_groups(id) ON DELETE SET NULL,
-                    bbox_x REAL NOT NULL,
-                    bbox_y REAL NOT NULL,
-                    bbox_width REAL NOT NULL,
-                    bbox_height REAL NOT NULL,
-                    frame_width INTEGER,
-                    frame_height INTEGER,
-                    thumbnail_path TEXT,
-                    label TEXT,
-                    metadata JSONB DEFAULT '{}',
-                    created_by TEXT,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_selections_camera ON camera_sync_selections(source_camera_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_selections_group ON camera_sync_selections(group_id)")
-            logger.info("Camera sync selections table ready")
+    When nothing is pending this is a single read of schema_migrations, so
+    service startup doesn't touch (or lock) any other table.
 
-            # Migration: PTZ calibration reference points table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS ptz_calibration_points (
-                    id BIGSERIAL PRIMARY KEY,
-                    source_camera_id TEXT NOT NULL,
-                    target_camera_id TEXT NOT NULL,
-                    source_bbox_x REAL NOT NULL,
-                    source_bbox_y REAL NOT NULL,
-                    estimated_pan REAL,
-                    estimated_tilt REAL,
-                    actual_pan REAL NOT NULL,
-                    actual_tilt REAL NOT NULL,
-                    label TEXT,
-                    confirmed_by TEXT,
-                    error_pan REAL GENERATED ALWAYS AS (actual_pan - estimated_pan) STORED,
-                    error_tilt REAL GENERATED ALWAYS AS (actual_tilt - estimated_tilt) STORED,
-                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ptz_cal_pair ON ptz_calibration_points(source_camera_id, target_camera_id)")
-            logger.info("PTZ calibration points table ready")
-
-            # ============================================================
-            # EcoEye Vision System Improvement Migrations
-            # ============================================================
-
-            # New tables for vision improvement system
-            for tbl_sql in [
-                """CREATE TABLE IF NOT EXISTS spatial_scale_models (
-                    id BIGSERIAL PRIMARY KEY,
-                    camera_id VARCHAR(100) NOT NULL,
-                    classification VARCHAR(100) NOT NULL,
-                    grid_x INTEGER NOT NULL,
-                    grid_y INTEGER NOT NULL,
-                    sample_count INTEGER DEFAULT 0,
-                    mean_width REAL, mean_height REAL,
-                    std_width REAL, std_height REAL,
-                    p5_width REAL, p95_width REAL,
-                    p5_height REAL, p95_height REAL,
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(camera_id, classification, grid_x, grid_y)
-                )""",
-                """CREATE TABLE IF NOT EXISTS classification_hierarchy (
-                    id SERIAL PRIMARY KEY,
-                    tier1 VARCHAR(50) NOT NULL,
-                    tier2 VARCHAR(100) NOT NULL,
-                    tier3 VARCHAR(100),
-                    yolo_prompt VARCHAR(200),
-                    display_name VARCHAR(200),
-                    enforcement_eligible BOOLEAN DEFAULT FALSE,
-                    disqualification_reason TEXT,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    UNIQUE(tier1, tier2, tier3)
-                )""",
-                """CREATE TABLE IF NOT EXISTS classification_roles (
-                    name VARCHAR(50) PRIMARY KEY,
-                    display_name VARCHAR(100),
-                    visual_cues TEXT,
-                    is_active BOOLEAN DEFAULT TRUE
-                )""",
-                """CREATE TABLE IF NOT EXISTS classification_votes (
-                    id BIGSERIAL PRIMARY KEY,
-                    prediction_id BIGINT NOT NULL REFERENCES ai_predictions(id) ON DELETE CASCADE,
-                    voter VARCHAR(50) NOT NULL,
-                    voted_tier1 VARCHAR(50),
-                    voted_tier2 VARCHAR(100),
-                    voted_tier3 VARCHAR(100),
-                    voted_role VARCHAR(50),
-                    voted_cargo VARCHAR(100),
-                    confidence REAL,
-                    metadata JSONB,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    UNIQUE(prediction_id, voter)
-                )""",
-                """CREATE TABLE IF NOT EXISTS visit_consistency_flags (
-                    id BIGSERIAL PRIMARY KEY,
-                    visit_id UUID REFERENCES visits(visit_id),
-                    identity_id UUID REFERENCES identities(identity_id),
-                    camera_a VARCHAR(100),
-                    camera_b VARCHAR(100),
-                    class_a VARCHAR(100),
-                    class_b VARCHAR(100),
-                    flag_type VARCHAR(50),
-                    resolved BOOLEAN DEFAULT FALSE,
-                    resolution TEXT,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                )""",
-                """CREATE TABLE IF NOT EXISTS ptz_stationary_references (
-                    id BIGSERIAL PRIMARY KEY,
-                    camera_id VARCHAR(100) NOT NULL,
-                    reference_label TEXT,
-                    observations JSONB DEFAULT '[]',
-                    estimated_distance REAL,
-                    estimated_real_width REAL,
-                    estimated_real_height REAL,
-                    confidence REAL,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                )""",
-                """CREATE TABLE IF NOT EXISTS ptz_zoom_calibration (
-                    id SERIAL PRIMARY KEY,
-                    camera_id VARCHAR(100) NOT NULL,
-                    zoom_level REAL NOT NULL,
-                    effective_focal_length REAL,
-                    pixels_per_degree_h REAL,
-                    pixels_per_degree_v REAL,
-                    sample_count INTEGER DEFAULT 0,
-                    UNIQUE(camera_id, zoom_level)
-                )""",
-                """CREATE TABLE IF NOT EXISTS seasonal_priors (
-                    id SERIAL PRIMARY KEY,
-                    tier3_class VARCHAR(100) NOT NULL,
-                    month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
-                    prior_weight REAL DEFAULT 1.0,
-                    source VARCHAR(20) DEFAULT 'manual',
-                    observation_count INTEGER DEFAULT 0,
-                    UNIQUE(tier3_class, month)
-                )""",
-                """CREATE TABLE IF NOT EXISTS background_references (
-                    id SERIAL PRIMARY KEY,
-                    camera_id VARCHAR(100) NOT NULL,
-                    image_path TEXT NOT NULL,
-                    time_category VARCHAR(20),
-                    season VARCHAR(20),
-                    frame_count INTEGER,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                )""",
-                """CREATE TABLE IF NOT EXISTS camera_degradation_profiles (
-                    id SERIAL PRIMARY KEY,
-                    camera_id VARCHAR(100) NOT NULL,
-                    distance_bucket VARCHAR(20),
-                    avg_crop_width REAL, avg_crop_height REAL,
-                    noise_level REAL,
-                    compression_quality REAL,
-                    motion_blur_kernel REAL,
-                    color_profile JSONB,
-                    sample_count INTEGER DEFAULT 0,
-                    UNIQUE(camera_id, distance_bucket)
-                )""",
-            ]:
-                try:
-                    cursor.execute(tbl_sql)
-                except Exception as e:
-                    logger.debug(f"Table creation note: {e}")
-
-            # Indexes for new tables
-            new_indexes = [
-                "CREATE INDEX IF NOT EXISTS idx_spatial_scale_camera ON spatial_scale_models(camera_id)",
-                "CREATE INDEX IF NOT EXISTS idx_spatial_scale_class ON spatial_scale_models(classification)",
-                "CREATE INDEX IF NOT EXISTS idx_class_hierarchy_tier1 ON classification_hierarchy(tier1)",
-                "CREATE INDEX IF NOT EXISTS idx_class_hierarchy_tier2 ON classification_hierarchy(tier2)",
-                "CREATE INDEX IF NOT EXISTS idx_class_hierarchy_tier3 ON classification_hierarchy(tier3)",
-                "CREATE INDEX IF NOT EXISTS idx_class_votes_prediction ON classification_votes(prediction_id)",
-                "CREATE INDEX IF NOT EXISTS idx_class_votes_voter ON classification_votes(voter)",
-                "CREATE INDEX IF NOT EXISTS idx_visit_flags_visit ON visit_consistency_flags(visit_id)",
-                "CREATE INDEX IF NOT EXISTS idx_visit_flags_resolved ON visit_consistency_flags(resolved)",
-                "CREATE INDEX IF NOT EXISTS idx_ptz_stationary_camera ON ptz_stationary_references(camera_id)",
-                "CREATE INDEX IF NOT EXISTS idx_ptz_zoom_camera ON ptz_zoom_calibration(camera_id)",
-                "CREATE INDEX IF NOT EXISTS idx_seasonal_priors_class ON seasonal_priors(tier3_class)",
-                "CREATE INDEX IF NOT EXISTS idx_bg_refs_camera ON background_references(camera_id)",
-                "CREATE INDEX IF NOT EXISTS idx_camera_degrade_camera ON camera_degradation_profiles(camera_id)",
-            ]
-            for idx_sql in new_indexes:
-                try:
-                    cursor.execute(idx_sql)
-                except Exception:
-                    pass
-            logger.info("EcoEye Vision Improvement tables ready")
-
-            # New columns on ai_predictions for tiered classification + voting
-            ai_pred_columns = [
-                ("vehicle_tier1", "VARCHAR(50)"),
-                ("vehicle_tier2", "VARCHAR(100)"),
-                ("vehicle_tier3", "VARCHAR(100)"),
-                ("vehicle_role", "VARCHAR(50)"),
-                ("confidence_tier1", "REAL"),
-                ("confidence_tier2", "REAL"),
-                ("confidence_tier3", "REAL"),
-                ("confidence_role", "REAL"),
-                ("enforcement_eligible", "BOOLEAN"),
-                ("disqualification_reason", "TEXT"),
-                ("cargo_type", "VARCHAR(100)"),
-                ("cargo_count", "INTEGER"),
-                ("source_type", "VARCHAR(20) DEFAULT 'real'"),
-                ("parent_entity_prediction_id", "BIGINT REFERENCES ai_predictions(id)"),
-                ("entity_relationship", "VARCHAR(50)"),
-                ("is_training_candidate", "BOOLEAN DEFAULT TRUE"),
-                ("training_exclusion_reason", "VARCHAR(100)"),
-                ("voter_count", "INTEGER DEFAULT 0"),
-                ("voter_agreement", "INTEGER DEFAULT 0"),
-                ("consensus_tier", "VARCHAR(20)"),
-                ("review_queue", "VARCHAR(20)"),
-            ]
-            for col_name, col_type in ai_pred_columns:
-                cursor.execute(f"ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS {col_name} {col_type}")
-
-            # Indexes for new ai_predictions columns
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_tier1 ON ai_predictions(vehicle_tier1)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_tier2 ON ai_predictions(vehicle_tier2)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_review_queue ON ai_predictions(review_queue)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_consensus ON ai_predictions(consensus_tier)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_training ON ai_predictions(is_training_candidate)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_predictions_entity_parent ON ai_predictions(parent_entity_prediction_id)")
-            logger.info("ai_predictions tiered classification columns ready")
-
-            # New column on camera_object_tracks
-            cursor.execute("ALTER TABLE camera_object_tracks ADD COLUMN IF NOT EXISTS best_crop_prediction_id BIGINT")
-            logger.info("camera_object_tracks best_crop_prediction_id ready")
-
-            # Add overlap_zones column to camera_overlap_groups
-            cursor.execute("ALTER TABLE camera_overlap_groups ADD COLUMN IF NOT EXISTS overlap_zones JSONB")
-            logger.info("camera_overlap_groups overlap_zones ready")
-
-        logger.info("Migrations completed successfully")
+    With defer_concurrent (service startup), only the pending steps before
+    the first concurrent one run here; that step and everything after it --
+    backfills and CONCURRENTLY index builds that can take minutes on a large
+    table -- run in order on a background thread.  `python schema.py migrate`
+    runs them all in the foreground.
+    """
+    started = time.monotonic()
+    try:
+        pending = pending_migrations()
+        if not pending:
+            logger.info(f"Schema up to date (version {SCHEMA_VERSION}, "
+                        f"checked in {(time.monotonic() - started) * 1000:.1f}ms)")
+            return
+        deferred = []
+        if defer_concurrent:
+            first_concurrent = next((i for i, m in enumerate(pending) if m[3]), len(pending))
+            pending, deferred = pending[:first_concurrent], pending[first_concurrent:]
+        if pending:
+            logger.info(f"Running {len(pending)} database migration(s)...")
+            for version, name, func, concurrent in pending:
+                _apply_migration(version, name, func, concurrent)
+            logger.info(f"Migrations completed successfully in {time.monotonic() - started:.2f}s")
+        if deferred:
+            logger.info(f"Running {len(deferred)} long migration(s) in the background: "
+                        f"{', '.join(m[1] for m in deferred)}")
+            threading.Thread(target=_run_deferred_migrations, args=(deferred,),
+                             daemon=True, name="schema-migrations").start()
     except Exception as e:
         logger.error(f"Migration error: {e}")
         raise
 
 
-if __name__ == '__main__':
-    # Allow running as standalone script for schema initialization
+def _run_deferred_migrations(steps: List[tuple]):
+    started = time.monotonic()
+    try:
+        for version, name, func, concurrent in steps:
+            _apply_migration(version, name, func, concurrent)
+    except Exception as e:
+        # Left pending; retried on the next start or by `python schema.py migrate`
+        logger.error(f"Background migration error: {e}")
+        return
+    logger.info(f"Background migrations completed in {time.monotonic() - started:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GroundTruth Studio schema management')
+    parser.add_argument('command', nargs='?', default='setup',
+                        choices=['setup', 'migrate', 'status', 'vectors'],
+                        help='setup: create tables, migrate and verify (default); '
+                             'migrate: apply pending migrations only; '
+                             'status: list applied and pending migrations; '
+                             'vectors: (re)build pgvector embedding columns')
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO)
-    init_schema()
+    if args.command == 'status':
+        applied = get_applied_migrations()
+        for version, name, _func, concurrent in MIGRATIONS:
+            row = applied.get(version)
+            state = (f"applied {row['applied_at']:%Y-%m-%d %H:%M} ({row['duration_ms']}ms)"
+                     if row else 'pending')
+            print(f"{version:>4}  {name:<28} {'concurrent ' if concurrent else ''}{state}")
+        return
+    if args.command == 'vectors':
+        rebuild_embedding_vectors()
+        return
+    if args.command == 'setup':
+        init_schema()
     run_migrations()
-    status = verify_schema()
-    print(f"Schema verification: {status}")
+    if args.command == 'setup':
+        status = verify_schema()
+        print(f"Schema verification: {status}")
+
+
+if __name__ == '__main__':
+    # Allow running as standalone script for schema initialization
+    main()
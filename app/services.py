@@ -2,6 +2,7 @@
 import os
 import logging
 import atexit
+import threading
 from pathlib import Path
 
 from database import VideoDatabase
@@ -29,6 +30,11 @@ EXPORT_DIR = BASE_DIR / 'exports'
 
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
 
+# How often the API process checks the trigger-maintained rollups
+# (review_queue_counters, vehicle_metrics_rollup) against ai_predictions
+# and repairs drift; 0 disables the check
+ROLLUP_RECONCILE_SECONDS = int(os.environ.get('ROLLUP_RECONCILE_SECONDS', 6 * 3600))
+
 # EcoEye API Configuration
 ECOEYE_API_BASE = os.environ.get('ECOEYE_API_BASE', 'https://alert.ecoeyetech.com')
 ECOEYE_PHP_API_KEY = os.environ.get('ECOEYE_PHP_API_KEY', '')
@@ -102,6 +108,19 @@ def ecoeye_request(method, endpoint, **kwargs):
     return requests.request(method, url, headers=headers, **kwargs)
 
 
+def _rollup_reconcile_loop(stop_event):
+    """Periodically repair drift in the trigger-maintained prediction rollups."""
+    while not stop_event.wait(timeout=ROLLUP_RECONCILE_SECONDS):
+        for name, reconcile in (('review_queue_counters', db.reconcile_review_queue_counters),
+                                ('vehicle_metrics_rollup', db.reconcile_vehicle_metrics_rollup)):
+            try:
+                drifted = reconcile()
+                if drifted:
+                    logger.warning("Reconciled %s: %d keys had drifted", name, drifted)
+            except Exception:
+                logger.exception("%s reconciliation failed", name)
+
+
 def init_services():
     """Initialize all shared services. Called once at app startup."""
     global db, downloader, processor, download_queue, yolo_exporter
@@ -130,13 +149,15 @@ def init_services():
     init_training_jobs_table(db)
     training_queue = TrainingQueueClient(db)
 
-    # Startup clip cleanup
-    try:
-        _startup_cleanup = processor.cleanup_clips(max_age_days=7, max_size_mb=500)
-        if _startup_cleanup.get('removed', 0) > 0:
-            logger.info(f"Startup clip cleanup: removed {_startup_cleanup['removed']} clips, freed {_startup_cleanup['freed_mb']}MB")
-    except Exception as e:
-        logger.warning(f"Startup clip cleanup failed: {e}")
+    # Startup clip cleanup (walks the clip cache, so off the startup path)
+    def _startup_clip_cleanup():
+        try:
+            _startup_cleanup = processor.cleanup_clips(max_age_days=7, max_size_mb=500)
+            if _startup_cleanup.get('removed', 0) > 0:
+                logger.info(f"Startup clip cleanup: removed {_startup_cleanup['removed']} clips, freed {_startup_cleanup['freed_mb']}MB")
+        except Exception as e:
+            logger.warning(f"Startup clip cleanup failed: {e}")
+    threading.Thread(target=_startup_clip_cleanup, daemon=True, name="startup-clip-cleanup").start()
 
     # Start auto-retrain background checker
     start_auto_retrain_checker(db, yolo_exporter, training_queue)
@@ -153,13 +174,32 @@ def init_services():
         start_ecoeye_auto_sync(db, processor, _ecoeye_client, DOWNLOAD_DIR, THUMBNAIL_DIR, sync_config)
         atexit.register(stop_ecoeye_auto_sync)
 
-    # Run schema migrations
+    # Run schema migrations (long concurrent steps continue in the background)
     from schema import run_migrations
     try:
-        run_migrations()
+        run_migrations(defer_concurrent=True)
     except Exception as e:
         print(f"[Migrations] Warning: {e}")
 
 
+def start_rollup_reconcile():
+    """
+    Start the background rollup reconciliation.  Only the API process calls
+    this -- workers and scripts that import services don't reconcile -- and
+    each pass skips a rollup another process is already reconciling.
+    """
+    if ROLLUP_RECONCILE_SECONDS <= 0:
+        logger.info("Rollup reconciliation disabled (ROLLUP_RECONCILE_SECONDS=0)")
+        return
+    _reconcile_stop = threading.Event()
+    threading.Thread(
+        target=_rollup_reconcile_loop,
+        args=(_reconcile_stop,),
+        daemon=True,
+        name="rollup-reconcile",
+    ).start()
+    atexit.register(_reconcile_stop.set)
+
+
 # Initialize on import (matches original api.py module-level behavior)
 init_services()
@@ -0,0 +1,207 @@
+"""
+Camera Snapshot Cache
+
+Short-TTL, per-camera cache for live snapshots with request coalescing.
+Concurrent requests for the same camera share one in-flight upstream grab
+(go2rtc frame.jpeg, falling back to Frigate latest.jpg), so N viewers
+polling M cameras cost at most M grabs per TTL instead of N x M.
+Downscaled variants are derived from the cached frame and cached alongside it.
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+GO2RTC_API = os.environ.get('GO2RTC_API_URL', 'http://172.200.1.7:1984')
+FRIGATE_API = os.environ.get('FRIGATE_API_URL', 'https://172.200.1.7:8971')
+
+SNAPSHOT_TTL = float(os.environ.get('SNAPSHOT_CACHE_TTL', '2.0'))
+# Failed grabs are remembered briefly so a dead camera doesn't get hammered
+FAILURE_TTL = 1.0
+FETCH_TIMEOUT = 5
+MAX_ENTRIES = 256
+
+
+class _Flight:
+    """One in-progress upstream fetch that other requests can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+
+
+class SnapshotCache:
+    """TTL cache of JPEG snapshots keyed by (camera_id, height)."""
+
+    def __init__(self, ttl: float = SNAPSHOT_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (camera_id, height or None) -> (jpeg bytes or None, fetched_at)
+        self._entries: 'OrderedDict[Tuple[str, Optional[int]], Tuple[Optional[bytes], float]]' = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._stats = {
+            'hits': 0, 'misses': 0, 'coalesced': 0, 'resizes': 0,
+            'fetches': 0, 'fetch_errors': 0,
+            'fetch_ms_total': 0.0, 'fetch_ms_max': 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, camera_id: str, height: Optional[int] = None) -> Tuple[Optional[bytes], float]:
+        """Return (jpeg, age_seconds) for a camera, fetching at most once per TTL.
+
+        jpeg is None when no upstream source produced a frame.
+        """
+        key = (camera_id, height)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._fresh(key, now)
+            if cached is not None:
+                self._stats['hits'] += 1
+                return cached[0], now - cached[1]
+
+            # Full-size frame still fresh: only the resize is missing
+            base = self._fresh((camera_id, None), now) if height else None
+            if base is None:
+                self._stats['misses'] += 1
+                flight = self._inflight.get(camera_id)
+                owner = flight is None
+                if owner:
+                    flight = _Flight()
+                    self._inflight[camera_id] = flight
+                else:
+                    self._stats['coalesced'] += 1
+
+        if base is None:
+            if owner:
+                self._run_flight(camera_id, flight)
+            else:
+                flight.done.wait(FETCH_TIMEOUT * 2 + 1)
+            with self._lock:
+                base = self._entries.get((camera_id, None))
+            if base is None:
+                return None, 0.0
+
+        data, fetched_at = base
+        if data is None or not height:
+            return data, time.monotonic() - fetched_at
+
+        with self._lock:
+            existing = self._entries.get(key)
+        if existing is not None and existing[1] == fetched_at:
+            return existing[0], time.monotonic() - fetched_at
+
+        resized = _downscale(data, height)
+        with self._lock:
+            self._stats['resizes'] += 1
+            self._store(key, resized, fetched_at)
+        return resized, time.monotonic() - fetched_at
+
+    def get_stats(self) -> dict:
+        """Hit rate and upstream fetch latency counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['inflight'] = len(self._inflight)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['fetch_ms_avg'] = (round(stats['fetch_ms_total'] / stats['fetches'], 1)
+                                 if stats['fetches'] else 0.0)
+        stats['fetch_ms_total'] = round(stats['fetch_ms_total'], 1)
+        stats['fetch_ms_max'] = round(stats['fetch_ms_max'], 1)
+        stats['ttl_seconds'] = self.ttl
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold self._lock unless noted)
+    # ------------------------------------------------------------------
+
+    def _fresh(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        ttl = self.ttl if entry[0] is not None else FAILURE_TTL
+        if now - entry[1] >= ttl:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, data, fetched_at):
+        self._entries[key] = (data, fetched_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _run_flight(self, camera_id, flight):
+        """Fetch upstream without holding the lock, then publish the result."""
+        start = time.monotonic()
+        data = None
+        try:
+            data = _fetch_snapshot(camera_id)
+        except Exception as e:
+            logger.debug(f"Snapshot fetch failed for {camera_id}: {e}")
+        elapsed_ms = (time.monotonic() - start) * 1000
+        with self._lock:
+            self._stats['fetches'] += 1
+            self._stats['fetch_ms_total'] += elapsed_ms
+            self._stats['fetch_ms_max'] = max(self._stats['fetch_ms_max'], elapsed_ms)
+            if data is None:
+                self._stats['fetch_errors'] += 1
+            # A new base frame invalidates the resized variants of the old one
+            for key in [k for k in self._entries if k[0] == camera_id and k[1] is not None]:
+                del self._entries[key]
+            self._store((camera_id, None), data, time.monotonic())
+            del self._inflight[camera_id]
+        flight.data = data
+        flight.done.set()
+
+
+def _fetch_snapshot(camera_id: str) -> Optional[bytes]:
+    """Grab one full-size JPEG: go2rtc first (faster, no auth), then Frigate."""
+    try:
+        resp = requests.get(f'{GO2RTC_API}/api/frame.jpeg',
+                            params={'src': camera_id}, timeout=FETCH_TIMEOUT)
+        if resp.status_code == 200 and len(resp.content) > 100:
+            return resp.content
+    except Exception:
+        pass
+
+    try:
+        resp = requests.get(f'{FRIGATE_API}/api/{camera_id}/latest.jpg',
+                            timeout=FETCH_TIMEOUT, verify=False)
+        if resp.status_code == 200:
+            return resp.content
+    except Exception:
+        pass
+    return None
+
+
+def _downscale(data: bytes, height: int) -> bytes:
+    """Resize a JPEG to the given height, keeping aspect; never upscales."""
+    from PIL import Image
+    try:
+        img = Image.open(io.BytesIO(data))
+        if img.height <= height:
+            return data
+        width = max(1, round(img.width * height / img.height))
+        img = img.convert('RGB').resize((width, height), Image.BILINEAR)
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=85)
+        return buf.getvalue()
+    except Exception as e:
+        logger.debug(f"Snapshot downscale failed: {e}")
+        return data
+
+
+snapshot_cache = SnapshotCache()
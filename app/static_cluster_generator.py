@@ -22,10 +22,10 @@ Usage:
 
 import os
 import sys
-import json
 import logging
 import argparse
 from collections import defaultdict
+from contextlib import nullcontext
 
 os.environ.setdefault(
     'DATABASE_URL',
@@ -42,16 +42,31 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def quantize(val, grid=50):
+GRID = 50
+
+# Cluster key computed in SQL; must stay identical to build_clusters()
+CLUSTER_KEY_SQL = f"""
+    CASE WHEN p.camera_object_track_id IS NOT NULL
+         THEN 'track_' || p.camera_object_track_id
+         ELSE 'vid_' || p.video_id
+              || '_' || (FLOOR(TRUNC(p.bbox_x::numeric) / {GRID}) * {GRID})::bigint
+              || '_' || (FLOOR(TRUNC(p.bbox_y::numeric) / {GRID}) * {GRID})::bigint
+    END
+"""
+
+
+def quantize(val, grid=GRID):
     """Snap a coordinate to the nearest grid boundary (floor)."""
     return (int(val) // grid) * grid
 
 
-def fetch_eligible_predictions(min_id=None, camera_id=None):
-    """
-    Fetch all pending/processing predictions that don't already have
-    a static_cluster tag.  Returns a list of dicts.
-    """
+def _use_cursor(cursor, commit):
+    """The caller's cursor (its transaction, its commit) or a pooled one."""
+    return nullcontext(cursor) if cursor is not None else get_cursor(commit=commit)
+
+
+def _eligible_where(min_id=None, camera_id=None):
+    """WHERE clause and params for pending predictions without a static_cluster tag."""
     conditions = [
         "p.review_status IN ('pending', 'processing')",
         "(p.corrected_tags IS NULL OR p.corrected_tags->>'static_cluster' IS NULL)",
@@ -70,7 +85,18 @@ def fetch_eligible_predictions(min_id=None, camera_id=None):
         conditions.append("v.camera_id = %s")
         params.append(camera_id)
 
-    where_clause = " AND ".join(conditions)
+    return " AND ".join(conditions), params
+
+
+def fetch_eligible_predictions(min_id=None, camera_id=None, cursor=None):
+    """
+    Fetch all pending/processing predictions that don't already have
+    a static_cluster tag.  Returns a list of dicts.
+
+    Row-level reference path; clustering itself runs in SQL (plan_clusters,
+    tag_clusters).  Kept for checking the two agree.
+    """
+    where_clause, params = _eligible_where(min_id, camera_id)
 
     query = f"""
         SELECT
@@ -88,7 +114,7 @@ def fetch_eligible_predictions(min_id=None, camera_id=None):
         ORDER BY p.id
     """
 
-    with get_cursor(commit=False) as cur:
+    with _use_cursor(cursor, commit=False) as cur:
         cur.execute(query, params or None)
         rows = cur.fetchall()
 
@@ -128,49 +154,104 @@ def build_clusters(predictions):
     return groups
 
 
-def apply_clusters(clusters, dry_run=False, min_cluster_size=3):
+def _grouped_cte(min_id, camera_id):
+    """CTEs 'eligible' (id, cluster_key) and 'groups' (cluster_key, n, first_id)."""
+    where_clause, params = _eligible_where(min_id, camera_id)
+    cte = f"""
+        WITH eligible AS (
+            SELECT p.id, {CLUSTER_KEY_SQL} AS cluster_key
+            FROM ai_predictions p
+            JOIN videos v ON v.id = p.video_id
+            WHERE {where_clause}
+        ),
+        groups AS (
+            SELECT cluster_key, COUNT(*) AS n, MIN(id) AS first_id
+            FROM eligible
+            GROUP BY cluster_key
+        )
+    """
+    return cte, params
+
+
+def plan_clusters(min_id=None, camera_id=None, min_cluster_size=3, cursor=None):
     """
-    For each cluster with >= min_cluster_size members, update corrected_tags.
-    Returns (clusters_created, predictions_tagged).
+    Group eligible predictions in SQL without writing anything.
+
+    Returns {'eligible', 'total_groups', 'qualifying': [(key, size), ...]},
+    qualifying ordered by each cluster's lowest prediction id (the order
+    build_clusters() discovers them in).
     """
-    clusters_created = 0
-    predictions_tagged = 0
+    cte, params = _grouped_cte(min_id, camera_id)
+    with _use_cursor(cursor, commit=False) as cur:
+        cur.execute(cte + """
+            SELECT (SELECT COALESCE(SUM(n), 0) FROM groups) AS eligible,
+                   (SELECT COUNT(*) FROM groups) AS total_groups,
+                   COALESCE((SELECT json_agg(json_build_array(cluster_key, n) ORDER BY first_id)
+                             FROM groups WHERE n >= %s), '[]') AS qualifying
+        """, params + [min_cluster_size])
+        row = cur.fetchone()
+    return {
+        'eligible': int(row['eligible']),
+        'total_groups': row['total_groups'],
+        'qualifying': [(key, int(n)) for key, n in row['qualifying']],
+    }
 
-    qualifying = {k: ids for k, ids in clusters.items() if len(ids) >= min_cluster_size}
+
+def tag_clusters(min_id=None, camera_id=None, min_cluster_size=3, cursor=None):
+    """
+    Tag every qualifying cluster in one UPDATE ... FROM over the grouped rows.
+
+    Returns [(key, size), ...] for the clusters tagged, in first-id order.
+    With a cursor the UPDATE runs in the caller's transaction, uncommitted.
+    """
+    cte, params = _grouped_cte(min_id, camera_id)
+    with _use_cursor(cursor, commit=True) as cur:
+        cur.execute(cte + """,
+            tagged AS (
+                UPDATE ai_predictions p
+                SET corrected_tags = COALESCE(p.corrected_tags, '{}'::jsonb)
+                    || jsonb_build_object('static_cluster', g.cluster_key,
+                                          'batch_reviewable', 'true',
+                                          'cluster_size', g.n::text)
+                FROM eligible e
+                JOIN groups g ON g.cluster_key = e.cluster_key
+                WHERE p.id = e.id AND g.n >= %s
+                RETURNING g.cluster_key, g.first_id
+            )
+            SELECT cluster_key, COUNT(*) AS n
+            FROM tagged
+            GROUP BY cluster_key, first_id
+            ORDER BY first_id
+        """, params + [min_cluster_size])
+        return [(row['cluster_key'], row['n']) for row in cur.fetchall()]
+
+
+def apply_clusters(min_id=None, camera_id=None, dry_run=False, min_cluster_size=3):
+    """
+    Tag clusters with >= min_cluster_size members for batch review.
+    Returns (clusters_created, predictions_tagged, eligible).
+    """
+    plan = plan_clusters(min_id, camera_id, min_cluster_size)
+    logger.info("Fetched %d eligible predictions, grouped into %d distinct clusters.",
+                plan['eligible'], plan['total_groups'])
+
+    if dry_run:
+        clusters = plan['qualifying']
+    else:
+        # Plan and write are separate statements; report what was written
+        clusters = tag_clusters(min_id, camera_id, min_cluster_size) if plan['qualifying'] else []
 
     logger.info(
         "Found %d qualifying clusters (>= %d members) out of %d total groups.",
-        len(qualifying), min_cluster_size, len(clusters)
+        len(clusters), min_cluster_size, plan['total_groups']
     )
-
-    for key, ids in qualifying.items():
-        count = len(ids)
-        tag_payload = json.dumps({
-            'static_cluster': key,
-            'batch_reviewable': 'true',
-            'cluster_size': str(count),
-        })
-
+    for key, count in clusters:
         logger.info(
             "  Cluster %-45s  %4d predictions  %s",
             key, count, "[DRY RUN]" if dry_run else ""
         )
 
-        if not dry_run:
-            with get_cursor(commit=True) as cur:
-                cur.execute(
-                    """
-                    UPDATE ai_predictions
-                    SET corrected_tags = COALESCE(corrected_tags, '{}'::jsonb) || %s::jsonb
-                    WHERE id = ANY(%s)
-                    """,
-                    (tag_payload, ids)
-                )
-
-        clusters_created += 1
-        predictions_tagged += count
-
-    return clusters_created, predictions_tagged
+    return len(clusters), sum(count for _key, count in clusters), plan['eligible']
 
 
 def parse_args():
@@ -216,24 +297,9 @@ def main():
     if args.camera is not None:
         logger.info("Filtering to camera: %s", args.camera)
 
-    logger.info("Fetching eligible predictions...")
-    predictions = fetch_eligible_predictions(
+    clusters_created, predictions_tagged, _eligible = apply_clusters(
         min_id=args.min_id,
         camera_id=args.camera,
-    )
-    logger.info("Fetched %d eligible predictions.", len(predictions))
-
-    if not predictions:
-        logger.info("Nothing to do.")
-        return
-
-    clusters = build_clusters(predictions)
-    logger.info(
-        "Grouped into %d distinct clusters.", len(clusters)
-    )
-
-    clusters_created, predictions_tagged = apply_clusters(
-        clusters,
         dry_run=args.dry_run,
         min_cluster_size=args.min_cluster_size,
     )
@@ -247,16 +313,11 @@ def main():
 
 def run_static_clustering(min_cluster_size=3):
     """Callable entry point for pipeline worker. Returns summary dict."""
-    predictions = fetch_eligible_predictions()
-    if not predictions:
-        return {'eligible': 0, 'clusters_created': 0, 'predictions_tagged': 0}
-
-    clusters = build_clusters(predictions)
-    clusters_created, predictions_tagged = apply_clusters(
-        clusters, dry_run=False, min_cluster_size=min_cluster_size
+    clusters_created, predictions_tagged, eligible = apply_clusters(
+        dry_run=False, min_cluster_size=min_cluster_size
     )
     return {
-        'eligible': len(predictions),
+        'eligible': eligible,
         'clusters_created': clusters_created,
         'predictions_tagged': predictions_tagged,
     }
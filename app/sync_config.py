@@ -12,9 +12,6 @@ import json
 import base64
 from pathlib import Path
 from typing import Dict, Optional
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import logging
 import os
 from db_connection import get_connection, get_cursor
@@ -35,7 +32,17 @@ class SyncConfigManager:
         """
         # db_path parameter kept for backwards compatibility but ignored
         # Schema is now managed by schema.py
-        self.encryption_key = encryption_key or self._generate_encryption_key()
+        self._encryption_key = encryption_key
+        if encryption_key is None and not os.environ.get('GROUNDTRUTH_ENCRYPTION_SECRET'):
+            # Fail at startup as before, even though the key is derived lazily
+            self._generate_encryption_key()
+
+    @property
+    def encryption_key(self) -> str:
+        # Derived on first use: PBKDF2 with 100k iterations is too slow for startup
+        if self._encryption_key is None:
+            self._encryption_key = self._generate_encryption_key()
+        return self._encryption_key
 
     def _generate_encryption_key(self) -> str:
         """
@@ -44,6 +51,9 @@ class SyncConfigManager:
         Returns:
             Base64-encoded encryption key
         """
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
         # Use machine-specific data for key derivation
         # In production, this should be stored securely (e.g., environment variable)
         salt = b'groundtruth_studio_salt_v1'  # Fixed salt for deterministic key
@@ -64,8 +74,9 @@ class SyncConfigManager:
 
         return key.decode()
 
-    def _get_cipher(self) -> Fernet:
+    def _get_cipher(self):
         """Get Fernet cipher instance"""
+        from cryptography.fernet import Fernet
         return Fernet(self.encryption_key.encode())
 
     def _encrypt(self, data: str) -> str:
@@ -14,9 +14,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
-import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
-
 import psycopg2.extras
 from db_connection import get_connection
 
@@ -65,6 +62,21 @@ class TrainingQueueClient:
         self.queue_url = queue_url or os.environ.get('SQS_QUEUE_URL', DEFAULT_QUEUE_URL)
         self.dlq_url = dlq_url or os.environ.get('SQS_DLQ_URL', DEFAULT_DLQ_URL)
 
+        self._aws_resolved = False
+        self._sqs = None
+        self._s3 = None
+        self._local_mode = True
+
+    def _resolve_aws(self):
+        """Resolve AWS credentials on first use rather than at startup.
+
+        Credential lookup can fall through to the instance metadata service,
+        which takes seconds when there are no credentials configured.
+        """
+        if self._aws_resolved:
+            return
+        import boto3
+        from botocore.exceptions import NoCredentialsError
         try:
             session = boto3.Session(region_name=self.region)
             credentials = session.get_credentials()
@@ -74,15 +86,31 @@ class TrainingQueueClient:
             credentials = credentials.get_frozen_credentials()
             if not credentials.access_key:
                 raise NoCredentialsError()
-            self.sqs = session.client('sqs')
-            self.s3 = session.client('s3')
-            self.local_mode = False
+            self._sqs = session.client('sqs')
+            self._s3 = session.client('s3')
+            self._local_mode = False
             logger.info('AWS credentials found, using S3/SQS mode')
         except (NoCredentialsError, Exception) as e:
             logger.warning(f'AWS credentials unavailable, running in local mode: {e}')
-            self.sqs = None
-            self.s3 = None
-            self.local_mode = True
+            self._sqs = None
+            self._s3 = None
+            self._local_mode = True
+        self._aws_resolved = True
+
+    @property
+    def local_mode(self):
+        self._resolve_aws()
+        return self._local_mode
+
+    @property
+    def sqs(self):
+        self._resolve_aws()
+        return self._sqs
+
+    @property
+    def s3(self):
+        self._resolve_aws()
+        return self._s3
 
     def submit_job(self, export_path: str, job_type: str, config: dict,
                    export_config_id: int = None) -> Dict:
@@ -139,6 +167,7 @@ class TrainingQueueClient:
 
     def _upload_and_queue(self, job_id: str, export_path: str, job_type: str, config: dict):
         """Background worker: upload files to S3, then send SQS message."""
+        from botocore.exceptions import ClientError
         try:
             export_dir = Path(export_path)
             s3_prefix = f'{S3_PREFIX}/{job_id}'
@@ -195,6 +224,7 @@ class TrainingQueueClient:
 
     def get_queue_status(self) -> Dict:
         """Get approximate message counts for the main queue and DLQ."""
+        from botocore.exceptions import ClientError, NoCredentialsError
         if self.local_mode:
             with get_connection() as conn:
                 cursor = conn.cursor()
@@ -21,75 +21,118 @@ MIN_TIER3_SAMPLES = 10
 class TrainingSampler:
     """Manages training data selection from ai_predictions."""
 
-    def select_best_per_track(self, camera_id: Optional[str] = None) -> dict:
+    def select_best_per_track(self, camera_id: Optional[str] = None,
+                              chunk_size: Optional[int] = None) -> dict:
         """
         For each camera_object_track, pick the prediction with highest quality_score
         as best_crop. Mark others as duplicate_track.
 
+        Runs as one set-based statement per transaction; with chunk_size the
+        tracks are processed in camera_object_track_id ranges of that width,
+        each committed on its own, to keep locks and WAL per batch bounded.
+
         Returns:
             {tracks_processed, duplicates_excluded}
         """
         tracks_processed = 0
         duplicates_excluded = 0
 
-        with get_cursor(commit=False) as cursor:
-            conditions = ["camera_object_track_id IS NOT NULL"]
-            params = []
-            if camera_id:
-                # Join to get camera_id from video
-                cursor.execute("""
-                    SELECT DISTINCT p.camera_object_track_id
-                    FROM ai_predictions p
-                    JOIN videos v ON v.id = p.video_id
-                    WHERE p.camera_object_track_id IS NOT NULL
-                      AND v.camera_id = %s
-                """, (camera_id,))
-            else:
-                cursor.execute("""
-                    SELECT DISTINCT camera_object_track_id
+        if chunk_size:
+            with get_cursor(commit=False) as cursor:
+                track_filter, params = self._track_filter(camera_id)
+                cursor.execute(f"""
+                    SELECT MIN(camera_object_track_id) AS lo, MAX(camera_object_track_id) AS hi
                     FROM ai_predictions
-                    WHERE camera_object_track_id IS NOT NULL
-                """)
-            track_rows = cursor.fetchall()
-
-        track_ids = [row['camera_object_track_id'] for row in track_rows]
-
-        for track_id in track_ids:
+                    WHERE camera_object_track_id IS NOT NULL {track_filter}
+                """, params)
+                bounds = cursor.fetchone()
+            ranges = []
+            if bounds['lo'] is not None:
+                ranges = [(lo, lo + chunk_size - 1)
+                          for lo in range(bounds['lo'], bounds['hi'] + 1, chunk_size)]
+        else:
+            ranges = [None]
+
+        for track_range in ranges:
             with get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT id, quality_score
-                    FROM ai_predictions
-                    WHERE camera_object_track_id = %s
-                    ORDER BY quality_score DESC NULLS LAST, id ASC
-                """, (track_id,))
-                preds = cursor.fetchall()
-                if not preds:
-                    continue
-
-                best_id = preds[0]['id']
-                dup_ids = [r['id'] for r in preds[1:]]
-
-                cursor.execute("""
-                    UPDATE camera_object_tracks
-                    SET best_crop_prediction_id = %s
-                    WHERE id = %s
-                """, (best_id, track_id))
-
-                if dup_ids:
-                    cursor.execute("""
-                        UPDATE ai_predictions
-                        SET is_training_candidate = FALSE,
-                            training_exclusion_reason = 'duplicate_track'
-                        WHERE id = ANY(%s)
-                    """, (dup_ids,))
-                    duplicates_excluded += len(dup_ids)
-
-                tracks_processed += 1
+                tracks, dups = self._select_best_chunk(cursor, camera_id, track_range)
+            tracks_processed += tracks
+            duplicates_excluded += dups
 
         logger.info("select_best_per_track: %d tracks, %d duplicates excluded",
                     tracks_processed, duplicates_excluded)
         return {'tracks_processed': tracks_processed, 'duplicates_excluded': duplicates_excluded}
 
+    @staticmethod
+    def _track_filter(camera_id: Optional[str], track_range: Optional[tuple] = None):
+        """SQL restricting ai_predictions rows to tracks seen on camera_id,
+        and to track ids in track_range.  The range applies inside the camera
+        subquery too, so a chunk doesn't collect the camera's every track."""
+        range_sql = ''
+        range_params = []
+        if track_range:
+            range_sql = "AND camera_object_track_id BETWEEN %s AND %s"
+            range_params = list(track_range)
+        if not camera_id:
+            return range_sql, range_params
+        return f"""
+            {range_sql}
+            AND camera_object_track_id IN (
+                SELECT p.camera_object_track_id
+                FROM ai_predictions p
+                JOIN videos v ON v.id = p.video_id
+                WHERE p.camera_object_track_id IS NOT NULL
+                  AND v.camera_id = %s {range_sql.replace('camera_object_track_id', 'p.camera_object_track_id')}
+            )
+        """, range_params + [camera_id] + range_params
+
+    def _select_best_chunk(self, cursor, camera_id: Optional[str] = None,
+                           track_range: Optional[tuple] = None) -> tuple:
+        """Rank, set best crops and exclude duplicates for one set of tracks.
+
+        Returns (tracks_processed, duplicates_excluded).  Counts cover every
+        ranked prediction, as before; rows already in the target state are
+        not rewritten.
+        """
+        track_filter, params = self._track_filter(camera_id, track_range)
+
+        cursor.execute(f"""
+            WITH ranked AS (
+                SELECT id, camera_object_track_id AS track_id,
+                       ROW_NUMBER() OVER (PARTITION BY camera_object_track_id
+                                          ORDER BY quality_score DESC NULLS LAST, id) AS rn
+                FROM ai_predictions
+                WHERE camera_object_track_id IS NOT NULL {track_filter}
+            ),
+            best AS (
+                UPDATE camera_object_tracks t
+                SET best_crop_prediction_id = r.id
+                FROM ranked r
+                WHERE r.rn = 1 AND t.id = r.track_id
+                  AND t.best_crop_prediction_id IS DISTINCT FROM r.id
+                RETURNING t.id
+            ),
+            dups AS (
+                UPDATE ai_predictions p
+                SET is_training_candidate = FALSE,
+                    training_exclusion_reason = 'duplicate_track'
+                FROM ranked r
+                WHERE r.rn > 1 AND p.id = r.id
+                  AND (p.is_training_candidate IS DISTINCT FROM FALSE
+                       OR p.training_exclusion_reason IS DISTINCT FROM 'duplicate_track')
+                RETURNING p.id
+            )
+            SELECT COUNT(*) FILTER (WHERE rn = 1) AS tracks_processed,
+                   COUNT(*) FILTER (WHERE rn > 1) AS duplicates_excluded,
+                   (SELECT COUNT(*) FROM best) AS best_updated,
+                   (SELECT COUNT(*) FROM dups) AS dups_updated
+            FROM ranked
+        """, params)
+        row = cursor.fetchone()
+        logger.debug("select_best_per_track chunk %s: %d best crops changed, %d predictions newly excluded",
+                     track_range, row['best_updated'], row['dups_updated'])
+        return row['tracks_processed'], row['duplicates_excluded']
+
     def compute_class_balance(self, scenario: Optional[str] = None) -> Dict[str, int]:
         """
         Count approved training-eligible predictions per classification.
@@ -13,7 +13,6 @@ import logging
 import threading
 from pathlib import Path
 from typing import Optional, Dict, List
-from image_quality import compute_crop_quality
 
 import requests
 
@@ -754,6 +753,7 @@ def _run_detection_locked(video_id: int, thumbnail_path: str, force_review: bool
 
     try:
         from PIL import Image
+        from image_quality import compute_crop_quality_batch
 
         img = Image.open(thumbnail_path)
         img_width, img_height = img.size
@@ -806,15 +806,6 @@ def _run_detection_locked(video_id: int, thumbnail_path: str, force_review: bool
                 if confidence < min_conf:
                     continue
 
-                # Compute quality metrics for this crop
-                quality = compute_crop_quality(img, bbox)
-
-                # Check minimum crop size for training candidacy
-                quality_flags = {f: True for f in quality['flags']} if quality['flags'] else {}
-                longest_edge = max(bbox['width'], bbox['height'])
-                if longest_edge < MIN_TRAINING_CROP_SIZE:
-                    quality_flags['below_min_size'] = True
-
                 # Look up tiered classification
                 tier_info = DISPLAY_NAME_TO_TIER.get(class_name, (None, None, None))
                 tier1, tier2, tier3 = tier_info
@@ -829,12 +820,9 @@ def _run_detection_locked(video_id: int, thumbnail_path: str, force_review: bool
                         'class_id': class_id,
                         'vehicle_type': class_name,
                         'yolo_world_prompt': raw_class,
-                        'quality': quality
                     },
                     'bbox': bbox,
                     'inference_time_ms': round(inference_time_ms, 2),
-                    'quality_score': quality['quality_score'],
-                    'quality_flags': quality_flags,
                     'vehicle_tier1': tier1,
                     'vehicle_tier2': tier2,
                     'vehicle_tier3': tier3,
@@ -842,6 +830,18 @@ def _run_detection_locked(video_id: int, thumbnail_path: str, force_review: bool
                     'confidence_tier2': round(confidence, 4) if tier2 else None,
                 })
 
+        # Quality metrics for every vehicle crop in one pass over the frame
+        qualities = compute_crop_quality_batch(img, [p['bbox'] for p in vehicle_predictions])
+        for pred, quality in zip(vehicle_predictions, qualities):
+            # Check minimum crop size for training candidacy
+            quality_flags = {f: True for f in quality['flags']} if quality['flags'] else {}
+            longest_edge = max(pred['bbox']['width'], pred['bbox']['height'])
+            if longest_edge < MIN_TRAINING_CROP_SIZE:
+                quality_flags['below_min_size'] = True
+            pred['tags']['quality'] = quality
+            pred['quality_score'] = quality['quality_score']
+            pred['quality_flags'] = quality_flags
+
         # Suppress overlapping cross-class vehicle detections
         vehicle_predictions = _cross_class_nms(vehicle_predictions, iou_threshold=0.5)
 
@@ -1028,6 +1028,7 @@ def run_video_multiframe_detection(video_id: int, video_path: str, force_review:
     import cv2
     from PIL import Image
     import numpy as np
+    from image_quality import compute_crop_quality_batch
 
     if _has_multiframe_predictions(video_id):
         logger.debug(f"Multi-frame skipped video {video_id}: already processed")
@@ -1102,6 +1103,7 @@ def run_video_multiframe_detection(video_id: int, video_path: str, force_review:
             if result.boxes is None or len(result.boxes) == 0:
                 continue
 
+            frame_detections = []
             for box in result.boxes:
                 x1, y1, x2, y2 = box.xyxy[0].tolist()
                 confidence = float(box.conf[0])
@@ -1142,10 +1144,7 @@ def run_video_multiframe_detection(video_id: int, video_path: str, force_review:
                 if _is_in_exclusion_zone(mf_camera_id, bbox):
                     continue
 
-                # Compute quality metrics for this crop
-                quality = compute_crop_quality(pil_img, bbox)
-
-                all_vehicle_detections.append({
+                frame_detections.append({
                     'prediction_type': 'keyframe',
                     'confidence': round(confidence, 4),
                     'timestamp': round(timestamp, 2),
@@ -1157,14 +1156,19 @@ def run_video_multiframe_detection(video_id: int, video_path: str, force_review:
                         'yolo_world_prompt': raw_class,
                         'source': 'multiframe',
                         'source_frame_time': round(timestamp, 2),
-                        'quality': quality
                     },
                     'bbox': bbox,
                     'inference_time_ms': round(frame_inference_ms, 2),
-                    'quality_score': quality['quality_score'],
-                    'quality_flags': {f: True for f in quality['flags']} if quality['flags'] else {}
                 })
 
+            # Quality metrics for this frame's vehicle crops in one pass
+            qualities = compute_crop_quality_batch(pil_img, [d['bbox'] for d in frame_detections])
+            for det, quality in zip(frame_detections, qualities):
+                det['tags']['quality'] = quality
+                det['quality_score'] = quality['quality_score']
+                det['quality_flags'] = {f: True for f in quality['flags']} if quality['flags'] else {}
+            all_vehicle_detections.extend(frame_detections)
+
         logger.info(
             f"Multi-frame video {video_id}: {frames_processed}/{len(sample_times)} frames processed, "
             f"{len(all_vehicle_detections)} vehicles, {total_person_count} persons "
@@ -1265,6 +1269,3 @@ def trigger_vehicle_detect(video_id: int, thumbnail_path: str, force_review: boo
     thread.start()
     logger.info(f"Pre-screen triggered in background for video {video_id}")
 
-
-# Load exclusion zones on startup
-_load_exclusion_zones()
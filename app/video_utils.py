@@ -1,10 +1,45 @@
 import subprocess
 import os
 import json
+import logging
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import requests
 
+from clip_cache import get_clip_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLIPS_DIR = '/opt/groundtruth-studio/clips'
+
+# decode_frames_at: forward gaps larger than this are crossed with a seek
+# instead of grab()s
+SEEK_GAP_FRAMES = 300
+
+
+def decode_frames_at(cap, frame_numbers: List[int]):
+    """
+    Yield (frame_number, frame_bgr or None) for ascending frame numbers of an
+    open cv2.VideoCapture, decoding front-to-back in one pass: grab() across
+    short gaps, seek across long ones.
+    """
+    import cv2
+    position = None
+    for frame_number in frame_numbers:
+        if position is None or frame_number < position or frame_number - position > SEEK_GAP_FRAMES:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            position = frame_number
+        while position < frame_number and cap.grab():
+            position += 1
+        ret, frame = cap.read()
+        if not ret:
+            position = None
+            yield frame_number, None
+            continue
+        position += 1
+        yield frame_number, frame
+
+
 class VideoProcessor:
     def __init__(self, thumbnail_dir='thumbnails'):
         self.thumbnail_dir = Path(thumbnail_dir)
@@ -146,13 +181,15 @@ class VideoProcessor:
             if output_path:
                 clip_path = Path(output_path)
             else:
-                clips_dir = Path('/opt/groundtruth-studio/clips')
+                clips_dir = Path(DEFAULT_CLIPS_DIR)
                 clips_dir.mkdir(exist_ok=True)
                 clip_name = f"{video_file.stem}_t{int(timestamp*10)}.mp4"
                 clip_path = clips_dir / clip_name
 
             # Return cached clip if it exists
             if clip_path.exists() and clip_path.stat().st_size > 0:
+                if not output_path:
+                    self._index_clip(DEFAULT_CLIPS_DIR, clip_path, hit=True)
                 return {'success': True, 'clip_path': str(clip_path)}
 
             # Use stream copy for speed when possible, re-encode for precision
@@ -179,6 +216,8 @@ class VideoProcessor:
             if not clip_path.exists() or clip_path.stat().st_size == 0:
                 return {'success': False, 'error': 'Clip file was not created'}
 
+            if not output_path:
+                self._index_clip(DEFAULT_CLIPS_DIR, clip_path)
             return {'success': True, 'clip_path': str(clip_path)}
 
         except subprocess.TimeoutExpired:
@@ -188,7 +227,7 @@ class VideoProcessor:
 
     def fetch_frigate_clip(self, frigate_url: str, event_id: str, camera: str,
                            duration: float = 5.0,
-                           clips_dir: str = '/opt/groundtruth-studio/clips') -> Dict:
+                           clips_dir: str = DEFAULT_CLIPS_DIR) -> Dict:
         """
         Fetch a video clip from Frigate's recording API for a specific event.
 
@@ -212,6 +251,7 @@ class VideoProcessor:
 
             # Return cached clip if already fetched
             if clip_path.exists() and clip_path.stat().st_size > 0:
+                self._index_clip(clips_dir, clip_path, hit=True)
                 return {'success': True, 'clip_path': str(clip_path)}
 
             # Fetch event clip from Frigate API
@@ -230,6 +270,7 @@ class VideoProcessor:
                 clip_path.unlink(missing_ok=True)
                 return {'success': False, 'error': 'Frigate returned empty clip'}
 
+            self._index_clip(clips_dir, clip_path)
             return {'success': True, 'clip_path': str(clip_path)}
 
         except requests.Timeout:
@@ -237,69 +278,53 @@ class VideoProcessor:
         except Exception as e:
             return {'success': False, 'error': f'Failed to fetch Frigate clip: {str(e)}'}
 
+    def _index_clip(self, clips_dir, clip_path, hit: bool = False):
+        """Record a new clip (or a cache hit) in the clip cache index."""
+        try:
+            index = get_clip_cache(clips_dir)
+            if hit:
+                index.touch(clip_path)
+            else:
+                index.record(clip_path)
+        except Exception as e:
+            logger.debug(f"Clip index update failed for {clip_path}: {e}")
+
     def cleanup_clips(self, max_age_days: int = 7, max_size_mb: int = 500,
-                      clips_dir: str = '/opt/groundtruth-studio/clips') -> Dict:
+                      clips_dir: str = DEFAULT_CLIPS_DIR, rescan: bool = False) -> Dict:
         """
         Clean up cached video clips based on age and total size.
 
+        Served from the clip cache index: clips unused for max_age_days go
+        first, then least-recently-used clips until under max_size_mb.  The
+        directory is only walked when the index is new or stale, or when
+        rescan is set.
+
         Args:
-            max_age_days: Remove clips older than this many days
+            max_age_days: Remove clips not accessed for this many days
             max_size_mb: Maximum total size of clips directory in MB
+            rescan: Reconcile the index with the directory first
 
         Returns:
             Dict with cleanup stats
         """
         try:
-            clips_path = Path(clips_dir)
-            if not clips_path.exists():
+            if not Path(clips_dir).exists():
                 return {'success': True, 'removed': 0, 'freed_mb': 0}
 
-            import time
-            now = time.time()
-            max_age_secs = max_age_days * 86400
-            max_size_bytes = max_size_mb * 1024 * 1024
-
-            removed = 0
-            freed = 0
-
-            # Phase 1: Remove clips older than max_age_days
-            clips = sorted(clips_path.glob('*.mp4'), key=lambda f: f.stat().st_mtime)
-            for clip in clips:
-                try:
-                    age = now - clip.stat().st_mtime
-                    if age > max_age_secs:
-                        size = clip.stat().st_size
-                        clip.unlink()
-                        removed += 1
-                        freed += size
-                except OSError:
-                    continue
-
-            # Phase 2: If still over max size, remove oldest first
-            remaining = sorted(clips_path.glob('*.mp4'), key=lambda f: f.stat().st_mtime)
-            total_size = sum(f.stat().st_size for f in remaining)
-
-            while total_size > max_size_bytes and remaining:
-                oldest = remaining.pop(0)
-                try:
-                    size = oldest.stat().st_size
-                    oldest.unlink()
-                    removed += 1
-                    freed += size
-                    total_size -= size
-                except OSError:
-                    continue
-
-            return {
-                'success': True,
-                'removed': removed,
-                'freed_mb': round(freed / (1024 * 1024), 1),
-                'remaining_mb': round(total_size / (1024 * 1024), 1),
-                'remaining_count': len(list(clips_path.glob('*.mp4')))
-            }
+            index = get_clip_cache(clips_dir)
+            if rescan or index.needs_rescan():
+                index.rescan()
+            return index.enforce(max_age_days, max_size_mb)
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def clip_stats(self, clips_dir: str = DEFAULT_CLIPS_DIR) -> Dict:
+        """Clip cache count, size and oldest clip age, from the index."""
+        index = get_clip_cache(clips_dir)
+        if index.needs_rescan():
+            index.rescan()
+        return index.stats()
+
     def check_ffmpeg_installed(self) -> bool:
         """
         Check if FFmpeg is installed
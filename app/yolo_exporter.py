@@ -3,18 +3,343 @@ YOLO Training Data Exporter
 Exports annotated video frames in YOLO format for model training
 """
 
+import contextlib
+import fcntl
+import hashlib
 import json
+import os
 import random
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
-import cv2
 from database import VideoDatabase
 from psycopg2 import extras
 from db_connection import get_connection
+from video_utils import decode_frames_at
 import logging
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
+
+# Shared store of extracted frames under export_base_dir, reused across exports
+FRAME_STORE_DIRNAME = '.frame_store'
+MANIFEST_FILENAME = 'export_manifest.json'
+
+# Decoded frames held by all extraction workers together, waiting on the
+# JPEG encoder; split evenly across worker processes
+FRAME_MEMORY_BUDGET_MB = 512
+ENCODE_THREADS = 2
+
+
+def _load_json(path: Path) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write_text(path: Path, text: str):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+@contextlib.contextmanager
+def _store_lock(store_dir: Path):
+    """Exclusive lock on the frame store's index.json (held across processes)."""
+    with open(store_dir / '.lock', 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _store_reuse(path: Path) -> bool:
+    """True if a store entry exists; refreshes its mtime so pruning keeps it."""
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+def _link_into(src: Path, dst: Path) -> bool:
+    """Hardlink src to dst (copying across filesystems). Returns True if dst changed."""
+    if dst.exists():
+        try:
+            if os.path.samefile(src, dst):
+                return False
+        except OSError:
+            pass
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return True
+
+
+def _stable_split(frame_id: str, seed: int, val_split: float) -> str:
+    """Assign a split from a hash of the frame id, independent of dataset size."""
+    digest = hashlib.sha1(f"{seed}:{frame_id}".encode()).digest()
+    return 'val' if int.from_bytes(digest[:4], 'big') / 2**32 < val_split else 'train'
+
+
+def _store_key(video_id: int, kind: str, frame_ref: int, mtime_ns: int) -> str:
+    return hashlib.sha1(f"{video_id}:{kind}:{frame_ref}:{mtime_ns}".encode()).hexdigest()
+
+
+def _still_store_key(video_id: int, kind: str, path) -> Optional[str]:
+    """Store key for a single-image source (uploaded image or thumbnail)."""
+    if not path:
+        return None
+    path = Path(path)
+    if kind == 'img' and path.suffix.lower() not in IMAGE_EXTS:
+        return None
+    try:
+        return _store_key(video_id, kind, 0, path.stat().st_mtime_ns)
+    except OSError:
+        return None
+
+
+def _store_write(store_dir: Path, key: str, frame) -> bool:
+    import cv2
+    path = store_dir / key[:2] / f"{key}.jpg"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # cv2 picks the encoder from the extension, so the temp name keeps .jpg
+    tmp = path.with_name(f".{key}.{os.getpid()}.tmp.jpg")
+    if not cv2.imwrite(str(tmp), frame):
+        return False
+    os.replace(tmp, path)
+    return True
+
+
+def _store_still(store_dir: Path, video_id: int, kind: str, path: Path,
+                 known_dims: Dict) -> Optional[Dict]:
+    key = _still_store_key(video_id, kind, path)
+    if not key:
+        return None
+    if key in known_dims and _store_reuse(store_dir / key[:2] / f"{key}.jpg"):
+        width, height = known_dims[key]
+        return {'store': key, 'width': width, 'height': height, 'hit': True}
+    import cv2
+    frame = cv2.imread(str(path))
+    if frame is None or not _store_write(store_dir, key, frame):
+        return None
+    height, width = frame.shape[:2]
+    return {'store': key, 'width': width, 'height': height, 'hit': False}
+
+
+def _store_video_frames(store_dir: Path, video_id: int, video_path: Path,
+                        timestamps: List[float]) -> Dict:
+    """
+    Store the frames at the given timestamps, decoding the video once in
+    frame order.  Frames already in the store are not decoded again.
+    """
+    import cv2
+    results = {}
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            return results
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        mtime_ns = video_path.stat().st_mtime_ns
+
+        by_frame = {}
+        for ts in timestamps:
+            by_frame.setdefault(int(ts * fps), []).append(ts)
+
+        missing = []
+        for frame_number, stamps in sorted(by_frame.items()):
+            key = _store_key(video_id, 'frame', frame_number, mtime_ns)
+            entry = {'store': key, 'width': width, 'height': height, 'hit': True,
+                     'filename': f"video_{video_id}_frame_{frame_number}.jpg"}
+            if width and height and _store_reuse(store_dir / key[:2] / f"{key}.jpg"):
+                for ts in stamps:
+                    results[ts] = entry
+            else:
+                missing.append((frame_number, entry))
+
+        entries = dict(missing)
+        for frame_number, frame in decode_frames_at(cap, [n for n, _ in missing]):
+            entry = entries[frame_number]
+            if frame is None:
+                continue
+            if not _store_write(store_dir, entry['store'], frame):
+                continue
+            entry = dict(entry, hit=False, height=frame.shape[0], width=frame.shape[1])
+            for ts in by_frame[frame_number]:
+                results[ts] = entry
+    finally:
+        cap.release()
+    return results
+
+
+def _extract_frames_for_video(job: Dict):
+    """
+    Process-pool worker: make sure every requested frame of one video is in
+    the frame store, falling back from image file to video to thumbnail like
+    the full export does.
+
+    Returns:
+        (video_id, {timestamp: {'store', 'filename', 'width', 'height', 'hit'} or None})
+    """
+    video_id = job['video_id']
+    store_dir = Path(job['store_dir'])
+    video_path = Path(job['video_path'])
+    remaining = list(job['timestamps'])
+    results = {}
+
+    # Source 1: Direct image file (uploaded JPG/PNG stored as video entry)
+    if video_path.exists() and video_path.suffix.lower() in IMAGE_EXTS:
+        entry = _store_still(store_dir, video_id, 'img', video_path, job['known_dims'])
+        if entry:
+            for ts in remaining:
+                results[ts] = dict(entry, filename=f"video_{video_id}_img_{int(ts * 1000)}.jpg")
+            remaining = []
+
+    # Source 2: Video file - one sequential pass over the requested frames
+    if remaining and video_path.exists() and not job['is_placeholder']:
+        results.update(_store_video_frames(store_dir, video_id, video_path, remaining))
+        remaining = [ts for ts in remaining if ts not in results]
+
+    # Source 3: Thumbnail
+    thumbnail_path = job.get('thumbnail_path')
+    if remaining and thumbnail_path and Path(thumbnail_path).exists():
+        entry = _store_still(store_dir, video_id, 'thumb', Path(thumbnail_path), job['known_dims'])
+        if entry:
+            for ts in remaining:
+                results[ts] = dict(entry, filename=f"video_{video_id}_thumb_{int(ts * 1000)}.jpg")
+            remaining = []
+
+    for ts in remaining:
+        results[ts] = None
+    return video_id, results
+
+
+
+class _BoundedEncoder:
+    """Thread pool for cv2.imwrite that blocks the decoder once max_pending
+    frames are waiting, so decoded frames never pile up in memory.
+
+    Paths whose write failed are removed and collected in self.failed.
+    """
+
+    def __init__(self, max_pending: int):
+        self._pool = ThreadPoolExecutor(max_workers=ENCODE_THREADS)
+        self._pending = []
+        self._max_pending = max(1, max_pending)
+        self.failed = set()
+
+    def _finish(self, path: Path, future):
+        try:
+            ok = future.result()
+        except Exception as e:
+            logger.warning("Failed to write %s: %s", path, e)
+            ok = False
+        if not ok:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            self.failed.add(path)
+
+    def write(self, path: Path, frame):
+        import cv2
+        while len(self._pending) >= self._max_pending:
+            self._finish(*self._pending.pop(0))
+        self._pending.append((path, self._pool.submit(cv2.imwrite, str(path), frame)))
+
+    def close(self):
+        for path, future in self._pending:
+            self._finish(path, future)
+        self._pending = []
+        self._pool.shutdown()
+
+
+def _export_frames_for_video(job: Dict):
+    """
+    Process-pool worker for full exports: write every requested frame of one
+    video into its split's images directory, decoding the video once
+    front-to-back and releasing it before returning.  Falls back from image
+    file to video to thumbnail per frame.
+
+    Returns:
+        (video_id, {timestamp: (filename, width, height) or None})
+    """
+    import cv2
+    video_id = job['video_id']
+    export_dir = Path(job['export_dir'])
+    video_path = Path(job['video_path'])
+    frames = job['frames']  # [(timestamp, split)]
+    remaining = [ts for ts, _ in frames]
+    split_of = dict(frames)
+    results = {}
+    encoder = _BoundedEncoder(job['max_pending'])
+
+    def write_still(path: Path, kind: str):
+        nonlocal remaining
+        frame = cv2.imread(str(path))
+        if frame is None:
+            return
+        height, width = frame.shape[:2]
+        for ts in remaining:
+            filename = f"video_{video_id}_{kind}_{int(ts * 1000)}.jpg"
+            encoder.write(export_dir / split_of[ts] / 'images' / filename, frame)
+            results[ts] = (filename, width, height)
+        remaining = []
+
+    try:
+        # Source 1: Direct image file (uploaded JPG/PNG stored as video entry)
+        if video_path.exists() and video_path.suffix.lower() in IMAGE_EXTS:
+            write_still(video_path, 'img')
+
+        # Source 2: Video file - one sequential pass over the requested frames
+        if remaining and video_path.exists() and not job['is_placeholder']:
+            cap = cv2.VideoCapture(str(video_path))
+            try:
+                if cap.isOpened():
+                    fps = cap.get(cv2.CAP_PROP_FPS)
+                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                    by_frame = {}
+                    for ts in remaining:
+                        by_frame.setdefault(int(ts * fps), []).append(ts)
+                    for frame_number, frame in decode_frames_at(cap, sorted(by_frame)):
+                        if frame is None:
+                            continue
+                        filename = f"video_{video_id}_frame_{frame_number}.jpg"
+                        for split in {split_of[ts] for ts in by_frame[frame_number]}:
+                            encoder.write(export_dir / split / 'images' / filename, frame)
+                        for ts in by_frame[frame_number]:
+                            results[ts] = (filename, width, height)
+            finally:
+                cap.release()
+            remaining = [ts for ts in remaining if ts not in results]
+
+        # Source 3: Thumbnail
+        thumbnail_path = job.get('thumbnail_path')
+        if remaining and thumbnail_path and Path(thumbnail_path).exists():
+            write_still(Path(thumbnail_path), 'thumb')
+    finally:
+        encoder.close()
+
+    # A frame whose image failed to encode gets no label either
+    for ts, entry in results.items():
+        if entry and export_dir / split_of[ts] / 'images' / entry[0] in encoder.failed:
+            results[ts] = None
+    for ts in remaining:
+        results[ts] = None
+    return video_id, results
+
 
 class YOLOExporter:
     def __init__(self, db: VideoDatabase, videos_dir: Path, export_base_dir: Path):
@@ -243,57 +568,48 @@ class YOLOExporter:
             logger.warning("EcoEye upgrade: failed for event %s", event_id, exc_info=True)
             return None
 
-    def export_dataset(self, config_id: int, output_name: Optional[str] = None,
-                       val_split: float = 0.2, seed: int = 42) -> Dict:
+    def _upgrade_placeholder_once(self, video: dict, upgraded_videos: Dict[int, dict]):
         """
-        Export complete YOLO dataset for a configuration
-
-        Args:
-            config_id: Export configuration ID
-            output_name: Optional custom output directory name
+        Resolve the on-disk path for a video, upgrading EcoEye placeholders at
+        most once per export.
 
         Returns:
-            Dict with export statistics and paths
+            (video, video_path, upgraded) where upgraded is True only on the
+            call that performed the upgrade.
         """
-        with get_connection() as conn:
-            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
-
-            # Get configuration
-            cursor.execute('SELECT * FROM yolo_export_configs WHERE id = %s', (config_id,))
-            config_row = cursor.fetchone()
-            if not config_row:
-                raise ValueError(f"Export configuration {config_id} not found")
+        video_id = video['id']
+        video_path = self.videos_dir / video['filename']
+        if not video['filename'].endswith('.placeholder'):
+            return video, video_path, False
+        if video_id in upgraded_videos:
+            # Already upgraded in a previous frame iteration
+            video = upgraded_videos[video_id]
+            return video, self.videos_dir / video['filename'], False
 
-            config = dict(config_row)
-            config['class_mapping'] = json.loads(config['class_mapping'])
+        upgraded_path = self._try_upgrade_placeholder(video)
+        if not upgraded_path:
+            return video, video_path, False
 
-        # Create export directory
-        if output_name:
-            export_dir = self.export_base_dir / output_name
-        else:
-            export_dir = self.export_base_dir / f"{config['config_name']}_{config_id}"
-
-        # Clean and recreate export directory
-        if export_dir.exists():
-            shutil.rmtree(export_dir)
-        export_dir.mkdir(parents=True, exist_ok=True)
-        for split in ('train', 'val'):
-            (export_dir / split / 'images').mkdir(parents=True, exist_ok=True)
-            (export_dir / split / 'labels').mkdir(parents=True, exist_ok=True)
+        # Re-fetch video record with updated filename/thumbnail
+        with get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            cursor.execute('SELECT * FROM videos WHERE id = %s', (video_id,))
+            video = dict(cursor.fetchone())
+        upgraded_videos[video_id] = video
+        return video, upgraded_path, True
 
-        # Get videos to export
-        video_ids = self.get_filtered_videos(config_id)
+    def _collect_frame_groups(self, config: Dict, video_ids: List[int]) -> Dict:
+        """
+        Collect annotations grouped by frame (video_id + timestamp).
 
-        total_frames = 0
-        total_annotations = 0
-        train_count = 0
-        val_count = 0
-        negative_frame_count = 0
-        upgraded_count = 0
+        Each unique frame gets one image file with all its bboxes in one label
+        file.
 
-        # Collect annotations grouped by frame (video_id + timestamp)
-        # Each unique frame gets one image file with all its bboxes in one label file
-        frame_groups = {}  # key: (video_id, timestamp) -> {video: dict, positive: [list], negative: [list]}
+        Returns:
+            Dict with 'frame_groups' ((video_id, timestamp) -> {video, positive,
+            negative}), 'quality_scores' and 'quality_filtered_count'.
+        """
+        frame_groups = {}
 
         # Get min_quality_score from config (default 0.0 = no filtering)
         min_quality_score = config.get('min_quality_score', 0.0) or 0.0
@@ -362,111 +678,80 @@ class YOLOExporter:
                     else:
                         frame_groups[key]['positive'].append(ann)
 
-        # Shuffle frames and split into train/val
-        all_frames = list(frame_groups.items())
-        rng = random.Random(seed)
-        rng.shuffle(all_frames)
-        val_size = max(1, int(len(all_frames) * val_split)) if all_frames else 0
-        val_set = set(range(val_size))
+        return {
+            'frame_groups': frame_groups,
+            'quality_scores': quality_scores,
+            'quality_filtered_count': quality_filtered_count,
+        }
 
-        # Process each frame
-        image_exts = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
-        open_caps = {}
-        upgraded_videos = {}  # video_id -> refreshed video dict (avoid duplicate upgrades)
-        for idx, ((video_id, timestamp), group) in enumerate(all_frames):
-            split = 'val' if idx in val_set else 'train'
-            images_dir = export_dir / split / 'images'
-            labels_dir = export_dir / split / 'labels'
-
-            video = group['video']
-            video_path = self.videos_dir / video['filename']
-            # Try to upgrade EcoEye placeholder to full video
-            if video['filename'].endswith('.placeholder'):
-                if video_id in upgraded_videos:
-                    # Already upgraded in a previous frame iteration
-                    video = upgraded_videos[video_id]
-                    video_path = self.videos_dir / video['filename']
-                else:
-                    upgraded_path = self._try_upgrade_placeholder(video)
-                    if upgraded_path:
-                        video_path = upgraded_path
-                        # Re-fetch video record with updated filename/thumbnail
-                        with get_connection() as conn2:
-                            up_cursor = conn2.cursor(cursor_factory=extras.RealDictCursor)
-                            up_cursor.execute('SELECT * FROM videos WHERE id = %s', (video_id,))
-                            video = dict(up_cursor.fetchone())
-                        upgraded_videos[video_id] = video
-                        upgraded_count += 1
-            thumbnail_path = Path(video['thumbnail_path']) if video.get('thumbnail_path') else None
-            frame = None
-            img_width = None
-            img_height = None
-            frame_filename = None
-
-            # Source 1: Direct image file (uploaded JPG/PNG stored as video entry)
-            if video_path.exists() and video_path.suffix.lower() in image_exts:
-                frame = cv2.imread(str(video_path))
-                if frame is not None:
-                    img_height, img_width = frame.shape[:2]
-                    frame_filename = f"video_{video_id}_img_{int(timestamp * 1000)}.jpg"
-
-            # Source 2: Video file - extract frame at timestamp
-            if frame is None and video_path.exists() and not video['filename'].endswith('.placeholder'):
-                if video_id not in open_caps:
-                    cap = cv2.VideoCapture(str(video_path))
-                    open_caps[video_id] = {
-                        'cap': cap,
-                        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-                        'fps': cap.get(cv2.CAP_PROP_FPS),
-                    }
-                vc = open_caps[video_id]
-                frame_number = int(timestamp * vc['fps'])
-                vc['cap'].set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-                ret, frame = vc['cap'].read()
-                if ret:
-                    img_width = vc['width']
-                    img_height = vc['height']
-                    frame_filename = f"video_{video_id}_frame_{frame_number}.jpg"
-                else:
-                    frame = None
-
-            # Source 3: Thumbnail
-            if frame is None and thumbnail_path and thumbnail_path.exists():
-                frame = cv2.imread(str(thumbnail_path))
-                if frame is not None:
-                    img_height, img_width = frame.shape[:2]
-                    frame_filename = f"video_{video_id}_thumb_{int(timestamp * 1000)}.jpg"
+    @staticmethod
+    def _format_labels(positive_anns: List[Dict], class_mapping: Dict[str, int],
+                       img_width: int, img_height: int) -> str:
+        """Render YOLO label lines for a frame's positive annotations."""
+        lines = []
+        for ann in positive_anns:
+            class_id = class_mapping[ann['activity_tag']]
+            x_center = (ann['bbox_x'] + ann['bbox_width'] / 2) / img_width
+            y_center = (ann['bbox_y'] + ann['bbox_height'] / 2) / img_height
+            w_norm = ann['bbox_width'] / img_width
+            h_norm = ann['bbox_height'] / img_height
+            lines.append(f"{class_id} {x_center:.6f} {y_center:.6f} {w_norm:.6f} {h_norm:.6f}\n")
+        return ''.join(lines)
 
-            if frame is None:
-                print(f"Warning: No usable image source for video {video_id}")
-                continue
+    def export_dataset(self, config_id: int, output_name: Optional[str] = None,
+                       val_split: float = 0.2, seed: int = 42,
+                       incremental: bool = False, workers: Optional[int] = None) -> Dict:
+        """
+        Export complete YOLO dataset for a configuration
 
-            cv2.imwrite(str(images_dir / frame_filename), frame)
+        Args:
+            config_id: Export configuration ID
+            output_name: Optional custom output directory name
+            incremental: Reuse frames from the shared content-addressed frame
+                store and only rewrite what changed since the last export
+                (see _write_frames_incremental)
+            workers: Frame extraction processes (one video per process)
 
-            # Write label file: positive bboxes only; empty file for negative-only frames
-            label_filename = frame_filename.replace('.jpg', '.txt')
-            positive_anns = group['positive']
-            with open(labels_dir / label_filename, 'w') as f:
-                for ann in positive_anns:
-                    class_id = config['class_mapping'][ann['activity_tag']]
-                    x_center = (ann['bbox_x'] + ann['bbox_width'] / 2) / img_width
-                    y_center = (ann['bbox_y'] + ann['bbox_height'] / 2) / img_height
-                    w_norm = ann['bbox_width'] / img_width
-                    h_norm = ann['bbox_height'] / img_height
-                    f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {w_norm:.6f} {h_norm:.6f}\n")
-                    total_annotations += 1
-            if not positive_anns:
-                negative_frame_count += 1
+        Returns:
+            Dict with export statistics and paths
+        """
+        with get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
 
-            total_frames += 1
-            if split == 'val':
-                val_count += 1
-            else:
-                train_count += 1
+            # Get configuration
+            cursor.execute('SELECT * FROM yolo_export_configs WHERE id = %s', (config_id,))
+            config_row = cursor.fetchone()
+            if not config_row:
+                raise ValueError(f"Export configuration {config_id} not found")
+
+            config = dict(config_row)
+            config['class_mapping'] = json.loads(config['class_mapping'])
+
+        # Create export directory
+        if output_name:
+            export_dir = self.export_base_dir / output_name
+        else:
+            export_dir = self.export_base_dir / f"{config['config_name']}_{config_id}"
+
+        # Get videos to export
+        video_ids = self.get_filtered_videos(config_id)
+        collected = self._collect_frame_groups(config, video_ids)
+        frame_groups = collected['frame_groups']
+        quality_scores = collected['quality_scores']
+        min_quality_score = config.get('min_quality_score', 0.0) or 0.0
+
+        if incremental:
+            frame_stats = self._write_frames_incremental(
+                config_id, config, export_dir, frame_groups, val_split, seed, workers)
+        else:
+            frame_stats = self._write_frames(config, export_dir, frame_groups, val_split, seed, workers)
 
-        for vc in open_caps.values():
-            vc['cap'].release()
+        total_frames = frame_stats['frame_count']
+        total_annotations = frame_stats['annotation_count']
+        train_count = frame_stats['train_count']
+        val_count = frame_stats['val_count']
+        negative_frame_count = frame_stats['negative_frame_count']
+        upgraded_count = frame_stats['upgraded_count']
 
         # Create data.yaml for YOLO
         yaml_content = f"""# YOLO Dataset Configuration
@@ -587,11 +872,322 @@ python train.py --data {yaml_path.absolute()} --weights yolov5s.pt --epochs 100
             'negative_frame_count': negative_frame_count,
             'upgraded_count': upgraded_count,
             'class_mapping': config['class_mapping'],
-            'quality_filtered_count': quality_filtered_count,
+            'quality_filtered_count': collected['quality_filtered_count'],
             'quality_score_distribution': quality_distribution,
-            'min_quality_score': min_quality_score
+            'min_quality_score': min_quality_score,
+            'delta': frame_stats.get('delta'),
         }
 
+    def _write_frames(self, config: Dict, export_dir: Path, frame_groups: Dict,
+                      val_split: float, seed: int, workers: Optional[int] = None) -> Dict:
+        """
+        Write every frame and label from scratch into a clean export directory.
+
+        Frames are grouped by video and extracted by _export_frames_for_video
+        in a process pool, so each video is opened once, decoded front-to-back
+        and released; labels are written here once frame sizes are known.
+        """
+        # Clean and recreate export directory
+        if export_dir.exists():
+            shutil.rmtree(export_dir)
+        export_dir.mkdir(parents=True, exist_ok=True)
+        for split in ('train', 'val'):
+            (export_dir / split / 'images').mkdir(parents=True, exist_ok=True)
+            (export_dir / split / 'labels').mkdir(parents=True, exist_ok=True)
+
+        total_frames = 0
+        total_annotations = 0
+        train_count = 0
+        val_count = 0
+        negative_frame_count = 0
+        upgraded_count = 0
+
+        # Shuffle frames and split into train/val
+        all_frames = list(frame_groups.items())
+        rng = random.Random(seed)
+        rng.shuffle(all_frames)
+        val_size = max(1, int(len(all_frames) * val_split)) if all_frames else 0
+        splits = {key: ('val' if idx < val_size else 'train')
+                  for idx, (key, _group) in enumerate(all_frames)}
+
+        # Group requests per video (placeholder upgrades need the DB, so they stay here)
+        max_workers = workers or min(4, os.cpu_count() or 1)
+        upgraded_videos = {}  # video_id -> refreshed video dict (avoid duplicate upgrades)
+        jobs = {}
+        for (video_id, timestamp), group in frame_groups.items():
+            if video_id not in jobs:
+                video, video_path, upgraded = self._upgrade_placeholder_once(group['video'], upgraded_videos)
+                if upgraded:
+                    upgraded_count += 1
+                width = video.get('width') or 1920
+                height = video.get('height') or 1080
+                frame_mb = width * height * 3 / (1024 * 1024)
+                jobs[video_id] = {
+                    'video_id': video_id,
+                    'video_path': str(video_path),
+                    'is_placeholder': video['filename'].endswith('.placeholder'),
+                    'thumbnail_path': video.get('thumbnail_path'),
+                    'export_dir': str(export_dir),
+                    'frames': [],
+                    'max_pending': int(FRAME_MEMORY_BUDGET_MB / max_workers / frame_mb),
+                }
+            jobs[video_id]['frames'].append((timestamp, splits[(video_id, timestamp)]))
+        for job in jobs.values():
+            job['frames'].sort()
+
+        extracted = {}
+        job_list = list(jobs.values())
+        if max_workers > 1 and len(job_list) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for video_id, results in pool.map(_export_frames_for_video, job_list):
+                    extracted[video_id] = results
+        else:
+            for job in job_list:
+                video_id, results = _export_frames_for_video(job)
+                extracted[video_id] = results
+
+        for (video_id, timestamp), group in all_frames:
+            entry = extracted.get(video_id, {}).get(timestamp)
+            if entry is None:
+                print(f"Warning: No usable image source for video {video_id}")
+                continue
+            frame_filename, img_width, img_height = entry
+            split = splits[(video_id, timestamp)]
+
+            # Write label file: positive bboxes only; empty file for negative-only frames
+            label_filename = frame_filename.replace('.jpg', '.txt')
+            positive_anns = group['positive']
+            with open(export_dir / split / 'labels' / label_filename, 'w') as f:
+                f.write(self._format_labels(positive_anns, config['class_mapping'], img_width, img_height))
+            total_annotations += len(positive_anns)
+            if not positive_anns:
+                negative_frame_count += 1
+
+            total_frames += 1
+            if split == 'val':
+                val_count += 1
+            else:
+                train_count += 1
+
+        return {
+            'frame_count': total_frames,
+            'annotation_count': total_annotations,
+            'train_count': train_count,
+            'val_count': val_count,
+            'negative_frame_count': negative_frame_count,
+            'upgraded_count': upgraded_count,
+        }
+
+    def _write_frames_incremental(self, config_id: int, config: Dict, export_dir: Path,
+                                  frame_groups: Dict, val_split: float, seed: int,
+                                  workers: Optional[int] = None) -> Dict:
+        """
+        Materialize an export from the content-addressed frame store.
+
+        Frame images are extracted once into export_base_dir/.frame_store,
+        keyed by (video_id, frame number, source mtime), and hardlinked into
+        the train/val splits.  An export manifest records what each split file
+        was built from, so the next export only extracts new frames, rewrites
+        changed label files and removes frames that dropped out.  Frames keep
+        the split they were first assigned to; new frames get a split from a
+        stable hash so earlier assignments don't reshuffle.
+        """
+        started = time.monotonic()
+        store_dir = self.export_base_dir / FRAME_STORE_DIRNAME
+        store_dir.mkdir(parents=True, exist_ok=True)
+        store_index_path = store_dir / 'index.json'
+        store_index = _load_json(store_index_path) or {}
+
+        manifest_path = export_dir / MANIFEST_FILENAME
+        local_manifest = _load_json(manifest_path)
+        if local_manifest is None and export_dir.exists():
+            # Legacy full export without a manifest -- start over
+            shutil.rmtree(export_dir)
+        config_manifest_path = store_dir / 'manifests' / f'config_{config_id}.json'
+        previous = local_manifest or _load_json(config_manifest_path) or {}
+        prev_frames = previous.get('frames', {})
+        local_frames = (local_manifest or {}).get('frames', {})
+
+        for split in ('train', 'val'):
+            (export_dir / split / 'images').mkdir(parents=True, exist_ok=True)
+            (export_dir / split / 'labels').mkdir(parents=True, exist_ok=True)
+
+        # Resolve sources (placeholder upgrades need the DB, so they stay here)
+        upgraded_count = 0
+        upgraded_videos = {}
+        jobs = {}
+        for (video_id, timestamp), group in frame_groups.items():
+            if video_id not in jobs:
+                video, video_path, upgraded = self._upgrade_placeholder_once(group['video'], upgraded_videos)
+                if upgraded:
+                    upgraded_count += 1
+                thumbnail_path = video.get('thumbnail_path')
+                jobs[video_id] = {
+                    'video_id': video_id,
+                    'video_path': str(video_path),
+                    'is_placeholder': video['filename'].endswith('.placeholder'),
+                    'thumbnail_path': thumbnail_path,
+                    'store_dir': str(store_dir),
+                    'timestamps': [],
+                    'known_dims': {},
+                }
+                # Stills are keyed by path mtime, so their dimensions can be
+                # looked up here and spared a decode in the worker
+                for kind, path in (('img', video_path), ('thumb', thumbnail_path)):
+                    key = _still_store_key(video_id, kind, path)
+                    if key and key in store_index:
+                        jobs[video_id]['known_dims'][key] = store_index[key]
+            jobs[video_id]['timestamps'].append(timestamp)
+
+        # Extract frames: one job per video, decoded front-to-back in a worker process
+        extracted = {}
+        max_workers = workers or min(4, os.cpu_count() or 1)
+        job_list = list(jobs.values())
+        if max_workers > 1 and len(job_list) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for video_id, results in pool.map(_extract_frames_for_video, job_list):
+                    extracted[video_id] = results
+        else:
+            for job in job_list:
+                video_id, results = _extract_frames_for_video(job)
+                extracted[video_id] = results
+
+        extracted_keys = set()
+        index_updates = {}
+        for results in extracted.values():
+            for entry in results.values():
+                if entry is None:
+                    continue
+                index_updates[entry['store']] = [entry['width'], entry['height']]
+                if not entry['hit']:
+                    extracted_keys.add(entry['store'])
+
+        total_annotations = 0
+        train_count = 0
+        val_count = 0
+        negative_frame_count = 0
+        frames_added = 0
+        labels_written = 0
+        new_frames = {}
+        for (video_id, timestamp), group in sorted(frame_groups.items(), key=lambda kv: kv[0]):
+            entry = extracted.get(video_id, {}).get(timestamp)
+            if entry is None:
+                print(f"Warning: No usable image source for video {video_id}")
+                continue
+
+            frame_id = f"{video_id}:{int(round(timestamp * 1000))}"
+            prev = prev_frames.get(frame_id)
+            split = prev['split'] if prev else _stable_split(frame_id, seed, val_split)
+            image_rel = f"{split}/images/{entry['filename']}"
+            label_rel = f"{split}/labels/{entry['filename'].replace('.jpg', '.txt')}"
+
+            store_path = store_dir / entry['store'][:2] / f"{entry['store']}.jpg"
+            if _link_into(store_path, export_dir / image_rel):
+                frames_added += 1
+
+            positive_anns = group['positive']
+            label_text = self._format_labels(
+                positive_anns, config['class_mapping'], entry['width'], entry['height'])
+            label_sha = hashlib.sha1(label_text.encode()).hexdigest()
+            local = local_frames.get(frame_id)
+            label_path = export_dir / label_rel
+            if not (local and local.get('label') == label_rel
+                    and local.get('label_sha') == label_sha and label_path.exists()):
+                _atomic_write_text(label_path, label_text)
+                labels_written += 1
+
+            new_frames[frame_id] = {
+                'split': split,
+                'image': image_rel,
+                'label': label_rel,
+                'store': entry['store'],
+                'label_sha': label_sha,
+            }
+            total_annotations += len(positive_anns)
+            if not positive_anns:
+                negative_frame_count += 1
+            if split == 'val':
+                val_count += 1
+            else:
+                train_count += 1
+
+        # Drop split files that no longer belong to the export
+        keep = {p for f in new_frames.values() for p in (f['image'], f['label'])}
+        frames_removed = 0
+        for frame_id, old in local_frames.items():
+            if frame_id not in new_frames:
+                frames_removed += 1
+            for rel in (old.get('image'), old.get('label')):
+                if rel and rel not in keep:
+                    (export_dir / rel).unlink(missing_ok=True)
+
+        manifest = {
+            'version': 1,
+            'config_id': config_id,
+            'generated_at': datetime.now().isoformat(),
+            'frames': new_frames,
+        }
+        _atomic_write_text(manifest_path, json.dumps(manifest))
+        config_manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write_text(config_manifest_path, json.dumps(manifest))
+        # Re-read under the lock so concurrent exports don't drop each other's entries
+        with _store_lock(store_dir):
+            store_index = _load_json(store_index_path) or {}
+            store_index.update(index_updates)
+            _atomic_write_text(store_index_path, json.dumps(store_index))
+
+        delta = {
+            'frames_added': frames_added,
+            'frames_removed': frames_removed,
+            'frames_unchanged': len(new_frames) - frames_added,
+            'frames_extracted': len(extracted_keys),
+            'labels_written': labels_written,
+            'elapsed_seconds': round(time.monotonic() - started, 3),
+        }
+        logger.info("Incremental YOLO export %s: %s", export_dir.name, delta)
+
+        return {
+            'frame_count': len(new_frames),
+            'annotation_count': total_annotations,
+            'train_count': train_count,
+            'val_count': val_count,
+            'negative_frame_count': negative_frame_count,
+            'upgraded_count': upgraded_count,
+            'delta': delta,
+        }
+
+    def prune_frame_store(self, max_age_days: int = 30) -> int:
+        """
+        Delete frame store entries that no export links to any more.
+
+        An entry is unreferenced when its link count has dropped back to one
+        (only the store itself holds it).  Entries written or reused within
+        max_age_days are kept so a re-export can still reuse them.
+
+        Returns:
+            Number of files removed
+        """
+        store_dir = self.export_base_dir / FRAME_STORE_DIRNAME
+        if not store_dir.exists():
+            return 0
+        cutoff = time.time() - max_age_days * 86400
+        store_index_path = store_dir / 'index.json'
+        removed = 0
+        with _store_lock(store_dir):
+            store_index = _load_json(store_index_path) or {}
+            for path in store_dir.glob('??/*.jpg'):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                if st.st_nlink <= 1 and st.st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+                    store_index.pop(path.stem, None)
+                    removed += 1
+            if removed:
+                _atomic_write_text(store_index_path, json.dumps(store_index))
+        return removed
+
     def get_export_preview(self, config_id: int) -> Dict:
         """
         Preview what would be exported without actually exporting
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Check and benchmark batched crop-quality scoring against the per-crop path.
+
+Builds a synthetic frame (blurred noise with a few sharp patches so crops
+span the usable/blurry thresholds), scores a set of random bboxes -- some
+clipped by the frame edge, some below the minimum size -- with
+compute_crop_quality one at a time and with compute_crop_quality_batch,
+and requires identical dicts for both ndarray (BGR) and PIL input with
+each batch strategy (grayscale slices and whole-frame integral images)
+forced in turn.  Then times both paths at several crops-per-frame counts
+on the PIL input the detection runners pass in.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/benchmark_crop_quality.py
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import image_quality
+from image_quality import compute_crop_quality, compute_crop_quality_batch
+
+
+def build_frame(width, height, rng):
+    frame = (rng.random((height, width, 3)) * 255).astype(np.uint8)
+    frame = cv2.GaussianBlur(frame, (0, 0), 4)
+    for _ in range(12):
+        x, y = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 200))
+        frame[y:y + 200, x:x + 200] = (rng.random((200, 200, 3)) * 255).astype(np.uint8)
+    return frame
+
+
+def random_bboxes(n, width, height, rng):
+    bboxes = []
+    for _ in range(n):
+        w, h = int(rng.integers(2, 400)), int(rng.integers(2, 400))
+        bboxes.append({'x': int(rng.integers(-20, width)), 'y': int(rng.integers(-20, height)),
+                       'width': w, 'height': h})
+    return bboxes
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--crops', type=int, default=500, help='bboxes for the parity check')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    frame_bgr = build_frame(args.width, args.height, rng)
+    frame_pil = Image.fromarray(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
+    bboxes = random_bboxes(args.crops, args.width, args.height, rng)
+
+    ok = True
+    default_coverage = image_quality.BATCH_INTEGRAL_MIN_COVERAGE
+    for path, coverage in (('slices', float('inf')), ('integral', 0.0)):
+        # Force one strategy regardless of how much of the frame the crops cover
+        image_quality.BATCH_INTEGRAL_MIN_COVERAGE = coverage
+        for label, frame in (('ndarray', frame_bgr), ('PIL', frame_pil)):
+            single = [compute_crop_quality(frame, b) for b in bboxes]
+            batch = compute_crop_quality_batch(frame, bboxes)
+            mismatches = sum(1 for a, b in zip(single, batch) if a != b)
+            usable = sum(1 for q in batch if q['usable'])
+            print(f"parity {path:<8} {label:<8} {len(bboxes)} crops ({usable} usable): "
+                  f"{'ok' if mismatches == 0 else f'{mismatches} MISMATCHES'}")
+            ok = ok and mismatches == 0 and len(batch) == len(single)
+    image_quality.BATCH_INTEGRAL_MIN_COVERAGE = default_coverage
+
+    print(f"\n{'crops':>6} {'per-crop ms':>12} {'batch ms':>10} {'speedup':>8}")
+    for n in (1, 5, 20, 50, 100):
+        subset = bboxes[:n]
+        single_ms = timed(lambda: [compute_crop_quality(frame_pil, b) for b in subset], args.repeat)
+        batch_ms = timed(lambda: compute_crop_quality_batch(frame_pil, subset), args.repeat)
+        print(f"{n:>6} {single_ms:12.2f} {batch_ms:10.2f} {single_ms / batch_ms:7.1f}x")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
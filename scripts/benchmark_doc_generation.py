@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark pooled synthetic document generation on a small sample template.
+
+Builds a sample template (noise background with printed text, same
+template.json layout the annotator writes) in a temp directory -- or uses
+--template-dir -- and runs doc_generation jobs with the same seed on one
+worker and on --workers workers, writing to temp output and YOLO dirs.
+Reports images/s for each, and checks that:
+
+  - both runs produced byte-identical images, sidecars and labels
+  - no temp files were left behind
+  - the persisted job record reads back as completed with every image counted
+
+Requires the doc_synthesizer module from the synthesizer directory.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/benchmark_doc_generation.py --count 40
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import doc_generation
+
+DEFAULT_SYNTH_DIR = "/mnt/storage/training-material/documents/synthesizer"
+
+# Mid-range augmentation settings (fractions, as start_generation passes them)
+OPTIONS = {
+    'scene_pct': 0.3, 'max_perspective': 0.08, 'max_rotation': 3,
+    'photocopy_pct': 0.3, 'oversaturated_pct': 0.3,
+    'washout_min': 0.2, 'washout_max': 0.7, 'oversat_min': 0.2, 'oversat_max': 0.7,
+    'overlay_pct': 0.2, 'overlay_opacity_min': 0.3, 'overlay_opacity_max': 0.7,
+}
+
+
+def build_sample_template(root: Path) -> Path:
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    tpl_dir = root / 'sample_template'
+    (tpl_dir / 'overlays').mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    img = Image.fromarray((rng.random((640, 1010, 3)) * 60 + 180).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(('SAMPLE CREDENTIAL', 'NAME  DOE, JANE', 'NO. 000-000-000')):
+        draw.text((40, 40 + i * 60), line, fill=(20, 20, 60))
+    img.save(tpl_dir / 'background.png')
+    tpl = {
+        'id': 'sample_template', 'name': 'Sample template', 'class_id': 4,
+        'class_name': 'id_card_generic', 'background_image': 'background.png',
+        'dimensions': {'width': img.width, 'height': img.height},
+        'created': '', 'modified': '', 'regions': [],
+    }
+    with open(tpl_dir / 'template.json', 'w') as f:
+        json.dump(tpl, f, indent=2)
+    return tpl_dir
+
+
+def digest_tree(root: Path, prefix_len: int):
+    """{relative path with the job-specific name prefix stripped: sha1}."""
+    digests = {}
+    for path in sorted(root.rglob('*')):
+        if path.is_file():
+            rel = str(path.relative_to(root))
+            name = path.name[prefix_len:] if path.name.startswith('tpl_') else path.name
+            digests[os.path.join(os.path.dirname(rel), name)] = hashlib.sha1(path.read_bytes()).hexdigest()
+    return digests
+
+
+def run(tpl, tpl_dir, synth_dir, root, label, count, workers, seed):
+    out = root / label / 'output'
+    yolo = root / label / 'yolo'
+    job = doc_generation.create_job(tpl['id'], tpl_dir, count, OPTIONS, out, seed=seed, workers=workers)
+    job = doc_generation.run_job(job, tpl, tpl_dir, synth_dir, yolo_dir=yolo)
+    elapsed = job['finished_at'] - job['started_at']
+    print(f"{label:<10} {job['workers']} workers: {job['completed']}/{job['total']} images, "
+          f"{job['errors']} errors, {job['files_written']} files in {elapsed:6.2f}s "
+          f"({job['completed'] / max(elapsed, 1e-9):.1f} images/s)")
+    return job, root / label
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=doc_generation.GENERATION_WORKERS)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--synth-dir', default=DEFAULT_SYNTH_DIR)
+    parser.add_argument('--template-dir', help='use an existing template instead of the sample')
+    args = parser.parse_args()
+
+    synth_dir = Path(args.synth_dir)
+    sys.path.insert(0, str(synth_dir))
+    if importlib.util.find_spec('doc_synthesizer') is None:
+        print(f"doc_synthesizer not found in {synth_dir}")
+        sys.exit(2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        if args.template_dir:
+            # Copy so the job records land in the temp dir, not the real template
+            tpl_dir = root / 'template'
+            shutil.copytree(args.template_dir, tpl_dir,
+                            ignore=shutil.ignore_patterns(doc_generation.JOBS_DIRNAME))
+        else:
+            tpl_dir = build_sample_template(root)
+        with open(tpl_dir / 'template.json') as f:
+            tpl = json.load(f)
+
+        serial, serial_dir = run(tpl, tpl_dir, synth_dir, root, 'serial', args.count, 1, args.seed)
+        pooled, pooled_dir = run(tpl, tpl_dir, synth_dir, root, 'pooled', args.count, args.workers, args.seed)
+
+        problems = []
+        prefix_len = len(f"tpl_{tpl['class_name']}_{tpl['id']}_") + 13  # + ms timestamp
+        a, b = digest_tree(serial_dir, prefix_len), digest_tree(pooled_dir, prefix_len)
+        if a != b:
+            differing = sum(1 for k in set(a) | set(b) if a.get(k) != b.get(k))
+            problems.append(f"{differing} files differ between serial and pooled runs")
+        leftovers = [p for p in root.rglob('.*.tmp')]
+        if leftovers:
+            problems.append(f"{len(leftovers)} temp files left behind")
+        for job in (serial, pooled):
+            stored = doc_generation.load_job(tpl_dir, job['job_id'])
+            if not stored or stored['status'] != 'completed' or stored['completed'] != args.count:
+                problems.append(f"job {job['job_id']} record: {stored and stored['status']}")
+
+        speedup = (serial['finished_at'] - serial['started_at']) / max(
+            pooled['finished_at'] - pooled['started_at'], 1e-9)
+        print(f"speedup: {speedup:.1f}x; {len(a)} files per run")
+        print('ok' if not problems else '\n'.join(problems))
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark the face photo index against directory listing.
+
+Builds a synthetic face library (empty face_NNNNN.png files, a fraction of
+them also in faces_white, plus a profile JSON and a gender sidecar per face
+that the metadata loader reads and parses the way _face_meta does) in a
+temp directory.  Times the cold build -- the refresh that indexes the
+library, the first page served while metadata is still pending, and the
+background metadata fill -- then, for the first and the last page:
+
+  - listing: listdir both directories, sort, slice (the old face_items path,
+    before any per-item profile/gender reads)
+  - offset:  FaceIndex.page(offset=...)
+  - keyset:  FaceIndex.page(after=...)
+
+plus a no-change refresh and a refresh after only white variants were
+rewritten (which must not re-read metadata).  Keyset latency should be
+flat from page 1 to the last page; listing grows with the library.
+
+Usage:
+    python scripts/benchmark_face_index.py --faces 100000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from face_index import FaceIndex
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def build_tree(root, n, white_fraction):
+    faces = os.path.join(root, 'faces')
+    whites = os.path.join(root, 'faces_white')
+    profiles = os.path.join(root, 'profiles')
+    genders = os.path.join(root, 'gender')
+    for path in (faces, whites, profiles, genders):
+        os.makedirs(path)
+    n_white = int(n * white_fraction)
+    for i in range(n):
+        name = f'face_{i:06d}.png'
+        open(os.path.join(faces, name), 'wb').close()
+        if i < n_white:
+            open(os.path.join(whites, name), 'wb').close()
+        with open(os.path.join(genders, name + '.json'), 'w') as f:
+            json.dump({'gender': 'female' if i % 2 else 'male', 'confidence': 0.9}, f)
+        if i % 3:
+            with open(os.path.join(profiles, name + '.json'), 'w') as f:
+                json.dump({'identity': {'first_name': f'First{i}', 'last_name': f'Last{i}'},
+                           'generation_count': i % 7,
+                           'documents': {'passport': {}, 'license': {}}}, f)
+    return faces, whites, profiles, genders
+
+
+def file_meta_loader(genders, profiles):
+    """Per-face metadata read from disk, shaped like face_photo_manager._face_meta."""
+    def load(name):
+        meta = {}
+        try:
+            with open(os.path.join(genders, name + '.json')) as f:
+                meta['gender'] = json.load(f)
+        except FileNotFoundError:
+            meta['gender'] = None
+        try:
+            with open(os.path.join(profiles, name + '.json')) as f:
+                profile = json.load(f)
+        except FileNotFoundError:
+            return meta
+        identity = profile.get('identity', {})
+        meta.update({
+            'has_profile': True,
+            'profile_name': f"{identity.get('first_name', '')} {identity.get('last_name', '')}",
+            'generation_count': profile.get('generation_count', 0),
+            'doc_types': list(profile.get('documents', {}).keys()),
+        })
+        return meta
+    return load
+
+
+def wait_for_meta(index, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while index.stats()['meta_pending']:
+        if time.perf_counter() > deadline:
+            raise TimeoutError('metadata fill did not finish')
+        time.sleep(0.05)
+
+
+def listing_page(faces, whites, page, per_page):
+    names = sorted(set(os.listdir(faces)) | set(os.listdir(whites)))
+    start = (page - 1) * per_page
+    return names[start:start + per_page]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--faces', type=int, default=100000)
+    parser.add_argument('--white-fraction', type=float, default=0.8)
+    parser.add_argument('--per-page', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        faces, whites, profiles, genders = build_tree(root, args.faces, args.white_fraction)
+        print(f"synthetic tree: {args.faces} faces in {time.perf_counter() - start:.1f}s")
+
+        loads = []
+        load = file_meta_loader(genders, profiles)
+        index = FaceIndex(faces, whites, os.path.join(root, '.face_index.sqlite'),
+                          lambda name: loads.append(name) or load(name))
+
+        start = time.perf_counter()
+        index.refresh()
+        print(f"cold refresh:       {(time.perf_counter() - start) * 1000:10.1f} ms")
+        page_start = time.perf_counter()
+        first = index.page('both', args.per_page)
+        pending = sum(r['meta_pending'] for r in first)
+        print(f"cold first page:    {(time.perf_counter() - page_start) * 1000:10.1f} ms "
+              f"({pending}/{len(first)} rows pending)")
+        wait_for_meta(index)
+        print(f"cold build + meta:  {(time.perf_counter() - start) * 1000:10.1f} ms "
+              f"({len(loads)} metadata loads)")
+        _, noop_ms = timed(index.refresh, args.repeat)
+        print(f"no-change refresh:  {noop_ms:10.2f} ms")
+        _, stats_ms = timed(index.stats, args.repeat)
+        print(f"stats:              {stats_ms:10.2f} ms")
+
+        # Rewriting white variants only must not re-read any metadata
+        loads.clear()
+        n_touch = min(1000, int(args.faces * args.white_fraction))
+        for i in range(n_touch):
+            os.utime(os.path.join(whites, f'face_{i:06d}.png'))
+        start = time.perf_counter()
+        index.refresh(force=True)
+        wait_for_meta(index)
+        print(f"white-only rescan:  {(time.perf_counter() - start) * 1000:10.1f} ms "
+              f"({n_touch} touched, {len(loads)} metadata loads)")
+        if loads:
+            print("white-variant change re-read metadata")
+            sys.exit(1)
+
+        per_page = args.per_page
+        last_page = max(1, (args.faces + per_page - 1) // per_page)
+        # Cursor for the last page: the name just before its first item
+        last_cursor = index.names('both')[(last_page - 1) * per_page - 1] if last_page > 1 else None
+
+        print(f"\n{'path':<10} {'page 1 ms':>10} {f'page {last_page} ms':>14}")
+        _, l1 = timed(lambda: listing_page(faces, whites, 1, per_page), args.repeat)
+        _, ln = timed(lambda: listing_page(faces, whites, last_page, per_page), args.repeat)
+        print(f"{'listing':<10} {l1:10.2f} {ln:14.2f}")
+
+        _, o1 = timed(lambda: index.page('both', per_page, offset=0), args.repeat)
+        _, on = timed(lambda: index.page('both', per_page, offset=(last_page - 1) * per_page), args.repeat)
+        print(f"{'offset':<10} {o1:10.2f} {on:14.2f}")
+
+        _, k1 = timed(lambda: index.page('both', per_page), args.repeat)
+        last, kn = timed(lambda: index.page('both', per_page, after=last_cursor), args.repeat)
+        print(f"{'keyset':<10} {k1:10.2f} {kn:14.2f}")
+
+        _, g = timed(lambda: index.page('both', per_page, after=last_cursor, gender='female'), args.repeat)
+        print(f"{'keyset+gender':<14} {'':>6} {g:14.2f}")
+
+        expected = listing_page(faces, whites, last_page, per_page)
+        if [r['name'] for r in last] != expected:
+            print("MISMATCH between keyset and listing for the last page")
+            sys.exit(1)
+        print("last page matches listing")
+
+
+if __name__ == '__main__':
+    main()
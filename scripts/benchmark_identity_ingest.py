@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/identities/ingest-embeddings with a large synthetic gallery.
+
+Posts a payload of --identities identities x --faces-per-identity random
+512-d face embeddings (50k embeddings by default) through the blueprint
+against the configured Postgres, three times: the second run replaces
+every identity's reference embeddings, which exercises the delete path,
+and the third re-sends the second payload unchanged, which should write
+nothing.  After each run it checks the stored row counts match the
+response, then removes everything it created (identities cascade to
+embeddings).
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/benchmark_identity_ingest.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from flask import Flask
+
+from db_connection import init_connection_pool, close_connection_pool, get_cursor
+from routes.identities import identities_bp
+
+
+def build_payload(source_system, n_identities, faces_per_identity, seed):
+    rng = random.Random(seed)
+    results = []
+    for i in range(n_identities):
+        results.append({
+            'external_id': f'bench-{i:06d}',
+            'name': f'Bench Person {i}',
+            'faces': [
+                {'embedding': [rng.uniform(-1, 1) for _ in range(512)],
+                 'confidence': round(rng.uniform(0.5, 1.0), 3)}
+                for _ in range(faces_per_identity)
+            ],
+        })
+    return {'source_system': source_system, 'results': results}
+
+
+def stored_counts(source_system):
+    with get_cursor(commit=False) as cursor:
+        cursor.execute('''
+            SELECT COUNT(DISTINCT i.identity_id) AS identities, COUNT(e.embedding_id) AS embeddings
+            FROM identities i
+            LEFT JOIN embeddings e ON e.identity_id = i.identity_id
+                 AND e.embedding_type = 'face' AND e.is_reference
+            WHERE i.source_system = %s
+        ''', (source_system,))
+        row = cursor.fetchone()
+    return row['identities'], row['embeddings']
+
+
+def stored_embedding_ids(source_system):
+    with get_cursor(commit=False) as cursor:
+        cursor.execute('''
+            SELECT e.embedding_id FROM embeddings e
+            JOIN identities i ON i.identity_id = e.identity_id
+            WHERE i.source_system = %s
+        ''', (source_system,))
+        return {row['embedding_id'] for row in cursor.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--identities', type=int, default=5000)
+    parser.add_argument('--faces-per-identity', type=int, default=10)
+    parser.add_argument('--source-system', default='ingest-benchmark')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.register_blueprint(identities_bp)
+    client = app.test_client()
+
+    init_connection_pool()
+    try:
+        expected = args.identities * args.faces_per_identity
+        for run, seed in ((1, 1), (2, 2), (3, 2)):
+            payload = build_payload(args.source_system, args.identities,
+                                    args.faces_per_identity, seed=seed)
+            before_ids = stored_embedding_ids(args.source_system) if run == 3 else None
+            start = time.perf_counter()
+            resp = client.post('/api/identities/ingest-embeddings', json=payload)
+            elapsed = time.perf_counter() - start
+            body = resp.get_json()
+            if not body.get('success'):
+                print(f"run {run}: failed: {body.get('error')}")
+                sys.exit(1)
+
+            identities, embeddings = stored_counts(args.source_system)
+            print(f"run {run}: {body['identities_resolved']} identities, "
+                  f"{body['embeddings_stored']} embeddings in {elapsed:.2f}s "
+                  f"({body['embeddings_stored'] / max(elapsed, 1e-9):,.0f}/s)")
+            if (identities, embeddings) != (args.identities, expected) or body['embeddings_stored'] != expected:
+                print(f"MISMATCH: stored {identities} identities / {embeddings} embeddings, "
+                      f"expected {args.identities} / {expected}")
+                sys.exit(1)
+            if before_ids is not None and stored_embedding_ids(args.source_system) != before_ids:
+                print("MISMATCH: unchanged payload rewrote stored embeddings")
+                sys.exit(1)
+        print("stored counts match")
+    finally:
+        with get_cursor() as cursor:
+            cursor.execute('DELETE FROM identities WHERE source_system = %s', (args.source_system,))
+        close_connection_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark review filter counts: counters table vs full scan.
+
+Times get_review_filter_counts() (served from review_queue_counters) against
+the scanning implementation it replaced, and checks both return the same
+numbers.  Run it at different ai_predictions sizes: the counter path should
+stay flat while the scan grows with the table.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/benchmark_review_counters.py --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from db_connection import init_connection_pool, close_connection_pool, get_cursor
+from database import VideoDatabase
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--camera-id', default=None)
+    parser.add_argument('--min-confidence', type=float, default=None)
+    parser.add_argument('--reconcile', action='store_true',
+                        help='Rebuild the counters first and report drift')
+    args = parser.parse_args()
+
+    init_connection_pool()
+    try:
+        db = VideoDatabase()
+        with get_cursor(commit=False) as cursor:
+            cursor.execute("SELECT COUNT(*) AS n FROM ai_predictions")
+            n_predictions = cursor.fetchone()['n']
+            cursor.execute("SELECT COUNT(*) AS n FROM review_queue_counters")
+            n_counters = cursor.fetchone()['n']
+        print(f"ai_predictions rows:        {n_predictions}")
+        print(f"review_queue_counters rows: {n_counters}")
+
+        if args.reconcile:
+            start = time.perf_counter()
+            drifted = db.reconcile_review_queue_counters()
+            print(f"reconcile: {drifted} drifted keys in {time.perf_counter() - start:.2f}s")
+
+        kwargs = {'min_confidence': args.min_confidence, 'camera_id': args.camera_id}
+        counted, c_med, c_max = timed(lambda: db.get_review_filter_counts(**kwargs), args.repeat)
+        scanned, s_med, s_max = timed(lambda: db._scan_review_filter_counts(**kwargs), args.repeat)
+
+        print(f"{'path':<10} {'median ms':>10} {'max ms':>10}")
+        print(f"{'counters':<10} {c_med:10.2f} {c_max:10.2f}")
+        print(f"{'scan':<10} {s_med:10.2f} {s_max:10.2f}")
+        print(f"speedup: {s_med / max(c_med, 1e-9):.1f}x")
+
+        mismatched = {k: (counted.get(k), scanned.get(k))
+                      for k in scanned if int(counted.get(k) or 0) != int(scanned.get(k) or 0)}
+        if mismatched:
+            print(f"MISMATCH (counters, scan): {mismatched}")
+            sys.exit(1)
+        print("counts match")
+    finally:
+        close_connection_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Measure the schema step of service startup, before and after versioning.
+
+"before" replays every transactional migration step the way startup used
+to (all of them, every time) inside a transaction that is rolled back;
+"after" is run_migrations() against an up-to-date schema_migrations table,
+which is what services.init_services() now pays.  The replay takes the
+same locks the old startup did, so run it off-peak.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/benchmark_schema_startup.py --repeat 5
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from db_connection import init_connection_pool, close_connection_pool, get_connection
+from psycopg2 import extras
+import schema
+
+
+def replay_all_steps():
+    with get_connection() as conn:
+        cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+        try:
+            for _version, _name, func, concurrent in schema.MIGRATIONS:
+                if not concurrent:
+                    func(cursor)
+        finally:
+            conn.rollback()
+            cursor.close()
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    init_connection_pool()
+    try:
+        pending = schema.pending_migrations()
+        if pending:
+            print(f"{len(pending)} migration(s) pending -- run 'python schema.py migrate' first")
+            sys.exit(1)
+        before = measure(replay_all_steps, args.repeat)
+        after = measure(schema.run_migrations, args.repeat)
+        print(f"{'startup schema step':<32} {'median ms':>10} {'max ms':>10}")
+        print(f"{'before (replay every step)':<32} {before[0]:10.1f} {before[1]:10.1f}")
+        print(f"{'after (version check)':<32} {after[0]:10.1f} {after[1]:10.1f}")
+        print(f"speedup: {before[0] / max(after[0], 1e-9):.0f}x")
+    finally:
+        close_connection_pool()
+
+
+if __name__ == '__main__':
+    main()
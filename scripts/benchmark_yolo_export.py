@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark full vs incremental YOLO dataset export.
+
+Runs a full export, a cold incremental export (empty frame store), then
+simulates ~1% new annotations by forgetting 1% of the frames in the
+incremental manifest and frame store, and times the re-export.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/benchmark_yolo_export.py --config-id 3
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from db_connection import init_connection_pool, close_connection_pool
+from database import VideoDatabase
+from yolo_exporter import YOLOExporter, FRAME_STORE_DIRNAME, MANIFEST_FILENAME
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def timed(label, fn):
+    start = time.monotonic()
+    result = fn()
+    elapsed = time.monotonic() - start
+    print(f"{label:<28} {elapsed:8.2f}s  frames={result['frame_count']}  delta={result.get('delta')}")
+    return result
+
+
+def forget_fraction(export_base: Path, export_dir: Path, fraction: float, seed: int):
+    """Remove a fraction of frames from the manifest, split dirs and frame store."""
+    manifest_path = export_dir / MANIFEST_FILENAME
+    manifest = json.loads(manifest_path.read_text())
+    frames = manifest['frames']
+    rng = random.Random(seed)
+    victims = rng.sample(sorted(frames), max(1, int(len(frames) * fraction))) if frames else []
+    store_dir = export_base / FRAME_STORE_DIRNAME
+    for frame_id in victims:
+        entry = frames.pop(frame_id)
+        (export_dir / entry['image']).unlink(missing_ok=True)
+        (export_dir / entry['label']).unlink(missing_ok=True)
+        (store_dir / entry['store'][:2] / f"{entry['store']}.jpg").unlink(missing_ok=True)
+    manifest_path.write_text(json.dumps(manifest))
+    return len(victims)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--config-id', type=int, required=True)
+    parser.add_argument('--export-base', type=Path, default=BASE_DIR / 'exports' / '_benchmark')
+    parser.add_argument('--fraction', type=float, default=0.01,
+                        help='Fraction of frames treated as new on the re-export')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--keep', action='store_true', help='Keep benchmark output')
+    args = parser.parse_args()
+
+    init_connection_pool()
+    try:
+        if args.export_base.exists():
+            shutil.rmtree(args.export_base)
+        exporter = YOLOExporter(VideoDatabase(), BASE_DIR / 'downloads', args.export_base)
+
+        timed('full export', lambda: exporter.export_dataset(args.config_id, 'full'))
+        timed('incremental (cold store)', lambda: exporter.export_dataset(
+            args.config_id, 'incremental', incremental=True, workers=args.workers))
+
+        forgotten = forget_fraction(args.export_base, args.export_base / 'incremental',
+                                    args.fraction, seed=42)
+        print(f"Simulating {forgotten} new frames ({args.fraction:.1%})")
+        timed('incremental (re-export)', lambda: exporter.export_dataset(
+            args.config_id, 'incremental', incremental=True, workers=args.workers))
+        timed('incremental (no change)', lambda: exporter.export_dataset(
+            args.config_id, 'incremental', incremental=True, workers=args.workers))
+    finally:
+        close_connection_pool()
+        if not args.keep and args.export_base.exists():
+            shutil.rmtree(args.export_base)
+
+
+if __name__ == '__main__':
+    main()
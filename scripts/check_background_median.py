@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare the streaming background median with the exact median.
+
+Writes a synthetic clip (static textured background, sensor noise and
+objects crossing the frame) and decodes the sampled frames two ways:
+median_background() (one sequential pass into the bounded remedian)
+and an exact np.median over every frame held in memory.  It prints the
+per-pixel difference between the two, the error of each against the true
+background, and the peak memory each needed.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/check_background_median.py --frames 300
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import cv2
+import numpy as np
+
+from background_reference import median_background
+
+
+def write_clip(path, n_frames, width, height, seed):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    background = np.stack([
+        (xx * 255 // width), (yy * 255 // height), ((xx // 16 + yy // 16) % 2 * 120 + 60),
+    ], axis=-1).astype(np.uint8)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (width, height))
+    for i in range(n_frames):
+        frame = background.astype(np.int16) + rng.normal(0, 4, background.shape).astype(np.int16)
+        # A few objects drift across, each covering any pixel only briefly
+        for k in range(3):
+            x = int((i * (5 + 3 * k) + 97 * k) % width)
+            y = int(height * (0.2 + 0.3 * k))
+            frame[max(0, y - 20):y + 20, max(0, x - 30):x + 30] = (40 + 60 * k, 200 - 50 * k, 90)
+        writer.write(np.clip(frame, 0, 255).astype(np.uint8))
+    writer.release()
+    return background  # written and decoded as BGR
+
+
+def exact_median(path, n_frames):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    for _ in range(n_frames):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return np.median(np.stack(frames), axis=0).round().astype(np.uint8)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=360)
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.avi')
+        truth = write_clip(path, args.frames, args.width, args.height, args.seed)
+        timestamps = [i / 10 for i in range(args.frames)]
+
+        (streamed, used), s_time, s_peak = measure(lambda: median_background(path, timestamps))
+        exact, e_time, e_peak = measure(lambda: exact_median(path, args.frames))
+
+    diff = np.abs(streamed.astype(np.int16) - exact.astype(np.int16))
+    err_stream = np.abs(streamed.astype(np.int16) - truth.astype(np.int16))
+    err_exact = np.abs(exact.astype(np.int16) - truth.astype(np.int16))
+    print(f"frames stacked: {used}")
+    print(f"{'path':<10} {'seconds':>8} {'peak MB':>8} {'mean err':>9} {'p99 err':>8}")
+    print(f"{'streamed':<10} {s_time:8.2f} {s_peak:8.1f} {err_stream.mean():9.2f} {np.percentile(err_stream, 99):8.0f}")
+    print(f"{'exact':<10} {e_time:8.2f} {e_peak:8.1f} {err_exact.mean():9.2f} {np.percentile(err_exact, 99):8.0f}")
+    print(f"streamed vs exact: mean {diff.mean():.2f}, p99 {np.percentile(diff, 99):.0f}, max {diff.max()}")
+    if diff.mean() > 2.0 or np.percentile(diff, 99) > 12:
+        print("streamed median drifts too far from the exact median")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
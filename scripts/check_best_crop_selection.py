@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Check TrainingSampler best-crop selection against seeded data.
+
+Seeds session-local temp tables named ai_predictions, videos and
+camera_object_tracks (they shadow the real tables for this connection
+only), runs the set-based selection whole and in track-id chunks, and
+compares every best crop, exclusion and returned count with a per-track
+reference computed in Python.  Nothing is committed.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/check_best_crop_selection.py --tracks 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from psycopg2 import extras
+
+from db_connection import init_connection_pool, close_connection_pool, get_connection
+from training_sampler import TrainingSampler
+
+
+def seed(cursor, n_tracks, seed_value):
+    rng = random.Random(seed_value)
+    cursor.execute("""
+        CREATE TEMP TABLE videos (id BIGINT PRIMARY KEY, camera_id TEXT) ON COMMIT DROP;
+        CREATE TEMP TABLE camera_object_tracks (
+            id BIGINT PRIMARY KEY, best_crop_prediction_id BIGINT) ON COMMIT DROP;
+        CREATE TEMP TABLE ai_predictions (
+            id BIGINT PRIMARY KEY, video_id BIGINT, camera_object_track_id BIGINT,
+            quality_score REAL, is_training_candidate BOOLEAN,
+            training_exclusion_reason TEXT) ON COMMIT DROP;
+    """)
+    videos = [(i, f'cam{i % 4}') for i in range(1, 41)]
+    extras.execute_values(cursor, "INSERT INTO videos VALUES %s", videos)
+    extras.execute_values(cursor, "INSERT INTO camera_object_tracks (id) VALUES %s",
+                          [(t,) for t in range(1, n_tracks + 1)])
+
+    preds = []
+    pid = 0
+    for track in range(1, n_tracks + 1):
+        for _ in range(rng.randint(1, 6)):
+            pid += 1
+            # Ties and NULL scores exercise the ORDER BY tie-breakers
+            score = None if rng.random() < 0.15 else round(rng.choice([0.5, rng.random()]), 3)
+            preds.append((pid, rng.choice(videos)[0], track, score, None, None))
+    for _ in range(n_tracks // 10):
+        pid += 1
+        preds.append((pid, rng.choice(videos)[0], None, rng.random(), None, None))
+    extras.execute_values(cursor, "INSERT INTO ai_predictions VALUES %s", preds)
+    # Same track index as the real table, and stats (autovacuum never
+    # analyzes temp tables), so chunked timings use the production plan
+    cursor.execute("""
+        CREATE INDEX ON ai_predictions (camera_object_track_id);
+        ANALYZE videos; ANALYZE camera_object_tracks; ANALYZE ai_predictions;
+    """)
+    return preds, dict(videos)
+
+
+def reference(preds, video_cameras, camera_id):
+    tracks = {}
+    for pid, video_id, track, score, _c, _r in preds:
+        if track is not None:
+            tracks.setdefault(track, []).append((pid, video_id, score))
+    if camera_id:
+        tracks = {t: rows for t, rows in tracks.items()
+                  if any(video_cameras[v] == camera_id for _p, v, _s in rows)}
+    best = {}
+    dups = set()
+    for track, rows in tracks.items():
+        ranked = sorted(rows, key=lambda r: (r[2] is None, -(r[2] or 0), r[0]))
+        best[track] = ranked[0][0]
+        dups.update(r[0] for r in ranked[1:])
+    return best, dups
+
+
+def check(cursor, sampler, preds, video_cameras, camera_id, chunk_size):
+    cursor.execute("UPDATE camera_object_tracks SET best_crop_prediction_id = NULL")
+    cursor.execute("UPDATE ai_predictions SET is_training_candidate = NULL, training_exclusion_reason = NULL")
+
+    start = time.perf_counter()
+    if chunk_size:
+        cursor.execute("SELECT MAX(camera_object_track_id) AS hi FROM ai_predictions")
+        hi = cursor.fetchone()['hi']
+        tracks = dups_n = 0
+        for lo in range(1, hi + 1, chunk_size):
+            t, d = sampler._select_best_chunk(cursor, camera_id, (lo, lo + chunk_size - 1))
+            tracks += t
+            dups_n += d
+    else:
+        tracks, dups_n = sampler._select_best_chunk(cursor, camera_id)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    best, dups = reference(preds, video_cameras, camera_id)
+    cursor.execute("SELECT id, best_crop_prediction_id FROM camera_object_tracks "
+                   "WHERE best_crop_prediction_id IS NOT NULL")
+    got_best = {r['id']: r['best_crop_prediction_id'] for r in cursor.fetchall()}
+    cursor.execute("SELECT id FROM ai_predictions WHERE training_exclusion_reason = 'duplicate_track' "
+                   "AND is_training_candidate = FALSE")
+    got_dups = {r['id'] for r in cursor.fetchall()}
+
+    label = f"camera={camera_id or 'all'} chunk={chunk_size or '-'}"
+    ok = (got_best == best and got_dups == dups
+          and tracks == len(best) and dups_n == len(dups))
+    print(f"{label:<24} tracks={tracks:<6} duplicates={dups_n:<6} {elapsed_ms:8.1f} ms  "
+          f"{'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tracks', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    init_connection_pool()
+    try:
+        with get_connection() as conn:
+            try:
+                cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+                preds, video_cameras = seed(cursor, args.tracks, args.seed)
+                sampler = TrainingSampler()
+                results = [check(cursor, sampler, preds, video_cameras, camera_id, chunk)
+                           for camera_id in (None, 'cam1')
+                           for chunk in (None, 97)]
+            finally:
+                conn.rollback()
+        if not all(results):
+            sys.exit(1)
+    finally:
+        close_connection_pool()
+
+
+if __name__ == '__main__':
+    main()
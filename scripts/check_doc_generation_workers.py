@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Check that generation pool workers do not re-run the API's service startup.
+
+This script plays the API process: it imports services (which calls
+init_services() at import time, as api.py does) and records its PID in a
+marker file right after that import.  Pool workers re-import the __main__
+of the process that starts the pool, so any worker that imports this
+script runs init_services() again and appends its own PID.  The script
+then runs a small generation job through doc_generation.start_job and
+fails if any PID other than its own reached the marker.
+
+--control also runs a job with run_job directly in this process, which must
+show the re-import (otherwise the check could not catch it).
+
+doc_synthesizer is not needed: workers start, and would re-import __main__,
+before the first render.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/check_doc_generation_workers.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+# Inherited by the children, so a re-import appends to the parent's file
+MARKER = os.environ.setdefault(
+    'GT_CHECK_DOC_GENERATION_MARKER',
+    os.path.join(tempfile.gettempdir(), f'check_doc_generation_workers.{os.getpid()}'))
+
+import services  # noqa: E402,F401  -- init_services() runs here
+
+with open(MARKER, 'a') as f:
+    f.write(f"{os.getpid()}\n")
+
+import doc_generation  # noqa: E402
+
+DEFAULT_SYNTH_DIR = "/mnt/storage/training-material/documents/synthesizer"
+
+
+def foreign_pids():
+    with open(MARKER) as f:
+        return sorted({int(line) for line in f if line.strip()} - {os.getpid()})
+
+
+def make_template(root: Path) -> Path:
+    tpl_dir = root / 'sample_template'
+    tpl_dir.mkdir()
+    with open(tpl_dir / 'template.json', 'w') as f:
+        json.dump({'id': 'sample_template', 'class_id': 4, 'class_name': 'id_card_generic',
+                   'background_image': 'background.png', 'regions': []}, f)
+    return tpl_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--synth-dir', default=DEFAULT_SYNTH_DIR)
+    parser.add_argument('--control', action='store_true',
+                        help='also start a pool from this process and expect the re-import')
+    args = parser.parse_args()
+
+    problems = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            tpl_dir = make_template(root)
+            with open(tpl_dir / 'template.json') as f:
+                tpl = json.load(f)
+
+            job = doc_generation.create_job(tpl['id'], tpl_dir, args.count, {}, root / 'output',
+                                            workers=args.workers)
+            proc = doc_generation.start_job(job, tpl_dir, Path(args.synth_dir), yolo_dir=root / 'yolo')
+            proc.wait()
+            stored = doc_generation.load_job(tpl_dir, job['job_id'])
+            print(f"start_job: exit {proc.returncode}, job {stored and stored['status']} "
+                  f"({stored and stored['completed']}/{args.count} images, {stored and stored['error']})")
+            pids = foreign_pids()
+            if pids:
+                problems.append(f"init_services re-ran in {len(pids)} job/worker processes: {pids}")
+
+            if args.control:
+                job = doc_generation.create_job(tpl['id'], tpl_dir, args.count, {}, root / 'output',
+                                                workers=args.workers)
+                doc_generation.run_job(job, tpl, tpl_dir, Path(args.synth_dir), yolo_dir=root / 'yolo')
+                control = sorted(set(foreign_pids()) - set(pids))
+                print(f"control run_job in-process: init_services re-ran in {len(control)} workers")
+                if not control:
+                    problems.append("control run did not re-import __main__; check cannot detect it")
+    finally:
+        os.unlink(MARKER)
+
+    print('ok' if not problems else '\n'.join(problems))
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Check pooled EcoEye downloads against a local stub relay.
+
+Starts a threaded HTTP server on localhost that implements the relay
+endpoints the download path uses (event details, retry, video download with
+Range support).  Video bodies are streamed slowly to stand in for a real
+uplink, some connections are cut off mid-body on the first request, and one
+alert starts with a partial .part file from an earlier run.  Downloads every
+alert with EcoEyeSyncClient.download_alerts sequentially (workers=1) and
+pooled, then checks:
+
+  - every file matches the served bytes and no .part files are left
+  - cut-off and pre-seeded downloads resumed with Range requests
+  - no more than `workers` videos streamed at once
+  - request starts never exceeded the token bucket (burst + rate * t)
+
+No database is needed.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/check_ecoeye_downloads.py --alerts 16
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import ecoeye_sync
+from ecoeye_sync import EcoEyeSyncClient
+
+
+class StubRelay:
+    """Shared state for the stub relay handler."""
+
+    def __init__(self, videos, cut_off, bytes_per_sec):
+        self.videos = videos
+        self.cut_off = set(cut_off)
+        self.bytes_per_sec = bytes_per_sec
+        self.lock = threading.Lock()
+        self.request_times = []
+        self.range_requests = {}
+        self.streaming = 0
+        self.max_streaming = 0
+
+    def reset(self, cut_off):
+        self.cut_off = set(cut_off)
+        self.request_times = []
+        self.range_requests = {}
+        self.max_streaming = 0
+
+
+def make_handler(relay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, payload, status=200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _record(self):
+            with relay.lock:
+                relay.request_times.append(time.monotonic())
+
+        def do_POST(self):
+            self._record()
+            self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+            self._json({'success': True})
+
+        def do_GET(self):
+            self._record()
+            m = re.match(r'^/api/events/([\w-]+)$', self.path)
+            if m:
+                alert_id = m.group(1)
+                if alert_id not in relay.videos:
+                    return self._json({'error': 'not found'}, 404)
+                return self._json({
+                    'event_id': alert_id, 'status': 'completed', 'camera_id': 'stubcam',
+                    'timestamp': '2026-01-01T00:00:00',
+                    'video_path': f'/data/videos/{alert_id}.mp4',
+                    'file_size': len(relay.videos[alert_id]),
+                })
+            m = re.match(r'^/videos/([\w-]+)\.mp4$', self.path)
+            if not m or m.group(1) not in relay.videos:
+                return self._json({'error': 'not found'}, 404)
+            self._send_video(m.group(1))
+
+        def _send_video(self, alert_id):
+            data = relay.videos[alert_id]
+            start = 0
+            range_header = self.headers.get('Range')
+            if range_header:
+                start = int(re.match(r'bytes=(\d+)-', range_header).group(1))
+                with relay.lock:
+                    relay.range_requests.setdefault(alert_id, []).append(start)
+                if start >= len(data):
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{len(data)}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+            else:
+                self.send_response(200)
+            body = data[start:]
+            self.send_header('Content-Type', 'video/mp4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+
+            with relay.lock:
+                cut = alert_id in relay.cut_off
+                relay.cut_off.discard(alert_id)
+                relay.streaming += 1
+                relay.max_streaming = max(relay.max_streaming, relay.streaming)
+            try:
+                limit = len(body) // 2 if cut else len(body)
+                step = 32 * 1024
+                for offset in range(0, limit, step):
+                    self.wfile.write(body[offset:min(offset + step, limit)])
+                    time.sleep(step / relay.bytes_per_sec)
+                if cut:
+                    # Drop the connection with the body half sent
+                    self.wfile.flush()
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+            finally:
+                with relay.lock:
+                    relay.streaming -= 1
+
+    return Handler
+
+
+def rate_ok(times, rate, burst):
+    """Whether request starts fit a token bucket of `burst` refilling at `rate`/s."""
+    times = sorted(times)
+    for i, t0 in enumerate(times):
+        for j in range(i, len(times)):
+            # Slack for clock granularity between client and handler threads
+            if j - i + 1 > burst + (times[j] - t0) * rate + 1:
+                return False
+    return True
+
+
+def run(client, relay, download_dir, alert_ids, workers, cut_off, seeded):
+    for path in Path(download_dir).glob('*'):
+        path.unlink()
+    relay.reset(cut_off)
+    for alert_id, prefix in seeded.items():
+        name = f"ecoeye_{alert_id}.mp4.part"
+        Path(download_dir, name).write_bytes(prefix)
+
+    start = time.perf_counter()
+    outcomes = list(client.download_alerts(alert_ids, workers))
+    return outcomes, time.perf_counter() - start
+
+
+def check(label, outcomes, elapsed, relay, download_dir, workers, cut_off, seeded, rate, burst):
+    problems = []
+    by_id = {o['alert_id']: o for o in outcomes}
+    for alert_id, data in relay.videos.items():
+        outcome = by_id.get(alert_id)
+        if not outcome or outcome['status'] != 'success':
+            problems.append(f"{alert_id}: {outcome and outcome['error']}")
+            continue
+        got = Path(outcome['path']).read_bytes()
+        if hashlib.sha256(got).digest() != hashlib.sha256(data).digest():
+            problems.append(f"{alert_id}: content mismatch ({len(got)}/{len(data)} bytes)")
+    leftovers = list(Path(download_dir).glob('*.part'))
+    if leftovers:
+        problems.append(f"{len(leftovers)} .part files left")
+    for alert_id in list(cut_off) + list(seeded):
+        if not relay.range_requests.get(alert_id):
+            problems.append(f"{alert_id}: no Range request after a partial download")
+    for alert_id, prefix in seeded.items():
+        if by_id.get(alert_id, {}).get('resumed_from') != len(prefix):
+            problems.append(f"{alert_id}: resumed_from {by_id.get(alert_id, {}).get('resumed_from')}, "
+                            f"expected {len(prefix)}")
+    if relay.max_streaming > workers:
+        problems.append(f"{relay.max_streaming} concurrent streams > {workers} workers")
+    if not rate_ok(relay.request_times, rate, burst):
+        problems.append("request rate exceeded the token bucket")
+
+    print(f"{label:<12} {len(outcomes)} alerts in {elapsed:6.2f}s, {len(relay.request_times)} requests, "
+          f"max {relay.max_streaming} streams, "
+          f"{sum(1 for o in outcomes if o['resumed_from'])} resumed at start  "
+          f"{'ok' if not problems else 'FAILED'}")
+    for problem in problems:
+        print(f"  {problem}")
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--alerts', type=int, default=16)
+    parser.add_argument('--video-kb', type=int, default=512)
+    parser.add_argument('--kb-per-sec', type=int, default=2048, help='stub bandwidth per stream')
+    parser.add_argument('--workers', type=int, default=ecoeye_sync.DOWNLOAD_WORKERS)
+    parser.add_argument('--rate', type=float, default=20.0,
+                        help='token bucket rate for the check (the relay default is 100/min)')
+    parser.add_argument('--burst', type=int, default=ecoeye_sync.RATE_LIMIT_BURST)
+    args = parser.parse_args()
+
+    # The production limits would make the check take minutes
+    ecoeye_sync.RATE_LIMIT_PER_SEC = args.rate
+    ecoeye_sync.RATE_LIMIT_BURST = args.burst
+
+    videos = {f'alert-{i:03d}': os.urandom(args.video_kb * 1024 + i * 97) for i in range(args.alerts)}
+    alert_ids = list(videos)
+    cut_off = alert_ids[1::5]
+    seeded = {alert_ids[2]: videos[alert_ids[2]][:args.video_kb * 300]}
+
+    relay = StubRelay(videos, cut_off, args.kb_per_sec * 1024)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(relay))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    ok = True
+    try:
+        with tempfile.TemporaryDirectory() as download_dir:
+            timings = {}
+            for label, workers in (('sequential', 1), ('pooled', args.workers)):
+                client = EcoEyeSyncClient(download_dir, api_key='stub', api_secret='stub',
+                                          base_url=f'http://127.0.0.1:{server.server_port}')
+                outcomes, elapsed = run(client, relay, download_dir, alert_ids, workers, cut_off, seeded)
+                timings[label] = elapsed
+                ok = check(label, outcomes, elapsed, relay, download_dir, workers,
+                           cut_off, seeded, args.rate, args.burst) and ok
+            print(f"speedup: {timings['sequential'] / timings['pooled']:.1f}x")
+    finally:
+        server.shutdown()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Check and time PlateReader batch processing on a synthetic clip.
+
+Writes a short video whose frames encode their own frame number in colour,
+builds prediction rows at random timestamps (several sharing a frame), and
+runs PlateReader._read_plates -- the decode/crop/VLM/link half of
+process_predictions -- with a local fake in place of the VLM and identity
+linking.  The fake reads the frame number back out of each crop, sleeps
+like a VLM round trip and records how many calls overlap, so the check
+verifies every prediction got its own frame, the VLM concurrency bound
+held, and compares against one seek + decode and one serial VLM call per
+prediction.  No database is needed.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/check_plate_batch.py --predictions 200
+"""
+
+import argparse
+import base64
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import plate_reader
+from plate_reader import PlateReader
+
+STEP = 20  # colour step per encoded digit; survives mp4v + JPEG error
+BASE = 12  # digits per channel, 12 * 12 = 144 distinct frames per cycle
+
+
+def frame_colour(frame_number):
+    n = frame_number % (BASE * BASE)
+    return (n % BASE) * STEP, (n // BASE) * STEP
+
+
+def write_clip(path, n_frames, fps, width=640, height=360):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(n_frames):
+        r, g = frame_colour(i)
+        writer.write(np.full((height, width, 3), (40, g, r), dtype=np.uint8))
+    writer.release()
+
+
+def decode_colour(crop_b64):
+    crop = np.asarray(Image.open(BytesIO(base64.b64decode(crop_b64))).convert('RGB'), dtype=np.float64)
+    r, g = crop[..., 0].mean(), crop[..., 1].mean()
+    return int(round(r / STEP)) + BASE * int(round(g / STEP))
+
+
+class FakePlateReader(PlateReader):
+    """PlateReader with the VLM and identity linking replaced by local fakes."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    def extract_plate_text(self, image_b64):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return {'plate_text': f'F{decode_colour(image_b64):05d}', 'confidence': 0.9,
+                    'state_guess': None}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def link_to_identity(self, plate_text, prediction_id):
+        return f'identity-{plate_text}'
+
+
+def per_prediction(reader, path, preds):
+    """One open + seek + decode and one serial VLM call per prediction."""
+    results = {}
+    for pred in preds:
+        cap = cv2.VideoCapture(path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(round(pred['timestamp'] * fps)))
+        ret, frame = cap.read()
+        cap.release()
+        if not ret:
+            results[pred['id']] = None
+            continue
+        full_frame = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        results[pred['id']] = reader._finish(pred['id'], reader.extract_plate_text(
+            reader._rear_crop_b64(full_frame, pred)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--predictions', type=int, default=200)
+    parser.add_argument('--frames', type=int, default=1200)
+    parser.add_argument('--fps', type=float, default=15.0)
+    parser.add_argument('--latency', type=float, default=0.02, help='fake VLM seconds per call')
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'clip.mp4')
+        write_clip(path, args.frames, args.fps)
+
+        frames = [rng.randrange(args.frames) for _ in range(args.predictions // 2)]
+        preds = []
+        for pid in range(1, args.predictions + 1):
+            frame_number = rng.choice(frames)
+            preds.append({'id': pid, 'video_id': 1, 'timestamp': frame_number / args.fps,
+                          'bbox_x': rng.randrange(0, 400), 'bbox_y': rng.randrange(0, 200),
+                          'bbox_width': 200, 'bbox_height': 150, 'filename': path})
+        expected = {p['id']: int(round(p['timestamp'] * args.fps)) % (BASE * BASE) for p in preds}
+
+        reader = FakePlateReader(args.latency)
+        start = time.perf_counter()
+        batch = reader._read_plates(sorted(preds, key=lambda p: (p['timestamp'], p['id'])))
+        batch_s = time.perf_counter() - start
+        max_in_flight = reader.max_in_flight
+
+        start = time.perf_counter()
+        single = per_prediction(FakePlateReader(args.latency), path, preds)
+        single_s = time.perf_counter() - start
+
+    wrong = [pid for pid, frame_number in expected.items()
+             if not batch.get(pid) or batch[pid]['plate_text'] != f'F{frame_number:05d}']
+    differs = [pid for pid in expected if batch.get(pid) != single.get(pid)]
+    print(f"{args.predictions} predictions on {len(set(frames))} frames")
+    print(f"per-prediction: {single_s:6.2f}s")
+    print(f"batch:          {batch_s:6.2f}s  ({single_s / batch_s:.1f}x), "
+          f"max {max_in_flight} VLM calls in flight (limit {plate_reader.VLM_WORKERS})")
+    print(f"frame check: {'ok' if not wrong else f'{len(wrong)} WRONG'}; "
+          f"matches per-prediction: {'ok' if not differs else f'{len(differs)} DIFFER'}")
+    if wrong or differs or max_in_flight > plate_reader.VLM_WORKERS:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Check the SQL static-cluster grouping against the Python reference path.
+
+Seeds session-local temp tables named ai_predictions and videos (they
+shadow the real tables for this connection only) with known points --
+bbox coordinates on and either side of the quantization grid lines,
+negative and fractional values, tracked predictions, and rows that must
+not be eligible -- plus random filler.  For several min_id / camera
+filters it compares the row fetch + build_clusters() path with
+plan_clusters() (what --dry-run and the tagging UPDATE use): qualifying
+cluster keys, sizes and order, and the eligible and group counts.  Then
+runs tag_clusters() and checks exactly the qualifying members were tagged
+and their existing corrected_tags kept.  Nothing is committed.
+
+--live also compares the two paths read-only over the live data.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/check_static_clusters.py [--live --camera mwcam8]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from psycopg2 import extras
+
+from db_connection import init_connection_pool, close_connection_pool, get_connection
+from static_cluster_generator import (CLUSTER_KEY_SQL, GRID, build_clusters,
+                                      fetch_eligible_predictions, plan_clusters, quantize,
+                                      tag_clusters)
+
+# Coordinate -> grid cell it must land in (truncate toward zero, then floor)
+BOUNDARY_CELLS = {
+    0: 0, 49: 0, 49.5: 0, 50: 50, 99.75: 50, 100: 100,
+    -0.5: 0, -1: -GRID, -49.5: -GRID, -50: -GRID, -50.5: -GRID, -51: -2 * GRID,
+}
+
+
+def seed(cursor, n_filler, seed_value):
+    """Insert the seeded rows; returns {id: row} of the eligible ones."""
+    rng = random.Random(seed_value)
+    cursor.execute("""
+        CREATE TEMP TABLE videos (id BIGINT PRIMARY KEY, camera_id TEXT) ON COMMIT DROP;
+        CREATE TEMP TABLE ai_predictions (
+            id BIGINT PRIMARY KEY, video_id BIGINT, camera_object_track_id BIGINT,
+            bbox_x REAL, bbox_y REAL, bbox_width REAL, bbox_height REAL,
+            review_status TEXT, corrected_tags JSONB) ON COMMIT DROP;
+    """)
+    videos = {1: 'cam1', 2: 'cam1', 3: 'cam2'}
+    extras.execute_values(cursor, "INSERT INTO videos VALUES %s", list(videos.items()))
+
+    rows = []
+    # Every boundary x against a few boundary y's, repeated 1-4 times so
+    # cells land on both sides of the minimum cluster size
+    for x in BOUNDARY_CELLS:
+        for y in (0, 49.5, 50, -0.5, -51):
+            for _ in range(rng.randint(1, 4)):
+                rows.append([rng.choice([1, 3]), None, x, y, 'pending', None])
+    # Tracked predictions cluster by track whatever their position
+    for track in range(1, 8):
+        for _ in range(track):
+            rows.append([rng.choice([2, 3]), track, rng.uniform(-100, 1900), rng.uniform(-100, 1000),
+                         rng.choice(['pending', 'processing']), None])
+    # Existing tags without static_cluster must be kept
+    for _ in range(5):
+        rows.append([2, None, 250, 250, 'pending', {'note': 'keep'}])
+    for _ in range(n_filler):
+        rows.append([rng.choice(list(videos)), rng.choice([None, None, rng.randint(8, 60)]),
+                     round(rng.uniform(-200, 2000), 2), round(rng.uniform(-200, 1100), 2),
+                     'pending', None])
+    eligible_count = len(rows)
+    # Not eligible: reviewed, already tagged, missing bbox
+    for _ in range(4):
+        rows.append([1, None, 0, 0, 'approved', None])
+        rows.append([1, None, 0, 0, 'pending', {'static_cluster': 'vid_1_0_0'}])
+        rows.append([1, None, None, 0, 'pending', None])
+
+    # Shuffled ids so cluster order (by lowest id) isn't insertion order
+    ids = list(range(1, len(rows) + 1))
+    rng.shuffle(ids)
+    values = [(pid, video_id, track, x, y, None if x is None else 20, 20, status,
+               json.dumps(tags) if tags else None)
+              for pid, (video_id, track, x, y, status, tags) in zip(ids, rows)]
+    extras.execute_values(cursor, "INSERT INTO ai_predictions VALUES %s", values)
+    # The real table's status and video indexes, and stats (autovacuum never
+    # analyzes temp tables), so the SQL timings use the production plan
+    cursor.execute("""
+        CREATE INDEX ON ai_predictions (review_status);
+        CREATE INDEX ON ai_predictions (video_id);
+        ANALYZE videos; ANALYZE ai_predictions;
+    """)
+    return {v[0]: v for v in values[:eligible_count]}, videos
+
+
+def compare(label, predictions, plan, min_cluster_size, python_ms, sql_ms, expected_eligible=None):
+    groups = build_clusters(predictions)
+    python_qualifying = [(key, len(ids)) for key, ids in groups.items()
+                         if len(ids) >= min_cluster_size]
+    ok = (plan['qualifying'] == python_qualifying and plan['eligible'] == len(predictions)
+          and plan['total_groups'] == len(groups)
+          and (expected_eligible is None or expected_eligible == len(predictions)))
+    print(f"{label:<28} eligible={plan['eligible']:<7} groups={plan['total_groups']:<6} "
+          f"qualifying={len(plan['qualifying']):<5} python {python_ms:7.1f} ms  sql {sql_ms:7.1f} ms  "
+          f"{'ok' if ok else 'MISMATCH'}")
+    if not ok:
+        only_python = set(python_qualifying) - set(plan['qualifying'])
+        only_sql = set(plan['qualifying']) - set(python_qualifying)
+        print(f"  only python {sorted(only_python)[:10]}, only sql {sorted(only_sql)[:10]}, "
+              f"expected eligible {expected_eligible}, fetched {len(predictions)}")
+    return ok, groups
+
+
+def run_filter(cursor, label, min_id, camera_id, min_cluster_size, expected_eligible):
+    start = time.perf_counter()
+    predictions = fetch_eligible_predictions(min_id=min_id, camera_id=camera_id, cursor=cursor)
+    python_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    plan = plan_clusters(min_id=min_id, camera_id=camera_id,
+                         min_cluster_size=min_cluster_size, cursor=cursor)
+    sql_ms = (time.perf_counter() - start) * 1000
+    return compare(label, predictions, plan, min_cluster_size, python_ms, sql_ms, expected_eligible)
+
+
+def check_seeded(n_filler, seed_value, min_cluster_size):
+    bad_cells = {x: quantize(x) for x, cell in BOUNDARY_CELLS.items() if quantize(x) != cell}
+    if bad_cells:
+        print(f"quantize() disagrees with the expected cells: {bad_cells}")
+        return False
+
+    with get_connection() as conn:
+        try:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            eligible, videos = seed(cursor, n_filler, seed_value)
+            mid_id = sorted(eligible)[len(eligible) // 2]
+            results = []
+            for label, min_id, camera_id in (('all', None, None),
+                                             ('camera=cam1', None, 'cam1'),
+                                             (f'min_id={mid_id}', mid_id, None)):
+                expected = sum(1 for v in eligible.values()
+                               if (min_id is None or v[0] >= min_id)
+                               and (camera_id is None or videos[v[1]] == camera_id))
+                ok, _groups = run_filter(cursor, label, min_id, camera_id, min_cluster_size, expected)
+                results.append(ok)
+
+            # Every boundary point must land in the cell the table expects, in SQL too
+            cursor.execute(f"""
+                SELECT p.id, p.video_id, p.bbox_x, p.bbox_y, {CLUSTER_KEY_SQL} AS cluster_key
+                FROM ai_predictions p
+                WHERE p.camera_object_track_id IS NULL
+                  AND p.bbox_x = ANY(%s) AND p.bbox_y = ANY(%s)
+            """, (list(BOUNDARY_CELLS), list(BOUNDARY_CELLS)))
+            misplaced = [(r['bbox_x'], r['bbox_y'], r['cluster_key']) for r in cursor.fetchall()
+                         if r['cluster_key'] != (f"vid_{r['video_id']}_{BOUNDARY_CELLS[r['bbox_x']]}"
+                                                 f"_{BOUNDARY_CELLS[r['bbox_y']]}")]
+            if misplaced:
+                print(f"boundary points in the wrong SQL cell: {misplaced[:10]}")
+                results.append(False)
+
+            predictions = fetch_eligible_predictions(cursor=cursor)
+            groups = build_clusters(predictions)
+            expected_tags = {pid: (key, len(ids)) for key, ids in groups.items()
+                             if len(ids) >= min_cluster_size for pid in ids}
+            tagged = tag_clusters(min_cluster_size=min_cluster_size, cursor=cursor)
+            cursor.execute("SELECT id, corrected_tags FROM ai_predictions "
+                           "WHERE corrected_tags ? 'batch_reviewable'")
+            got_tags = {r['id']: (r['corrected_tags']['static_cluster'],
+                                  int(r['corrected_tags']['cluster_size']))
+                        for r in cursor.fetchall()}
+            cursor.execute("SELECT COUNT(*) AS n FROM ai_predictions WHERE corrected_tags->>'note' = 'keep'")
+            kept = cursor.fetchone()['n']
+            ok = (got_tags == expected_tags and kept == 5
+                  and tagged == [(key, len(ids)) for key, ids in groups.items()
+                                 if len(ids) >= min_cluster_size])
+            print(f"{'tag_clusters':<28} tagged={len(got_tags):<7} clusters={len(tagged):<5} "
+                  f"{'ok' if ok else 'MISMATCH'}")
+            results.append(ok)
+        finally:
+            conn.rollback()
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--filler', type=int, default=5000, help='random predictions added to the seed')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--min-cluster-size', type=int, default=3)
+    parser.add_argument('--live', action='store_true', help='also compare over the live data')
+    parser.add_argument('--min-id', type=int, default=None)
+    parser.add_argument('--camera', default=None)
+    args = parser.parse_args()
+
+    init_connection_pool()
+    try:
+        ok = check_seeded(args.filler, args.seed, args.min_cluster_size)
+        if args.live:
+            with get_connection() as conn:
+                try:
+                    cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+                    live_ok, _groups = run_filter(cursor, 'live', args.min_id, args.camera,
+                                                  args.min_cluster_size, None)
+                    ok = ok and live_ok
+                finally:
+                    conn.rollback()
+        if not ok:
+            sys.exit(1)
+        print("cluster keys, sizes and order match")
+    finally:
+        close_connection_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,14 @@ Merge converted YOLO datasets into a unified train/val/test split.
 
 Scans one or more input directories (each containing images/ and labels/
 subdirectories in YOLO format), validates label files, handles filename
-collisions, performs stratified splitting by class, and writes the merged
-output as symlinks (or copies) with a YOLOv8-compatible data.yaml.
+collisions, drops exact (and optionally near-) duplicate images across
+datasets, performs stratified splitting by class, and writes the merged
+output as symlinks, hardlinks or copies with a YOLOv8-compatible data.yaml.
+
+Scanning and validation run in a process pool.  Results are kept in a scan
+cache keyed by path + mtime + size (and split assignments are remembered),
+so re-running a merge after adding a source only hashes, validates and
+links the new files.
 
 Input directories (from converter scripts):
     /mnt/storage/training-material/documents/yolo-doc-detect/midv500/
@@ -23,15 +29,20 @@ Usage:
     python merge_yolo_datasets.py
     python merge_yolo_datasets.py --dry-run
     python merge_yolo_datasets.py --copy --seed 123
+    python merge_yolo_datasets.py --link-mode hardlink --phash --workers 8
     python merge_yolo_datasets.py --input-dirs /path/a /path/b --output-dir /path/merged
 """
 
 import argparse
+import hashlib
 import os
 import random
 import shutil
+import sqlite3
 import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
@@ -60,6 +71,11 @@ DEFAULT_INPUT_DIRS = [
 ]
 DEFAULT_OUTPUT_DIR = "/mnt/storage/training-material/documents/yolo-doc-detect/merged"
 
+# Scan cache file, created inside the output directory unless --cache is given
+SCAN_CACHE_NAME = ".merge_scan_cache.sqlite"
+
+LINK_MODES = ("symlink", "hardlink", "copy")
+
 
 # ---------------------------------------------------------------------------
 # Label validation
@@ -136,6 +152,151 @@ def validate_label_file(label_path: Path) -> Tuple[bool, Optional[int], List[str
     return True, primary_class, warnings
 
 
+# ---------------------------------------------------------------------------
+# Content hashing
+# ---------------------------------------------------------------------------
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dhash(path: Path, hash_size: int = 8) -> Optional[int]:
+    """
+    64-bit difference hash: compares adjacent pixels of a 9x8 grayscale
+    thumbnail.  Re-encoded, resized or lightly recompressed copies of an
+    image land within a few bits of each other.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            small = img.convert("L").resize((hash_size + 1, hash_size))
+    except OSError:
+        return None
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def scan_pair(task: Tuple[str, str, bool]) -> Dict:
+    """
+    Validate one image/label pair and hash the image.
+
+    Runs in a worker process; takes and returns plain types so it pickles
+    cheaply.
+    """
+    img_path, label_path, use_phash = task
+    is_valid, class_id, warnings = validate_label_file(Path(label_path))
+    record = {
+        "valid": is_valid,
+        "class_id": class_id,
+        "warnings": warnings,
+        "sha256": None,
+        "phash": None,
+    }
+    if is_valid and class_id is not None:
+        record["sha256"] = file_sha256(Path(img_path))
+        if use_phash:
+            record["phash"] = dhash(Path(img_path))
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Scan cache
+# ---------------------------------------------------------------------------
+
+class ScanCache:
+    """
+    SQLite cache of per-pair scan results keyed by image path, invalidated
+    when the mtime or size of the image or its label changes.  Also
+    remembers which split each output stem was written to, so a re-run
+    keeps existing assignments stable.
+    """
+
+    def __init__(self, path: Optional[Path], read_only: bool = False):
+        self.read_only = read_only
+        if path is None or (read_only and not path.exists()):
+            self.conn = sqlite3.connect(":memory:")
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scan_cache (
+                image_path TEXT PRIMARY KEY,
+                image_mtime_ns INTEGER, image_size INTEGER,
+                label_mtime_ns INTEGER, label_size INTEGER,
+                valid INTEGER, class_id INTEGER, warnings TEXT,
+                sha256 TEXT, phash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS split_assignments (
+                unique_stem TEXT PRIMARY KEY,
+                split TEXT, image_name TEXT, split_key TEXT
+            );
+        """)
+
+    def get(self, image_path: str, sig: Tuple[int, int, int, int],
+            need_phash: bool) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT image_mtime_ns, image_size, label_mtime_ns, label_size, "
+            "valid, class_id, warnings, sha256, phash "
+            "FROM scan_cache WHERE image_path = ?", (image_path,)).fetchone()
+        if row is None or tuple(row[:4]) != sig:
+            return None
+        if need_phash and row[7] is not None and row[8] is None:
+            return None
+        return {
+            "valid": bool(row[4]),
+            "class_id": row[5],
+            "warnings": row[6].split("\n") if row[6] else [],
+            "sha256": row[7],
+            "phash": int(row[8], 16) if row[8] is not None else None,
+        }
+
+    def put_many(self, items: List[Tuple[str, Tuple[int, int, int, int], Dict]]) -> None:
+        if self.read_only:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scan_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(path, *sig, int(rec["valid"]), rec["class_id"], "\n".join(rec["warnings"]),
+              rec["sha256"], format(rec["phash"], "016x") if rec["phash"] is not None else None)
+             for path, sig, rec in items])
+        self.conn.commit()
+
+    def get_assignments(self, split_key: str) -> Dict[str, Tuple[str, str]]:
+        """Previous {unique_stem: (split, image_name)} written with the same split settings."""
+        rows = self.conn.execute(
+            "SELECT unique_stem, split, image_name FROM split_assignments WHERE split_key = ?",
+            (split_key,)).fetchall()
+        return {stem: (split, name) for stem, split, name in rows}
+
+    def get_all_assignments(self) -> Dict[str, Tuple[str, str]]:
+        rows = self.conn.execute(
+            "SELECT unique_stem, split, image_name FROM split_assignments").fetchall()
+        return {stem: (split, name) for stem, split, name in rows}
+
+    def set_assignments(self, assignments: Dict[str, Tuple[str, str]], split_key: str) -> None:
+        if self.read_only:
+            return
+        self.conn.execute("DELETE FROM split_assignments")
+        self.conn.executemany(
+            "INSERT INTO split_assignments VALUES (?, ?, ?, ?)",
+            [(stem, split, name, split_key) for stem, (split, name) in assignments.items()])
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
 # ---------------------------------------------------------------------------
 # Dataset scanning
 # ---------------------------------------------------------------------------
@@ -143,65 +304,100 @@ def validate_label_file(label_path: Path) -> Tuple[bool, Optional[int], List[str
 def scan_dataset(
     input_dir: Path,
     dataset_name: str,
-) -> Tuple[List[Tuple[str, Path, Path, int]], List[str]]:
+    cache: Optional[ScanCache] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
+    use_phash: bool = False,
+) -> Tuple[List[Tuple[str, Path, Path, int]], List[str], Dict[Path, Tuple[str, Optional[int]]]]:
     """
     Scan an input directory for valid image/label pairs.
 
     Args:
         input_dir:    Root of the YOLO dataset (must contain images/ and labels/).
         dataset_name: Short name for this dataset (used for collision prefixing).
+        cache:        Scan cache; pairs whose files are unchanged skip validation.
+        executor:     Process pool for validating and hashing uncached pairs.
+        use_phash:    Also compute a perceptual hash for near-duplicate detection.
 
     Returns:
-        (samples, warnings)
+        (samples, warnings, digests)
         samples: list of (unique_stem, image_path, label_path, class_id)
         warnings: list of warning strings for skipped files
+        digests: image_path -> (sha256, phash or None) for each sample
     """
     images_dir = input_dir / "images"
     labels_dir = input_dir / "labels"
     samples = []
     warnings = []
+    digests = {}
 
     if not images_dir.is_dir():
         warnings.append(f"WARNING: {images_dir} does not exist, skipping dataset")
-        return samples, warnings
+        return samples, warnings, digests
 
     if not labels_dir.is_dir():
         warnings.append(f"WARNING: {labels_dir} does not exist, skipping dataset")
-        return samples, warnings
+        return samples, warnings, digests
 
-    # Collect all image files
+    # Collect all image and label files in one directory listing each
     image_files = {}
-    for f in sorted(images_dir.iterdir()):
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS:
-            image_files[f.stem] = f
+    with os.scandir(images_dir) as it:
+        for entry in it:
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                image_files[os.path.splitext(entry.name)[0]] = entry
+    label_files = {}
+    with os.scandir(labels_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".txt") and entry.is_file():
+                label_files[entry.name[:-4]] = entry
 
     if not image_files:
         warnings.append(f"WARNING: No image files found in {images_dir}")
-        return samples, warnings
+        return samples, warnings, digests
 
-    # Match each image with its label
-    matched = 0
+    # Match each image with its label, reusing cached results where possible
     missing_labels = 0
-    invalid_labels = 0
-
-    for stem, img_path in sorted(image_files.items()):
-        label_path = labels_dir / f"{stem}.txt"
-
-        if not label_path.exists():
-            warnings.append(f"WARNING: Missing label for {img_path.name}, skipping")
+    results: Dict[str, Dict] = {}
+    pending = []
+    for stem, img_entry in sorted(image_files.items()):
+        label_entry = label_files.get(stem)
+        if label_entry is None:
+            warnings.append(f"WARNING: Missing label for {img_entry.name}, skipping")
             missing_labels += 1
             continue
+        img_stat = img_entry.stat()
+        lbl_stat = label_entry.stat()
+        sig = (img_stat.st_mtime_ns, img_stat.st_size, lbl_stat.st_mtime_ns, lbl_stat.st_size)
+        cached = cache.get(img_entry.path, sig, use_phash) if cache else None
+        if cached is not None:
+            results[stem] = cached
+        else:
+            pending.append((stem, img_entry.path, label_entry.path, sig))
 
-        # Validate label content
-        is_valid, class_id, label_warnings = validate_label_file(label_path)
+    tasks = [(img, lbl, use_phash) for _, img, lbl, _ in pending]
+    if executor is not None and len(tasks) > 1:
+        scanned = executor.map(scan_pair, tasks, chunksize=64)
+    else:
+        scanned = map(scan_pair, tasks)
+    fresh = []
+    for (stem, img, _lbl, sig), record in zip(pending, scanned):
+        results[stem] = record
+        fresh.append((img, sig, record))
+    if cache is not None and fresh:
+        cache.put_many(fresh)
 
-        if not is_valid:
-            for w in label_warnings:
+    matched = 0
+    invalid_labels = 0
+    for stem, record in sorted(results.items()):
+        img_path = Path(image_files[stem].path)
+        label_path = Path(label_files[stem].path)
+
+        if not record["valid"]:
+            for w in record["warnings"]:
                 warnings.append(f"WARNING: {label_path.name}: {w}")
             invalid_labels += 1
             continue
 
-        if class_id is None:
+        if record["class_id"] is None:
             warnings.append(f"WARNING: {label_path.name}: no annotations found")
             invalid_labels += 1
             continue
@@ -215,14 +411,77 @@ def scan_dataset(
         else:
             unique_stem = f"{dataset_name}_{stem}"
 
-        samples.append((unique_stem, img_path, label_path, class_id))
+        samples.append((unique_stem, img_path, label_path, record["class_id"]))
+        digests[img_path] = (record["sha256"], record["phash"])
         matched += 1
 
     print(f"  [{dataset_name}] {matched} valid pairs, "
           f"{missing_labels} missing labels, {invalid_labels} invalid labels "
-          f"(of {len(image_files)} images)")
+          f"(of {len(image_files)} images, {len(pending)} rescanned)")
+
+    return samples, warnings, digests
+
+
+# ---------------------------------------------------------------------------
+# Duplicate detection
+# ---------------------------------------------------------------------------
+
+def find_duplicates(
+    samples: List[Tuple[str, Path, Path, int]],
+    digests: Dict[Path, Tuple[str, Optional[int]]],
+    max_distance: int = -1,
+) -> Tuple[List[Tuple[str, Path, Path, int]], List[str]]:
+    """
+    Drop exact duplicate images (same SHA-256) and, if max_distance >= 0
+    and perceptual hashes are available, near-duplicates whose dHash is
+    within max_distance bits.  The first occurrence in input order wins.
+
+    Near-duplicate candidates are found by splitting each 64-bit hash into
+    max_distance + 1 bands: two hashes within max_distance bits must agree
+    exactly on at least one band, so only band-mates are compared.
+
+    Returns:
+        (kept_samples, warnings)
+    """
+    kept = []
+    warnings = []
+    seen_sha: Dict[str, Path] = {}
+    n_bands = max_distance + 1
+    band_bits = 64 // n_bands if n_bands > 0 else 64
+    bands: Dict[Tuple[int, int], List[Tuple[int, Path]]] = defaultdict(list)
+
+    def band_keys(value: int):
+        for b in range(n_bands):
+            width = band_bits if b < n_bands - 1 else 64 - band_bits * (n_bands - 1)
+            yield b, (value >> (b * band_bits)) & ((1 << width) - 1)
+
+    for sample in samples:
+        img_path = sample[1]
+        sha, phash = digests.get(img_path, (None, None))
+        if sha is not None and sha in seen_sha:
+            warnings.append(f"DUPLICATE: {img_path} is identical to {seen_sha[sha]}")
+            continue
+
+        if max_distance >= 0 and phash is not None:
+            match = None
+            for key in band_keys(phash):
+                for other_hash, other_path in bands.get(key, ()):
+                    if bin(phash ^ other_hash).count("1") <= max_distance:
+                        match = other_path
+                        break
+                if match is not None:
+                    break
+            if match is not None:
+                warnings.append(f"NEAR-DUPLICATE: {img_path} resembles {match}")
+                continue
+            for key in band_keys(phash):
+                bands[key].append((phash, img_path))
 
-    return samples, warnings
+        if sha is not None:
+            seen_sha[sha] = img_path
+        kept.append(sample)
+
+    return kept, warnings
 
 
 # ---------------------------------------------------------------------------
@@ -287,27 +546,85 @@ def stratified_split(
     return train_set, val_set, test_set
 
 
+def stable_split(
+    samples: List[Tuple[str, Path, Path, int]],
+    previous: Dict[str, Tuple[str, str]],
+    train_ratio: float,
+    val_ratio: float,
+    seed: int,
+) -> Tuple[
+    List[Tuple[str, Path, Path, int]],
+    List[Tuple[str, Path, Path, int]],
+    List[Tuple[str, Path, Path, int]],
+]:
+    """
+    Keep the split of every sample that was assigned in a previous run and
+    stratify only the new ones, so adding a dataset doesn't move files that
+    are already in place.
+
+    Args:
+        previous: {unique_stem: (split, image_name)} from the scan cache.
+
+    Returns:
+        (train_samples, val_samples, test_samples)
+    """
+    kept: Dict[str, List[Tuple[str, Path, Path, int]]] = {"train": [], "val": [], "test": []}
+    new_samples = []
+    for sample in samples:
+        prev = previous.get(sample[0])
+        if prev and prev[0] in kept:
+            kept[prev[0]].append(sample)
+        else:
+            new_samples.append(sample)
+
+    train_set, val_set, test_set = stratified_split(new_samples, train_ratio, val_ratio, seed)
+    return kept["train"] + train_set, kept["val"] + val_set, kept["test"] + test_set
+
+
 # ---------------------------------------------------------------------------
 # File operations (symlink or copy)
 # ---------------------------------------------------------------------------
 
+def _is_current(src: Path, dst: Path, mode: str) -> bool:
+    """True if dst already is the requested link/copy of src."""
+    try:
+        if mode == "symlink":
+            return dst.is_symlink() and os.readlink(dst) == str(src.resolve())
+        if dst.is_symlink() or not dst.exists():
+            return False
+        if mode == "hardlink":
+            return os.path.samefile(src, dst)
+        src_stat, dst_stat = src.stat(), dst.stat()
+        return (src_stat.st_size == dst_stat.st_size
+                and src_stat.st_mtime_ns == dst_stat.st_mtime_ns)
+    except OSError:
+        return False
+
+
 def link_or_copy(
     src: Path,
     dst: Path,
-    use_copy: bool,
+    mode: str,
     dry_run: bool,
-) -> None:
+) -> bool:
     """
-    Create a symlink or copy from src to dst.
+    Create a symlink, hardlink or copy from src to dst.
 
     Args:
         src:      Source file path (absolute).
         dst:      Destination file path.
-        use_copy: If True, copy the file. If False, create a symlink.
+        mode:     One of LINK_MODES.  Hardlinks fall back to a copy when
+                  src and dst are on different filesystems.
         dry_run:  If True, do nothing (just preview).
+
+    Returns:
+        True if dst was written, False if it was already up to date.
     """
     if dry_run:
-        return
+        return False
+
+    if _is_current(src, dst, mode):
+        return False
 
     # Ensure parent directory exists
     dst.parent.mkdir(parents=True, exist_ok=True)
@@ -316,27 +633,38 @@ def link_or_copy(
     if dst.exists() or dst.is_symlink():
         dst.unlink()
 
-    if use_copy:
+    if mode == "copy":
         shutil.copy2(str(src), str(dst))
+    elif mode == "hardlink":
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(str(src), str(dst))
     else:
         # Use absolute path for symlink target
         os.symlink(src.resolve(), dst)
+    return True
 
 
 def write_split(
     samples: List[Tuple[str, Path, Path, int]],
     split_dir: Path,
-    use_copy: bool,
+    mode: str,
     dry_run: bool,
-) -> None:
+    workers: int = 8,
+) -> int:
     """
     Write image/label pairs into a split directory (train/, val/, or test/).
 
     Args:
         samples:   List of (unique_stem, image_path, label_path, class_id).
         split_dir: e.g. merged/train/
-        use_copy:  Whether to copy files instead of symlinking.
+        mode:      One of LINK_MODES.
         dry_run:   If True, skip file operations.
+        workers:   Threads issuing link/copy calls.
+
+    Returns:
+        Number of files written (files already up to date are skipped).
     """
     images_dir = split_dir / "images"
     labels_dir = split_dir / "labels"
@@ -345,14 +673,43 @@ def write_split(
         images_dir.mkdir(parents=True, exist_ok=True)
         labels_dir.mkdir(parents=True, exist_ok=True)
 
+    ops = []
     for unique_stem, img_path, lbl_path, _class_id in samples:
         # Preserve original image extension
         img_ext = img_path.suffix
-        dst_img = images_dir / f"{unique_stem}{img_ext}"
-        dst_lbl = labels_dir / f"{unique_stem}.txt"
+        ops.append((img_path, images_dir / f"{unique_stem}{img_ext}"))
+        ops.append((lbl_path, labels_dir / f"{unique_stem}.txt"))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        written = pool.map(lambda op: link_or_copy(op[0], op[1], mode, dry_run), ops)
+        return sum(written)
 
-        link_or_copy(img_path, dst_img, use_copy, dry_run)
-        link_or_copy(lbl_path, dst_lbl, use_copy, dry_run)
+
+def remove_stale_outputs(
+    output_dir: Path,
+    previous: Dict[str, Tuple[str, str]],
+    current: Dict[str, Tuple[str, str]],
+    dry_run: bool,
+) -> int:
+    """
+    Remove output files from a previous run whose stem was dropped or moved
+    to another split (or changed image extension).
+
+    Returns:
+        Number of stems removed.
+    """
+    removed = 0
+    for stem, (split, image_name) in previous.items():
+        if current.get(stem) == (split, image_name):
+            continue
+        removed += 1
+        if dry_run:
+            continue
+        for path in (output_dir / split / "images" / image_name,
+                     output_dir / split / "labels" / f"{stem}.txt"):
+            if path.exists() or path.is_symlink():
+                path.unlink()
+    return removed
 
 
 # ---------------------------------------------------------------------------
@@ -494,6 +851,9 @@ Examples:
   # Use file copies instead of symlinks
   python merge_yolo_datasets.py --copy
 
+  # Hardlink outputs and drop near-duplicate images across datasets
+  python merge_yolo_datasets.py --link-mode hardlink --phash --near-dup-distance 4
+
   # Custom directories and split ratios
   python merge_yolo_datasets.py \\
       --input-dirs /path/to/dataset_a /path/to/dataset_b \\
@@ -544,7 +904,45 @@ Classes:
     parser.add_argument(
         "--copy",
         action="store_true",
-        help="Copy files instead of creating symlinks (uses more disk space).",
+        help="Copy files instead of creating symlinks (uses more disk space). "
+             "Same as --link-mode copy.",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="symlink",
+        help="How to place files in the output (default: symlink). "
+             "Hardlinks fall back to copies across filesystems.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for scanning/validation and threads for linking "
+             "(default: CPU count).",
+    )
+    parser.add_argument(
+        "--phash",
+        action="store_true",
+        help="Compute perceptual hashes to drop near-duplicate images.",
+    )
+    parser.add_argument(
+        "--near-dup-distance",
+        type=int,
+        default=4,
+        help="Max dHash Hamming distance treated as a near-duplicate when "
+             "--phash is set (default: 4).",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help=f"Scan cache path (default: <output-dir>/{SCAN_CACHE_NAME}).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Rescan every file and don't remember split assignments.",
     )
     parser.add_argument(
         "--dry-run",
@@ -567,6 +965,9 @@ Classes:
     # Clamp floating-point rounding
     test_ratio = max(0.0, test_ratio)
 
+    link_mode = "copy" if args.copy else args.link_mode
+    cache_path = None if args.no_cache else (args.cache or args.output_dir / SCAN_CACHE_NAME)
+
     # Print configuration
     print("=" * 76)
     print("YOLO Dataset Merger")
@@ -579,7 +980,11 @@ Classes:
     print(f"  Output dir:   {args.output_dir}")
     print(f"  Split:        train={args.train_ratio:.0%} / "
           f"val={args.val_ratio:.0%} / test={test_ratio:.0%}")
-    print(f"  Link mode:    {'copy' if args.copy else 'symlink'}")
+    print(f"  Link mode:    {link_mode}")
+    print(f"  Workers:      {args.workers}")
+    print(f"  Dedup:        exact"
+          f"{f' + near (dHash <= {args.near_dup_distance} bits)' if args.phash else ''}")
+    print(f"  Scan cache:   {cache_path or 'disabled'}")
     print(f"  Seed:         {args.seed}")
     print(f"  Dry run:      {args.dry_run}")
     print()
@@ -590,30 +995,55 @@ Classes:
 
     all_samples: List[Tuple[str, Path, Path, int]] = []
     all_warnings: List[str] = []
+    all_digests: Dict[Path, Tuple[str, Optional[int]]] = {}
 
-    print("Scanning input directories...")
-    for input_dir in args.input_dirs:
-        if not input_dir.is_dir():
-            print(f"  [{input_dir.name}] SKIPPED (directory not found)")
-            all_warnings.append(f"WARNING: Input directory not found: {input_dir}")
-            continue
-
-        # Use the directory name as the dataset identifier for collision prefixing
-        dataset_name = input_dir.name
-
-        samples, warnings = scan_dataset(input_dir, dataset_name)
-        all_samples.extend(samples)
-        all_warnings.extend(warnings)
+    cache = ScanCache(cache_path, read_only=args.dry_run) if cache_path else None
 
+    print("Scanning input directories...")
+    scan_start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        for input_dir in args.input_dirs:
+            if not input_dir.is_dir():
+                print(f"  [{input_dir.name}] SKIPPED (directory not found)")
+                all_warnings.append(f"WARNING: Input directory not found: {input_dir}")
+                continue
+
+            # Use the directory name as the dataset identifier for collision prefixing
+            dataset_name = input_dir.name
+
+            samples, warnings, digests = scan_dataset(
+                input_dir, dataset_name, cache=cache, executor=executor,
+                use_phash=args.phash)
+            all_samples.extend(samples)
+            all_warnings.extend(warnings)
+            all_digests.update(digests)
+    scan_elapsed = time.monotonic() - scan_start
+
+    print(f"  Scanned {len(all_samples)} pairs in {scan_elapsed:.1f}s "
+          f"({len(all_samples) / max(scan_elapsed, 1e-9):.0f} files/s)")
     print()
 
     if not all_samples:
         print("ERROR: No valid image/label pairs found across all input directories.",
               file=sys.stderr)
+        if cache:
+            cache.close()
         return 1
 
     print(f"Total valid samples: {len(all_samples)}")
 
+    # -----------------------------------------------------------------------
+    # Drop duplicate images across datasets
+    # -----------------------------------------------------------------------
+
+    all_samples, dup_warnings = find_duplicates(
+        all_samples, all_digests,
+        max_distance=args.near_dup_distance if args.phash else -1)
+    if dup_warnings:
+        print(f"Dropped {len(dup_warnings)} duplicate image(s); "
+              f"{len(all_samples)} samples remain")
+    all_warnings.extend(dup_warnings)
+
     # -----------------------------------------------------------------------
     # Check for filename collisions
     # -----------------------------------------------------------------------
@@ -633,12 +1063,26 @@ Classes:
     # Stratified split
     # -----------------------------------------------------------------------
 
-    train_samples, val_samples, test_samples = stratified_split(
+    # Previous assignments only carry over when the split settings match
+    split_key = f"{args.train_ratio}:{args.val_ratio}:{args.seed}"
+    previous_all = cache.get_all_assignments() if cache else {}
+    previous = cache.get_assignments(split_key) if cache else {}
+
+    train_samples, val_samples, test_samples = stable_split(
         all_samples,
+        previous,
         train_ratio=args.train_ratio,
         val_ratio=args.val_ratio,
         seed=args.seed,
     )
+    current = {}
+    for split_name, split_samples in [
+        ("train", train_samples),
+        ("val", val_samples),
+        ("test", test_samples),
+    ]:
+        for stem, img_path, _, _ in split_samples:
+            current[stem] = (split_name, f"{stem}{img_path.suffix}")
 
     # Print class distribution
     print_class_distribution(train_samples, val_samples, test_samples)
@@ -657,23 +1101,44 @@ Classes:
         print(f"    test/images/   ({len(test_samples)} files)")
         print(f"    test/labels/   ({len(test_samples)} files)")
         print(f"    data.yaml")
-        link_type = "copies" if args.copy else "symlinks"
+        link_type = {"copy": "copies", "hardlink": "hardlinks", "symlink": "symlinks"}[link_mode]
         print(f"  Total files: {2 * len(all_samples)} ({link_type})")
+        stale = remove_stale_outputs(args.output_dir, previous_all, current, dry_run=True)
+        if stale:
+            print(f"  Would remove {stale} stale pair(s) from a previous run")
     else:
         print("Writing merged dataset...")
 
         # Create output directory structure
         args.output_dir.mkdir(parents=True, exist_ok=True)
 
+        stale = remove_stale_outputs(args.output_dir, previous_all, current, dry_run=False)
+        if stale:
+            print(f"  Removed {stale} stale pair(s) from a previous run")
+
         # Write each split
+        write_start = time.monotonic()
+        total_written = 0
         for split_name, split_samples in [
             ("train", train_samples),
             ("val", val_samples),
             ("test", test_samples),
         ]:
             split_dir = args.output_dir / split_name
-            print(f"  Writing {split_name}/ ({len(split_samples)} pairs)...")
-            write_split(split_samples, split_dir, args.copy, dry_run=False)
+            written = write_split(split_samples, split_dir, link_mode, dry_run=False,
+                                  workers=args.workers)
+            total_written += written
+            print(f"  Writing {split_name}/ ({len(split_samples)} pairs, "
+                  f"{written} files written)...")
+        write_elapsed = time.monotonic() - write_start
+        print(f"  Wrote {total_written} of {2 * len(all_samples)} files in {write_elapsed:.1f}s "
+              f"({2 * len(all_samples) / max(write_elapsed, 1e-9):.0f} files/s)")
+
+        if cache:
+            cache.set_assignments(current, split_key)
+
+    if cache:
+        cache.close()
 
     # Write data.yaml
     write_data_yaml(args.output_dir, args.dry_run)
@@ -700,7 +1165,7 @@ Classes:
     if args.dry_run:
         print("DRY RUN complete. No files were written.")
     else:
-        link_type = "copied" if args.copy else "symlinked"
+        link_type = {"copy": "copied", "hardlink": "hardlinked", "symlink": "symlinked"}[link_mode]
         print(f"Merge complete. {len(all_samples)} samples {link_type} into:")
         print(f"  {args.output_dir.resolve()}")
         print()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Profile API cold start.
+
+Runs ``python -X importtime`` on the Flask entry point in a fresh
+interpreter and reports the slowest modules by cumulative and self import
+time, plus the wall time until the app object exists.  Importing api runs
+init_services(), so DATABASE_URL etc. must be set as for the real service.
+
+Usage:
+    cd /opt/groundtruth-studio/app && python ../scripts/profile_startup.py --top 25
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+BOOT = '''
+import time
+_t0 = time.perf_counter()
+import {module}
+print(f"__ready__ {{time.perf_counter() - _t0:.3f}}", flush=True)
+'''
+
+
+def profile(module: str):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(APP_DIR), env.get('PYTHONPATH')]))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT.format(module=module)],
+        cwd=APP_DIR, env=env, capture_output=True, text=True)
+    ready = None
+    for line in proc.stdout.splitlines():
+        if line.startswith('__ready__'):
+            ready = float(line.split()[1])
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return proc.returncode, ready, rows, proc.stderr
+
+
+def top_level_package(name: str) -> str:
+    return name.split('.')[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--module', default='api', help='Module to import (default: api)')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    returncode, ready, rows, stderr = profile(args.module)
+    if returncode != 0 or ready is None:
+        print(stderr[-4000:])
+        sys.exit(f"import {args.module} failed (exit {returncode})")
+
+    # Nested imports are counted in their parents' cumulative time, so rank
+    # cumulative time per distinct package (its outermost import) and self
+    # time per package summed over all its submodules
+    cumulative = {}
+    self_time = {}
+    for name, self_us, cumulative_us, _level in rows:
+        pkg = top_level_package(name)
+        cumulative[pkg] = max(cumulative.get(pkg, 0), cumulative_us)
+        self_time[pkg] = self_time.get(pkg, 0) + self_us
+
+    print(f"import {args.module}: {ready * 1000:.0f} ms wall ({len(rows)} modules)\n")
+    print(f"{'package':<36} {'cumulative ms':>14} {'self ms':>10}")
+    for pkg, cum in sorted(cumulative.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{pkg:<36} {cum / 1000:14.1f} {self_time[pkg] / 1000:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2848,7 +2848,7 @@ var TemplateAnnotator = {
             });
             var data = await resp.json();
             if (data.success) {
-                this.pollGenerationStatus(this.currentTemplate.id, count);
+                this.pollGenerationStatus(this.currentTemplate.id, data.job_id, count);
             } else {
                 this.showToast(data.error || 'Failed to start generation.', 'error');
                 document.getElementById('btn-start-generate').disabled = false;
@@ -2860,11 +2860,12 @@ var TemplateAnnotator = {
         }
     },
 
-    pollGenerationStatus: function(templateId, total) {
+    pollGenerationStatus: function(templateId, jobId, total) {
         var self = this;
         var interval = setInterval(async function() {
             try {
-                var resp = await fetch('/api/doc-templates/' + templateId + '/generate/status');
+                var resp = await fetch('/api/doc-templates/' + templateId + '/generate/status?job_id=' +
+                    encodeURIComponent(jobId));
                 var data = await resp.json();
                 if (!data.success) {
                     clearInterval(interval);
@@ -2884,7 +2885,7 @@ var TemplateAnnotator = {
                     document.getElementById('gen-progress-text').textContent = total + ' / ' + total + ' \u2014 Complete';
                     self.showToast('Generation complete. ' + total + ' documents created.', 'success');
                     document.getElementById('btn-start-generate').disabled = false;
-                } else if (data.status === 'failed') {
+                } else if (data.status === 'failed' || data.status === 'interrupted') {
                     clearInterval(interval);
                     self.showToast('Generation failed: ' + (data.error || 'Unknown error'), 'error');
                     document.getElementById('btn-start-generate').disabled = false;
@@ -5,6 +5,7 @@ var FacePhotoManager = {
     page: 1,
     perPage: 60,
     totalPages: 0,
+    cursor: null,
     loading: false,
     filters: { variant: 'original' },
     selectedItems: new Set(),
@@ -52,6 +53,8 @@ var FacePhotoManager = {
             per_page: this.perPage,
             variant: this.filters.variant
         });
+        // Keyset cursor for infinite scroll: cost doesn't grow with depth
+        if (this.page > 1 && this.cursor) params.set('after', this.cursor);
 
         try {
             var resp = await fetch('/api/faces/items?' + params);
@@ -65,6 +68,7 @@ var FacePhotoManager = {
             }
 
             this.totalPages = data.pages || 1;
+            this.cursor = data.next_cursor || null;
             this.renderGrid(data.items || []);
             this.updateFilterStats(data.total || 0);
 
@@ -830,6 +834,7 @@ var FacePhotoManager = {
     // ── Utilities ─────────────────────────────────────────────────────────
     resetAndReload: function() {
         this.page = 1;
+        this.cursor = null;
         this.items = [];
         this.selectedItems.clear();
         this.updateActionBar();
@@ -25,7 +25,7 @@ def compute_color_hist(image_path):
     """Compute a compact color histogram from a crop image file.
 
     Args:
-        image_path: Path to JPEG crop file.
+        image_path: Path to JPEG crop file, or a file-like object.
 
     Returns:
         list of floats (length HIST_SIZE), or None on failure.
@@ -73,8 +73,7 @@ def compute_color_hist(image_path):
             s_bins = np.clip((sat_flat[achro_mask] / SAT_THRESHOLD * 3).astype(int), 0, 2)
             v_bins = np.clip((val_flat[achro_mask] / 256.0 * 3).astype(int), 0, 2)
             achro_idx = s_bins * 3 + v_bins
-            for idx in achro_idx:
-                hist[idx] += 1
+            hist += np.bincount(achro_idx, minlength=HIST_SIZE)
 
         # Chromatic pixels
         chro_mask = ~achro_mask
@@ -85,8 +84,7 @@ def compute_color_hist(image_path):
             v_bins = np.clip((val_flat[chro_mask] / 256.0 * 2).astype(int), 0, 1)
             sv_idx = s_bins * 2 + v_bins
             chro_idx = N_ACHRO_BINS + h_bins * 4 + sv_idx
-            for idx in chro_idx:
-                hist[idx] += 1
+            hist += np.bincount(chro_idx, minlength=HIST_SIZE)
 
         # Normalize
         total = hist.sum()
@@ -1,14 +1,26 @@
 #!/usr/bin/env python3
 """Embedding worker - continuously embeds new predictions using DINOv2.
 
-Runs as a one-shot process (called by systemd timer) that embeds any
-predictions missing from the prediction_embeddings table, then exits.
+By default runs as a one-shot process (called by systemd timer) that embeds
+any predictions missing from the prediction_embeddings table, then exits.
+With --continuous it keeps polling for new predictions past a high-water
+mark on ai_predictions.id.
+
+Work is fetched in id-ordered chunks with an anti-join, so an interrupted
+run resumes where it stopped: every committed batch drops out of the next
+query.  Crops are generated (or read from the crop cache) and colour
+histograms computed in a thread pool that feeds in-memory JPEG bytes to the
+embedding request, and vectors are written with a binary COPY.
 """
+import argparse
 import base64
+import io
 import json
 import os
-import sys
+import struct
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import psycopg2
 import psycopg2.extras
@@ -23,15 +35,20 @@ FASTREID_URL = 'http://localhost:5061'
 EMBED_ENDPOINT = '/embed-batch/dino'
 CROPS_DIR = '/opt/groundtruth-studio/clips/crops'
 BATCH_SIZE = 32
+CHUNK_SIZE = 1000
+CROP_WORKERS = 8
+POLL_INTERVAL = 30
+# In continuous mode, rescan from id 0 every N polls to retry skipped rows
+RESCAN_EVERY = 120
 DB_DSN = 'dbname=groundtruth_studio'
 
 
-def generate_crop(row, crop_path):
-    """Generate a tight crop from the video thumbnail."""
+def render_crop(row):
+    """Render a tight crop from the video thumbnail as JPEG bytes, or None."""
     from PIL import Image
     thumb_path = row['thumbnail_path']
     if not thumb_path or not os.path.exists(thumb_path):
-        return False
+        return None
     try:
         img = Image.open(thumb_path)
         iw, ih = img.size
@@ -50,87 +67,182 @@ def generate_crop(row, crop_path):
         x2 = min(iw, x + w + pad_x)
         y2 = min(ih, y + h + pad_y)
         crop = img.crop((x1, y1, x2, y2))
-        crop.save(crop_path, 'JPEG', quality=85)
-        return True
+        if crop.mode != 'RGB':
+            crop = crop.convert('RGB')
+        buf = io.BytesIO()
+        crop.save(buf, 'JPEG', quality=85)
+        return buf.getvalue()
     except Exception as e:
         logger.warning("Crop failed for %s: %s", row['id'], e)
-        return False
+        return None
 
 
-def main():
-    conn = psycopg2.connect(DB_DSN)
-    conn.autocommit = False
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+def prepare_item(row):
+    """Thread-pool stage: crop bytes (cached on disk) plus colour histogram.
 
-    # Find predictions without embeddings (exclude no_detection)
+    Returns (prediction_id, jpeg_bytes, hist) or None if no crop is possible.
+    """
+    crop_path = os.path.join(CROPS_DIR, f"gallery_{row['id']}.jpg")
+    data = None
+    if os.path.exists(crop_path):
+        try:
+            with open(crop_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = None
+    if data is None:
+        data = render_crop(row)
+        if data is None:
+            return None
+        try:
+            tmp = f'{crop_path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, crop_path)
+        except OSError as e:
+            logger.warning("Could not cache crop for %s: %s", row['id'], e)
+    hist = compute_color_hist(io.BytesIO(data))
+    return row['id'], data, hist
+
+
+def fetch_chunk(cur, after_id, limit):
+    """Next chunk of predictions without embeddings, by ascending id."""
     cur.execute('''
         SELECT p.id, p.bbox_x, p.bbox_y, p.bbox_width, p.bbox_height,
                v.thumbnail_path, v.width AS video_width, v.height AS video_height
         FROM ai_predictions p
         JOIN videos v ON p.video_id = v.id
+        LEFT JOIN prediction_embeddings pe ON pe.prediction_id = p.id
         WHERE p.review_status NOT IN ('no_detection')
-          AND p.id NOT IN (SELECT prediction_id FROM prediction_embeddings)
+          AND pe.prediction_id IS NULL
+          AND p.id > %s
         ORDER BY p.id
-        LIMIT 1000
-    ''')
-    rows = cur.fetchall()
+        LIMIT %s
+    ''', (after_id, limit))
+    return cur.fetchall()
 
-    if not rows:
-        logger.info("No new predictions to embed")
-        conn.close()
-        return
 
-    logger.info("Found %d predictions to embed", len(rows))
-    os.makedirs(CROPS_DIR, exist_ok=True)
+def run_pass(conn, cur, pool, after_id, args, stats):
+    """Embed everything past after_id; returns the new high-water mark."""
+    while True:
+        rows = fetch_chunk(cur, after_id, args.chunk_size)
+        conn.commit()  # end the read transaction between chunks
+        if not rows:
+            return after_id
 
-    embedded = 0
-    skipped = 0
-    batch_items = []
-    batch_images = []
-
-    for row in rows:
-        crop_path = os.path.join(CROPS_DIR, f"gallery_{row['id']}.jpg")
-        if not os.path.exists(crop_path):
-            if not generate_crop(row, crop_path):
-                skipped += 1
+        logger.info("Found %d predictions to embed (id > %d)", len(rows), after_id)
+        batch = []
+        for item in pool.map(prepare_item, rows):
+            if item is None:
+                stats['skipped'] += 1
                 continue
-        try:
-            with open(crop_path, 'rb') as f:
-                b64 = base64.b64encode(f.read()).decode('ascii')
-            batch_items.append(row['id'])
-            batch_images.append(b64)
-        except Exception:
-            skipped += 1
-            continue
+            batch.append(item)
+            if len(batch) >= args.batch_size:
+                stats['embedded'] += flush_batch(cur, conn, batch)
+                batch = []
+        if batch:
+            stats['embedded'] += flush_batch(cur, conn, batch)
+
+        after_id = rows[-1]['id']
+        elapsed = time.monotonic() - stats['started']
+        logger.info("Progress: %d embedded, %d skipped, %.1f embeddings/sec (hwm id %d)",
+                    stats['embedded'], stats['skipped'],
+                    stats['embedded'] / max(elapsed, 1e-9), after_id)
+        if len(rows) < args.chunk_size:
+            return after_id
+
+
+# ---------------------------------------------------------------------------
+# Writing vectors
+# ---------------------------------------------------------------------------
+
+_PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+_color_hist_type = None
 
-        if len(batch_images) >= BATCH_SIZE:
-            embedded += flush_batch(cur, conn, batch_items, batch_images)
-            batch_items = []
-            batch_images = []
 
-    if batch_images:
-        embedded += flush_batch(cur, conn, batch_items, batch_images)
+def _copy_binary_rows(items, embeddings):
+    """Encode (prediction_id bigint, embedding vector, color_hist text) rows
+    in PostgreSQL binary COPY format.  pgvector's binary vector is
+    int16 dim, int16 unused, then dim float4 values."""
+    buf = io.BytesIO()
+    buf.write(_PGCOPY_HEADER)
+    for (pred_id, _data, hist), emb in zip(items, embeddings):
+        vec = struct.pack(f'!hh{len(emb)}f', len(emb), 0, *emb)
+        buf.write(struct.pack('!h', 3))
+        buf.write(struct.pack('!iq', 8, pred_id))
+        buf.write(struct.pack('!i', len(vec)))
+        buf.write(vec)
+        if hist:
+            hist_bytes = json.dumps(hist).encode()
+            buf.write(struct.pack('!i', len(hist_bytes)))
+            buf.write(hist_bytes)
+        else:
+            buf.write(struct.pack('!i', -1))
+    buf.write(struct.pack('!h', -1))
+    buf.seek(0)
+    return buf
 
-    conn.close()
-    logger.info("Done: %d embedded, %d skipped", embedded, skipped)
 
+def _get_color_hist_type(cur):
+    global _color_hist_type
+    if _color_hist_type is None:
+        cur.execute('''
+            SELECT format_type(atttypid, atttypmod) AS type
+            FROM pg_attribute
+            WHERE attrelid = 'prediction_embeddings'::regclass AND attname = 'color_hist'
+        ''')
+        _color_hist_type = cur.fetchone()['type']
+    return _color_hist_type
 
-def flush_batch(cur, conn, ids, images):
+
+def write_embeddings(cur, items, embeddings):
+    """Binary COPY into a staging table, then one INSERT ... SELECT.
+
+    Falls back to a multi-row text INSERT if the binary path is unavailable
+    (e.g. an older pgvector without binary I/O).
+    """
+    cur.execute('SAVEPOINT embed_copy')
     try:
+        cur.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS embed_stage (
+                prediction_id BIGINT, embedding vector, color_hist TEXT
+            ) ON COMMIT DELETE ROWS
+        ''')
+        cur.copy_expert('COPY embed_stage FROM STDIN WITH (FORMAT BINARY)',
+                        _copy_binary_rows(items, embeddings))
+        cur.execute(f'''
+            INSERT INTO prediction_embeddings (prediction_id, embedding, color_hist)
+            SELECT prediction_id, embedding, color_hist::{_get_color_hist_type(cur)}
+            FROM embed_stage
+            ON CONFLICT DO NOTHING
+        ''')
+        cur.execute('RELEASE SAVEPOINT embed_copy')
+        return
+    except psycopg2.Error as e:
+        logger.warning("Binary COPY failed, using text insert: %s", e)
+        cur.execute('ROLLBACK TO SAVEPOINT embed_copy')
+
+    values = [
+        (pred_id, '[' + ','.join(str(v) for v in emb) + ']', json.dumps(hist) if hist else None)
+        for (pred_id, _data, hist), emb in zip(items, embeddings)
+    ]
+    psycopg2.extras.execute_values(
+        cur,
+        'INSERT INTO prediction_embeddings (prediction_id, embedding, color_hist) VALUES %s ON CONFLICT DO NOTHING',
+        values,
+    )
+
+
+def flush_batch(cur, conn, items):
+    """Embed a batch of (prediction_id, jpeg_bytes, hist) and store the vectors."""
+    try:
+        images = [base64.b64encode(data).decode('ascii') for _, data, _ in items]
         resp = requests.post(f'{FASTREID_URL}{EMBED_ENDPOINT}',
                              json={'images': images}, timeout=60)
         resp.raise_for_status()
         embeddings = resp.json()['embeddings']
 
-        for pred_id, emb in zip(ids, embeddings):
-            vec_str = '[' + ','.join(str(v) for v in emb) + ']'
-            crop_path = os.path.join(CROPS_DIR, f'gallery_{pred_id}.jpg')
-            hist = compute_color_hist(crop_path)
-            hist_json = json.dumps(hist) if hist else None
-            cur.execute(
-                'INSERT INTO prediction_embeddings (prediction_id, embedding, color_hist) VALUES (%s, %s, %s) ON CONFLICT DO NOTHING',
-                (pred_id, vec_str, hist_json)
-            )
+        write_embeddings(cur, items, embeddings)
         conn.commit()
         return len(embeddings)
     except Exception as e:
@@ -139,5 +251,51 @@ def flush_batch(cur, conn, ids, images):
         return 0
 
 
+def main():
+    parser = argparse.ArgumentParser(description='Embed predictions missing from prediction_embeddings')
+    parser.add_argument('--continuous', action='store_true',
+                        help='Keep polling for new predictions instead of exiting')
+    parser.add_argument('--poll-interval', type=int, default=POLL_INTERVAL,
+                        help=f'Seconds between polls in continuous mode (default {POLL_INTERVAL})')
+    parser.add_argument('--start-id', type=int, default=0,
+                        help='Only embed predictions with id greater than this')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=CROP_WORKERS,
+                        help='Threads for crop generation and colour histograms')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(DB_DSN)
+    conn.autocommit = False
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    os.makedirs(CROPS_DIR, exist_ok=True)
+
+    stats = {'embedded': 0, 'skipped': 0, 'started': time.monotonic()}
+    hwm = args.start_id
+    polls = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            while True:
+                hwm = run_pass(conn, cur, pool, hwm, args, stats)
+                if not args.continuous:
+                    break
+                polls += 1
+                if polls % RESCAN_EVERY == 0:
+                    hwm = args.start_id
+                time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        logger.info("Interrupted; committed batches are kept and will be skipped on restart")
+    finally:
+        conn.close()
+
+    if stats['embedded'] == 0 and stats['skipped'] == 0:
+        logger.info("No new predictions to embed")
+        return
+    elapsed = time.monotonic() - stats['started']
+    logger.info("Done: %d embedded, %d skipped in %.1fs (%.1f embeddings/sec)",
+                stats['embedded'], stats['skipped'], elapsed,
+                stats['embedded'] / max(elapsed, 1e-9))
+
+
 if __name__ == '__main__':
     main()